@@ -8,11 +8,17 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import re
 
+from effective_columns import EffectiveColumns
+from epoch_columns import EpochColumns
+
 class TokenFilters:
     """Système de filtres avancés pour tokens"""
     
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
+        self.epoch_columns = EpochColumns(database_path)
+        # effective_volume_24h (DexScreener sinon Jupiter), indexée
+        EffectiveColumns(database_path)
     
     async def filter_by_whale_activity(self, min_whale_count: int = 3) -> List[Dict]:
         """Filtrer par activité des whales (gros holders)"""
@@ -20,10 +26,11 @@ class TokenFilters:
         cursor = conn.cursor()
         
         try:
+            # Concentration numérique (HoldersService): filtrage directement en SQL
             cursor.execute('''
-                SELECT address, symbol, invest_score, holders, holder_distribution
+                SELECT address, symbol, invest_score, holders, top10_concentration
                 FROM tokens 
-                WHERE holder_distribution LIKE '%Top 10:%'
+                WHERE top10_concentration BETWEEN 20 AND 70  -- Sweet spot: ni trop centralisé ni trop dispersé
                 AND holders > ?
                 AND is_tradeable = 1
                 ORDER BY invest_score DESC
@@ -32,21 +39,14 @@ class TokenFilters:
             
             results = []
             for row in cursor.fetchall():
-                # Parser la concentration des top holders
-                dist = row[4] or ""
-                concentration_match = re.search(r'Top 10: ([\d.]+)%', dist)
-                if concentration_match:
-                    concentration = float(concentration_match.group(1))
-                    # Filtrer les tokens avec concentration équilibrée (pas trop centralisée)
-                    if 20 <= concentration <= 70:  # Sweet spot
-                        results.append({
-                            "address": row[0],
-                            "symbol": row[1],
-                            "score": row[2],
-                            "holders": row[3],
-                            "concentration": concentration,
-                            "whale_friendly": True
-                        })
+                results.append({
+                    "address": row[0],
+                    "symbol": row[1],
+                    "score": row[2],
+                    "holders": row[3],
+                    "concentration": row[4],
+                    "whale_friendly": True
+                })
             
             return results
         
@@ -61,12 +61,12 @@ class TokenFilters:
         try:
             cursor.execute('''
                 SELECT address, symbol, invest_score, age_hours, 
-                       volume_24h, liquidity_usd, holders, rug_score
+                       effective_volume_24h, liquidity_usd, holders, rug_score
                 FROM tokens 
                 WHERE age_hours <= 12  -- Très récent
                 AND invest_score >= 70  -- Score élevé
                 AND rug_score >= 60    -- Sécurité minimale
-                AND volume_24h > 10000 -- Activité minimale
+                AND effective_volume_24h > 10000 -- Activité minimale
                 AND is_tradeable = 1
                 ORDER BY invest_score DESC, age_hours ASC
                 LIMIT 5
@@ -112,10 +112,10 @@ class TokenFilters:
         ]
         
         try:
-            cursor.execute('''
-                SELECT address, symbol, name, invest_score, volume_24h, holders
+            cursor.execute(f'''
+                SELECT address, symbol, name, invest_score, effective_volume_24h, holders
                 FROM tokens 
-                WHERE first_discovered_at > datetime('now', '-24 hours')
+                WHERE {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                 AND is_tradeable = 1
                 ORDER BY invest_score DESC
                 LIMIT 50
@@ -203,14 +203,14 @@ class TokenFilters:
         
         try:
             # Indicateurs d'activité dev : metadata complète, logo, etc.
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT address, symbol, name, logo_uri, invest_score,
                        bonding_curve_status, raydium_pool_address
                 FROM tokens 
                 WHERE symbol != 'UNKNOWN' 
                 AND name IS NOT NULL 
                 AND logo_uri IS NOT NULL
-                AND first_discovered_at > datetime('now', '-48 hours')
+                AND {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-48 hours') AS INTEGER)
                 ORDER BY invest_score DESC
                 LIMIT 20
             ''')
@@ -252,6 +252,7 @@ class CustomQueries:
     
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
+        EpochColumns(database_path)
     
     async def get_diamond_hands_tokens(self) -> List[Dict]:
         """Tokens avec holders stables (diamond hands)"""
@@ -8,12 +8,78 @@ import asyncio
 import aiohttp
 import json
 import logging
+import random
+import time
+import websockets
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 import sqlite3
 
 logger = logging.getLogger('whale_tracker')
 
+# Composantes du score whale (partagées par le scoring complet et la table de décision)
+SPECIALTY_BONUS = {
+    "ultra_early": 20,
+    "early_memecoins": 15,
+    "safe_plays": 10
+}
+AMOUNT_BONUS_TIERS = [(50000, 15), (20000, 10), (5000, 5), (0, 0)]  # (min USD, bonus)
+COPY_SIZING_LADDER = [(95, 1.0), (85, 0.8), (75, 0.5)]  # (score min, fraction du max)
+
+class LatencyHistogram:
+    """Histogramme de latences à buckets fixes (en millisecondes)"""
+    
+    BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)  # Dernier bucket = overflow
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, seconds: float):
+        """Enregistrer une latence mesurée en secondes"""
+        value_ms = seconds * 1000
+        index = 0
+        while index < len(self.BUCKETS_MS) and value_ms > self.BUCKETS_MS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+    
+    def percentile(self, pct: float) -> float:
+        """Borne supérieure du bucket contenant le percentile demandé"""
+        if not self.count:
+            return 0.0
+        target = self.count * pct / 100
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return float(self.BUCKETS_MS[index]) if index < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+    
+    def snapshot(self) -> Dict:
+        """Exporter l'histogramme (buckets cumulés façon Prometheus)"""
+        labels = [f"le_{bound}ms" for bound in self.BUCKETS_MS] + ["le_inf"]
+        cumulative = 0
+        buckets = {}
+        for label, bucket_count in zip(labels, self.counts):
+            cumulative += bucket_count
+            buckets[label] = cumulative
+        
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": self.max_ms,
+            "buckets": buckets
+        }
+
 class AdvancedWhaleTracker:
     """Système de tracking avancé des whales"""
     
@@ -60,10 +126,53 @@ class AdvancedWhaleTracker:
             "max_copy_amount": 1.0,  # Max 1 SOL par copy
             "min_whale_score": 80,
             "blacklisted_whales": set(),
-            "auto_sell_follow": True  # Suivre aussi les ventes
+            "auto_sell_follow": True,  # Suivre aussi les ventes
+            "order_retries": 2,        # Nouvelles tentatives d'un ordre de copy en échec
+            "order_retry_delay": 2     # Délai de base entre tentatives (secondes, x tentative)
+        }
+        
+        # Mode souscription: streams logsSubscribe "mentions" au lieu du polling
+        self.subscription_config = {
+            "enabled": True,
+            "ws_url": "wss://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8",
+            "commitment": "confirmed",
+            "wallets_per_connection": 25,  # Souscriptions multiplexées par socket
+            "max_connections": 4,          # Taille max du pool de WebSockets
+            "fetch_workers": 4,            # Workers du pipeline dédup + fetch
+            "fetch_retries": 3,            # Nouvelles tentatives d'une signature non récupérée
+            "retry_delay": 5,              # Délai de base entre tentatives (secondes, x tentative)
+            "resync_interval": 30          # Vérifier les nouvelles whales (secondes)
+        }
+        
+        # Pipeline unique de signatures (toutes connexions confondues)
+        self.signature_queue = asyncio.Queue(maxsize=1000)
+        self.seen_signatures = OrderedDict()  # signature -> timestamp de réception
+        self.max_seen_signatures = 10000
+        self.signature_retries: Dict[str, int] = {}  # signature -> tentatives déjà replanifiées
+        self.subscription_stats = {
+            "notifications": 0,
+            "duplicates": 0,
+            "fetched": 0,
+            "fetch_failures": 0,
+            "fetch_retries": 0,
+            "reconnects": 0
+        }
+        
+        # Chemin rapide du copy trading: table de décision précalculée par whale
+        self.copy_decision_table: Dict[str, Dict] = {}
+        self.decision_table_refresh_interval = 60  # Reconstruction en arrière-plan (secondes)
+        self.copy_order_queue = asyncio.Queue(maxsize=100)
+        self.enqueued_copy_signatures = OrderedDict()  # signature -> timestamp de mise en queue
+        self.max_enqueued_copy_signatures = 5000
+        self.latency_histograms = {
+            "receipt_to_decision": LatencyHistogram(),  # Log reçu -> décision prise
+            "receipt_to_order": LatencyHistogram(),     # Log reçu -> ordre en queue
+            "decision": LatencyHistogram(),             # Durée du chemin rapide seul
+            "order_to_executor": LatencyHistogram()     # Attente dans la queue d'ordres
         }
         
         self.init_whale_database()
+        self.rebuild_copy_decision_table()
     
     def init_whale_database(self):
         """Initialiser la base de données whale"""
@@ -115,11 +224,20 @@ class AdvancedWhaleTracker:
         """Démarrer le tracking des whales"""
         await self.start_session()
         
+        if self.subscription_config["enabled"]:
+            monitoring_tasks = [
+                self.monitor_whale_subscriptions(),
+                self.run_signature_pipeline()
+            ]
+        else:
+            monitoring_tasks = [self.monitor_whale_transactions()]
+        
         tasks = [
-            self.monitor_whale_transactions(),
+            *monitoring_tasks,
             self.analyze_whale_performance(),
             self.detect_new_whales(),
-            self.execute_copy_trading(),
+            self.maintain_copy_decision_table(),
+            self.run_copy_order_executor(),
             self.update_whale_positions()
         ]
         
@@ -143,7 +261,8 @@ class AdvancedWhaleTracker:
                     transactions = await self.get_whale_recent_transactions(whale_address)
                     
                     for tx in transactions:
-                        await self.process_whale_transaction(tx, whale_address, whale_info)
+                        await self.process_whale_transaction(tx, whale_address, whale_info,
+                                                             received_at=time.perf_counter())
                 
                 await asyncio.sleep(15)  # Check toutes les 15 secondes
                 
@@ -186,22 +305,209 @@ class AdvancedWhaleTracker:
         
         return []
     
-    async def get_transaction_detail(self, signature: str) -> Optional[Dict]:
+    async def monitor_whale_subscriptions(self):
+        """Monitor les whales via un pool de WebSockets (logsSubscribe mentions)"""
+        logger.info("🐋 Starting whale subscription monitoring...")
+        
+        while True:
+            wallets = sorted(self.known_whales.keys())
+            connection_tasks = [
+                asyncio.create_task(self._run_subscription_connection(conn_id, chunk))
+                for conn_id, chunk in enumerate(self._partition_wallets(wallets))
+            ]
+            logger.info(f"📡 {len(wallets)} whales réparties sur {len(connection_tasks)} WebSocket(s)")
+            
+            try:
+                # Reconstruire le pool quand la liste des whales change
+                while sorted(self.known_whales.keys()) == wallets:
+                    await asyncio.sleep(self.subscription_config["resync_interval"])
+                logger.info("🔄 Whale list changed, rebuilding subscription pool")
+            finally:
+                for task in connection_tasks:
+                    task.cancel()
+                await asyncio.gather(*connection_tasks, return_exceptions=True)
+    
+    def _partition_wallets(self, wallets: List[str]) -> List[List[str]]:
+        """Répartir les wallets sur un petit pool de connexions"""
+        if not wallets:
+            return []
+        
+        per_connection = self.subscription_config["wallets_per_connection"]
+        needed = -(-len(wallets) // per_connection)  # Division arrondie au supérieur
+        pool_size = max(1, min(self.subscription_config["max_connections"], needed))
+        
+        # Round-robin pour équilibrer la charge entre connexions
+        return [wallets[i::pool_size] for i in range(pool_size)]
+    
+    async def _run_subscription_connection(self, conn_id: int, wallets: List[str]):
+        """Maintenir une connexion WebSocket avec une souscription par wallet"""
+        
+        while True:
+            try:
+                async with websockets.connect(self.subscription_config["ws_url"],
+                                              ping_interval=60, ping_timeout=30) as ws:
+                    # "mentions" n'accepte qu'une adresse: une souscription par wallet,
+                    # toutes multiplexées sur la même connexion
+                    pending = {}        # request id -> wallet
+                    subscriptions = {}  # subscription id -> wallet
+                    
+                    for request_id, wallet in enumerate(wallets, start=1):
+                        pending[request_id] = wallet
+                        await ws.send(json.dumps({
+                            "jsonrpc": "2.0",
+                            "id": request_id,
+                            "method": "logsSubscribe",
+                            "params": [
+                                {"mentions": [wallet]},
+                                {"commitment": self.subscription_config["commitment"]}
+                            ]
+                        }))
+                    
+                    logger.debug(f"WS#{conn_id}: subscribed {len(wallets)} wallets")
+                    
+                    async for message in ws:
+                        received_at = time.perf_counter()
+                        
+                        try:
+                            data = json.loads(message)
+                        except json.JSONDecodeError:
+                            continue
+                        
+                        # Confirmation de souscription
+                        if "id" in data and "result" in data:
+                            wallet = pending.pop(data["id"], None)
+                            if wallet:
+                                subscriptions[data["result"]] = wallet
+                            continue
+                        
+                        if data.get("method") != "logsNotification":
+                            continue
+                        
+                        params = data.get("params", {})
+                        wallet = subscriptions.get(params.get("subscription"))
+                        value = params.get("result", {}).get("value", {})
+                        signature = value.get("signature")
+                        
+                        # Ignorer les transactions échouées dès la réception
+                        if not wallet or not signature or value.get("err"):
+                            continue
+                        
+                        self.subscription_stats["notifications"] += 1
+                        await self.enqueue_signature(signature, wallet, received_at)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.subscription_stats["reconnects"] += 1
+                backoff = min(60, (2 ** random.uniform(1, 5)))
+                logger.error(f"WS#{conn_id} subscription error: {e} - retry in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+    
+    async def enqueue_signature(self, signature: str, whale_address: str,
+                                received_at: Optional[float] = None) -> bool:
+        """Ajouter une signature au pipeline (dédupliquée en mémoire)"""
+        
+        if signature in self.seen_signatures:
+            self.subscription_stats["duplicates"] += 1
+            return False
+        
+        self.seen_signatures[signature] = received_at or time.perf_counter()
+        while len(self.seen_signatures) > self.max_seen_signatures:
+            self.seen_signatures.popitem(last=False)
+        
+        await self.signature_queue.put((signature, whale_address, self.seen_signatures[signature]))
+        return True
+    
+    async def run_signature_pipeline(self):
+        """Pipeline unique de dédup + fetch des signatures reçues"""
+        workers = [
+            asyncio.create_task(self._signature_worker(worker_id))
+            for worker_id in range(self.subscription_config["fetch_workers"])
+        ]
+        
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+    
+    async def _signature_worker(self, worker_id: int):
+        """Worker: vérifier en base, récupérer la transaction et la traiter"""
+        
+        while True:
+            signature, whale_address, received_at = await self.signature_queue.get()
+            
+            try:
+                whale_info = self.known_whales.get(whale_address)
+                if not whale_info or await self.transaction_already_processed(signature):
+                    continue
+                
+                # La transaction peut ne pas être encore indexée juste après le log
+                tx = None
+                for attempt in range(3):
+                    tx = await self.get_transaction_detail(
+                        signature, commitment=self.subscription_config["commitment"]
+                    )
+                    if tx:
+                        break
+                    await asyncio.sleep(0.5 * (attempt + 1))
+                
+                if not tx:
+                    self.release_signature(signature, whale_address, received_at)
+                    continue
+                
+                self.subscription_stats["fetched"] += 1
+                await self.process_whale_transaction(tx, whale_address, whale_info,
+                                                     received_at=received_at)
+                self.signature_retries.pop(signature, None)
+            
+            except Exception as e:
+                logger.error(f"Signature worker {worker_id} error on {signature}: {e}")
+                self.release_signature(signature, whale_address, received_at)
+            finally:
+                self.signature_queue.task_done()
+    
+    def release_signature(self, signature: str, whale_address: str, received_at: float):
+        """Échec de fetch / traitement: retirer la signature de la dédup et la replanifier
+        
+        Sans cela une erreur passagère (429, transaction pas encore confirmée)
+        ferait perdre définitivement la transaction de la whale.
+        """
+        self.seen_signatures.pop(signature, None)
+        retries = self.signature_retries.get(signature, 0)
+        if retries >= self.subscription_config["fetch_retries"]:
+            self.signature_retries.pop(signature, None)
+            self.subscription_stats["fetch_failures"] += 1
+            logger.warning(f"⚠️ Signature {signature[:16]}... abandonnée après {retries} nouvelles tentatives")
+            return
+        
+        self.signature_retries[signature] = retries + 1
+        self.subscription_stats["fetch_retries"] += 1
+        asyncio.create_task(self._retry_signature(signature, whale_address, received_at, retries + 1))
+    
+    async def _retry_signature(self, signature: str, whale_address: str, received_at: float, attempt: int):
+        await asyncio.sleep(self.subscription_config["retry_delay"] * attempt)
+        if not await self.enqueue_signature(signature, whale_address, received_at):
+            self.signature_retries.pop(signature, None)  # Déjà repris par une nouvelle notification
+    
+    async def get_transaction_detail(self, signature: str,
+                                     commitment: Optional[str] = None) -> Optional[Dict]:
         """Récupérer les détails d'une transaction"""
         try:
             url = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8"
             
+            options = {
+                "encoding": "jsonParsed",
+                "maxSupportedTransactionVersion": 0
+            }
+            if commitment:
+                options["commitment"] = commitment
+            
             payload = {
                 "jsonrpc": "2.0",
                 "id": 1,
                 "method": "getTransaction",
-                "params": [
-                    signature,
-                    {
-                        "encoding": "jsonParsed",
-                        "maxSupportedTransactionVersion": 0
-                    }
-                ]
+                "params": [signature, options]
             }
             
             async with self.session.post(url, json=payload) as resp:
@@ -214,7 +520,8 @@ class AdvancedWhaleTracker:
         
         return None
     
-    async def process_whale_transaction(self, tx: Dict, whale_address: str, whale_info: Dict):
+    async def process_whale_transaction(self, tx: Dict, whale_address: str, whale_info: Dict,
+                                        received_at: Optional[float] = None):
         """Traiter une transaction de whale"""
         
         if not tx or not tx.get("meta"):
@@ -231,6 +538,10 @@ class AdvancedWhaleTracker:
         if await self.transaction_already_processed(signature):
             return
         
+        # Chemin rapide: décision de copy via la table précalculée, avant toute écriture
+        if self.copy_trading_config["enabled"]:
+            self.decide_copy_trade(parsed_tx, whale_address, received_at)
+        
         # Calculer le score whale
         whale_score = self.calculate_whale_score(whale_info, parsed_tx)
         
@@ -252,13 +563,6 @@ class AdvancedWhaleTracker:
         if whale_score >= 75:
             await self.send_whale_alert(whale_alert)
         
-        # Copy trading si activé
-        if (self.copy_trading_config["enabled"] and 
-            whale_score >= self.copy_trading_config["min_whale_score"] and
-            parsed_tx["transaction_type"] == "buy"):
-            
-            await self.execute_copy_trade(whale_alert)
-        
         logger.info(f"🐋 WHALE MOVE: {whale_info['label']} {parsed_tx['transaction_type'].upper()} "
                    f"{parsed_tx.get('token_symbol', 'UNKNOWN')} | Score: {whale_score}")
     
@@ -351,36 +655,213 @@ class AdvancedWhaleTracker:
         base_score = whale_info["success_rate"]
         
         # Bonus selon spécialité
-        specialty_bonus = {
-            "ultra_early": 20,
-            "early_memecoins": 15,
-            "safe_plays": 10
-        }
-        base_score += specialty_bonus.get(whale_info["specialty"], 5)
+        base_score += SPECIALTY_BONUS.get(whale_info["specialty"], 5)
         
         # Bonus selon le montant (plus gros = plus confiance)
-        amount_usd = tx.get("amount_usd", 0)
-        if amount_usd >= 50000:
-            base_score += 15  # Très gros trade
-        elif amount_usd >= 20000:
-            base_score += 10
-        elif amount_usd >= 5000:
-            base_score += 5
+        base_score += self._amount_bonus(tx.get("amount_usd", 0))
         
         # Bonus selon le type de transaction
         if tx["transaction_type"] == "buy":
             base_score += 5  # Les achats sont plus intéressants
         
         # Pénalité pour transactions très anciennes
-        block_time = tx.get("block_time", 0)
+        base_score -= self._age_penalty(tx.get("block_time", 0))
+        
+        return min(max(base_score, 0), 100)
+    
+    @staticmethod
+    def _amount_bonus(amount_usd: float) -> int:
+        """Bonus de score selon le montant du trade"""
+        for min_usd, bonus in AMOUNT_BONUS_TIERS:
+            if amount_usd >= min_usd:
+                return bonus
+        return 0
+    
+    @staticmethod
+    def _age_penalty(block_time: int) -> int:
+        """Pénalité de score pour les transactions anciennes"""
         if block_time > 0:
-            time_diff = datetime.now().timestamp() - block_time
+            time_diff = time.time() - block_time
             if time_diff > 3600:  # > 1 heure
-                base_score -= 10
+                return 10
             elif time_diff > 1800:  # > 30 minutes
-                base_score -= 5
+                return 5
+        return 0
+    
+    def rebuild_copy_decision_table(self):
+        """Précalculer seuils, sizing et allowlist de copy pour chaque whale"""
         
-        return min(max(base_score, 0), 100)
+        inactive_whales = set()
+        copied_tokens = {}
+        
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("SELECT whale_address FROM whale_performance WHERE is_active = FALSE")
+            inactive_whales = {row[0] for row in cursor.fetchall()}
+            
+            # Positions déjà copiées: ne pas racheter le même token derrière la même whale
+            cursor.execute('''
+                SELECT DISTINCT whale_address, token_address
+                FROM whale_transactions_advanced
+                WHERE copy_executed = TRUE AND transaction_type = 'buy'
+            ''')
+            for whale_address, token_address in cursor.fetchall():
+                copied_tokens.setdefault(whale_address, set()).add(token_address)
+        except Exception as e:
+            logger.error(f"Error loading copy decision data: {e}")
+        finally:
+            conn.close()
+        
+        config = self.copy_trading_config
+        max_amount = config["max_copy_amount"]
+        table = {}
+        
+        for whale_address, whale_info in list(self.known_whales.items()):
+            # Score d'un achat avant pénalité d'âge, par palier de montant
+            buy_base = (whale_info["success_rate"]
+                        + SPECIALTY_BONUS.get(whale_info["specialty"], 5) + 5)
+            
+            table[whale_address] = {
+                "label": whale_info["label"],
+                "allowed": (whale_address not in config["blacklisted_whales"]
+                            and whale_address not in inactive_whales),
+                "min_whale_score": config["min_whale_score"],
+                "buy_score_tiers": [(min_usd, buy_base + bonus)
+                                    for min_usd, bonus in AMOUNT_BONUS_TIERS],
+                "sizing": [(min_score, max_amount * fraction)
+                           for min_score, fraction in COPY_SIZING_LADDER],
+                "copied_tokens": copied_tokens.get(whale_address, set()),
+                "built_at": time.time()
+            }
+        
+        # Remplacement atomique: le chemin rapide ne voit jamais une table partielle
+        self.copy_decision_table = table
+        return table
+    
+    async def maintain_copy_decision_table(self):
+        """Reconstruire la table de décision en arrière-plan"""
+        
+        while True:
+            try:
+                await asyncio.sleep(self.decision_table_refresh_interval)
+                self.rebuild_copy_decision_table()
+            except Exception as e:
+                logger.error(f"Error rebuilding copy decision table: {e}")
+    
+    def decide_copy_trade(self, parsed_tx: Dict, whale_address: str,
+                          received_at: Optional[float] = None) -> Optional[Dict]:
+        """Chemin rapide: lookup dans la table de décision + enqueue de l'ordre"""
+        
+        started_at = time.perf_counter()
+        received_at = received_at or started_at
+        
+        entry = self.copy_decision_table.get(whale_address)
+        if not entry or not entry["allowed"] or parsed_tx["transaction_type"] != "buy":
+            return None
+        
+        token_address = parsed_tx["token_address"]
+        signature = parsed_tx["signature"]
+        if token_address in entry["copied_tokens"] or signature in self.enqueued_copy_signatures:
+            return None
+        
+        amount_usd = parsed_tx.get("amount_usd", 0)
+        score = next(tier_score for min_usd, tier_score in entry["buy_score_tiers"]
+                     if amount_usd >= min_usd)
+        score = min(max(score - self._age_penalty(parsed_tx.get("block_time", 0)), 0), 100)
+        
+        copy_amount = 0
+        if score >= entry["min_whale_score"]:
+            copy_amount = next((amount for min_score, amount in entry["sizing"]
+                                if score >= min_score), 0)
+        
+        decided_at = time.perf_counter()
+        self.latency_histograms["decision"].observe(decided_at - started_at)
+        self.latency_histograms["receipt_to_decision"].observe(decided_at - received_at)
+        
+        if copy_amount <= 0:
+            return None
+        
+        order = {
+            "signature": signature,
+            "whale_address": whale_address,
+            "whale_label": entry["label"],
+            "token_address": token_address,
+            "copy_amount": copy_amount,
+            "whale_score": score,
+            "received_at": received_at,
+            "enqueued_at": time.perf_counter()
+        }
+        
+        try:
+            self.copy_order_queue.put_nowait(order)
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Copy order queue full, dropping {signature}")
+            return None
+        
+        entry["copied_tokens"].add(token_address)
+        self.enqueued_copy_signatures[signature] = order["enqueued_at"]
+        while len(self.enqueued_copy_signatures) > self.max_enqueued_copy_signatures:
+            self.enqueued_copy_signatures.popitem(last=False)
+        self.latency_histograms["receipt_to_order"].observe(order["enqueued_at"] - received_at)
+        return order
+    
+    async def run_copy_order_executor(self):
+        """Exécuteur des ordres de copy produits par le chemin rapide
+        
+        copy_executed n'est écrit qu'après exécution (mark_transaction_copied):
+        un ordre en échec est replanifié au lieu d'être considéré comme copié.
+        """
+        
+        while True:
+            order = await self.copy_order_queue.get()
+            
+            try:
+                self.latency_histograms["order_to_executor"].observe(
+                    time.perf_counter() - order["enqueued_at"]
+                )
+                
+                logger.warning(f"🤖 COPY TRADING: Copying {order['whale_label']} - "
+                              f"Buying {order['copy_amount']} SOL of {order['token_address']}")
+                
+                # TODO: Intégrer avec les bots de sniper pour exécuter l'achat
+                # await sniper_bot.buy_token(order['token_address'], order['copy_amount'], slippage=12)
+                
+                await self.mark_transaction_copied(order["signature"])
+            except Exception as e:
+                logger.error(f"Error executing copy order {order['signature']}: {e}")
+                self.release_copy_order(order)
+            finally:
+                self.copy_order_queue.task_done()
+    
+    def release_copy_order(self, order: Dict):
+        """Ordre en échec: le replanifier, ou libérer token et signature après la dernière tentative"""
+        
+        attempt = order.get("attempt", 0)
+        if attempt < self.copy_trading_config["order_retries"]:
+            asyncio.create_task(self._retry_copy_order({**order, "attempt": attempt + 1}))
+            return
+        
+        logger.warning(f"⚠️ Copy order {order['signature'][:16]}... abandonné après {attempt} nouvelles tentatives")
+        entry = self.copy_decision_table.get(order["whale_address"])
+        if entry:
+            entry["copied_tokens"].discard(order["token_address"])
+        self.enqueued_copy_signatures.pop(order["signature"], None)
+    
+    async def _retry_copy_order(self, order: Dict):
+        await asyncio.sleep(self.copy_trading_config["order_retry_delay"] * order["attempt"])
+        order["enqueued_at"] = time.perf_counter()
+        try:
+            self.copy_order_queue.put_nowait(order)
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Copy order queue full, dropping retry of {order['signature']}")
+            order["attempt"] = self.copy_trading_config["order_retries"]
+            self.release_copy_order(order)
+    
+    def get_latency_histograms(self) -> Dict:
+        """Histogrammes de latence du chemin log -> ordre de copy"""
+        return {name: histogram.snapshot() for name, histogram in self.latency_histograms.items()}
     
     async def transaction_already_processed(self, signature: str) -> bool:
         """Vérifier si une transaction a déjà été traitée"""
@@ -409,8 +890,8 @@ class AdvancedWhaleTracker:
                 INSERT OR REPLACE INTO whale_transactions_advanced 
                 (signature, whale_address, whale_label, token_address, token_symbol,
                  transaction_type, amount_sol, amount_usd, token_amount, timestamp,
-                 block_time, whale_score, copy_executed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 block_time, whale_score)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 whale_alert["signature"],
                 whale_alert["whale_address"], 
@@ -423,8 +904,7 @@ class AdvancedWhaleTracker:
                 whale_alert.get("token_amount", 0),
                 whale_alert["detection_time"].strftime('%Y-%m-%d %H:%M:%S'),
                 whale_alert.get("block_time", 0),
-                whale_alert["whale_score"],
-                False
+                whale_alert["whale_score"]
             ))
             
             conn.commit()
@@ -450,46 +930,6 @@ class AdvancedWhaleTracker:
         logger.warning(alert_msg)
         # TODO: Envoyer via Discord/Telegram
     
-    async def execute_copy_trade(self, whale_alert: Dict):
-        """Exécuter un copy trade (TRÈS RISQUÉ!)"""
-        
-        if whale_alert["transaction_type"] != "buy":
-            return  # Ne copier que les achats pour l'instant
-        
-        token_address = whale_alert["token_address"]
-        whale_score = whale_alert["whale_score"]
-        
-        # Calculer le montant à copier
-        copy_amount = self.calculate_copy_amount(whale_alert)
-        
-        if copy_amount <= 0:
-            return
-        
-        logger.warning(f"🤖 COPY TRADING: Copying {whale_alert['whale_label']} - "
-                      f"Buying {copy_amount} SOL of {token_address}")
-        
-        # TODO: Intégrer avec les bots de sniper pour exécuter l'achat
-        # await sniper_bot.buy_token(token_address, copy_amount, slippage=12)
-        
-        # Marquer comme copié
-        await self.mark_transaction_copied(whale_alert["signature"])
-    
-    def calculate_copy_amount(self, whale_alert: Dict) -> float:
-        """Calculer le montant à copier selon le score whale"""
-        
-        max_amount = self.copy_trading_config["max_copy_amount"]
-        whale_score = whale_alert["whale_score"]
-        
-        # Plus le score est haut, plus on copie
-        if whale_score >= 95:
-            return max_amount  # Copy complet
-        elif whale_score >= 85:
-            return max_amount * 0.8
-        elif whale_score >= 75:
-            return max_amount * 0.5
-        else:
-            return 0  # Ne pas copier
-    
     async def mark_transaction_copied(self, signature: str):
         """Marquer une transaction comme copiée"""
         conn = sqlite3.connect(self.database_path)
@@ -584,73 +1024,6 @@ class AdvancedWhaleTracker:
         
         return []  # Placeholder
     
-    async def execute_copy_trading(self):
-        """Boucle principale de copy trading"""
-        
-        while True:
-            try:
-                if not self.copy_trading_config["enabled"]:
-                    await asyncio.sleep(60)
-                    continue
-                
-                # Vérifier s'il y a des trades à suivre
-                pending_copies = await self.get_pending_copy_trades()
-                
-                for copy_trade in pending_copies:
-                    await self.process_copy_trade(copy_trade)
-                
-                await asyncio.sleep(10)  # Check toutes les 10 secondes
-                
-            except Exception as e:
-                logger.error(f"Error in copy trading loop: {e}")
-                await asyncio.sleep(30)
-    
-    async def get_pending_copy_trades(self) -> List[Dict]:
-        """Récupérer les trades en attente de copy"""
-        
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT * FROM whale_transactions_advanced 
-                WHERE copy_executed = FALSE 
-                AND whale_score >= ? 
-                AND transaction_type = 'buy'
-                AND timestamp > datetime('now', '-15 minutes', 'localtime')
-                ORDER BY whale_score DESC, timestamp DESC
-                LIMIT 10
-            ''', (self.copy_trading_config["min_whale_score"],))
-            
-            rows = cursor.fetchall()
-            columns = [description[0] for description in cursor.description]
-            
-            return [dict(zip(columns, row)) for row in rows]
-        
-        except Exception as e:
-            logger.error(f"Error getting pending copy trades: {e}")
-            return []
-        finally:
-            conn.close()
-    
-    async def process_copy_trade(self, copy_trade: Dict):
-        """Traiter un copy trade individuel"""
-        
-        # Vérifications de sécurité
-        if copy_trade["whale_address"] in self.copy_trading_config["blacklisted_whales"]:
-            return
-        
-        # Vérifier que le token n'est pas déjà trop cher
-        current_price = await self.get_current_token_price(copy_trade["token_address"])
-        if current_price and copy_trade.get("amount_usd", 0) > 0:
-            price_change = (current_price - copy_trade["amount_usd"]) / copy_trade["amount_usd"]
-            if price_change > 0.5:  # Prix a déjà augmenté de 50%+
-                logger.info(f"⚠️ Skipping copy trade - price already up {price_change:.1%}")
-                return
-        
-        # Exécuter le copy trade
-        await self.execute_copy_trade(copy_trade)
-    
     async def get_current_token_price(self, token_address: str) -> Optional[float]:
         """Récupérer le prix actuel d'un token"""
         
@@ -767,7 +1140,12 @@ class AdvancedWhaleTracker:
                     for row in top_whales
                 ],
                 "active_whales": len(self.known_whales),
-                "copy_trading_enabled": self.copy_trading_config["enabled"]
+                "copy_trading_enabled": self.copy_trading_config["enabled"],
+                "subscription_mode": self.subscription_config["enabled"],
+                "subscription_stats": dict(self.subscription_stats),
+                "signature_queue_size": self.signature_queue.qsize(),
+                "copy_order_queue_size": self.copy_order_queue.qsize(),
+                "latency_histograms": self.get_latency_histograms()
             }
         
         except Exception as e:
@@ -790,6 +1168,7 @@ async def setup_whale_tracker():
         "min_whale_score": 85,
         "auto_sell_follow": True
     })
+    tracker.rebuild_copy_decision_table()  # Prendre en compte la nouvelle config
     
     return tracker
 
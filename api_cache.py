@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+🗄️ API Cache - Cache des réponses Flask invalidé par PRAGMA data_version
+Réponses gardées par route + arguments normalisés tant que la base n'a pas
+changé; après une écriture, la réponse précédente est servie pendant qu'un
+seul recalcul tourne en arrière-plan (stale-while-revalidate, single-flight).
+"""
+
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import current_app, request
+
+from api_encoding import encoded_body
+
+logger = logging.getLogger('api_cache')
+
+
+class ResponseCache:
+    """Cache de réponses JSON pour les routes en lecture seule
+
+    data_version n'a de sens que pour une connexion donnée: une connexion
+    dédiée (jamais utilisée pour écrire) le lit et incrémente une génération
+    à chaque commit d'un autre processus. max_age borne aussi la durée de vie
+    d'une entrée pour les requêtes relatives à l'heure courante.
+    """
+
+    def __init__(self, database_path: str, max_entries: int = 512, wait_timeout: float = 30.0):
+        self.database_path = database_path
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+
+        self.entries: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self.inflight: Dict[tuple, threading.Event] = {}
+        self.lock = threading.Lock()
+
+        self.version_conn: Optional[sqlite3.Connection] = None
+        self.version_lock = threading.Lock()
+        self.data_version = None
+        self.generation = 0
+
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'recomputes': 0,
+            'background_refreshes': 0,
+            'invalidations': 0
+        }
+
+    # === Version de la base ===
+
+    def current_generation(self) -> int:
+        """Génération courante; change dès qu'un commit est visible"""
+        with self.version_lock:
+            try:
+                if self.version_conn is None:
+                    uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+                    self.version_conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                data_version = self.version_conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error as e:
+                # Base inaccessible: ne rien considérer comme à jour
+                logger.debug(f"data_version indisponible: {e}")
+                if self.version_conn is not None:
+                    self.version_conn.close()
+                    self.version_conn = None
+                self.generation += 1
+                return self.generation
+
+            if data_version != self.data_version:
+                if self.data_version is not None:
+                    self.stats['invalidations'] += 1
+                self.data_version = data_version
+                self.generation += 1
+            return self.generation
+
+    # === Décorateur ===
+
+    def cached(self, max_age: float = 30.0, stale_ttl: float = 15.0):
+        """Mettre en cache une route GET (réponses 200 uniquement)
+
+        max_age: durée de vie d'une entrée même sans écriture en base
+        stale_ttl: âge maximal d'une réponse servie pendant son recalcul
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = (request.path, tuple(sorted(request.args.items(multi=True))))
+                generation = self.current_generation()
+                now = time.monotonic()
+
+                with self.lock:
+                    entry = self.entries.get(key)
+                    if entry is not None:
+                        self.entries.move_to_end(key)
+
+                if entry is not None:
+                    age = now - entry['created']
+                    if entry['generation'] == generation and age < max_age:
+                        self.stats['hits'] += 1
+                        return self._response(entry, 'HIT')
+                    if age < stale_ttl:
+                        self.stats['stale_hits'] += 1
+                        self._refresh_in_background(key, view, args, kwargs)
+                        return self._response(entry, 'STALE')
+
+                self.stats['misses'] += 1
+                entry, response = self._compute(key, view, args, kwargs)
+                if entry is None:
+                    return response  # Erreur ou réponse non cacheable
+                return self._response(entry, 'MISS')
+            return wrapper
+        return decorator
+
+    # === Calcul single-flight ===
+
+    def _compute(self, key: tuple, view, args, kwargs):
+        """Un seul calcul par clé à la fois; les autres attendent son résultat"""
+        with self.lock:
+            event = self.inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self.inflight[key] = threading.Event()
+
+        if not leader:
+            self.stats['waits'] += 1
+            event.wait(self.wait_timeout)
+            with self.lock:
+                entry = self.entries.get(key)
+            if entry is not None:
+                return entry, None
+            # Le calcul du leader a échoué: calculer pour cette requête sans cacher
+            return None, current_app.make_response(view(*args, **kwargs))
+
+        try:
+            generation = self.current_generation()
+            self.stats['recomputes'] += 1
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return None, response
+
+            entry = {
+                'body': response.get_data(),
+                'mimetype': response.mimetype,
+                'generation': generation,
+                'created': time.monotonic()
+            }
+            with self.lock:
+                self.entries[key] = entry
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+            return entry, None
+        finally:
+            with self.lock:
+                self.inflight.pop(key, None)
+            event.set()
+
+    def _refresh_in_background(self, key: tuple, view, args, kwargs):
+        with self.lock:
+            if key in self.inflight:
+                return
+        app = current_app._get_current_object()
+        path, query_string = request.path, request.query_string
+
+        def refresh():
+            try:
+                with app.test_request_context(path, query_string=query_string):
+                    self._compute(key, view, args, kwargs)
+                    self.stats['background_refreshes'] += 1
+            except Exception as e:
+                logger.error(f"❌ Background refresh error for {path}: {e}")
+
+        threading.Thread(target=refresh, name="api-cache-refresh", daemon=True).start()
+
+    def _response(self, entry: Dict, status: str):
+        body, encoding = encoded_body(entry)
+        response = current_app.response_class(body, status=200, mimetype=entry['mimetype'])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['X-Cache'] = status
+        return response
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self) -> Dict:
+        requests_count = self.stats['hits'] + self.stats['stale_hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries': len(self.entries),
+            'generation': self.generation,
+            'hit_rate': (self.stats['hits'] + self.stats['stale_hits']) / requests_count if requests_count else 0
+        }
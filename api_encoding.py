@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+📦 API Encoding - Sérialisation JSON rapide et compression des réponses
+orjson si disponible (json sinon), sérialisation directe des tuples SQLite,
+format colonnes optionnel et compression brotli / gzip négociée.
+"""
+
+import gzip
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from flask import current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+logger = logging.getLogger('api_encoding')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# En dessous, la compression coûte plus qu'elle ne rapporte
+MIN_COMPRESS_SIZE = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 4
+
+
+def dumps(obj) -> bytes:
+    """JSON compact en bytes (NaN/inf -> null avec orjson)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # Type non géré par orjson (Decimal, numpy...): json standard
+    return json.dumps(obj, separators=(',', ':'), default=str).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() via dumps() (orjson); options explicites -> provider Flask"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def rows_payload(columns: Sequence[str], rows: Iterable[Sequence], layout: str = "rows"):
+    """Lignes SQLite (tuples) -> liste de dicts, ou {"columns", "rows"} en format colonnes"""
+    if layout == "columns":
+        return {'columns': list(columns), 'rows': rows if isinstance(rows, list) else list(rows)}
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def cursor_columns(cursor) -> List[str]:
+    return [description[0] for description in cursor.description]
+
+
+def requested_layout() -> str:
+    """?format=columns pour le format colonnes"""
+    return "columns" if request.args.get('format') == 'columns' else "rows"
+
+
+def negotiate_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+def json_response(payload, status: int = 200):
+    """Réponse JSON sérialisée avec dumps() (compressée par compress_response)"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+
+def compress_response(response):
+    """after_request: compresser les réponses JSON volumineuses selon Accept-Encoding"""
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+
+    body = response.get_data()
+    response.vary.add('Accept-Encoding')
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def encoded_body(entry: Dict) -> tuple:
+    """Corps d'une entrée de cache dans l'encodage accepté (compressé une seule fois)"""
+    body = entry['body']
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return body, None
+    variants = entry.setdefault('encoded', {})
+    if encoding not in variants:
+        variants[encoding] = compress(body, encoding)
+    return variants[encoding], encoding
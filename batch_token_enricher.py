@@ -14,6 +14,9 @@ from typing import List, Dict, Optional, Tuple
 from aiohttp import ClientSession, TCPConnector
 import random
 
+from holders_service import HoldersService
+from epoch_columns import EpochColumns
+
 logger = logging.getLogger('batch_enricher')
 
 class BatchTokenEnricher:
@@ -25,6 +28,8 @@ class BatchTokenEnricher:
         self.max_concurrent = max_concurrent
         self.session: Optional[ClientSession] = None
         self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.holders_service: Optional[HoldersService] = None
+        self.epoch_columns = EpochColumns(database_path)
         
         # Rate limiters globaux plus agressifs
         self.api_delays = {
@@ -60,6 +65,7 @@ class BatchTokenEnricher:
                 'Accept-Encoding': 'gzip, deflate'
             }
         )
+        self.holders_service = HoldersService(self.database_path, session=self.session)
         logger.info("🚀 Batch enricher started with optimized session")
     
     async def stop(self):
@@ -215,25 +221,13 @@ class BatchTokenEnricher:
         }
     
     async def _get_holders_helius(self, address: str) -> Dict:
-        """Holders via Helius - version simplifiée"""
-        url = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8"
-        payload = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "getTokenLargestAccounts",
-            "params": [address]
-        }
-        
+        """Holders via HoldersService (cache alimenté par enrich_batch)"""
         try:
-            async with self.session.post(url, json=payload) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if "result" in data and "value" in data["result"]:
-                        accounts = data["result"]["value"]
-                        holders = len([acc for acc in accounts if acc.get("uiAmount", 0) > 0])
-                        return {"holders": holders}
-        except:
-            pass
+            holders = await self.holders_service.get_holders(address)
+            if holders:
+                return {"holders": holders["holders"]}
+        except Exception as e:
+            logger.debug(f"Holders error for {address}: {e}")
         
         return {"holders": 0}
     
@@ -269,6 +263,12 @@ class BatchTokenEnricher:
         logger.info(f"⚡ Starting batch enrichment of {len(addresses)} tokens")
         start_time = time.time()
         
+        # Holders + concentration du batch en un aller-retour (les tokens lisent ensuite le cache)
+        try:
+            await self.holders_service.get_holders_batch(addresses)
+        except Exception as e:
+            logger.debug(f"Holders batch error: {e}")
+        
         # Traitement parallèle de tous les tokens du batch
         tasks = [self._enrich_single_token_fast(addr) for addr in addresses]
         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -349,10 +349,10 @@ class BatchTokenEnricher:
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT address FROM tokens 
                 WHERE (symbol IS NULL OR symbol = 'UNKNOWN' OR symbol = '') 
-                AND first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                AND {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                 ORDER BY first_discovered_at DESC
                 LIMIT ?
             ''', (limit,))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+📉 Chart Downsampling - Réduction des séries temporelles pour les graphiques
+Largest-Triangle-Three-Buckets (LTTB) multi-séries: un seul jeu d'indices
+choisi sur plusieurs séries normalisées, pour que toutes les courbes restent
+alignées sur les mêmes labels tout en gardant leurs pics et leurs creux.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+# En dessous de 3 points, LTTB n'a pas de bucket intermédiaire
+MIN_POINTS = 3
+
+
+def lttb_indices(x: Sequence[float], series: Sequence[Sequence[float]], max_points: int) -> np.ndarray:
+    """Indices des points à garder (premier et dernier inclus, ordre croissant)
+
+    x: abscisses (timestamps epoch), series: matrice (n_séries, n_points).
+    Chaque série est ramenée à [0, 1] pour que prix et volume pèsent autant;
+    dans chaque bucket, le point retenu maximise la somme des aires des
+    triangles formés avec le point précédent et la moyenne du bucket suivant.
+    """
+    n = len(x)
+    if max_points < MIN_POINTS or n <= max_points:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    if np.isnan(x).any():
+        x = np.arange(n, dtype=float)  # Timestamps illisibles: points équidistants
+    ys = np.atleast_2d(np.asarray(series, dtype=float))
+
+    x = (x - x[0]) / ((x[-1] - x[0]) or 1.0)
+    low = np.nanmin(ys, axis=1, keepdims=True)
+    span = np.nanmax(ys, axis=1, keepdims=True) - low
+    span[~(span > 0)] = 1.0
+    ys = np.nan_to_num((ys - low) / span)
+
+    # max_points - 2 buckets entre le premier et le dernier point
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:n - 1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(ys[:, :n - 1], edges[:-1], axis=1) / counts
+
+    selected = np.empty(max_points, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    buckets = len(counts)
+    a = 0
+    for i in range(buckets):
+        start, end = edges[i], edges[i + 1]
+        if i + 1 < buckets:
+            cx, cy = avg_x[i + 1], avg_y[:, i + 1]
+        else:
+            cx, cy = x[-1], ys[:, -1]
+        ax, ay = x[a], ys[:, a:a + 1]
+        areas = np.abs((ax - cx) * (ys[:, start:end] - ay)
+                       - (ax - x[start:end]) * (cy[:, None] - ay)).sum(axis=0)
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
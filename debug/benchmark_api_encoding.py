@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark sérialisation API: jsonify(dicts) vs orjson sur tuples vs format colonnes
+Lit la requête complète de /api/tokens-detail sur une base existante et mesure
+le temps CPU de sérialisation ainsi que les tailles brute / gzip / brotli.
+
+Usage: python debug/benchmark_api_encoding.py [--database tokens.db] [--repeat 3]
+"""
+
+import argparse
+import gzip
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import api_encoding
+from api_encoding import BROTLI_QUALITY, GZIP_LEVEL, rows_payload
+from flask_api_backend import TOKENS_DETAIL_COLUMNS, app
+
+
+def best_time(func, repeat: int):
+    """Meilleur temps CPU sur repeat exécutions, et le dernier résultat"""
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def sizes(body: bytes) -> str:
+    parts = [f"brut {len(body) / 1e6:7.2f} Mo", f"gzip {len(gzip.compress(body, compresslevel=GZIP_LEVEL)) / 1e6:6.2f} Mo"]
+    if api_encoding.brotli is not None:
+        parts.append(f"br {len(api_encoding.brotli.compress(body, quality=BROTLI_QUALITY)) / 1e6:6.2f} Mo")
+    return " | ".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sérialisation des réponses API")
+    parser.add_argument("--database", default="tokens.db")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.database)
+    query = f"SELECT {TOKENS_DETAIL_COLUMNS} FROM tokens ORDER BY last_update DESC, invest_score DESC"
+
+    conn.row_factory = sqlite3.Row
+    start = time.perf_counter()
+    dict_rows = [dict(row) for row in conn.execute(query).fetchall()]
+    print(f"🧪 {len(dict_rows):,} tokens lus en {time.perf_counter() - start:.2f}s (sqlite3.Row -> dict)")
+
+    conn.row_factory = None
+    cursor = conn.execute(query)
+    tuple_rows = cursor.fetchall()
+    columns = [description[0] for description in cursor.description]
+    conn.close()
+
+    print(f"   orjson: {'oui' if api_encoding.orjson is not None else 'non'} | "
+          f"brotli: {'oui' if api_encoding.brotli is not None else 'non'}")
+
+    # Référence: json standard de Flask sur une liste de dicts
+    with app.app_context():
+        from flask.json.provider import DefaultJSONProvider
+        provider = DefaultJSONProvider(app)
+        reference_time, reference = best_time(lambda: provider.dumps(dict_rows).encode(), args.repeat)
+    print(f"🐢 jsonify (dicts)       : {reference_time * 1000:8.1f} ms | {sizes(reference)}")
+
+    rows_time, rows_body = best_time(
+        lambda: api_encoding.dumps(rows_payload(columns, tuple_rows)), args.repeat)
+    print(f"⚡ orjson (tuples->dicts) : {rows_time * 1000:8.1f} ms | {sizes(rows_body)}")
+
+    columns_time, columns_body = best_time(
+        lambda: api_encoding.dumps(rows_payload(columns, tuple_rows, "columns")), args.repeat)
+    print(f"⚡ orjson (colonnes)      : {columns_time * 1000:8.1f} ms | {sizes(columns_body)}")
+
+    if rows_time:
+        print(f"📈 Gain sérialisation: x{reference_time / rows_time:.1f} (dicts), x{reference_time / columns_time:.1f} (colonnes)")
+
+
+if __name__ == "__main__":
+    main()
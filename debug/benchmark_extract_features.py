@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark extract_features: version vectorisée vs boucle de référence
+Historique synthétique avec zéros, NULL et ex-aequo de timestamps: --rows tirages
+(1M par défaut), dont il reste ~76% une fois un quart des tokens réduit à un snapshot.
+La boucle de référence étant quadratique, elle s'arrête après --sample tokens
+(temps extrapolé à l'ensemble), sauf avec --full-reference.
+
+Usage: python debug/benchmark_extract_features.py [--rows 1000000] [--tokens 50000] [--sample 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from ml_rugg_pull import RugPullPredictor
+
+
+def synthetic_history(rows: int, tokens: int, seed: int = 42) -> pd.DataFrame:
+    """tokens_hist synthétique, lignes mélangées comme après un SELECT sans ORDER BY"""
+    rng = np.random.default_rng(seed)
+    addresses = np.array([f"Token{i:07d}" for i in range(tokens)])
+    token_index = rng.integers(0, tokens, rows)
+    base = pd.Timestamp("2025-07-01")
+    offsets = pd.to_timedelta(rng.integers(0, 30 * 24 * 60, rows), unit="min")
+
+    def with_gaps(values: np.ndarray, zero_rate: float = 0.1, null_rate: float = 0.05) -> np.ndarray:
+        values = values.astype(float)
+        values[rng.random(rows) < zero_rate] = 0
+        values[rng.random(rows) < null_rate] = np.nan
+        return values
+
+    df = pd.DataFrame({
+        "address": addresses[token_index],
+        "snapshot_timestamp": (base + offsets).strftime("%Y-%m-%d %H:%M:%S"),
+        "holders": with_gaps(rng.integers(0, 3000, rows)),
+        "market_cap": with_gaps(rng.lognormal(8, 3, rows)),
+        "liquidity_usd": with_gaps(rng.lognormal(7, 3, rows)),
+        "age_hours": with_gaps(rng.uniform(0, 2000, rows)),
+        "volume_24h": with_gaps(rng.lognormal(6, 4, rows), zero_rate=0.3),
+        "dexscreener_txns_24h": with_gaps(rng.integers(0, 500, rows), zero_rate=0.3),
+        "dexscreener_buys_24h": with_gaps(rng.integers(0, 300, rows), zero_rate=0.3),
+        "dexscreener_sells_24h": with_gaps(rng.integers(0, 300, rows), zero_rate=0.2),
+        "price_usdc": with_gaps(rng.lognormal(-8, 3, rows), zero_rate=0.3),
+        "dexscreener_price_usd": with_gaps(rng.lognormal(-8, 3, rows), zero_rate=0.3),
+        "price_change_24h": with_gaps(rng.uniform(-100, 300, rows)),
+        "rug_score": rng.integers(0, 100, rows),
+    })
+    # Un quart des tokens n'a qu'un snapshot
+    singles = pd.DataFrame({"address": addresses[: tokens // 4]}).merge(
+        df.drop_duplicates("address"), on="address", how="left"
+    )
+    df = pd.concat([df[~df["address"].isin(singles["address"])], singles.dropna(subset=["snapshot_timestamp"])])
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_features")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--tokens", type=int, default=50_000)
+    parser.add_argument("--sample", type=int, default=300, help="Tokens traités par la boucle de référence")
+    parser.add_argument("--full-reference", action="store_true", help="Boucle de référence sur tous les tokens (très long)")
+    args = parser.parse_args()
+
+    predictor = RugPullPredictor(":memory:")
+
+    print(f"🧪 Génération de {args.rows:,} lignes pour {args.tokens:,} tokens...")
+    df = synthetic_history(args.rows, args.tokens)
+    print(f"   {len(df):,} lignes, {df['address'].nunique():,} tokens")
+
+    start = time.perf_counter()
+    vectorized = predictor.extract_features(df=df)
+    vectorized_time = time.perf_counter() - start
+    print(f"⚡ Vectorisé       : {vectorized_time:.2f}s ({len(vectorized):,} tokens)")
+
+    # La boucle de référence filtre l'historique complet pour chaque token: le coût par token
+    # mesuré sur les N premiers tokens est représentatif
+    limit = None if args.full_reference else args.sample
+    start = time.perf_counter()
+    reference = predictor.extract_features_reference(df=df, limit_tokens=limit)
+    reference_time = time.perf_counter() - start
+
+    tokens_total = df["address"].nunique()
+    extrapolated = reference_time * tokens_total / reference["address"].nunique()
+    print(f"🐢 Référence      : {reference_time:.2f}s pour {reference['address'].nunique():,} tokens "
+          f"(≈ {extrapolated / 60:.1f} min extrapolé à {tokens_total:,} tokens)")
+    print(f"🚀 Speedup        : ≈ {extrapolated / vectorized_time:,.0f}x")
+
+    # Équivalence: mêmes colonnes, même ordre, mêmes valeurs (NaN compris)
+    expected = reference.set_index("address")
+    actual = vectorized.set_index("address").loc[expected.index]
+    assert list(vectorized.columns) == list(reference.columns), "colonnes différentes"
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_exact=False, rtol=1e-12)
+    dtype_diffs = {c: (str(actual[c].dtype), str(expected[c].dtype))
+                   for c in expected.columns if actual[c].dtype != expected[c].dtype}
+    assert list(vectorized["address"][:len(reference)]) == list(reference["address"]), "ordre des tokens différent"
+
+    print(f"✅ Équivalence OK sur {len(expected):,} tokens ({len(expected.columns)} features)")
+    if dtype_diffs:
+        print(f"   dtypes différents (valeurs identiques): {dtype_diffs}")
+
+
+if __name__ == "__main__":
+    main()
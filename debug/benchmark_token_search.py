@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+⏱️ Benchmark recherche de tokens: FTS5 (token_search_index) vs LIKE '%...%'
+Table tokens synthétique (1M lignes par défaut, un tiers avec description
+pump.fun) dans une base temporaire; meilleur temps sur --repeat exécutions.
+
+Usage: python debug/benchmark_token_search.py [--tokens 1000000] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from token_search_index import TokenSearchIndex, search
+
+QUERIES = ['p', 'pe', 'pepe', 'pepe do', 'wif', 'solana', 'sol', 'the best', 'zzzz']
+SYLLABLES = ['pe', 'do', 'ge', 'mo', 'on', 'ca', 't', 'sol', 'ana', 'bon', 'k', 'wif',
+             'fro', 'g', 'ai', 'dog', 'in', 'u', 'ch', 'ma', 'x', 'zy', 'ra']
+BASE58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def synthetic_tokens(conn: sqlite3.Connection, tokens: int, seed: int = 42):
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))) for _ in range(30000)]
+
+    def rows():
+        for i in range(tokens):
+            first, second = rng.choice(words), rng.choice(words)
+            description = f"{first} {second} the best meme coin on solana" if i % 3 == 0 else None
+            yield (''.join(rng.choice(BASE58) for _ in range(44)), first.upper()[:10],
+                   f"{first.title()} {second.title()}", rng.random() * 100, description)
+
+    conn.execute('''
+        CREATE TABLE tokens (
+            address TEXT PRIMARY KEY, symbol TEXT, name TEXT, invest_score REAL,
+            pump_fun_description TEXT, bonding_curve_status TEXT, is_tradeable INTEGER
+        )
+    ''')
+    conn.executemany("INSERT INTO tokens (address, symbol, name, invest_score, pump_fun_description) "
+                     "VALUES (?, ?, ?, ?, ?)", rows())
+    conn.commit()
+
+
+def best_time(func, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def like_search(conn: sqlite3.Connection, text: str, limit: int = 20):
+    pattern = f"%{text}%"
+    return conn.execute('''
+        SELECT address FROM tokens
+        WHERE symbol LIKE ? OR name LIKE ? OR pump_fun_description LIKE ?
+        ORDER BY invest_score DESC LIMIT ?
+    ''', (pattern, pattern, pattern, limit)).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recherche FTS5 des tokens")
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "search.db")
+        conn = sqlite3.connect(database)
+
+        print(f"🧪 Génération de {args.tokens:,} tokens...")
+        synthetic_tokens(conn, args.tokens)
+
+        start = time.perf_counter()
+        TokenSearchIndex(database)
+        print(f"   Index FTS5 construit en {time.perf_counter() - start:.1f}s")
+
+        print(f"{'requête':<12} {'FTS5':>10} {'LIKE':>10}  résultats")
+        for query in QUERIES:
+            fts_time, results = best_time(lambda: search(conn, query), args.repeat)
+            like_time, _ = best_time(lambda: like_search(conn, query), 1)
+            print(f"{query!r:<12} {fts_time * 1000:8.2f}ms {like_time * 1000:8.0f}ms  {len(results)}")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+🧪 Test du mode souscription de AdvancedWhaleTracker
+Serveur WebSocket local qui imite logsSubscribe / logsNotification
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from advance_whale_tracking_system import AdvancedWhaleTracker
+
+WALLETS = [f"StandInWhale{i:02d}".ljust(44, "1") for i in range(6)]
+SHARED_SIGNATURE = "shared_signature_seen_by_two_wallets"
+
+
+class LogsSubscribeStandIn:
+    """Stand-in minimal du endpoint WebSocket Helius"""
+
+    def __init__(self):
+        self.subscription_ids = itertools.count(100)
+        self.connections = 0
+        self.subscriptions = {}  # wallet -> subscription id
+
+    async def handler(self, ws):
+        self.connections += 1
+        try:
+            await self._serve(ws)
+        except websockets.exceptions.ConnectionClosed:
+            pass  # Fermeture côté client à la fin du test
+
+    async def _serve(self, ws):
+        async for message in ws:
+            request = json.loads(message)
+            wallet = request["params"][0]["mentions"][0]
+            sub_id = next(self.subscription_ids)
+            self.subscriptions[wallet] = sub_id
+            await ws.send(json.dumps({"jsonrpc": "2.0", "result": sub_id, "id": request["id"]}))
+
+            # Une notification propre par wallet + une signature partagée
+            for signature in (f"sig_{wallet[:14]}", SHARED_SIGNATURE):
+                await ws.send(json.dumps({
+                    "jsonrpc": "2.0",
+                    "method": "logsNotification",
+                    "params": {
+                        "result": {
+                            "context": {"slot": 1},
+                            "value": {"signature": signature, "err": None, "logs": []}
+                        },
+                        "subscription": sub_id
+                    }
+                }))
+
+
+async def run_stand_in_test():
+    stand_in = LogsSubscribeStandIn()
+    server = await websockets.serve(stand_in.handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    db_path = os.path.join(tempfile.mkdtemp(), "whales_test.db")
+    tracker = AdvancedWhaleTracker(database_path=db_path)
+    tracker.known_whales = {
+        wallet: {"label": f"Stand-in {i}", "success_rate": 80, "avg_profit": 2.0,
+                 "specialty": "safe_plays", "risk_level": "low", "copy_weight": 1.0}
+        for i, wallet in enumerate(WALLETS)
+    }
+    tracker.subscription_config.update({
+        "ws_url": f"ws://127.0.0.1:{port}",
+        "wallets_per_connection": 2,
+        "max_connections": 2,
+        "retry_delay": 0.1
+    })
+
+    fetched = []
+    processed = []
+
+    async def fake_get_transaction_detail(signature, commitment=None):
+        fetched.append(signature)
+        if signature == SHARED_SIGNATURE and fetched.count(signature) == 1:
+            raise RuntimeError("429 Too Many Requests")  # Échec passager: doit être retenté
+        return {"meta": {}, "signature": signature}
+
+    async def fake_process(tx, whale_address, whale_info, received_at=None):
+        processed.append((tx["signature"], whale_address, received_at))
+
+    tracker.get_transaction_detail = fake_get_transaction_detail
+    tracker.process_whale_transaction = fake_process
+
+    tasks = [
+        asyncio.create_task(tracker.monitor_whale_subscriptions()),
+        asyncio.create_task(tracker.run_signature_pipeline())
+    ]
+    await asyncio.sleep(1.0)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    server.close()
+    await server.wait_closed()
+
+    expected = {f"sig_{wallet[:14]}" for wallet in WALLETS} | {SHARED_SIGNATURE}
+    print(f"📡 Connexions ouvertes : {stand_in.connections}")
+    print(f"📝 Souscriptions       : {len(stand_in.subscriptions)}")
+    print(f"📥 Stats tracker       : {tracker.subscription_stats}")
+
+    assert stand_in.connections == 2, "pool limité à max_connections"
+    assert set(stand_in.subscriptions) == set(WALLETS), "une souscription par wallet"
+    assert sorted(fetched) == sorted(list(expected) + [SHARED_SIGNATURE]), \
+        "chaque signature récupérée une fois, plus la nouvelle tentative après échec"
+    assert len(processed) == len(expected)
+    assert all(isinstance(received_at, float) for _, _, received_at in processed), \
+        "received_at (réception du log) transmis jusqu'au traitement"
+    assert tracker.subscription_stats["fetch_retries"] == 1
+    assert SHARED_SIGNATURE in tracker.seen_signatures and not tracker.signature_retries
+    assert tracker.subscription_stats["duplicates"] == len(WALLETS) - 1
+
+    print("✅ Mode souscription OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_stand_in_test())
@@ -15,6 +15,10 @@ from typing import Dict, List, Optional, Tuple
 import argparse
 from dataclasses import dataclass
 
+from epoch_columns import EpochColumns
+from token_feature_store import TokenFeatureStore
+from token_write_layer import TokenWriteLayer
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +26,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Colonnes écrites par l'enrichisseur (hors updated_at)
+DEXSCREENER_COLUMNS = [
+    'dexscreener_pair_created_at', 'dexscreener_price_usd', 'dexscreener_market_cap',
+    'dexscreener_liquidity_base', 'dexscreener_liquidity_quote',
+    'dexscreener_volume_1h', 'dexscreener_volume_6h', 'dexscreener_volume_24h',
+    'dexscreener_price_change_1h', 'dexscreener_price_change_6h', 'dexscreener_price_change_h24',
+    'dexscreener_txns_1h', 'dexscreener_txns_6h', 'dexscreener_txns_24h',
+    'dexscreener_buys_1h', 'dexscreener_sells_1h', 'dexscreener_buys_24h', 'dexscreener_sells_24h',
+    'dexscreener_dexscreener_url', 'dexscreener_last_dexscreener_update'
+]
+
 @dataclass
 class RateLimiter:
     """Rate limiter pour DexScreener API - IDENTIQUE AU SCRIPT ORIGINAL"""
@@ -72,6 +87,11 @@ class ContinuousDexScreenerEnricher:
         self.rate_limiter = RateLimiter()
         self.base_url = "https://api.dexscreener.com/latest/dex/tokens"
         self.is_running = False
+        self.write_layer = TokenWriteLayer(database_path)
+        # Trigger tokens_hist -> token_features: chaque snapshot met à jour les features ML
+        self.feature_store = TokenFeatureStore(database_path)
+        # Colonnes *_epoch: sélection des tokens récents et historique 7 jours sur index
+        self.epoch_columns = EpochColumns(database_path)
         
         # Statistiques avec historique
         self.stats = {
@@ -83,7 +103,8 @@ class ContinuousDexScreenerEnricher:
             'cycles_completed': 0,
             'last_successful_tokens': [],
             'snapshots_created': 0,
-            'snapshot_errors': 0
+            'snapshot_errors': 0,
+            'unchanged_updates': 0
         }
     
     def get_tokens_to_enrich(self, limit: int, strategy: str = "oldest", min_hours_since_update: int = 1) -> List[Dict]:
@@ -140,7 +161,7 @@ class ContinuousDexScreenerEnricher:
                 query = f'''
                     SELECT address, symbol, updated_at, dexscreener_last_dexscreener_update
                     FROM tokens 
-                    WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                    WHERE {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                     AND symbol IS NOT NULL 
                     AND symbol != 'UNKNOWN' 
                     AND symbol != ''
@@ -373,155 +394,39 @@ class ContinuousDexScreenerEnricher:
     
     def update_token_in_database(self, address: str, dexscreener_data: Dict) -> bool:
         """
-        COPIE EXACTE de la méthode du script original qui fonctionne
+        Mise à jour dirty-checking: seules les colonnes modifiées sont écrites,
+        snapshot et updated_at uniquement si une valeur a réellement changé
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
+        fields = {column: dexscreener_data.get(column) for column in DEXSCREENER_COLUMNS}
         
         try:
-            update_query = '''
-                UPDATE tokens SET 
-                    dexscreener_pair_created_at = ?,
-                    dexscreener_price_usd = ?,
-                    dexscreener_market_cap = ?,
-                    dexscreener_liquidity_base = ?,
-                    dexscreener_liquidity_quote = ?,
-                    dexscreener_volume_1h = ?,
-                    dexscreener_volume_6h = ?,
-                    dexscreener_volume_24h = ?,
-                    dexscreener_price_change_1h = ?,
-                    dexscreener_price_change_6h = ?,
-                    dexscreener_price_change_h24 = ?,
-                    dexscreener_txns_1h = ?,
-                    dexscreener_txns_6h = ?,
-                    dexscreener_txns_24h = ?,
-                    dexscreener_buys_1h = ?,
-                    dexscreener_sells_1h = ?,
-                    dexscreener_buys_24h = ?,
-                    dexscreener_sells_24h = ?,
-                    dexscreener_dexscreener_url = ?,
-                    dexscreener_last_dexscreener_update = ?,
-                    updated_at = ?
-                WHERE address = ?
-            '''
-            
-            values = (
-                dexscreener_data.get('dexscreener_pair_created_at'),
-                dexscreener_data.get('dexscreener_price_usd'),
-                dexscreener_data.get('dexscreener_market_cap'),
-                dexscreener_data.get('dexscreener_liquidity_base'),
-                dexscreener_data.get('dexscreener_liquidity_quote'),
-                dexscreener_data.get('dexscreener_volume_1h'),
-                dexscreener_data.get('dexscreener_volume_6h'),
-                dexscreener_data.get('dexscreener_volume_24h'),
-                dexscreener_data.get('dexscreener_price_change_1h'),
-                dexscreener_data.get('dexscreener_price_change_6h'),
-                dexscreener_data.get('dexscreener_price_change_h24'),
-                dexscreener_data.get('dexscreener_txns_1h'),
-                dexscreener_data.get('dexscreener_txns_6h'),
-                dexscreener_data.get('dexscreener_txns_24h'),
-                dexscreener_data.get('dexscreener_buys_1h'),
-                dexscreener_data.get('dexscreener_sells_1h'),
-                dexscreener_data.get('dexscreener_buys_24h'),
-                dexscreener_data.get('dexscreener_sells_24h'),
-                dexscreener_data.get('dexscreener_dexscreener_url'),
-                dexscreener_data.get('dexscreener_last_dexscreener_update'),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                address
+            changed = self.write_layer.write_fields(
+                address, 'dexscreener', fields,
+                checked_columns=('dexscreener_last_dexscreener_update',),
+                before_write=self._snapshot_before_write
             )
-            
-            cursor.execute(update_query, values)
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                logger.debug(f"✅ Token {address} mis à jour avec succès")
-                return True
-            else:
-                logger.warning(f"⚠️ Token {address} non trouvé dans la base")
-                return False
-                
         except sqlite3.Error as e:
             logger.error(f"Erreur base de données pour {address}: {e}")
             self.stats['database_errors'] += 1
-            conn.rollback()
             return False
-        finally:
-            conn.close()
-        """
-        COPIE EXACTE de la méthode du script original qui fonctionne
-        """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
         
-        try:
-            update_query = '''
-                UPDATE tokens SET 
-                    dexscreener_pair_created_at = ?,
-                    dexscreener_price_usd = ?,
-                    dexscreener_market_cap = ?,
-                    dexscreener_liquidity_base = ?,
-                    dexscreener_liquidity_quote = ?,
-                    dexscreener_volume_1h = ?,
-                    dexscreener_volume_6h = ?,
-                    dexscreener_volume_24h = ?,
-                    dexscreener_price_change_1h = ?,
-                    dexscreener_price_change_6h = ?,
-                    dexscreener_price_change_h24 = ?,
-                    dexscreener_txns_1h = ?,
-                    dexscreener_txns_6h = ?,
-                    dexscreener_txns_24h = ?,
-                    dexscreener_buys_1h = ?,
-                    dexscreener_sells_1h = ?,
-                    dexscreener_buys_24h = ?,
-                    dexscreener_sells_24h = ?,
-                    dexscreener_dexscreener_url = ?,
-                    dexscreener_last_dexscreener_update = ?,
-                    updated_at = ?
-                WHERE address = ?
-            '''
-            
-            values = (
-                dexscreener_data.get('dexscreener_pair_created_at'),
-                dexscreener_data.get('dexscreener_price_usd'),
-                dexscreener_data.get('dexscreener_market_cap'),
-                dexscreener_data.get('dexscreener_liquidity_base'),
-                dexscreener_data.get('dexscreener_liquidity_quote'),
-                dexscreener_data.get('dexscreener_volume_1h'),
-                dexscreener_data.get('dexscreener_volume_6h'),
-                dexscreener_data.get('dexscreener_volume_24h'),
-                dexscreener_data.get('dexscreener_price_change_1h'),
-                dexscreener_data.get('dexscreener_price_change_6h'),
-                dexscreener_data.get('dexscreener_price_change_h24'),
-                dexscreener_data.get('dexscreener_txns_1h'),
-                dexscreener_data.get('dexscreener_txns_6h'),
-                dexscreener_data.get('dexscreener_txns_24h'),
-                dexscreener_data.get('dexscreener_buys_1h'),
-                dexscreener_data.get('dexscreener_sells_1h'),
-                dexscreener_data.get('dexscreener_buys_24h'),
-                dexscreener_data.get('dexscreener_sells_24h'),
-                dexscreener_data.get('dexscreener_dexscreener_url'),
-                dexscreener_data.get('dexscreener_last_dexscreener_update'),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                address
-            )
-            
-            cursor.execute(update_query, values)
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                logger.debug(f"✅ Token {address} mis à jour avec succès")
-                return True
-            else:
-                logger.warning(f"⚠️ Token {address} non trouvé dans la base")
-                return False
-                
-        except sqlite3.Error as e:
-            logger.error(f"Erreur base de données pour {address}: {e}")
-            self.stats['database_errors'] += 1
-            conn.rollback()
+        if changed is None:
+            logger.warning(f"⚠️ Token {address} non trouvé dans la base")
             return False
-        finally:
-            conn.close()
+        
+        if changed:
+            logger.debug(f"✅ Token {address} mis à jour ({len(changed)} colonnes modifiées)")
+        else:
+            self.stats['unchanged_updates'] += 1
+            logger.debug(f"⏸️ Token {address} inchangé, fraîcheur seule mise à jour")
+        return True
+    
+    def _snapshot_before_write(self, address: str, changed_fields: Dict):
+        """Snapshot tokens_hist juste avant une écriture qui modifie le token"""
+        if self.create_token_snapshot(address, 'before_dexscreener_update'):
+            self.stats['snapshots_created'] += 1
+        else:
+            self.stats['snapshot_errors'] += 1
     
     def count_consecutive_dexscreener_failures(self, address: str) -> int:
         """
@@ -532,11 +437,11 @@ class ContinuousDexScreenerEnricher:
         
         try:
             # Compter les snapshots récents sans données DexScreener
-            query = '''
+            query = f'''
                 SELECT COUNT(*) as failures
                 FROM tokens_hist 
                 WHERE address = ? 
-                AND snapshot_timestamp > datetime('now', '-7 days', 'localtime')
+                AND {self.epoch_columns.epoch('tokens_hist', 'snapshot_timestamp')} > CAST(strftime('%s', 'now', '-7 days') AS INTEGER)
                 AND (dexscreener_last_dexscreener_update IS NULL 
                      OR dexscreener_last_dexscreener_update = '')
                 ORDER BY snapshot_timestamp DESC
@@ -591,18 +496,18 @@ class ContinuousDexScreenerEnricher:
                 UPDATE tokens SET 
                     status = ?,
                     updated_at = datetime('now', 'localtime')
-                WHERE address = ?
+                WHERE address = ? AND status IS NOT ?
             '''
             
-            cursor.execute(update_query, (status, address))
+            cursor.execute(update_query, (status, address, status))
             
             if cursor.rowcount > 0:
                 conn.commit()
                 logger.debug(f"📝 Status du token {address} mis à jour: {status}")
-                return True
             else:
-                logger.warning(f"⚠️ Token {address} non trouvé pour mise à jour status")
-                return False
+                # Statut déjà à jour: pas d'écriture ni de bump d'updated_at
+                logger.debug(f"⏸️ Status du token {address} inchangé: {status}")
+            return True
                 
         except sqlite3.Error as e:
             logger.error(f"Erreur mise à jour status pour {address}: {e}")
@@ -621,19 +526,17 @@ class ContinuousDexScreenerEnricher:
         if self.verbose:
             logger.info(f"🔍 Enrichissement DexScreener: {symbol} ({address[:8]}...)")
         
-        # 1. CRÉER UN SNAPSHOT AVANT L'ENRICHISSEMENT
-        snapshot_created = self.create_token_snapshot(address, 'before_dexscreener_update')
-        if snapshot_created:
-            self.stats['snapshots_created'] += 1
-        else:
-            self.stats['snapshot_errors'] += 1
-            logger.debug(f"⚠️ Impossible de créer le snapshot pour {symbol}, on continue quand même")
-        
-        # 2. ENRICHISSEMENT NORMAL (logique originale inchangée)
-        # Récupérer les données DexScreener
+        # 1. Récupérer les données DexScreener
         pair_data = self.fetch_dexscreener_data(address)
         
         if not pair_data:  # Aucune donnée DexScreener
+            # Snapshot de la tentative échouée (base du comptage des échecs consécutifs)
+            if self.create_token_snapshot(address, 'before_dexscreener_update'):
+                self.stats['snapshots_created'] += 1
+            else:
+                self.stats['snapshot_errors'] += 1
+                logger.debug(f"⚠️ Impossible de créer le snapshot pour {symbol}, on continue quand même")
+            
             # Compter les échecs précédents dans l'historique
             consecutive_failures = self.count_consecutive_dexscreener_failures(address)
             token_age_days = self.get_token_age_days(address)
@@ -653,7 +556,7 @@ class ContinuousDexScreenerEnricher:
         # Extraire les champs selon votre structure
         dexscreener_fields = self.extract_dexscreener_fields(pair_data)
         
-        # Mettre à jour en base
+        # 2. Mettre à jour en base (snapshot uniquement si le token change)
         success = self.update_token_in_database(address, dexscreener_fields)
         
         if success:
@@ -786,6 +689,7 @@ class ContinuousDexScreenerEnricher:
         logger.info(f"✅ Total processed:     {self.stats['total_processed']}")
         logger.info(f"💾 Successful updates:  {self.stats['successful_updates']}")
         logger.info(f"📸 Snapshots created:   {self.stats['snapshots_created']}")
+        logger.info(f"⏸️ Unchanged updates:   {self.stats['unchanged_updates']}")
         logger.info(f"❌ API errors:          {self.stats['api_errors']}")
         logger.info(f"⚪ No data found:       {self.stats['no_data_found']}")
         logger.info(f"🔄 Cycles completed:    {self.stats['cycles_completed']}")
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+📬 Durable Job Queue - File de jobs persistante dans un fichier SQLite dédié
+Leases avec visibility timeout, compteur de tentatives, backoff et dead-letter.
+Un job leasé non acquitté redevient visible à l'expiration du lease: un crash
+ou un redémarrage reprend exactement où le travail s'est arrêté, et plusieurs
+process peuvent consommer la même file (WAL + BEGIN IMMEDIATE).
+"""
+
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('durable_job_queue')
+
+
+class DurableJobQueue:
+    """File persistante: enqueue / lease / ack / nack
+
+    Un même payload ne peut être qu'une fois en attente ou en cours dans une
+    file (index unique partiel), donc re-enqueue un token déjà en file est
+    sans effet.
+    """
+
+    def __init__(self, queue_path: str = "enrichment_queue.db", queue_name: str = "enrichment",
+                 visibility_timeout: float = 120.0, max_attempts: int = 5,
+                 retry_base_delay: float = 10.0, retry_max_delay: float = 900.0):
+        self.queue_path = queue_path
+        self.queue_name = queue_name
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self.stats = {
+            'enqueued': 0,
+            'duplicates': 0,
+            'leases': 0,
+            'acked': 0,
+            'retried': 0,
+            'dead_lettered': 0,
+            'reclaimed': 0
+        }
+
+        self.init_queue()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.queue_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def init_queue(self):
+        """Schéma de la file (WAL pour lecteurs/écrivains concurrents)"""
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    priority INTEGER DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, dead
+                    attempts INTEGER DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_payload
+                ON jobs(queue, payload) WHERE status IN ('pending', 'leased')
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_jobs_ready
+                ON jobs(queue, status, available_at, priority)
+            ''')
+        except sqlite3.Error as e:
+            logger.error(f"Error creating job queue {self.queue_path}: {e}")
+        finally:
+            conn.close()
+
+    # === Production ===
+
+    def enqueue(self, payloads: List[str], priority: int = 0, delay: float = 0.0) -> int:
+        """Ajouter des jobs, retourne le nombre réellement ajoutés (hors doublons)"""
+        if not payloads:
+            return 0
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO jobs (queue, payload, priority, available_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(self.queue_name, payload, priority, now + delay, now, now) for payload in payloads])
+            added = conn.total_changes - before
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Enqueue error: {e}")
+            return 0
+        finally:
+            conn.close()
+
+        self.stats['enqueued'] += added
+        self.stats['duplicates'] += len(payloads) - added
+        return added
+
+    # === Consommation ===
+
+    def lease(self, max_jobs: int, visibility_timeout: Optional[float] = None) -> List[Dict]:
+        """Prendre jusqu'à max_jobs jobs visibles (pending prêts ou leases expirés)
+
+        Un lease expiré qui a épuisé ses tentatives part en dead-letter au lieu
+        d'être redistribué.
+        """
+        now = time.time()
+        expires_at = now + (visibility_timeout or self.visibility_timeout)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+
+            # Leases expirés sans tentative restante: dead-letter
+            dead = conn.execute('''
+                UPDATE jobs SET status = 'dead', lease_owner = NULL, updated_at = ?,
+                                last_error = COALESCE(last_error, 'lease expired')
+                WHERE queue = ? AND status = 'leased' AND lease_expires_at <= ? AND attempts >= ?
+            ''', (now, self.queue_name, now, self.max_attempts)).rowcount
+
+            rows = conn.execute('''
+                SELECT id, payload, attempts, status FROM jobs
+                WHERE queue = ?
+                  AND ((status = 'pending' AND available_at <= ?)
+                       OR (status = 'leased' AND lease_expires_at <= ?))
+                ORDER BY priority DESC, available_at, id
+                LIMIT ?
+            ''', (self.queue_name, now, now, max_jobs)).fetchall()
+
+            conn.executemany('''
+                UPDATE jobs SET status = 'leased', lease_owner = ?, lease_expires_at = ?,
+                                attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', [(self.worker_id, expires_at, now, row[0]) for row in rows])
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Lease error: {e}")
+            return []
+        finally:
+            conn.close()
+
+        reclaimed = sum(1 for row in rows if row[3] == 'leased')
+        if reclaimed:
+            logger.info(f"♻️ Reclaimed {reclaimed} jobs with expired leases")
+        if dead:
+            logger.warning(f"💀 {dead} jobs dead-lettered after {self.max_attempts} attempts")
+
+        self.stats['leases'] += len(rows)
+        self.stats['reclaimed'] += reclaimed
+        self.stats['dead_lettered'] += dead
+        return [{'id': row[0], 'payload': row[1], 'attempts': row[2] + 1} for row in rows]
+
+    def extend_lease(self, job_ids: List[int], visibility_timeout: Optional[float] = None) -> int:
+        """Prolonger les leases encore détenus par ce worker"""
+        if not job_ids:
+            return 0
+        now = time.time()
+        expires_at = now + (visibility_timeout or self.visibility_timeout)
+        conn = self._connect()
+        try:
+            cursor = conn.executemany('''
+                UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+                WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            ''', [(expires_at, now, job_id, self.worker_id) for job_id in job_ids])
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def ack(self, job_ids: List[int]) -> int:
+        """Jobs terminés: supprimés s'ils sont toujours leasés par ce worker"""
+        if not job_ids:
+            return 0
+        conn = self._connect()
+        try:
+            cursor = conn.executemany('''
+                DELETE FROM jobs WHERE id = ? AND status = 'leased' AND lease_owner = ?
+            ''', [(job_id, self.worker_id) for job_id in job_ids])
+            acked = cursor.rowcount
+        finally:
+            conn.close()
+
+        # Un lease perdu (expiré puis repris ailleurs) n'est pas acquitté ici
+        if acked < len(job_ids):
+            logger.warning(f"⚠️ {len(job_ids) - acked} acks ignored: lease lost")
+        self.stats['acked'] += acked
+        return acked
+
+    def nack(self, job_ids: List[int], error: str = "") -> Dict[str, int]:
+        """Échecs: retry avec backoff exponentiel, dead-letter après max_attempts"""
+        if not job_ids:
+            return {'retried': 0, 'dead': 0}
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            placeholders = ",".join("?" * len(job_ids))
+            rows = conn.execute(f'''
+                SELECT id, attempts FROM jobs
+                WHERE id IN ({placeholders}) AND status = 'leased' AND lease_owner = ?
+            ''', (*job_ids, self.worker_id)).fetchall()
+
+            retry, dead = [], []
+            for job_id, attempts in rows:
+                if attempts >= self.max_attempts:
+                    dead.append((now, error, job_id))
+                else:
+                    delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1))
+                    retry.append((now + delay, now, error, job_id))
+
+            conn.executemany('''
+                UPDATE jobs SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL,
+                                available_at = ?, updated_at = ?, last_error = ?
+                WHERE id = ?
+            ''', retry)
+            conn.executemany('''
+                UPDATE jobs SET status = 'dead', lease_owner = NULL, lease_expires_at = NULL,
+                                updated_at = ?, last_error = ?
+                WHERE id = ?
+            ''', dead)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK")
+            logger.error(f"Nack error: {e}")
+            return {'retried': 0, 'dead': 0}
+        finally:
+            conn.close()
+
+        if dead:
+            logger.warning(f"💀 {len(dead)} jobs dead-lettered: {error}")
+        self.stats['retried'] += len(retry)
+        self.stats['dead_lettered'] += len(dead)
+        return {'retried': len(retry), 'dead': len(dead)}
+
+    # === Administration ===
+
+    def requeue_dead(self, limit: Optional[int] = None) -> int:
+        """Remettre les jobs dead-letter en attente (tentatives remises à zéro)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f'''
+                UPDATE OR IGNORE jobs SET status = 'pending', attempts = 0, available_at = ?, updated_at = ?
+                WHERE id IN (
+                    SELECT id FROM jobs WHERE queue = ? AND status = 'dead'
+                    ORDER BY updated_at LIMIT ?
+                )
+            ''', (now, now, self.queue_name, limit if limit is not None else -1))
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+    def pending_count(self) -> int:
+        """Jobs en attente ou en cours (ce qu'il reste à faire)"""
+        conn = self._connect()
+        try:
+            return conn.execute('''
+                SELECT COUNT(*) FROM jobs WHERE queue = ? AND status IN ('pending', 'leased')
+            ''', (self.queue_name,)).fetchone()[0]
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute('''
+                SELECT status, COUNT(*) FROM jobs WHERE queue = ? GROUP BY status
+            ''', (self.queue_name,)).fetchall())
+        finally:
+            conn.close()
+
+        return {
+            **self.stats,
+            'worker_id': self.worker_id,
+            'pending': counts.get('pending', 0),
+            'leased': counts.get('leased', 0),
+            'dead': counts.get('dead', 0)
+        }
+
+
+def main():
+    """Inspection / administration de la file"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Durable enrichment job queue")
+    parser.add_argument("--queue-db", default="enrichment_queue.db", help="Fichier SQLite de la file")
+    parser.add_argument("--queue", default="enrichment", help="Nom de la file")
+    parser.add_argument("--requeue-dead", action="store_true", help="Remettre les jobs dead-letter en attente")
+    parser.add_argument("--show-dead", type=int, default=0, help="Afficher les N derniers jobs dead-letter")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    queue = DurableJobQueue(args.queue_db, queue_name=args.queue)
+
+    if args.requeue_dead:
+        print(f"♻️ {queue.requeue_dead()} jobs remis en attente")
+
+    stats = queue.get_stats()
+    print(f"📬 File '{args.queue}' ({args.queue_db})")
+    print(f"   En attente : {stats['pending']}")
+    print(f"   En cours   : {stats['leased']}")
+    print(f"   Dead-letter: {stats['dead']}")
+
+    if args.show_dead:
+        conn = queue._connect()
+        try:
+            rows = conn.execute('''
+                SELECT payload, attempts, last_error, datetime(updated_at, 'unixepoch', 'localtime')
+                FROM jobs WHERE queue = ? AND status = 'dead'
+                ORDER BY updated_at DESC LIMIT ?
+            ''', (args.queue, args.show_dead)).fetchall()
+        finally:
+            conn.close()
+        for payload, attempts, error, updated in rows:
+            print(f"   💀 {payload} | {attempts} tentatives | {error or '-'} | {updated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+📐 Effective Columns - Métriques effectives en colonnes générées indexées
+Prix / volume "DexScreener sinon Jupiter" et date de dernière mise à jour,
+calculés par SQLite (GENERATED ALWAYS AS) au lieu de COALESCE répétés dans les
+WHERE / ORDER BY: les filtres et tris passent par un index au lieu d'un scan.
+"""
+
+import argparse
+import logging
+import sqlite3
+from typing import Dict, List
+
+logger = logging.getLogger('effective_columns')
+
+# (table, colonne générée, type, expression, colonnes sources)
+# DexScreener à 0 = pas de donnée: même règle que le "or" Python des routes API
+EFFECTIVE_COLUMNS = [
+    ('tokens', 'effective_price_usd', 'REAL',
+     "COALESCE(NULLIF(dexscreener_price_usd, 0), price_usdc, 0)", ['dexscreener_price_usd', 'price_usdc']),
+    ('tokens', 'effective_volume_24h', 'REAL',
+     "COALESCE(NULLIF(dexscreener_volume_24h, 0), volume_24h, 0)", ['dexscreener_volume_24h', 'volume_24h']),
+    # COALESCE(updated_at, first_discovered_at) en epoch (colonnes de epoch_columns)
+    ('tokens', 'last_update_epoch', 'INTEGER',
+     "COALESCE(updated_at_epoch, first_discovered_at_epoch, 0)", ['updated_at_epoch', 'first_discovered_at_epoch']),
+    # tokens_hist: lues par token via idx_tokens_hist_address_snapshot_timestamp_epoch
+    ('tokens_hist', 'effective_price_usd', 'REAL',
+     "COALESCE(NULLIF(dexscreener_price_usd, 0), price_usdc, 0)", ['dexscreener_price_usd', 'price_usdc']),
+    ('tokens_hist', 'effective_volume_24h', 'REAL',
+     "COALESCE(NULLIF(dexscreener_volume_24h, 0), volume_24h, 0)", ['dexscreener_volume_24h', 'volume_24h']),
+]
+GENERATED_COLUMNS = {column for _, column, *_ in EFFECTIVE_COLUMNS}
+
+# address en dernière colonne: pagination par curseur (valeur, address) de /api/tokens-detail
+EFFECTIVE_INDEXES = [
+    ('tokens', ['effective_price_usd', 'address']),
+    ('tokens', ['effective_volume_24h', 'address']),
+    ('tokens', ['last_update_epoch', 'address']),
+]
+
+# Index remplacés (expressions COALESCE devenues colonnes générées)
+OBSOLETE_INDEXES = ['idx_tokens_sort_last_update']
+
+
+class EffectiveColumns:
+    """Colonnes générées VIRTUAL + index
+
+    SQLite n'accepte pas ALTER TABLE ADD COLUMN ... STORED: les colonnes sont
+    VIRTUAL, calculées à la lecture; l'index en garde la valeur, si bien que
+    filtres et tris indexés ne recalculent rien. Invisibles dans PRAGMA
+    table_info: les écrivains qui listent les colonnes ne les voient pas.
+    """
+
+    def __init__(self, database_path: str = "tokens.db"):
+        self.database_path = database_path
+        self.columns = self.init_schema()
+        self.available = bool(self.columns)
+
+    def init_schema(self) -> List[tuple]:
+        """Colonnes générées et index pour les tables présentes; rend les (table, colonne) gérées"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.execute("BEGIN IMMEDIATE")
+
+            managed = []
+            for table, column, column_type, expression, sources in EFFECTIVE_COLUMNS:
+                if table not in tables:
+                    continue
+                # table_xinfo: table_info ne liste pas les colonnes générées
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+                missing = [source for source in sources if source not in existing]
+                if missing:
+                    logger.debug(f"{table}.{column} ignorée, colonnes absentes: {missing}")
+                    continue
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type} "
+                                 f"GENERATED ALWAYS AS ({expression}) VIRTUAL")
+                    logger.info(f"✅ Added generated column: {table}.{column}")
+                managed.append((table, column))
+
+            for table, index_columns in EFFECTIVE_INDEXES:
+                if table not in tables:
+                    continue
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({table})")}
+                if set(index_columns) <= existing:
+                    name = f"idx_{table}_{'_'.join(index_columns)}"
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(index_columns)})")
+
+            if ('tokens', 'last_update_epoch') in managed:
+                for name in OBSOLETE_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+            conn.commit()
+            return managed
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Effective columns schema error: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Lignes et valeurs non nulles par colonne générée"""
+        conn = sqlite3.connect(self.database_path)
+        try:
+            stats = {}
+            for table, column in self.columns:
+                total, non_zero = conn.execute(
+                    f"SELECT COUNT(*), COUNT(NULLIF({column}, 0)) FROM {table}"
+                ).fetchone()
+                stats[f"{table}.{column}"] = {'rows': total, 'non_zero': non_zero}
+            return stats
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Colonnes générées des métriques effectives")
+    parser.add_argument("--database", default="tokens.db", help="Base SQLite")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    columns = EffectiveColumns(args.database)
+    if not columns.available:
+        print("❌ Aucune colonne générée (tables ou colonnes sources absentes)")
+        return
+
+    for key, state in columns.get_stats().items():
+        print(f"📐 {key:<36} {state['non_zero']:>10} / {state['rows']} lignes non nulles")
+
+
+if __name__ == "__main__":
+    main()
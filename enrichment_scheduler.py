@@ -0,0 +1,642 @@
+#!/usr/bin/env python3
+"""
+🗓️ Enrichment Scheduler - Ordonnanceur unifié des enrichisseurs
+Une seule file de priorité de jobs (token, source) au lieu de 7 boucles "oldest"
+indépendantes. Priorité = fraîcheur x activité du token / coût de la source,
+dispatch sous budgets API globaux (SYSTEM_CONFIG["api_rates"]).
+"""
+
+import asyncio
+import heapq
+import logging
+import sqlite3
+import time
+import argparse
+from collections import deque, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from math import log1p
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from epoch_columns import EpochColumns
+from system_optimization import SYSTEM_CONFIG
+from token_write_layer import TokenWriteLayer
+
+logger = logging.getLogger('enrichment_scheduler')
+
+
+@dataclass
+class EnrichmentSource:
+    """Description d'une source d'enrichissement"""
+    name: str
+    refresh_seconds: int              # Âge cible: au-delà, le job est "stale"
+    min_interval_seconds: int         # Ne jamais relancer plus souvent que ça
+    api_calls: Dict[str, int]         # Budget API consommé par job
+    eligibility_sql: str              # Filtre WHERE sur la table tokens (alias t), {discovered}: epoch de découverte
+    last_checked_sql: Optional[str] = None  # Colonne de fraîcheur propre à la source
+    max_concurrent: int = 2
+    fetcher: Optional[Callable[[str], Awaitable[bool]]] = None
+
+    @property
+    def cost(self) -> int:
+        return max(1, sum(self.api_calls.values()))
+
+
+@dataclass(order=True)
+class EnrichmentJob:
+    """Job (token, source) dans la file de priorité"""
+    sort_key: float
+    address: str = field(compare=False)
+    source: str = field(compare=False)
+    priority: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+class TokenBucket:
+    """Budget API global (token bucket asynchrone)"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.total_wait = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self, amount: int = 1):
+        """Consommer `amount` appels, en attendant si le budget est épuisé"""
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                wait_time = (amount - self.tokens) / self.rate
+                self.total_wait += wait_time
+                await asyncio.sleep(wait_time)
+                self._refill()
+            self.tokens -= amount
+
+
+# Sources connues: colonnes de fraîcheur et critères d'éligibilité repris
+# des requêtes get_tokens_* de chaque enrichisseur
+DEFAULT_SOURCES = {
+    "full": EnrichmentSource(
+        name="full",
+        refresh_seconds=3600,
+        min_interval_seconds=300,
+        api_calls={"helius": 2, "dexscreener": 1, "jupiter": 1, "rugcheck": 1},
+        eligibility_sql="""(t.symbol IS NULL OR t.symbol = 'UNKNOWN' OR t.symbol = '')
+            AND {discovered} > CAST(strftime('%s', 'now', '-48 hours') AS INTEGER)""",
+        max_concurrent=4
+    ),
+    "symbol": EnrichmentSource(
+        name="symbol",
+        refresh_seconds=3600,
+        min_interval_seconds=3600,
+        api_calls={"dexscreener": 1, "jupiter": 1, "solscan": 1},
+        eligibility_sql="""(t.symbol = 'ERROR' OR t.symbol = 'UNKNOWN' OR t.symbol IS NULL OR t.symbol = '')
+            AND (t.skip_symbol_fix IS NULL OR t.skip_symbol_fix = FALSE)
+            AND (t.symbol_fix_attempts IS NULL OR t.symbol_fix_attempts < 3)""",
+        last_checked_sql="t.last_symbol_fix_attempt",
+        max_concurrent=2
+    ),
+    "dexscreener": EnrichmentSource(
+        name="dexscreener",
+        refresh_seconds=3600,
+        min_interval_seconds=600,
+        api_calls={"dexscreener": 1},
+        eligibility_sql="""t.symbol IS NOT NULL AND t.symbol != 'UNKNOWN' AND t.symbol != ''
+            AND (t.status IS NULL OR t.status IN ('active', 'new'))""",
+        last_checked_sql="t.dexscreener_last_dexscreener_update",
+        max_concurrent=2
+    ),
+    "pump_fun": EnrichmentSource(
+        name="pump_fun",
+        refresh_seconds=3600,
+        min_interval_seconds=900,
+        api_calls={"pumpfun": 1},
+        eligibility_sql="""(t.exists_on_pump IS NULL OR t.exists_on_pump = 1)
+            AND (t.status IS NULL OR t.status NOT IN ('archived', 'blacklisted'))""",
+        last_checked_sql="t.pump_fun_last_pump_update",
+        max_concurrent=1
+    ),
+    "pump_check": EnrichmentSource(
+        name="pump_check",
+        refresh_seconds=86400,
+        min_interval_seconds=86400,
+        api_calls={"pumpfun": 1},
+        eligibility_sql="t.exists_on_pump IS NULL AND (t.status = 'no_dex_data' OR t.status IS NULL)",
+        max_concurrent=1
+    ),
+    "rugcheck": EnrichmentSource(
+        name="rugcheck",
+        refresh_seconds=6 * 3600,
+        min_interval_seconds=1800,
+        api_calls={"rugcheck": 1},
+        eligibility_sql="t.symbol IS NOT NULL AND t.symbol != 'UNKNOWN'",
+        max_concurrent=1
+    ),
+}
+
+class EnrichmentScheduler:
+    """Ordonnanceur unique (token, source) à file de priorité"""
+
+    def __init__(self, database_path: str = "tokens.db", sources: Dict[str, EnrichmentSource] = None,
+                 max_concurrent: int = 8, refill_interval: int = 30, candidates_per_source: int = 200,
+                 run_flush_size: int = 50):
+        self.database_path = database_path
+        self.sources = sources or {}
+        self.max_concurrent = max_concurrent
+        self.refill_interval = refill_interval
+        self.candidates_per_source = candidates_per_source
+        self.run_flush_size = run_flush_size
+        self.epoch_columns = EpochColumns(database_path)
+        self.is_running = False
+
+        self.queues: Dict[str, List[EnrichmentJob]] = defaultdict(list)  # heapq par source (priorité négative)
+        self.pending: Dict[Tuple[str, str], EnrichmentJob] = {}  # En file ou en cours
+        self.pending_runs: List[tuple] = []  # Passages pas encore écrits dans enrichment_schedule
+        self.queue_event = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.running: Dict[str, int] = defaultdict(int)  # Jobs en cours par source
+        self.budgets = {
+            api: TokenBucket(rates["calls_per_second"], rates["burst"])
+            for api, rates in SYSTEM_CONFIG["api_rates"].items()
+        }
+
+        # Métriques: profondeur de file et latences par source
+        self.job_latencies = defaultdict(lambda: deque(maxlen=200))   # enqueue -> fin
+        self.run_latencies = defaultdict(lambda: deque(maxlen=200))   # durée du fetch
+        self.stats = defaultdict(lambda: {'dispatched': 0, 'succeeded': 0, 'failed': 0})
+
+        self.init_schedule_table()
+        self.write_layer = TokenWriteLayer(database_path)  # Garantit token_field_freshness
+
+    def init_schedule_table(self):
+        """Table de suivi des derniers passages par (token, source)"""
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS enrichment_schedule (
+                    address TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    last_run_at DATETIME,
+                    last_success BOOLEAN,
+                    runs INTEGER DEFAULT 0,
+                    PRIMARY KEY (address, source)
+                )
+            ''')
+            # Candidats d'une source triés par dernier passage (refill_queue)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_enrichment_schedule_source_last_run
+                ON enrichment_schedule(source, last_run_at)
+            ''')
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error creating enrichment_schedule table: {e}")
+        finally:
+            conn.close()
+
+    def register_source(self, source: EnrichmentSource):
+        """Ajouter une source (avec son fetcher) à l'ordonnanceur"""
+        self.sources[source.name] = source
+
+    # === Construction de la file ===
+
+    def compute_priority(self, source: EnrichmentSource, age_seconds: Optional[float],
+                         volume_24h: float, whale_hits: int, progress: float,
+                         unchanged_seconds: Optional[float] = None) -> float:
+        """Priorité = fraîcheur relative x activité / coût
+
+        unchanged_seconds: durée pendant laquelle les champs de la source n'ont
+        pas bougé (token_field_freshness). Un token "inchangé mais vérifié"
+        est moins prioritaire qu'un token qui bouge encore.
+        """
+        if age_seconds is None:
+            staleness = 10.0  # Jamais enrichi: très prioritaire
+        else:
+            staleness = min(10.0, age_seconds / source.refresh_seconds)
+            if unchanged_seconds:
+                staleness /= min(4.0, 1.0 + unchanged_seconds / (4 * source.refresh_seconds))
+
+        activity = (1.0
+                    + log1p(max(volume_24h, 0) / 10_000)
+                    + 0.5 * min(whale_hits, 10)
+                    + max(progress, 0) / 50)
+
+        return staleness * activity / source.cost
+
+    def _load_whale_hits(self, cursor) -> Dict[str, int]:
+        """Nombre de transactions whale récentes par token"""
+        try:
+            cursor.execute(f'''
+                SELECT token_address, COUNT(*) FROM whale_transactions_live
+                WHERE {self.epoch_columns.epoch('whale_transactions_live', 'timestamp')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
+                GROUP BY token_address
+            ''')
+            return dict(cursor.fetchall())
+        except sqlite3.Error:
+            return {}  # Table whale absente: pas de bonus
+
+    def _select_candidates(self, sources: List[Tuple[str, EnrichmentSource]],
+                           runs: List[tuple]) -> Tuple[Dict[str, int], List[tuple]]:
+        """Écrire les passages en attente puis lire les candidats de chaque source
+
+        sqlite bloquant: appelé via asyncio.to_thread. Passages écrits d'abord:
+        un job terminé ne doit pas revenir en candidat.
+        """
+        if runs:
+            self._write_runs(runs)
+
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        cursor = conn.cursor()
+        candidates = []
+
+        try:
+            whale_hits = self._load_whale_hits(cursor)
+            discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at', alias='t')
+
+            for name, source in sources:
+                # Dernier passage = le plus récent entre la colonne de la source
+                # (enrichisseurs lancés hors ordonnanceur) et enrichment_schedule.
+                # Sans colonne propre: s.last_run_at seul, servi par idx_enrichment_schedule_source_last_run
+                if source.last_checked_sql:
+                    last_checked = (f"NULLIF(MAX(COALESCE(s.last_run_at, ''), "
+                                    f"COALESCE({source.last_checked_sql}, '')), '')")
+                else:
+                    last_checked = "s.last_run_at"
+
+                query = f'''
+                    SELECT address,
+                           CAST(strftime('%s', 'now', 'localtime') AS INTEGER)
+                               - CAST(strftime('%s', last_checked) AS INTEGER) AS age_seconds,
+                           volume, progress, unchanged_seconds
+                    FROM (
+                        SELECT t.address,
+                               {last_checked} AS last_checked,
+                               COALESCE(t.dexscreener_volume_24h, t.volume_24h, 0) AS volume,
+                               COALESCE(t.bonding_curve_progress, 0) AS progress,
+                               CAST(strftime('%s', f.last_checked_at) AS INTEGER)
+                                   - CAST(strftime('%s', COALESCE(f.last_changed_at, f.last_checked_at)) AS INTEGER)
+                                   AS unchanged_seconds
+                        FROM tokens t
+                        LEFT JOIN enrichment_schedule s
+                            ON s.address = t.address AND s.source = ?
+                        LEFT JOIN token_field_freshness f
+                            ON f.address = t.address AND f.source = ?
+                        WHERE {source.eligibility_sql.format(discovered=discovered)}
+                    )
+                    WHERE last_checked IS NULL
+                       OR last_checked < datetime('now', '-{int(source.min_interval_seconds)} seconds', 'localtime')
+                    ORDER BY last_checked IS NOT NULL, last_checked ASC
+                    LIMIT ?
+                '''
+
+                try:
+                    cursor.execute(query, (name, name, self.candidates_per_source))
+                    candidates.append((name, cursor.fetchall()))
+                except sqlite3.Error as e:
+                    logger.debug(f"Candidate query failed for {name}: {e}")
+        finally:
+            conn.close()
+
+        return whale_hits, candidates
+
+    async def refill_queue(self) -> int:
+        """Sélectionner les candidats de chaque source et les pousser dans la file"""
+        sources = [(name, source) for name, source in self.sources.items() if source.fetcher is not None]
+        async with self.flush_lock:  # Pas de flush concurrent pendant la lecture des candidats
+            runs, self.pending_runs = self.pending_runs, []
+            whale_hits, candidates = await asyncio.to_thread(self._select_candidates, sources, runs)
+
+        # Jobs terminés pendant la lecture: passage pas encore écrit, à ne pas relancer
+        unflushed = {(address, source_name) for address, source_name, *_ in self.pending_runs}
+        now = time.time()
+        added = 0
+
+        for name, rows in candidates:
+            source = self.sources[name]
+            for address, age_seconds, volume, progress, unchanged_seconds in rows:
+                key = (address, name)
+                if key in self.pending or key in unflushed:
+                    continue
+
+                priority = self.compute_priority(
+                    source, age_seconds, volume or 0, whale_hits.get(address, 0), progress or 0,
+                    unchanged_seconds
+                )
+                job = EnrichmentJob(-priority, address, name, priority, now)
+                heapq.heappush(self.queues[name], job)
+                self.pending[key] = job
+                added += 1
+
+        if added:
+            self.queue_event.set()
+            logger.debug(f"🗓️ {added} jobs added (queue depth: {self.queue_size()})")
+
+        return added
+
+    def submit(self, address: str, source_name: str, priority: float = 100.0) -> bool:
+        """Ajouter un job explicite (ex: nouveau token détecté)"""
+        key = (address, source_name)
+        if source_name not in self.sources or key in self.pending:
+            return False
+
+        job = EnrichmentJob(-priority, address, source_name, priority, time.time())
+        heapq.heappush(self.queues[source_name], job)
+        self.pending[key] = job
+        self.queue_event.set()
+        return True
+
+    # === Dispatch ===
+
+    def record_run(self, address: str, source_name: str, success: bool):
+        """Mémoriser le passage (écrit par lots dans enrichment_schedule par flush_runs)"""
+        self.pending_runs.append((address, source_name, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), success))
+
+    def _write_runs(self, runs: List[tuple]):
+        """Upsert des passages en une transaction (sqlite bloquant: appelé via asyncio.to_thread)"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+
+        try:
+            conn.executemany('''
+                INSERT INTO enrichment_schedule (address, source, last_run_at, last_success, runs)
+                VALUES (?, ?, ?, ?, 1)
+                ON CONFLICT(address, source) DO UPDATE SET
+                    last_run_at = excluded.last_run_at,
+                    last_success = excluded.last_success,
+                    runs = runs + 1
+            ''', runs)
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error recording {len(runs)} enrichment runs: {e}")
+        finally:
+            conn.close()
+
+    async def flush_runs(self):
+        """Écrire les passages en attente hors de la boucle d'événements"""
+        async with self.flush_lock:  # Un seul lot à la fois: ordre des last_run_at préservé
+            if not self.pending_runs:
+                return
+            runs, self.pending_runs = self.pending_runs, []
+            await asyncio.to_thread(self._write_runs, runs)
+
+    async def _run_job(self, job: EnrichmentJob):
+        """Exécuter un job sous budgets API (slot global et slot de source déjà pris)"""
+        source = self.sources[job.source]
+        success = False
+
+        try:
+            for api, calls in source.api_calls.items():
+                if api in self.budgets:
+                    await self.budgets[api].acquire(calls)
+
+            self.stats[job.source]['dispatched'] += 1
+            started_at = time.time()
+            success = bool(await source.fetcher(job.address))
+            self.run_latencies[job.source].append(time.time() - started_at)
+
+        except Exception as e:
+            logger.debug(f"Job {job.source} failed for {job.address}: {e}")
+        finally:
+            self.stats[job.source]['succeeded' if success else 'failed'] += 1
+            self.job_latencies[job.source].append(time.time() - job.enqueued_at)
+            self.record_run(job.address, job.source, success)
+            self.pending.pop((job.address, job.source), None)
+            self.running[job.source] -= 1
+            self.queue_event.set()  # Slot libéré: le dispatch réévalue les sources
+
+        if len(self.pending_runs) >= self.run_flush_size:
+            await self.flush_runs()
+
+    def _next_job(self) -> Optional[EnrichmentJob]:
+        """Job le plus prioritaire parmi les sources qui ont un slot libre
+        
+        Une source saturée garde ses jobs en file sans bloquer de slot global:
+        les autres sources continuent d'être servies.
+        """
+        best = None
+        for name, queue in self.queues.items():
+            if queue and self.running[name] < self.sources[name].max_concurrent:
+                if best is None or queue[0] < self.queues[best][0]:
+                    best = name
+        return heapq.heappop(self.queues[best]) if best else None
+
+    async def _dispatch_loop(self):
+        """Dépiler les jobs par priorité décroissante, dans la limite des slots"""
+        while self.is_running:
+            job = None
+            if sum(self.running.values()) < self.max_concurrent:
+                job = self._next_job()
+
+            if job is None:
+                self.queue_event.clear()
+                await self.queue_event.wait()
+                continue
+
+            self.running[job.source] += 1
+            asyncio.create_task(self._run_job(job))
+
+    async def _refill_loop(self):
+        """Recharger périodiquement la file depuis la base"""
+        while self.is_running:
+            try:
+                await self.refill_queue()
+            except Exception as e:
+                logger.error(f"Error refilling enrichment queue: {e}")
+            await asyncio.sleep(self.refill_interval)
+
+    async def run(self):
+        """Boucle principale de l'ordonnanceur"""
+        self.is_running = True
+        logger.info(f"🗓️ Enrichment scheduler started with sources: {', '.join(self.sources)}")
+
+        try:
+            await asyncio.gather(self._refill_loop(), self._dispatch_loop(), self._stats_loop())
+        finally:
+            self.is_running = False
+            await self.flush_runs()
+
+    def stop(self):
+        """Arrêter l'ordonnanceur"""
+        self.is_running = False
+        self.queue_event.set()
+
+    # === Métriques ===
+
+    def queue_size(self) -> int:
+        """Jobs en attente, toutes sources"""
+        return sum(len(queue) for queue in self.queues.values())
+
+    def get_queue_depth(self) -> Dict[str, int]:
+        """Profondeur de file par source (jobs en attente, hors jobs en cours)"""
+        return {name: len(queue) for name, queue in self.queues.items() if queue}
+
+    def get_stats(self) -> Dict:
+        """Profondeur de file, latences et compteurs par source"""
+        def summarize(values) -> Dict:
+            if not values:
+                return {'count': 0, 'avg': 0, 'p95': 0, 'max': 0}
+            ordered = sorted(values)
+            return {
+                'count': len(ordered),
+                'avg': sum(ordered) / len(ordered),
+                'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max': ordered[-1]
+            }
+
+        return {
+            'queue_depth': self.queue_size(),
+            'in_flight': sum(self.running.values()),
+            'queue_depth_by_source': self.get_queue_depth(),
+            'job_latency': {name: summarize(values) for name, values in self.job_latencies.items()},
+            'run_latency': {name: summarize(values) for name, values in self.run_latencies.items()},
+            'jobs': {name: dict(counts) for name, counts in self.stats.items()},
+            'budget_wait_seconds': {api: bucket.total_wait for api, bucket in self.budgets.items()}
+        }
+
+    async def _stats_loop(self):
+        """Log périodique de l'état de l'ordonnanceur"""
+        while self.is_running:
+            await asyncio.sleep(60)
+            stats = self.get_stats()
+            logger.info(f"🗓️ Queue depth: {stats['queue_depth']} | In flight: {stats['in_flight']} | "
+                        f"By source: {stats['queue_depth_by_source']}")
+            for name, latency in stats['job_latency'].items():
+                logger.info(f"   {name:<12}: {latency['count']} jobs, "
+                            f"latency avg {latency['avg']:.1f}s / p95 {latency['p95']:.1f}s")
+
+
+# === Adaptateurs vers les enrichisseurs existants ===
+
+async def build_default_scheduler(database_path: str = "tokens.db", full_enricher=None,
+                                  enabled_sources: Optional[List[str]] = None,
+                                  max_concurrent: int = 8) -> EnrichmentScheduler:
+    """Créer l'ordonnanceur avec les fetchers de chaque enrichisseur
+
+    full_enricher: OptimizedTokenEnricher déjà démarré (launcher) ou None pour
+    utiliser BatchTokenEnricher, qui fait le même enrichissement complet.
+    """
+    from dexscreener_enricher import ContinuousDexScreenerEnricher
+    from pump_fun_enricher import ContinuousPumpFunEnricher
+    from pump_fun_checker import PumpFunChecker
+    from symbol_fixer import SymbolFixer
+    from rugcheck_update_script import RugCheckUpdater
+    from batch_token_enricher import BatchTokenEnricher
+
+    enabled = set(enabled_sources or DEFAULT_SOURCES.keys())
+    scheduler = EnrichmentScheduler(database_path, max_concurrent=max_concurrent)
+
+    def source(name: str, fetcher) -> None:
+        if name in enabled:
+            spec = DEFAULT_SOURCES[name]
+            scheduler.register_source(EnrichmentSource(**{**spec.__dict__, 'fetcher': fetcher}))
+
+    # Enrichissement complet (métadonnées + marché + holders)
+    if full_enricher is not None:
+        async def fetch_full(address: str) -> bool:
+            enriched = await full_enricher._enrich_token_fast(address)
+            if enriched.get("symbol") in (None, "ERROR"):
+                return False
+            await full_enricher._update_batch_in_db([enriched])
+            return True
+    else:
+        batch_enricher = BatchTokenEnricher(database_path)
+        if "full" in enabled:
+            await batch_enricher.start()
+
+        async def fetch_full(address: str) -> bool:
+            enriched = await batch_enricher._enrich_single_token_fast(address)
+            await batch_enricher.update_batch_in_db([enriched])
+            return enriched.get("symbol", "UNKNOWN") != "UNKNOWN"
+    source("full", fetch_full)
+
+    # Correction des symboles
+    symbol_fixer = SymbolFixer(database_path)
+    if "symbol" in enabled:
+        await symbol_fixer.start_session()
+
+    async def fetch_symbol(address: str) -> bool:
+        fixed_data = await symbol_fixer.get_token_metadata(address)
+        success = bool(fixed_data) and symbol_fixer.update_token_in_db(fixed_data)
+        symbol_fixer.update_token_attempt(address, success=success)
+        return success
+    source("symbol", fetch_symbol)
+
+    # DexScreener et pump.fun: enrich_token est synchrone (requests / asyncio.run)
+    dex_enricher = ContinuousDexScreenerEnricher(database_path, verbose=False)
+
+    async def fetch_dexscreener(address: str) -> bool:
+        return await asyncio.to_thread(dex_enricher.enrich_token, {'address': address})
+    source("dexscreener", fetch_dexscreener)
+
+    pump_enricher = ContinuousPumpFunEnricher(database_path, verbose=False)
+    if "pump_fun" in enabled:
+        pump_enricher.migrate_database_pump_fun()
+
+    async def fetch_pump_fun(address: str) -> bool:
+        return await asyncio.to_thread(pump_enricher.enrich_token, {'address': address})
+    source("pump_fun", fetch_pump_fun)
+
+    # Existence pump.fun
+    pump_checker = PumpFunChecker(database_path)
+    if "pump_check" in enabled:
+        pump_checker.migrate_database()
+        await pump_checker.start_session()
+
+    async def fetch_pump_check(address: str) -> bool:
+        result = await pump_checker.check_pump_fun_existence(address)
+        return pump_checker.update_token_pump_status(result)
+    source("pump_check", fetch_pump_check)
+
+    # Scores RugCheck
+    rug_updater = RugCheckUpdater(database_path)
+    if "rugcheck" in enabled:
+        await rug_updater.start()
+
+    async def fetch_rugcheck(address: str) -> bool:
+        rugcheck_data = await rug_updater.get_rugcheck_score(address)
+        if not rugcheck_data or not rugcheck_data['has_data']:
+            return False
+        return rug_updater.update_token_rugcheck(address, rugcheck_data['rug_score'])
+    source("rugcheck", fetch_rugcheck)
+
+    return scheduler
+
+
+async def run_scheduler(args):
+    scheduler = await build_default_scheduler(
+        args.database, enabled_sources=args.sources, max_concurrent=args.max_concurrent
+    )
+    await scheduler.run()
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Unified priority-based enrichment scheduler")
+    parser.add_argument("--database", default="tokens.db", help="Chemin vers la base de données")
+    parser.add_argument("--sources", nargs="+", choices=list(DEFAULT_SOURCES.keys()),
+                        help="Sources à activer (défaut: toutes)")
+    parser.add_argument("--max-concurrent", type=int, default=8, help="Jobs simultanés max")
+    parser.add_argument("--verbose", action="store_true", help="Mode verbose")
+
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    try:
+        asyncio.run(run_scheduler(args))
+    except KeyboardInterrupt:
+        logger.info("🛑 Scheduler interrompu par l'utilisateur")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+🕒 Epoch Columns - Timestamps entiers (secondes epoch UTC) à côté des textes
+Les dates sont stockées en texte heure locale; comparées à datetime('now', ...,
+'localtime') elles dépendent du fuseau du processus qui écrit et de celui qui lit.
+Chaque colonne texte reçoit une colonne <colonne>_epoch indexée, remplie par
+trigger à chaque écriture et rattrapée par une migration par lots reprenable.
+"""
+
+import argparse
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Set
+
+logger = logging.getLogger('epoch_columns')
+
+# (table, colonne texte) -> colonne entière <colonne>_epoch
+EPOCH_COLUMNS = [
+    ('tokens', 'first_discovered_at'),
+    ('tokens', 'updated_at'),
+    ('tokens_hist', 'snapshot_timestamp'),
+    ('whale_transactions_live', 'timestamp'),
+]
+
+# Index des fenêtres temporelles (globales et par token)
+EPOCH_INDEXES = [
+    ('tokens', ['first_discovered_at_epoch']),
+    ('tokens', ['updated_at_epoch']),
+    ('tokens_hist', ['snapshot_timestamp_epoch']),
+    ('tokens_hist', ['address', 'snapshot_timestamp_epoch']),
+    ('whale_transactions_live', ['timestamp_epoch']),
+    ('whale_transactions_live', ['token_address', 'timestamp_epoch']),
+]
+
+BACKFILL_BATCH_SIZE = 5000
+STATE_REFRESH_SECONDS = 60  # Relecture de epoch_backfill_state tant qu'un backfill est en cours
+
+# Backfills lancés par ce process (un thread par base)
+_backfill_threads: Dict[str, threading.Thread] = {}
+_backfill_lock = threading.Lock()
+
+
+def epoch_column(column: str) -> str:
+    return f"{column}_epoch"
+
+
+def epoch_sql(expression: str) -> str:
+    """Texte heure locale -> secondes epoch UTC (texte avec fuseau explicite: déjà UTC)"""
+    return (f"CAST(CASE WHEN {expression} GLOB '*Z' OR {expression} GLOB '*[+-][0-9][0-9]:[0-9][0-9]' "
+            f"THEN strftime('%s', {expression}) ELSE strftime('%s', {expression}, 'utc') END AS INTEGER)")
+
+
+class EpochColumns:
+    """Colonnes *_epoch, index et triggers de maintenance
+
+    Les triggers couvrent tous les écrivains (scanners, enrichers, INSERT OR
+    REPLACE compris); backfill() rattrape les lignes antérieures par lots de
+    rowid, avec un point de reprise par colonne dans epoch_backfill_state.
+    Tant qu'il n'est pas terminé, epoch() rend une expression de repli sur
+    le texte pour ne pas perdre les lignes anciennes.
+    """
+
+    def __init__(self, database_path: str = "tokens.db"):
+        self.database_path = database_path
+        self.columns = self.init_schema()
+        self.available = bool(self.columns)
+        self.pending: Set[tuple] = set()  # (table, colonne) au backfill non terminé
+        self.state_checked_at = 0.0
+        self.refresh_state()
+
+    def init_schema(self) -> List[tuple]:
+        """Colonnes, index et triggers pour les tables présentes; rend les (table, colonne) gérées"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS epoch_backfill_state (
+                    table_name TEXT,
+                    column_name TEXT,
+                    last_rowid INTEGER NOT NULL DEFAULT 0,
+                    completed INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (table_name, column_name)
+                )
+            ''')
+
+            managed = []
+            for table, column in EPOCH_COLUMNS:
+                if table not in tables:
+                    continue
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    continue
+                epoch = epoch_column(column)
+                if epoch not in existing:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {epoch} INTEGER")
+                    logger.info(f"✅ Added column: {table}.{epoch}")
+
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{epoch}_insert
+                    AFTER INSERT ON {table}
+                    WHEN NEW.{column} IS NOT NULL
+                    BEGIN
+                        UPDATE {table} SET {epoch} = {epoch_sql(f"NEW.{column}")} WHERE rowid = NEW.rowid;
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_{epoch}_update
+                    AFTER UPDATE OF {column} ON {table}
+                    BEGIN
+                        UPDATE {table} SET {epoch} = {epoch_sql(f"NEW.{column}")} WHERE rowid = NEW.rowid;
+                    END
+                ''')
+                conn.execute(
+                    "INSERT OR IGNORE INTO epoch_backfill_state (table_name, column_name, updated_at) "
+                    "VALUES (?, ?, datetime('now', 'localtime'))", (table, column)
+                )
+                managed.append((table, column))
+
+            managed_tables = {table for table, _ in managed}
+            for table, index_columns in EPOCH_INDEXES:
+                if table in managed_tables:
+                    name = f"idx_{table}_{'_'.join(index_columns)}"
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(index_columns)})")
+
+            conn.commit()
+            return managed
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Epoch columns schema error: {e}")
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def refresh_state(self) -> Set[tuple]:
+        """Relire les colonnes dont le backfill n'est pas terminé"""
+        self.state_checked_at = time.monotonic()
+        if not self.columns:
+            return self.pending
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            rows = conn.execute("SELECT table_name, column_name FROM epoch_backfill_state WHERE completed = 0")
+            self.pending = {tuple(row) for row in rows} & set(self.columns)
+        except sqlite3.Error as e:
+            logger.debug(f"Epoch backfill state unavailable: {e}")
+            self.pending = set(self.columns)
+        finally:
+            conn.close()
+        return self.pending
+
+    @property
+    def backfill_complete(self) -> bool:
+        if self.pending and time.monotonic() - self.state_checked_at > STATE_REFRESH_SECONDS:
+            self.refresh_state()
+        return not self.pending
+
+    def epoch(self, table: str, column: str, alias: str = None) -> str:
+        """Expression SQL epoch de table.column (alias: préfixe de la table dans la requête)
+
+        <colonne>_epoch seule une fois le backfill terminé (indexée); avant,
+        repli sur la conversion du texte pour les lignes pas encore migrées.
+        """
+        prefix = f"{alias}." if alias else ""
+        name = f"{prefix}{epoch_column(column)}"
+        if not self.backfill_complete and (table, column) in self.pending:
+            return f"COALESCE({name}, {epoch_sql(prefix + column)})"
+        return name
+
+    def start_backfill(self) -> bool:
+        """Lancer backfill() dans un thread de fond, une seule fois par base et par process"""
+        if self.backfill_complete:
+            return False
+        with _backfill_lock:
+            thread = _backfill_threads.get(self.database_path)
+            if thread and thread.is_alive():
+                return False
+            thread = threading.Thread(target=self._run_backfill, name="epoch-backfill", daemon=True)
+            _backfill_threads[self.database_path] = thread
+            thread.start()
+        logger.info(f"🕒 Backfill epoch en tâche de fond: {', '.join(f'{t}.{c}' for t, c in sorted(self.pending))}")
+        return True
+
+    def _run_backfill(self):
+        try:
+            self.backfill()
+        except sqlite3.Error as e:
+            logger.error(f"❌ Epoch backfill error: {e}")
+
+    def backfill(self, batch_size: int = BACKFILL_BATCH_SIZE, max_seconds: float = None) -> Dict[str, int]:
+        """Remplir les *_epoch des lignes existantes, un lot (une transaction courte) à la fois
+
+        Reprend au dernier rowid traité; s'arrête après max_seconds si fourni.
+        Rend le nombre de lignes mises à jour par colonne.
+        """
+        deadline = time.monotonic() + max_seconds if max_seconds else None
+        updated = {}
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            for table, column in self.columns:
+                key = f"{table}.{column}"
+                updated[key] = 0
+                last_rowid, completed = conn.execute(
+                    "SELECT last_rowid, completed FROM epoch_backfill_state WHERE table_name = ? AND column_name = ?",
+                    (table, column)
+                ).fetchone()
+                if completed:
+                    continue
+
+                epoch = epoch_column(column)
+                while deadline is None or time.monotonic() < deadline:
+                    conn.execute("BEGIN IMMEDIATE")
+                    upper = conn.execute(
+                        f"SELECT MAX(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                        (last_rowid, batch_size)
+                    ).fetchone()[0]
+                    if upper is None:
+                        conn.execute(
+                            "UPDATE epoch_backfill_state SET completed = 1, updated_at = datetime('now', 'localtime') "
+                            "WHERE table_name = ? AND column_name = ?", (table, column)
+                        )
+                        conn.commit()
+                        self.pending.discard((table, column))
+                        logger.info(f"✅ Backfill {key} terminé")
+                        break
+
+                    cursor = conn.execute(f'''
+                        UPDATE {table} SET {epoch} = {epoch_sql(column)}
+                        WHERE rowid > ? AND rowid <= ? AND {column} IS NOT NULL AND {epoch} IS NULL
+                    ''', (last_rowid, upper))
+                    updated[key] += cursor.rowcount
+                    last_rowid = upper
+                    conn.execute(
+                        "UPDATE epoch_backfill_state SET last_rowid = ?, updated_at = datetime('now', 'localtime') "
+                        "WHERE table_name = ? AND column_name = ?", (last_rowid, table, column)
+                    )
+                    conn.commit()
+            return updated
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        conn = sqlite3.connect(self.database_path)
+        try:
+            stats = {}
+            for table, column, last_rowid, completed in conn.execute(
+                "SELECT table_name, column_name, last_rowid, completed FROM epoch_backfill_state"
+            ):
+                if (table, column) not in self.columns:
+                    continue
+                missing = conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE {column} IS NOT NULL AND {epoch_column(column)} IS NULL"
+                ).fetchone()[0]
+                stats[f"{table}.{column}"] = {
+                    'last_rowid': last_rowid,
+                    'completed': bool(completed),
+                    'missing': missing
+                }
+            return stats
+        finally:
+            conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Colonnes timestamp epoch (*_epoch) et migration")
+    parser.add_argument("--database", default="tokens.db", help="Base SQLite")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    parser.add_argument("--max-seconds", type=float, default=None, help="Arrêter le backfill après N secondes")
+    parser.add_argument("--stats", action="store_true", help="Afficher l'état sans migrer")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    columns = EpochColumns(args.database)
+    if not columns.available:
+        print("❌ Aucune table à migrer")
+        return
+
+    if not args.stats:
+        updated = columns.backfill(args.batch_size, args.max_seconds)
+        for key, count in updated.items():
+            print(f"🕒 {key}: {count} lignes migrées")
+
+    for key, state in columns.get_stats().items():
+        status = "✅ terminé" if state['completed'] else f"⏳ rowid {state['last_rowid']}"
+        print(f"   {key:<40} {status} ({state['missing']} sans epoch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,25 +3,58 @@
 🌐 Flask API Backend - Mise à jour pour inclure les données DexScreener
 """
 
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, g
 from flask_cors import CORS
 import sqlite3
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 import json
+import base64
+import hashlib
 from flask import make_response
 import random
+import threading
+import numpy as np
 # Ajouter cette ligne avec les autres imports
 from whale_detector_integration import whale_api
+from ml_scoring_service import MLScoringService
+from system_optimization import ReadConnectionPool
+from api_cache import ResponseCache
+from chart_downsampling import lttb_indices
+from effective_columns import EffectiveColumns, GENERATED_COLUMNS
+from epoch_columns import EpochColumns
+from token_search_index import TokenSearchIndex, search as search_tokens
+from api_encoding import (FastJSONProvider, compress_response, cursor_columns, json_response,
+                          requested_layout, rows_payload)
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+app.after_request(compress_response)
 CORS(app)
 
 # Configuration
 DATABASE_PATH = "tokens.db"
 logger = logging.getLogger(__name__)
 
+# Connexions de lecture partagées par les requêtes (écritures: connexions dédiées)
+read_pool = ReadConnectionPool(DATABASE_PATH)
+
+def get_db() -> sqlite3.Connection:
+    """Connexion de lecture du pool, rendue automatiquement en fin de requête"""
+    if 'read_conn' not in g:
+        g.read_conn = read_pool.acquire()
+    return g.read_conn
+
+# Réponses des routes de lecture, invalidées à chaque commit (PRAGMA data_version)
+response_cache = ResponseCache(DATABASE_PATH)
+
+@app.teardown_appcontext
+def release_db(exception=None):
+    conn = g.pop('read_conn', None)
+    if conn is not None:
+        read_pool.release(conn)
+
 def format_datetime_local(dt_str):
     """Les timestamps sont maintenant corrigés, pas besoin de conversion"""
     return dt_str
@@ -33,10 +66,8 @@ class TokenAPI:
         self.db_path = db_path
     
     def get_connection(self):
-        """Créer une connexion à la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Connexion de lecture du pool (rendue en fin de requête)"""
+        return get_db()
     
     def get_stats(self) -> Dict:
         """Récupérer les statistiques générales"""
@@ -53,9 +84,9 @@ class TokenAPI:
             high_score_tokens = cursor.fetchone()[0]
             
             # New tokens (24h)
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
-                WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                WHERE {epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
             """)
             new_tokens = cursor.fetchone()[0]
             
@@ -106,10 +137,9 @@ class TokenAPI:
                 "activeTokens": 0,
                 "dexscreenerTokens": 0
             }
-        finally:
-            conn.close()
 
 @app.route('/api/whale-activity')
+@response_cache.cached(max_age=15)
 def get_whale_activity():
     """Endpoint pour récupérer l'activité whale récente"""
     hours = request.args.get('hours', 1, type=int)
@@ -144,6 +174,7 @@ def get_token_whale_activity(token_address):
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/whale-summary')
+@response_cache.cached(max_age=30)
 def get_whale_summary():
     """Endpoint pour le résumé de l'activité whale"""
     try:
@@ -154,6 +185,7 @@ def get_whale_summary():
         return jsonify({"error": "Internal server error"}), 500
 
 @app.route('/api/whale-feed')
+@response_cache.cached(max_age=15)
 def get_whale_feed():
     """Endpoint pour le feed temps réel des whales"""
     hours = request.args.get('hours', 1, type=int)
@@ -205,91 +237,202 @@ def dashboard_history():
     """Servir le dashboard historique"""
     return render_template('dashboard_history.html')
 
+# Séries des graphiques Chart.js, calculées en SQL (DexScreener en priorité)
+CHART_SERIES = ['price', 'volume', 'liquidity', 'score', 'holders', 'progress',
+                'transactions', 'buys', 'sells', 'market_cap']
+CHART_COLUMNS = '''
+    strftime('%d/%m %H:%M', snapshot_timestamp),
+    CAST(strftime('%s', snapshot_timestamp) AS REAL),
+    effective_price_usd,
+    effective_volume_24h,
+    COALESCE(NULLIF(dexscreener_liquidity_quote, 0), NULLIF(liquidity_usd, 0), 0),
+    COALESCE(invest_score, 0),
+    COALESCE(holders, 0),
+    COALESCE(bonding_curve_progress, 0),
+    COALESCE(dexscreener_txns_24h, 0),
+    COALESCE(dexscreener_buys_24h, 0),
+    COALESCE(dexscreener_sells_24h, 0),
+    COALESCE(NULLIF(dexscreener_market_cap, 0), NULLIF(market_cap, 0), 0)
+'''
+CHART_WIDTH = len(CHART_SERIES) + 2  # label, x epoch, séries
+
+# Colonnes brutes de tokens_hist pour les statistiques et les tendances
+HISTORY_COLUMNS = [
+    'snapshot_timestamp', 'price_usdc', 'dexscreener_price_usd', 'market_cap', 'dexscreener_market_cap',
+    'liquidity_usd', 'dexscreener_liquidity_quote', 'volume_24h', 'dexscreener_volume_24h', 'holders',
+    'invest_score', 'rug_score', 'bonding_curve_progress', 'dexscreener_txns_24h', 'dexscreener_buys_24h',
+    'dexscreener_sells_24h', 'bonding_curve_status', 'status', 'snapshot_reason'
+]
+
+TOKENS_HAS_HISTORY_MAX = 1000
+
+def token_history_query(columns: str, days: int) -> str:
+    """Historique d'un token sur la période, du plus ancien au plus récent"""
+    snapshot = epoch('tokens_hist', 'snapshot_timestamp')
+    return f'''
+        SELECT {columns}
+        FROM tokens_hist 
+        WHERE address = ? 
+        AND {snapshot} > CAST(strftime('%s', 'now', '-{int(days)} days') AS INTEGER)
+        ORDER BY {snapshot} ASC
+    '''
+
+def chart_payload(rows: List[tuple], max_points: int = 0) -> Dict:
+    """Lignes CHART_COLUMNS -> labels + datasets Chart.js (réduction LTTB si max_points)
+
+    Les points gardés sont choisis ensemble sur prix, volume, liquidité et holders.
+    """
+    source_points = len(rows)
+    if max_points and source_points > max_points:
+        values = np.array([row[1:] for row in rows], dtype=float)
+        # x puis prix, volume, liquidité, holders
+        keep = lttb_indices(values[:, 0], values[:, [1, 2, 3, 5]].T, max_points)
+        rows = [rows[i] for i in keep]
+    columns = [list(values) for values in zip(*rows)] if rows else [[] for _ in range(CHART_WIDTH)]
+    
+    return {
+        'labels': columns[0],
+        'datasets': dict(zip(CHART_SERIES, columns[2:])),
+        'data_points': len(rows),
+        'source_points': source_points
+    }
+
+def history_stats(data: List[Dict], days: int) -> Dict:
+    """Statistiques détaillées sur l'historique (lignes HISTORY_COLUMNS)"""
+    if not data:
+        return {
+            'error': 'No historical data found',
+            'data_points': 0
+        }
+    
+    # Calculer les statistiques
+    prices = []
+    volumes = []
+    scores = [row['invest_score'] for row in data if row['invest_score'] is not None]
+    holders_list = [row['holders'] for row in data if row['holders'] is not None]
+    
+    # Prix: priorité DexScreener
+    for row in data:
+        price = row['dexscreener_price_usd'] or row['price_usdc']
+        if price and price > 0:
+            prices.append(price)
+    
+    # Volume: priorité DexScreener
+    for row in data:
+        volume = row['dexscreener_volume_24h'] or row['volume_24h']
+        if volume and volume > 0:
+            volumes.append(volume)
+    
+    stats = {
+        'data_points': len(data),
+        'period_days': days,
+        'first_snapshot': data[0]['snapshot_timestamp'],
+        'last_snapshot': data[-1]['snapshot_timestamp'],
+        'snapshot_frequency_hours': round((days * 24) / max(len(data) - 1, 1), 2) if len(data) > 1 else 0,
+    }
+    
+    # Statistiques de prix
+    if prices:
+        stats['price_stats'] = {
+            'min': round(min(prices), 8),
+            'max': round(max(prices), 8),
+            'avg': round(sum(prices) / len(prices), 8),
+            'first': round(prices[0], 8),
+            'last': round(prices[-1], 8),
+            'change_pct': round(((prices[-1] - prices[0]) / prices[0]) * 100, 2) if prices[0] > 0 else 0,
+            'volatility': round((max(prices) - min(prices)) / max(prices) * 100, 2) if max(prices) > 0 else 0
+        }
+    
+    # Statistiques de volume
+    if volumes:
+        stats['volume_stats'] = {
+            'min': round(min(volumes)),
+            'max': round(max(volumes)),
+            'avg': round(sum(volumes) / len(volumes)),
+            'total': round(sum(volumes)),
+            'last': round(volumes[-1])
+        }
+    
+    # Statistiques de score
+    if scores:
+        stats['score_stats'] = {
+            'min': round(min(scores), 2),
+            'max': round(max(scores), 2),
+            'avg': round(sum(scores) / len(scores), 2),
+            'first': round(scores[0], 2),
+            'last': round(scores[-1], 2),
+            'change': round(scores[-1] - scores[0], 2)
+        }
+    
+    # Statistiques de holders
+    if holders_list:
+        stats['holders_stats'] = {
+            'min': min(holders_list),
+            'max': max(holders_list),
+            'first': holders_list[0],
+            'last': holders_list[-1],
+            'change': holders_list[-1] - holders_list[0],
+            'growth_pct': round(((holders_list[-1] - holders_list[0]) / max(holders_list[0], 1)) * 100, 2)
+        }
+    
+    # Analyse des changements de statut
+    status_changes = []
+    bonding_changes = []
+    
+    for i in range(1, len(data)):
+        if data[i]['status'] != data[i-1]['status']:
+            status_changes.append({
+                'timestamp': data[i]['snapshot_timestamp'],
+                'from': data[i-1]['status'],
+                'to': data[i]['status']
+            })
+        
+        if data[i]['bonding_curve_status'] != data[i-1]['bonding_curve_status']:
+            bonding_changes.append({
+                'timestamp': data[i]['snapshot_timestamp'],
+                'from': data[i-1]['bonding_curve_status'],
+                'to': data[i]['bonding_curve_status']
+            })
+    
+    stats['status_changes'] = status_changes
+    stats['bonding_changes'] = bonding_changes
+    
+    # Répartition des raisons de snapshot
+    snapshot_reasons = {}
+    for row in data:
+        reason = row['snapshot_reason'] or 'unknown'
+        snapshot_reasons[reason] = snapshot_reasons.get(reason, 0) + 1
+    
+    stats['snapshot_reasons'] = snapshot_reasons
+    return stats
+
+def get_token_info(cursor, address: str) -> Dict:
+    """Infos de base du token pour les tendances"""
+    cursor.execute('''
+        SELECT symbol, name, address, first_discovered_at
+        FROM tokens 
+        WHERE address = ?
+    ''', (address,))
+    token_row = cursor.fetchone()
+    return dict(zip(('symbol', 'name', 'address', 'first_discovered_at'), token_row)) if token_row else {}
+
 @app.route('/api/token-chart-data/<address>')
 def get_token_chart_data(address):
-    """Données formatées pour les graphiques Chart.js"""
+    """Données formatées pour les graphiques Chart.js
+
+    max_points: réduction LTTB commune à toutes les séries (prix, volume,
+    liquidité et holders choisissent les points gardés)
+    """
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
+        cursor.row_factory = None
         
         days = request.args.get('days', 7, type=int)
+        max_points = request.args.get('max_points', 0, type=int)
         
-        cursor.execute('''
-            SELECT 
-                snapshot_timestamp,
-                price_usdc,
-                dexscreener_price_usd,
-                dexscreener_volume_24h,
-                volume_24h,
-                dexscreener_liquidity_quote,
-                liquidity_usd,
-                invest_score,
-                holders,
-                bonding_curve_progress,
-                dexscreener_txns_24h,
-                dexscreener_buys_24h,
-                dexscreener_sells_24h,
-                market_cap,
-                dexscreener_market_cap
-            FROM tokens_hist 
-            WHERE address = ? 
-            AND snapshot_timestamp > datetime('now', '-{} days', 'localtime')
-            ORDER BY snapshot_timestamp ASC
-        '''.format(days), (address,))
-        
-        data = cursor.fetchall()
-        
-        # Formater pour Chart.js
-        labels = []
-        datasets = {
-            'price': [],
-            'volume': [],
-            'liquidity': [],
-            'score': [],
-            'holders': [],
-            'progress': [],
-            'transactions': [],
-            'buys': [],
-            'sells': [],
-            'market_cap': []
-        }
-        
-        for row in data:
-            # Formater le timestamp
-            timestamp = datetime.fromisoformat(row['snapshot_timestamp'].replace('Z', '+00:00'))
-            labels.append(timestamp.strftime('%d/%m %H:%M'))
-            
-            # Utiliser le prix DexScreener en priorité, sinon prix USDC
-            price = row['dexscreener_price_usd'] or row['price_usdc'] or 0
-            datasets['price'].append(price)
-            
-            # Volume: DexScreener en priorité
-            volume = row['dexscreener_volume_24h'] or row['volume_24h'] or 0
-            datasets['volume'].append(volume)
-            
-            # Liquidité: DexScreener en priorité
-            liquidity = row['dexscreener_liquidity_quote'] or row['liquidity_usd'] or 0
-            datasets['liquidity'].append(liquidity)
-            
-            # Market Cap: DexScreener en priorité
-            market_cap = row['dexscreener_market_cap'] or row['market_cap'] or 0
-            datasets['market_cap'].append(market_cap)
-            
-            datasets['score'].append(row['invest_score'] or 0)
-            datasets['holders'].append(row['holders'] or 0)
-            datasets['progress'].append(row['bonding_curve_progress'] or 0)
-            datasets['transactions'].append(row['dexscreener_txns_24h'] or 0)
-            datasets['buys'].append(row['dexscreener_buys_24h'] or 0)
-            datasets['sells'].append(row['dexscreener_sells_24h'] or 0)
-        
-        conn.close()
-        
-        return jsonify({
-            'labels': labels,
-            'datasets': datasets,
-            'data_points': len(labels)
-        })
+        cursor.execute(token_history_query(CHART_COLUMNS, days), (address,))
+        return json_response(chart_payload(cursor.fetchall(), max_points))
         
     except Exception as e:
         logger.error(f"Error getting chart data for {address}: {e}")
@@ -299,148 +442,15 @@ def get_token_chart_data(address):
 def get_token_history_stats(address):
     """Statistiques détaillées sur l'historique d'un token"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         days = request.args.get('days', 7, type=int)
         
-        # Récupérer toutes les données historiques
-        cursor.execute('''
-            SELECT 
-                snapshot_timestamp,
-                price_usdc,
-                dexscreener_price_usd,
-                dexscreener_volume_24h,
-                volume_24h,
-                dexscreener_liquidity_quote,
-                liquidity_usd,
-                invest_score,
-                holders,
-                bonding_curve_progress,
-                bonding_curve_status,
-                status,
-                snapshot_reason,
-                market_cap,
-                dexscreener_market_cap,
-                rug_score
-            FROM tokens_hist 
-            WHERE address = ? 
-            AND snapshot_timestamp > datetime('now', '-{} days', 'localtime')
-            ORDER BY snapshot_timestamp ASC
-        '''.format(days), (address,))
-        
+        cursor.execute(token_history_query(', '.join(HISTORY_COLUMNS), days), (address,))
         data = [dict(row) for row in cursor.fetchall()]
         
-        if not data:
-            return jsonify({
-                'error': 'No historical data found',
-                'data_points': 0
-            })
-        
-        # Calculer les statistiques
-        prices = []
-        volumes = []
-        scores = [row['invest_score'] for row in data if row['invest_score'] is not None]
-        holders_list = [row['holders'] for row in data if row['holders'] is not None]
-        
-        # Prix: priorité DexScreener
-        for row in data:
-            price = row['dexscreener_price_usd'] or row['price_usdc']
-            if price and price > 0:
-                prices.append(price)
-        
-        # Volume: priorité DexScreener
-        for row in data:
-            volume = row['dexscreener_volume_24h'] or row['volume_24h']
-            if volume and volume > 0:
-                volumes.append(volume)
-        
-        stats = {
-            'data_points': len(data),
-            'period_days': days,
-            'first_snapshot': data[0]['snapshot_timestamp'],
-            'last_snapshot': data[-1]['snapshot_timestamp'],
-            'snapshot_frequency_hours': round((days * 24) / max(len(data) - 1, 1), 2) if len(data) > 1 else 0,
-        }
-        
-        # Statistiques de prix
-        if prices:
-            stats['price_stats'] = {
-                'min': round(min(prices), 8),
-                'max': round(max(prices), 8),
-                'avg': round(sum(prices) / len(prices), 8),
-                'first': round(prices[0], 8),
-                'last': round(prices[-1], 8),
-                'change_pct': round(((prices[-1] - prices[0]) / prices[0]) * 100, 2) if prices[0] > 0 else 0,
-                'volatility': round((max(prices) - min(prices)) / max(prices) * 100, 2) if max(prices) > 0 else 0
-            }
-        
-        # Statistiques de volume
-        if volumes:
-            stats['volume_stats'] = {
-                'min': round(min(volumes)),
-                'max': round(max(volumes)),
-                'avg': round(sum(volumes) / len(volumes)),
-                'total': round(sum(volumes)),
-                'last': round(volumes[-1])
-            }
-        
-        # Statistiques de score
-        if scores:
-            stats['score_stats'] = {
-                'min': round(min(scores), 2),
-                'max': round(max(scores), 2),
-                'avg': round(sum(scores) / len(scores), 2),
-                'first': round(scores[0], 2),
-                'last': round(scores[-1], 2),
-                'change': round(scores[-1] - scores[0], 2)
-            }
-        
-        # Statistiques de holders
-        if holders_list:
-            stats['holders_stats'] = {
-                'min': min(holders_list),
-                'max': max(holders_list),
-                'first': holders_list[0],
-                'last': holders_list[-1],
-                'change': holders_list[-1] - holders_list[0],
-                'growth_pct': round(((holders_list[-1] - holders_list[0]) / max(holders_list[0], 1)) * 100, 2)
-            }
-        
-        # Analyse des changements de statut
-        status_changes = []
-        bonding_changes = []
-        
-        for i in range(1, len(data)):
-            if data[i]['status'] != data[i-1]['status']:
-                status_changes.append({
-                    'timestamp': data[i]['snapshot_timestamp'],
-                    'from': data[i-1]['status'],
-                    'to': data[i]['status']
-                })
-            
-            if data[i]['bonding_curve_status'] != data[i-1]['bonding_curve_status']:
-                bonding_changes.append({
-                    'timestamp': data[i]['snapshot_timestamp'],
-                    'from': data[i-1]['bonding_curve_status'],
-                    'to': data[i]['bonding_curve_status']
-                })
-        
-        stats['status_changes'] = status_changes
-        stats['bonding_changes'] = bonding_changes
-        
-        # Répartition des raisons de snapshot
-        snapshot_reasons = {}
-        for row in data:
-            reason = row['snapshot_reason'] or 'unknown'
-            snapshot_reasons[reason] = snapshot_reasons.get(reason, 0) + 1
-        
-        stats['snapshot_reasons'] = snapshot_reasons
-        
-        conn.close()
-        
-        return jsonify(stats)
+        return jsonify(history_stats(data, days))
         
     except Exception as e:
         logger.error(f"Error getting history stats for {address}: {e}")
@@ -450,59 +460,18 @@ def get_token_history_stats(address):
 def get_token_trends(address):
     """Récupérer les tendances historiques d'un token spécifique"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         # Paramètres de requête
         days = request.args.get('days', 7, type=int)
         limit = request.args.get('limit', 100, type=int)
         
-        # Récupérer les données historiques
-        cursor.execute('''
-            SELECT 
-                snapshot_timestamp,
-                price_usdc,
-                dexscreener_price_usd,
-                market_cap,
-                dexscreener_market_cap,
-                liquidity_usd,
-                dexscreener_liquidity_quote,
-                volume_24h,
-                dexscreener_volume_24h,
-                holders,
-                invest_score,
-                rug_score,
-                bonding_curve_progress,
-                dexscreener_txns_24h,
-                dexscreener_buys_24h,
-                dexscreener_sells_24h,
-                bonding_curve_status,
-                status,
-                snapshot_reason
-            FROM tokens_hist 
-            WHERE address = ? 
-            AND snapshot_timestamp > datetime('now', '-{} days', 'localtime')
-            ORDER BY snapshot_timestamp ASC
-            LIMIT ?
-        '''.format(days), (address, limit))
-        
+        cursor.execute(token_history_query(', '.join(HISTORY_COLUMNS), days) + ' LIMIT ?', (address, limit))
         historical_data = [dict(row) for row in cursor.fetchall()]
         
-        # Récupérer les infos de base du token
-        cursor.execute('''
-            SELECT symbol, name, address, first_discovered_at
-            FROM tokens 
-            WHERE address = ?
-        ''', (address,))
-        
-        token_row = cursor.fetchone()
-        token_info = dict(token_row) if token_row else {}
-        
-        conn.close()
-        
         return jsonify({
-            'token_info': token_info,
+            'token_info': get_token_info(cursor, address),
             'historical_data': historical_data,
             'data_points': len(historical_data),
             'period_days': days
@@ -512,148 +481,412 @@ def get_token_trends(address):
         logger.error(f"Error getting trends for {address}: {e}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/token-history-bundle/<address>')
+@response_cache.cached(max_age=30)
+def get_token_history_bundle(address):
+    """Graphiques, statistiques et tendances d'un token en un seul passage sur tokens_hist
+
+    Mêmes paramètres et mêmes réponses que token-chart-data (max_points),
+    token-history-stats et token-trends (limit), regroupés sous chart/stats/trends.
+    """
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        
+        days = request.args.get('days', 7, type=int)
+        max_points = request.args.get('max_points', 0, type=int)
+        limit = request.args.get('limit', 100, type=int)
+        
+        cursor.execute(token_history_query(f"{CHART_COLUMNS}, {', '.join(HISTORY_COLUMNS)}", days), (address,))
+        rows = cursor.fetchall()
+        data = [dict(zip(HISTORY_COLUMNS, row[CHART_WIDTH:])) for row in rows]
+        trends_data = data if limit < 0 else data[:limit]  # LIMIT négatif = sans limite (SQLite)
+        
+        return json_response({
+            'chart': chart_payload([row[:CHART_WIDTH] for row in rows], max_points),
+            'stats': history_stats(data, days),
+            'trends': {
+                'token_info': get_token_info(cursor, address),
+                'historical_data': trends_data,
+                'data_points': len(trends_data),
+                'period_days': days
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error getting history bundle for {address}: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
+
+
+# Colonnes de /api/tokens-detail (DexScreener + Whale + Pump.fun), via tokens_detail_columns()
+# qui remplit {whale_timestamp} (expression epoch de w.timestamp)
+TOKENS_DETAIL_COLUMNS = '''
+    address, symbol, name, price_usdc, invest_score, liquidity_usd,
+    volume_24h, holders, age_hours, rug_score, is_tradeable,
+    updated_at, first_discovered_at, bonding_curve_status, bonding_curve_progress,
+    status,
+
+    -- Colonnes DexScreener
+    dexscreener_pair_created_at,
+    dexscreener_price_usd,
+    dexscreener_market_cap,
+    dexscreener_liquidity_base,
+    dexscreener_liquidity_quote,
+    dexscreener_volume_1h,
+    dexscreener_volume_6h,
+    dexscreener_volume_24h,
+    dexscreener_price_change_1h,
+    dexscreener_price_change_6h,
+    dexscreener_price_change_h24,
+    dexscreener_txns_1h,
+    dexscreener_txns_6h,
+    dexscreener_txns_24h,
+    dexscreener_buys_1h,
+    dexscreener_sells_1h,
+    dexscreener_buys_24h,
+    dexscreener_sells_24h,
+    COALESCE(updated_at, first_discovered_at) as last_update,
+
+    -- === COLONNES PUMP.FUN (AJOUTÉES) ===
+    exists_on_pump,
+    pump_fun_name,
+    pump_fun_symbol,
+    pump_fun_description,
+    pump_fun_image_uri,
+    pump_fun_metadata_uri,
+    pump_fun_twitter,
+    pump_fun_telegram,
+    pump_fun_website,
+    pump_fun_show_name,
+    pump_fun_created_timestamp,
+    pump_fun_usd_market_cap,
+    pump_fun_reply_count,
+    pump_fun_raydium_pool,
+    pump_fun_complete,
+    pump_fun_total_supply,
+    pump_fun_creator,
+    pump_fun_nsfw,
+    pump_fun_market_cap,
+    pump_fun_virtual_sol_reserves,
+    pump_fun_virtual_token_reserves,
+    pump_fun_bonding_curve,
+    pump_fun_associated_bonding_curve,
+    pump_fun_king_of_hill_timestamp,
+    pump_fun_market_id,
+    pump_fun_inverted,
+    pump_fun_is_currently_live,
+    pump_fun_username,
+    pump_fun_profile_image,
+    pump_fun_last_pump_update,
+
+    -- === COLONNES WHALE ===
+    -- Activité whale 1h
+    (SELECT COUNT(*) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)) as whale_activity_1h,
+
+    -- Montant max whale 1h  
+    (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)) as whale_max_amount_1h,
+
+    -- Type de dernière transaction whale 1h
+    (SELECT w.transaction_type FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)
+     ORDER BY w.timestamp DESC LIMIT 1) as whale_last_type_1h,
+
+    -- Activité whale 6h
+    (SELECT COUNT(*) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-6 hours') AS INTEGER)) as whale_activity_6h,
+
+    -- Montant max whale 6h
+    (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-6 hours') AS INTEGER)) as whale_max_amount_6h,
+
+    -- Activité whale 24h
+    (SELECT COUNT(*) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)) as whale_activity_24h,
+
+    -- Montant max whale 24h
+    (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
+     WHERE w.token_address = tokens.address 
+     AND {whale_timestamp} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)) as whale_max_amount_24h,
+
+    -- Champs dérivés: URL DexScreener et date de dernière mise à jour DexScreener
+    CASE WHEN dexscreener_price_usd > 0
+         THEN 'https://dexscreener.com/solana/' || address END as dexscreener_url,
+    updated_at as last_dexscreener_update
+'''
+
+# Tri côté serveur: clé -> expression indexée (NULL ramenés à une valeur fixe pour le curseur)
+# Colonnes générées (effective_columns, jamais NULL): index créés par EffectiveColumns
+TOKENS_DETAIL_SORTS = {
+    'last_update': "last_update_epoch",
+    'first_discovered_at': "COALESCE(first_discovered_at, '')",
+    'invest_score': "COALESCE(invest_score, 0)",
+    'volume_24h': "COALESCE(volume_24h, 0)",
+    'liquidity_usd': "COALESCE(liquidity_usd, 0)",
+    'holders': "COALESCE(holders, 0)",
+    'age_hours': "COALESCE(age_hours, 0)",
+    'effective_price': "effective_price_usd",
+    'effective_volume': "effective_volume_24h",
+}
+
+# Filtres min_<nom> / max_<nom> -> colonne
+TOKENS_DETAIL_RANGES = {
+    'score': 'invest_score',
+    'price': 'price_usdc',
+    'liquidity': 'liquidity_usd',
+    'volume': 'volume_24h',
+    'holders': 'holders',
+    'age': 'age_hours',
+    'effective_price': 'effective_price_usd',
+    'effective_volume': 'effective_volume_24h',
+    'progress': 'COALESCE(bonding_curve_progress, 0)',
+    'risk': '100 - COALESCE(NULLIF(rug_score, 0), 50)',
+}
+
+TOKENS_DETAIL_MAX_LIMIT = 500
+
+API_INDEXES = [
+    *(f"CREATE INDEX IF NOT EXISTS idx_tokens_sort_{key} ON tokens({expression}, address)"
+      for key, expression in TOKENS_DETAIL_SORTS.items() if expression not in GENERATED_COLUMNS),
+    "CREATE INDEX IF NOT EXISTS idx_tokens_bonding_status ON tokens(bonding_curve_status)",
+    "CREATE INDEX IF NOT EXISTS idx_tokens_on_pump ON tokens(exists_on_pump) WHERE exists_on_pump = 1",
+]
+
+def create_api_indexes(db_path: str = DATABASE_PATH):
+    """Index des tris et filtres de l'API (le pool de lecture ne peut pas les créer)"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        for index_sql in API_INDEXES:
+            conn.execute(index_sql)
+        conn.commit()
+    except sqlite3.Error as e:
+        logger.error(f"❌ API index creation error: {e}")
+    finally:
+        conn.close()
+
+# Schéma requis par les routes, créé une fois par process (launchers, __main__ ou 1re requête)
+schema_initialized = False
+schema_lock = threading.Lock()
+epoch_columns: Optional[EpochColumns] = None  # Expressions *_epoch des requêtes (repli texte pendant le backfill)
+
+def init_schema(db_path: str = DATABASE_PATH):
+    """Colonnes dérivées et index des routes de lecture: le pool en lecture seule ne peut pas les créer"""
+    global schema_initialized, epoch_columns
+    with schema_lock:
+        if schema_initialized:
+            return
+        epoch_columns = EpochColumns(db_path)
+        # Lignes antérieures aux triggers migrées en tâche de fond (lots courts, reprenable)
+        epoch_columns.start_backfill()
+        EffectiveColumns(db_path)  # Après EpochColumns: last_update_epoch en dépend
+        create_api_indexes(db_path)
+        TokenSearchIndex(db_path)  # tokens_fts de /api/search
+        schema_initialized = True
+
+def epoch(table: str, column: str, alias: str = None) -> str:
+    """Expression epoch d'une colonne date pour les requêtes des routes"""
+    if epoch_columns is None:
+        init_schema()
+    return epoch_columns.epoch(table, column, alias)
+
+def last_update_sql() -> str:
+    """last_update_epoch (indexée); pendant le backfill, même calcul sur les expressions de repli"""
+    updated, discovered = epoch('tokens', 'updated_at'), epoch('tokens', 'first_discovered_at')
+    if (updated, discovered) == ('updated_at_epoch', 'first_discovered_at_epoch'):
+        return "last_update_epoch"
+    return f"COALESCE({updated}, {discovered}, 0)"
+
+def tokens_detail_columns() -> str:
+    """Colonnes de /api/tokens-detail (fenêtres whale sur l'expression epoch courante)"""
+    return TOKENS_DETAIL_COLUMNS.format(whale_timestamp=epoch('whale_transactions_live', 'timestamp', 'w'))
+
+@app.before_request
+def ensure_schema():
+    # App servie sans passer par init_schema (serveur WSGI externe)
+    if not schema_initialized:
+        init_schema()
+
+def filters_fingerprint(filters: Dict) -> str:
+    """Empreinte des filtres normalisés (ordre et forme de la query string indifférents)"""
+    return hashlib.sha1(json.dumps(filters, sort_keys=True).encode()).hexdigest()[:16]
+
+def encode_cursor(sort: str, order: str, filters: str, value, address: str) -> str:
+    payload = json.dumps([sort, order, filters, value, address], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str, sort: str, order: str, filters: str):
+    """(valeur de tri, adresse) du dernier token de la page précédente
+    
+    Le curseur n'est valable que pour le tri, l'ordre et les filtres qui l'ont produit.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_order, cursor_filters, value, address = json.loads(payload)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("cursor does not match sort")
+    if cursor_order != order:
+        raise ValueError("cursor does not match order")
+    if cursor_filters != filters:
+        raise ValueError("cursor does not match filters")
+    return value, address
 
+def build_tokens_detail_filters(args) -> tuple:
+    """Clauses WHERE, paramètres et filtres normalisés (empreinte du curseur) depuis la query string"""
+    clauses, params, filters = [], [], {}
+    
+    for name, column in TOKENS_DETAIL_RANGES.items():
+        for bound, operator in (('min', '>='), ('max', '<=')):
+            value = args.get(f"{bound}_{name}", type=float)
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+                filters[f"{bound}_{name}"] = value
+    
+    symbol = args.get('symbol', '').strip()
+    if symbol:
+        clauses.append("symbol LIKE ?")
+        params.append(f"%{symbol}%")
+        filters['symbol'] = symbol
+    
+    statuses = [status for status in args.get('bonding_status', '').lower().split(',') if status]
+    if statuses:
+        clauses.append(f"bonding_curve_status IN ({','.join('?' * len(statuses))})")
+        params.extend(statuses)
+        filters['bonding_status'] = sorted(set(statuses))
+    
+    tradeable = args.get('tradeable', type=int)
+    if tradeable is not None:
+        clauses.append("is_tradeable = 1" if tradeable else "COALESCE(is_tradeable, 0) != 1")
+        filters['tradeable'] = bool(tradeable)
+    
+    on_pump = args.get('on_pump', type=int)
+    if on_pump is not None:
+        clauses.append("exists_on_pump = 1" if on_pump else "COALESCE(exists_on_pump, 0) != 1")
+        filters['on_pump'] = bool(on_pump)
+    
+    discovered_on = args.get('discovered_on')
+    if discovered_on:
+        # Journée locale -> bornes epoch UTC
+        discovered = epoch('tokens', 'first_discovered_at')
+        clauses.append(f"{discovered} >= CAST(strftime('%s', date(?), 'utc') AS INTEGER) "
+                       f"AND {discovered} < CAST(strftime('%s', date(?, '+1 day'), 'utc') AS INTEGER)")
+        params.extend([discovered_on, discovered_on])
+        filters['discovered_on'] = discovered_on
+    
+    updated_within = args.get('updated_within_minutes', type=int)
+    if updated_within:
+        clauses.append(f"{last_update_sql()} > CAST(strftime('%s', 'now', ?) AS INTEGER)")
+        params.append(f"-{updated_within} minutes")
+        filters['updated_within_minutes'] = updated_within
+    
+    return clauses, params, filters
 
 # Mise à jour de l'endpoint tokens-detail pour inclure DexScreener
 @app.route('/api/tokens-detail')
+@response_cache.cached(max_age=30)
 def get_tokens_detail():
-    """Endpoint pour récupérer tous les tokens avec détails DexScreener, Whale ET Pump.fun"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    """Tokens avec détails DexScreener, Whale ET Pump.fun
+    
+    Avec limit (ou cursor): une page filtrée et triée côté serveur, pagination par
+    curseur (sort, order, min_/max_*, symbol, bonding_status, tradeable, on_pump,
+    discovered_on, updated_within_minutes, include_total). Sans: table complète.
+    format=columns: noms de colonnes une seule fois, lignes en tableaux de valeurs.
+    """
+    conn = get_db()
     cursor = conn.cursor()
+    cursor.row_factory = None  # Tuples sérialisés directement
+    layout = requested_layout()
     
     try:
-        # ✅ REQUÊTE CORRIGÉE avec toutes les colonnes (DexScreener + Whale + Pump.fun)
-        cursor.execute('''
-            SELECT address, symbol, name, price_usdc, invest_score, liquidity_usd,
-                   volume_24h, holders, age_hours, rug_score, is_tradeable,
-                   updated_at, first_discovered_at, bonding_curve_status, bonding_curve_progress,
-                   status,
-                   
-                   -- Colonnes DexScreener
-                   dexscreener_pair_created_at,
-                   dexscreener_price_usd,
-                   dexscreener_market_cap,
-                   dexscreener_liquidity_base,
-                   dexscreener_liquidity_quote,
-                   dexscreener_volume_1h,
-                   dexscreener_volume_6h,
-                   dexscreener_volume_24h,
-                   dexscreener_price_change_1h,
-                   dexscreener_price_change_6h,
-                   dexscreener_price_change_h24,
-                   dexscreener_txns_1h,
-                   dexscreener_txns_6h,
-                   dexscreener_txns_24h,
-                   dexscreener_buys_1h,
-                   dexscreener_sells_1h,
-                   dexscreener_buys_24h,
-                   dexscreener_sells_24h,
-                   COALESCE(updated_at, first_discovered_at) as last_update,
-                   
-                   -- === COLONNES PUMP.FUN (AJOUTÉES) ===
-                   exists_on_pump,
-                   pump_fun_name,
-                   pump_fun_symbol,
-                   pump_fun_description,
-                   pump_fun_image_uri,
-                   pump_fun_metadata_uri,
-                   pump_fun_twitter,
-                   pump_fun_telegram,
-                   pump_fun_website,
-                   pump_fun_show_name,
-                   pump_fun_created_timestamp,
-                   pump_fun_usd_market_cap,
-                   pump_fun_reply_count,
-                   pump_fun_raydium_pool,
-                   pump_fun_complete,
-                   pump_fun_total_supply,
-                   pump_fun_creator,
-                   pump_fun_nsfw,
-                   pump_fun_market_cap,
-                   pump_fun_virtual_sol_reserves,
-                   pump_fun_virtual_token_reserves,
-                   pump_fun_bonding_curve,
-                   pump_fun_associated_bonding_curve,
-                   pump_fun_king_of_hill_timestamp,
-                   pump_fun_market_id,
-                   pump_fun_inverted,
-                   pump_fun_is_currently_live,
-                   pump_fun_username,
-                   pump_fun_profile_image,
-                   pump_fun_last_pump_update,
-                   
-                   -- === COLONNES WHALE ===
-                   -- Activité whale 1h
-                   (SELECT COUNT(*) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-1 hour', 'localtime')) as whale_activity_1h,
-                   
-                   -- Montant max whale 1h  
-                   (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-1 hour', 'localtime')) as whale_max_amount_1h,
-                   
-                   -- Type de dernière transaction whale 1h
-                   (SELECT w.transaction_type FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-1 hour', 'localtime')
-                    ORDER BY w.timestamp DESC LIMIT 1) as whale_last_type_1h,
-                   
-                   -- Activité whale 6h
-                   (SELECT COUNT(*) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-6 hours', 'localtime')) as whale_activity_6h,
-                   
-                   -- Montant max whale 6h
-                   (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-6 hours', 'localtime')) as whale_max_amount_6h,
-                   
-                   -- Activité whale 24h
-                   (SELECT COUNT(*) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-24 hours', 'localtime')) as whale_activity_24h,
-                   
-                   -- Montant max whale 24h
-                   (SELECT MAX(w.amount_usd) FROM whale_transactions_live w 
-                    WHERE w.token_address = tokens.address 
-                    AND w.timestamp > datetime('now', '-24 hours', 'localtime')) as whale_max_amount_24h
-
+        if 'limit' not in request.args and 'cursor' not in request.args:
+            cursor.execute(f'''
+                SELECT {tokens_detail_columns()}
+                FROM tokens
+                ORDER BY {last_update_sql()} DESC, invest_score DESC
+            ''')
+            rows = cursor.fetchall()
+            logger.info(f"📊 Returned {len(rows)} tokens with DexScreener, Whale AND Pump.fun data")
+            return json_response(rows_payload(cursor_columns(cursor), rows, layout))
+        
+        sort = request.args.get('sort', 'last_update')
+        if sort not in TOKENS_DETAIL_SORTS:
+            return jsonify({"error": f"sort must be one of {sorted(TOKENS_DETAIL_SORTS)}"}), 400
+        order = request.args.get('order', 'desc').lower()
+        if order not in ('asc', 'desc'):
+            return jsonify({"error": "order must be asc or desc"}), 400
+        limit = max(1, min(request.args.get('limit', 50, type=int), TOKENS_DETAIL_MAX_LIMIT))
+        
+        clauses, params, filters = build_tokens_detail_filters(request.args)
+        fingerprint = filters_fingerprint(filters)
+        
+        total = None
+        if request.args.get('include_total', type=int):
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor.execute(f"SELECT COUNT(*) FROM tokens {where}", params)
+            total = cursor.fetchone()[0]
+        
+        sort_expression = last_update_sql() if sort == 'last_update' else TOKENS_DETAIL_SORTS[sort]
+        page_clauses, page_params = list(clauses), list(params)
+        if request.args.get('cursor'):
+            try:
+                value, address = decode_cursor(request.args['cursor'], sort, order, fingerprint)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            # Forme "a <= v AND (a < v OR address < x)": seek dans l'index de tri,
+            # contrairement à la comparaison de row values (scan depuis le début)
+            op = '<' if order == 'desc' else '>'
+            page_clauses.append(f"{sort_expression} {op}= ? AND ({sort_expression} {op} ? OR address {op} ?)")
+            page_params.extend([value, value, address])
+        
+        where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        cursor.execute(f'''
+            SELECT {tokens_detail_columns()},
+                   {sort_expression} AS sort_value
             FROM tokens
-            ORDER BY last_update DESC, invest_score DESC
-        ''')
-        
-        rows = []
-        for row in cursor.fetchall():
-            row_dict = dict(row)
-            
-            # ✅ AJOUT: Générer l'URL DexScreener si on a des données
-            if row_dict.get('dexscreener_price_usd', 0) > 0:
-                row_dict['dexscreener_url'] = f"https://dexscreener.com/solana/{row_dict['address']}"
-            else:
-                row_dict['dexscreener_url'] = None
-            
-            # ✅ AJOUT: Calculer la date de dernière mise à jour DexScreener
-            row_dict['last_dexscreener_update'] = row_dict.get('updated_at')
-            
-            rows.append(row_dict)
-        
-        logger.info(f"📊 Returned {len(rows)} tokens with DexScreener, Whale AND Pump.fun data")
-        return jsonify(rows)
+            {where}
+            ORDER BY {sort_expression} {order}, address {order}
+            LIMIT ?
+        ''', page_params + [limit + 1])
+        
+        rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        # sort_value en dernière colonne, address en première
+        next_cursor = encode_cursor(sort, order, fingerprint, rows[-1][-1], rows[-1][0]) if has_more else None
+        
+        payload = rows_payload(cursor_columns(cursor)[:-1], [row[:-1] for row in rows], layout)
+        page = {'columns': payload['columns'], 'tokens': payload['rows']} if layout == "columns" else {'tokens': payload}
+        page.update({
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'sort': sort,
+            'order': order,
+            'limit': limit
+        })
+        if total is not None:
+            page['total'] = total
+        return json_response(page)
         
     except Exception as e:
         logger.error(f"Error in /api/tokens-detail: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/api/debug-whale-data')
 def debug_whale_data():
     """Endpoint de debug pour vérifier les données whale"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
@@ -666,27 +899,26 @@ def debug_whale_data():
         whale_transactions = [dict(row) for row in cursor.fetchall()]
         
         # Vérifier combien de tokens matchent
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT DISTINCT w.token_address, t.symbol, t.address
             FROM whale_transactions_live w
             LEFT JOIN tokens t ON w.token_address = t.address
-            WHERE w.timestamp > datetime('now', '-24 hours', 'localtime')
+            WHERE {epoch('whale_transactions_live', 'timestamp', 'w')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
         ''')
         matching_tokens = [dict(row) for row in cursor.fetchall()]
         
         # Compter les tokens avec whale activity
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT COUNT(DISTINCT t.address) as token_count
             FROM tokens t
             WHERE EXISTS (
                 SELECT 1 FROM whale_transactions_live w 
                 WHERE w.token_address = t.address 
-                AND w.timestamp > datetime('now', '-24 hours', 'localtime')
+                AND {epoch('whale_transactions_live', 'timestamp', 'w')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
             )
         ''')
         tokens_with_whale = cursor.fetchone()[0]
         
-        conn.close()
         
         return jsonify({
             'whale_transactions_sample': whale_transactions,
@@ -698,8 +930,6 @@ def debug_whale_data():
     except Exception as e:
         logger.error(f"Error in debug whale data: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        conn.close()
 
 
 @app.route('/api/test-whale-data')
@@ -770,11 +1000,32 @@ def create_test_whale_data():
     finally:
         conn.close()
         
+@app.route('/api/search')
+def search():
+    """Recherche de tokens pour l'autocomplétion (symbole, nom, champs pump.fun)
+
+    ?q=pep&limit=20 - préfixe sur le dernier mot, adresse complète acceptée
+    """
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 20, type=int)
+    if not query:
+        return json_response({'query': query, 'results': []})
+    
+    try:
+        return json_response({'query': query, 'results': search_tokens(get_db(), query, limit)})
+    except sqlite3.OperationalError as e:
+        # tokens_fts absente: TokenSearchIndex (init_schema) a échoué ou tokens inexistante
+        logger.error(f"Search index error: {e}")
+        return jsonify({"error": "Search index not available"}), 503
+    except Exception as e:
+        logger.error(f"Error searching tokens for {query!r}: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/token-has-history/<address>')
 def check_token_history(address):
     """Vérifier si un token a des données historiques"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -783,7 +1034,6 @@ def check_token_history(address):
         ''', (address,))
         
         count = cursor.fetchone()[0]
-        conn.close()
         
         return jsonify({
             'has_history': count > 0,
@@ -794,12 +1044,49 @@ def check_token_history(address):
         logger.error(f"Error checking history for {address}: {e}")
         return jsonify({"has_history": False, "data_points": 0}), 500
 
+@app.route('/api/tokens-has-history', methods=['GET', 'POST'])
+def check_tokens_history():
+    """Historique de plusieurs tokens en une requête indexée
+
+    POST {"addresses": [...]} ou GET ?addresses=a,b,c
+    -> {adresse: {"has_history", "data_points"}}
+    """
+    if request.method == 'POST':
+        addresses = (request.get_json(silent=True) or {}).get('addresses')
+    else:
+        addresses = [a for a in request.args.get('addresses', '').split(',') if a]
+    
+    if not isinstance(addresses, list) or not all(isinstance(a, str) for a in addresses):
+        return jsonify({"error": "addresses must be a list of strings"}), 400
+    if len(addresses) > TOKENS_HAS_HISTORY_MAX:
+        return jsonify({"error": f"at most {TOKENS_HAS_HISTORY_MAX} addresses per request"}), 400
+    
+    try:
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        
+        # Un COUNT par adresse sur idx_tokens_hist_address_snapshot_timestamp_epoch (index couvrant)
+        cursor.execute('''
+            SELECT value, (SELECT COUNT(*) FROM tokens_hist WHERE address = value)
+            FROM json_each(?)
+        ''', (json.dumps(list(dict.fromkeys(addresses))),))
+        
+        return json_response({
+            address: {'has_history': count > 0, 'data_points': count}
+            for address, count in cursor.fetchall()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error checking history for {len(addresses)} tokens: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/trends-summary')
+@response_cache.cached(max_age=60)
 def get_trends_summary():
     """Récupérer un résumé des tendances pour tous les tokens actifs"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         # Paramètres
@@ -819,12 +1106,12 @@ def get_trends_summary():
                 -- Prix: première et dernière valeur
                 (SELECT price_usdc FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp ASC LIMIT 1) as price_start,
                  
                 (SELECT price_usdc FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp DESC LIMIT 1) as price_end,
                 
                 -- Volume: moyenne et tendance
@@ -834,23 +1121,23 @@ def get_trends_summary():
                 -- Liquidité: tendance
                 (SELECT dexscreener_liquidity_quote FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp ASC LIMIT 1) as liquidity_start,
                  
                 (SELECT dexscreener_liquidity_quote FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp DESC LIMIT 1) as liquidity_end,
                 
                 -- Score d'investissement: tendance
                 (SELECT invest_score FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp ASC LIMIT 1) as score_start,
                  
                 (SELECT invest_score FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp DESC LIMIT 1) as score_end,
                 
                 -- Progression bonding curve
@@ -859,7 +1146,7 @@ def get_trends_summary():
                 -- Holders: tendance
                 (SELECT holders FROM tokens_hist th2 
                  WHERE th2.address = t.address 
-                 AND th2.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                 AND {th2_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                  ORDER BY th2.snapshot_timestamp DESC LIMIT 1) as current_holders,
                 
                 t.bonding_curve_status,
@@ -867,14 +1154,15 @@ def get_trends_summary():
                 
             FROM tokens t
             JOIN tokens_hist th ON t.address = th.address
-            WHERE th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+            WHERE {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
             AND t.symbol IS NOT NULL 
             AND t.symbol != 'UNKNOWN'
             GROUP BY t.address, t.symbol, t.name
             HAVING COUNT(th.snapshot_timestamp) >= ?
             ORDER BY snapshot_count DESC, MAX(th.snapshot_timestamp) DESC
             LIMIT 50
-        '''.format(hours, hours, hours, hours, hours, hours), (min_snapshots,))
+        '''.format(hours=int(hours), th_snapshot=epoch('tokens_hist', 'snapshot_timestamp', 'th'),
+                   th2_snapshot=epoch('tokens_hist', 'snapshot_timestamp', 'th2')), (min_snapshots,))
         
         tokens_summary = []
         for row in cursor.fetchall():
@@ -916,7 +1204,6 @@ def get_trends_summary():
             
             tokens_summary.append(row_dict)
         
-        conn.close()
         
         return jsonify({
             'tokens': tokens_summary,
@@ -930,11 +1217,11 @@ def get_trends_summary():
 
 
 @app.route('/api/trending-tokens')
+@response_cache.cached(max_age=60)
 def get_trending_tokens():
     """Récupérer les tokens avec les meilleures tendances récentes"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         hours = request.args.get('hours', 6, type=int)
@@ -949,32 +1236,32 @@ def get_trending_tokens():
                     t.name,
                     
                     -- Prix: première et dernière valeur
-                    (SELECT COALESCE(dexscreener_price_usd, price_usdc) FROM tokens_hist th 
+                    (SELECT effective_price_usd FROM tokens_hist th 
                      WHERE th.address = t.address 
-                     AND th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
-                     AND COALESCE(th.dexscreener_price_usd, th.price_usdc) > 0
-                     ORDER BY th.snapshot_timestamp ASC LIMIT 1) as price_start,
+                     AND {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
+                     AND th.effective_price_usd > 0
+                     ORDER BY {th_snapshot} ASC LIMIT 1) as price_start,
                      
-                    (SELECT COALESCE(dexscreener_price_usd, price_usdc) FROM tokens_hist th 
+                    (SELECT effective_price_usd FROM tokens_hist th 
                      WHERE th.address = t.address 
-                     AND th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
-                     AND COALESCE(th.dexscreener_price_usd, th.price_usdc) > 0
-                     ORDER BY th.snapshot_timestamp DESC LIMIT 1) as price_end,
+                     AND {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
+                     AND th.effective_price_usd > 0
+                     ORDER BY {th_snapshot} DESC LIMIT 1) as price_end,
                     
                     -- Volume récent
-                    AVG(COALESCE(th.dexscreener_volume_24h, th.volume_24h, 0)) as avg_volume,
-                    MAX(COALESCE(th.dexscreener_volume_24h, th.volume_24h, 0)) as max_volume,
+                    AVG(th.effective_volume_24h) as avg_volume,
+                    MAX(th.effective_volume_24h) as max_volume,
                     
                     -- Score d'investissement
                     (SELECT invest_score FROM tokens_hist th 
                      WHERE th.address = t.address 
-                     AND th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                     AND {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                      AND th.invest_score IS NOT NULL
                      ORDER BY th.snapshot_timestamp ASC LIMIT 1) as score_start,
                      
                     (SELECT invest_score FROM tokens_hist th 
                      WHERE th.address = t.address 
-                     AND th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                     AND {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                      AND th.invest_score IS NOT NULL
                      ORDER BY th.snapshot_timestamp DESC LIMIT 1) as score_end,
                     
@@ -984,6 +1271,8 @@ def get_trending_tokens():
                     t.invest_score,
                     t.volume_24h,
                     t.dexscreener_volume_24h,
+                    t.effective_price_usd as current_price,
+                    t.effective_volume_24h as current_volume,
                     t.liquidity_usd,
                     t.dexscreener_liquidity_quote,
                     t.holders,
@@ -994,7 +1283,7 @@ def get_trending_tokens():
                     
                 FROM tokens t
                 JOIN tokens_hist th ON t.address = th.address
-                WHERE th.snapshot_timestamp > datetime('now', '-{} hours', 'localtime')
+                WHERE {th_snapshot} > CAST(strftime('%s', 'now', '-{hours} hours') AS INTEGER)
                 AND t.symbol IS NOT NULL 
                 AND t.symbol != 'UNKNOWN'
                 AND t.symbol != ''
@@ -1039,7 +1328,7 @@ def get_trending_tokens():
             WHERE price_start > 0 AND price_end > 0  -- Avoir des données de prix valides
             ORDER BY trend_score DESC, price_change_pct DESC
             LIMIT ?
-        '''.format(hours, hours, hours, hours, hours), (limit,))
+        '''.format(hours=int(hours), th_snapshot=epoch('tokens_hist', 'snapshot_timestamp', 'th')), (limit,))
         
         trending_tokens = []
         for row in cursor.fetchall():
@@ -1059,13 +1348,10 @@ def get_trending_tokens():
                 trend = "neutral"
             
             row_dict['trend'] = trend
-            row_dict['current_price'] = row_dict['dexscreener_price_usd'] or row_dict['price_usdc']
-            row_dict['current_volume'] = row_dict['dexscreener_volume_24h'] or row_dict['volume_24h']
             row_dict['current_liquidity'] = row_dict['dexscreener_liquidity_quote'] or row_dict['liquidity_usd']
             
             trending_tokens.append(row_dict)
         
-        conn.close()
         
         return jsonify({
             'trending_tokens': trending_tokens,
@@ -1080,11 +1366,12 @@ def get_trending_tokens():
 
 # Nouvel endpoint spécifique aux données DexScreener
 @app.route('/api/dexscreener-data')
+@response_cache.cached(max_age=30)
 def get_dexscreener_data():
     """Endpoint spécifique pour les données DexScreener"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = get_db()
     cursor = conn.cursor()
+    cursor.row_factory = None  # Tuples sérialisés directement
     
     try:
         # Filtres optionnels
@@ -1092,7 +1379,7 @@ def get_dexscreener_data():
         min_liquidity = request.args.get('min_liquidity', 0, type=float)
         max_age_hours = request.args.get('max_age_hours', 168, type=float)  # 7 jours par défaut
         
-        cursor.execute('''
+        cursor.execute(f'''
             SELECT address, symbol, name,
                    dexscreener_pair_created_at,
                    dexscreener_price_usd,
@@ -1113,35 +1400,70 @@ def get_dexscreener_data():
                    dexscreener_buys_24h,
                    dexscreener_sells_24h,
                    first_discovered_at,
-                   updated_at
+                   updated_at,
+                   'https://dexscreener.com/solana/' || address as dexscreener_url
             FROM tokens
             WHERE dexscreener_price_usd > 0
             AND dexscreener_volume_24h >= ?
             AND dexscreener_liquidity_quote >= ?
-            AND (julianday('now', 'localtime') - julianday(first_discovered_at)) * 24 <= ?
+            AND {epoch('tokens', 'first_discovered_at')} >= CAST(strftime('%s', 'now') AS INTEGER) - ? * 3600
             ORDER BY dexscreener_volume_24h DESC
             LIMIT 200
         ''', (min_volume_24h, min_liquidity, max_age_hours))
         
-        rows = []
-        for row in cursor.fetchall():
-            row_dict = dict(row)
-            row_dict['dexscreener_url'] = f"https://dexscreener.com/solana/{row_dict['address']}"
-            rows.append(row_dict)
-        
-        return jsonify(rows)
+        return json_response(rows_payload(cursor_columns(cursor), cursor.fetchall(), requested_layout()))
         
     except Exception as e:
         logger.error(f"Error in /api/dexscreener-data: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    finally:
-        conn.close()
 
 # Instance globale de l'API
 token_api = TokenAPI()
 
+# Service de scoring ML partagé par toutes les requêtes (créé au premier appel)
+ml_scorer = None
+ml_scorer_lock = threading.Lock()
+
+def get_ml_scorer() -> MLScoringService:
+    global ml_scorer
+    with ml_scorer_lock:
+        if ml_scorer is None:
+            ml_scorer = MLScoringService(DATABASE_PATH)
+        elif not ml_scorer.available:
+            ml_scorer.load_model()  # Modèle entraîné depuis le démarrage
+    return ml_scorer
+
+@app.route('/api/ml-score')
+def get_ml_score():
+    """Score ML à la demande: ?address=... (ou plusieurs séparées par des virgules, max 100)"""
+    addresses = [a.strip() for a in request.args.get('address', '').split(',') if a.strip()][:100]
+    if not addresses:
+        return jsonify({"error": "address parameter required"}), 400
+    
+    scorer = get_ml_scorer()
+    if not scorer.available:
+        return jsonify({"error": "ML model not available"}), 503
+    
+    try:
+        results = scorer.score_many(addresses, timeout=5.0)
+    except Exception as e:
+        logger.error(f"Error in /api/ml-score: {e}")
+        return jsonify({"error": "Internal server error"}), 500
+    
+    if len(addresses) == 1:
+        result = results[addresses[0]]
+        if result is None:
+            return jsonify({"error": "Token not found"}), 404
+        return jsonify(result)
+    
+    return jsonify({
+        "scores": [result for result in results.values() if result is not None],
+        "not_found": [address for address, result in results.items() if result is None]
+    })
+
 # ✅ ENDPOINTS EXISTANTS (gardés tels quels)
 @app.route('/api/stats')
+@response_cache.cached(max_age=30)
 def get_stats():
     """Endpoint pour les statistiques générales"""
     try:
@@ -1155,14 +1477,13 @@ def get_stats():
 def get_performance_metrics():
     """Endpoint pour récupérer les métriques de performance"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         # Tokens mis à jour dans les 5 dernières minutes
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT COUNT(*) FROM tokens 
-            WHERE updated_at > datetime('now', '-5 minutes', 'localtime')
+            WHERE {epoch('tokens', 'updated_at')} > CAST(strftime('%s', 'now', '-5 minutes') AS INTEGER)
             AND updated_at IS NOT NULL
             AND symbol IS NOT NULL 
             AND symbol != 'UNKNOWN' 
@@ -1171,9 +1492,9 @@ def get_performance_metrics():
         tokens_updated_5min = cursor.fetchone()[0]
         
         # Tokens mis à jour dans la dernière heure
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT COUNT(*) FROM tokens 
-            WHERE updated_at > datetime('now', '-1 hour', 'localtime')
+            WHERE {epoch('tokens', 'updated_at')} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)
             AND updated_at IS NOT NULL
             AND symbol IS NOT NULL 
             AND symbol != 'UNKNOWN' 
@@ -1201,7 +1522,6 @@ def get_performance_metrics():
         """)
         dexscreener_tokens = cursor.fetchone()[0]
         
-        conn.close()
         
         current_throughput = tokens_updated_5min / 300.0
         enrichment_rate = (enriched_tokens / total_tokens * 100) if total_tokens > 0 else 0
@@ -1233,11 +1553,11 @@ def get_performance_metrics():
         }), 500
 
 @app.route('/api/dashboard-data')
+@response_cache.cached(max_age=30)
 def get_dashboard_data():
     """Endpoint combiné pour toutes les données du dashboard"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
-        conn.row_factory = sqlite3.Row
+        conn = get_db()
         cursor = conn.cursor()
         
         # Stats réelles depuis la DB
@@ -1247,9 +1567,9 @@ def get_dashboard_data():
         cursor.execute("SELECT COUNT(*) FROM tokens WHERE invest_score >= 80")
         high_score_tokens = cursor.fetchone()[0]
         
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT COUNT(*) FROM tokens 
-            WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+            WHERE {epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
         """)
         new_tokens = cursor.fetchone()[0]
         
@@ -1266,21 +1586,20 @@ def get_dashboard_data():
         """)
         dexscreener_tokens = cursor.fetchone()[0]
 
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT COUNT(*) FROM whale_transactions_live 
-            WHERE timestamp > datetime('now', '-1 hour', 'localtime')
+            WHERE {epoch('whale_transactions_live', 'timestamp')} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)
         """)
         whale_activity_1h = cursor.fetchone()[0]
 
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT SUM(amount_usd) FROM whale_transactions_live 
-            WHERE timestamp > datetime('now', '-24 hours', 'localtime')
+            WHERE {epoch('whale_transactions_live', 'timestamp')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
         """)
         whale_volume_24h = cursor.fetchone()[0] or 0
 
         
         
-        conn.close()
         
 
         corrected_stats = {
@@ -1318,7 +1637,7 @@ def dashboard_detail():
 def health_check():
     """Health check endpoint"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM tokens")
         count = cursor.fetchone()[0]
@@ -1327,13 +1646,14 @@ def health_check():
         cursor.execute("SELECT COUNT(*) FROM tokens WHERE dexscreener_price_usd > 0")
         dexscreener_count = cursor.fetchone()[0]
         
-        conn.close()
         
         return jsonify({
             "status": "healthy",
             "database": "connected",
             "token_count": count,
             "dexscreener_count": dexscreener_count,
+            "read_pool": read_pool.get_stats(),
+            "response_cache": response_cache.get_stats(),
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
@@ -1356,8 +1676,12 @@ def index():
             "/api/token-chart-data/<address>",
             "/api/token-history-stats/<address>",
             "/api/token-trends/<address>",
+            "/api/token-history-bundle/<address>",
+            "/api/tokens-has-history",
+            "/api/search",
             "/api/dashboard-data",
             "/api/performance",
+            "/api/ml-score",
             "/api/health",
             "/dashboard",
             "/dashboard/detail",
@@ -1389,6 +1713,7 @@ if __name__ == '__main__':
         
         conn.close()
         logger.info(f"✅ Database connected: {count} tokens total, {dexscreener_count} with DexScreener data")
+        init_schema()
     except Exception as e:
         logger.error(f"❌ Database connection failed: {e}")
     
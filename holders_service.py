@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+👥 Holders Service - Holders et concentration, une seule source pour tous les enrichers
+getTokenLargestAccounts en requêtes JSON-RPC batch + supply lue par getMultipleAccounts,
+concentration top 1 / top 10 en valeurs numériques, cache avec TTL selon l'activité
+du token (mémoire + colonne holders_checked_at pour survivre aux redémarrages).
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+
+from token_metadata_decoder import OnChainMetadataReader, decode_mint_supply
+
+logger = logging.getLogger('holders_service')
+
+# Colonnes structurées qui remplacent le texte libre holder_distribution
+HOLDERS_COLUMNS = [
+    ("top1_concentration", "REAL"),
+    ("top10_concentration", "REAL"),
+    ("holders_checked_at", "DATETIME"),
+]
+
+LEGACY_DISTRIBUTION_PATTERN = re.compile(r'Top 10(?: holders)?: ([\d.]+)%')
+
+
+class HoldersService:
+    """Holders / concentration par lots avec cache à TTL adaptatif
+
+    holders = comptes non vides parmi les 20 plus gros (limite de
+    getTokenLargestAccounts): exact sous 20, borne basse au-delà.
+    """
+
+    def __init__(self, database_path: str = "tokens.db",
+                 rpc_url: str = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8",
+                 session: Optional[aiohttp.ClientSession] = None,
+                 request_json: Optional[Callable[[object], Awaitable[Optional[object]]]] = None,
+                 rpc_batch_size: int = 20, max_parallel_calls: int = 4, cache_size: int = 20000):
+        self.database_path = database_path
+        self.rpc_url = rpc_url
+        self.session = session
+        self.request_json = request_json or self._post_json
+        self.rpc_batch_size = rpc_batch_size
+        self.call_semaphore = asyncio.Semaphore(max_parallel_calls)
+        self.supply_reader = OnChainMetadataReader(rpc_url=rpc_url, session=session, request_json=self.request_json)
+
+        # TTL selon l'activité: un token chaud change de distribution en quelques minutes
+        self.ttl_config = {
+            'hot_volume_usd': 100_000,
+            'active_volume_usd': 5_000,
+            'young_age_hours': 6,
+            'hot_ttl': 120,
+            'active_ttl': 900,
+            'quiet_ttl': 6 * 3600
+        }
+
+        # address -> (vérifié_à, ttl, résultat)
+        self.cache: Dict[str, tuple] = {}
+        self.cache_size = cache_size
+
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'db_hits': 0,
+            'fetched': 0,
+            'rpc_calls': 0,
+            'errors': 0
+        }
+
+        self.init_database_schema()
+
+    def init_database_schema(self):
+        """Colonnes structurées + reprise des anciennes valeurs texte"""
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute("PRAGMA table_info(tokens)")
+            columns = {row[1] for row in cursor.fetchall()}
+            if not columns:
+                return
+
+            for column, column_type in HOLDERS_COLUMNS:
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE tokens ADD COLUMN {column} {column_type}")
+                    logger.info(f"✅ Added column: {column}")
+
+            # Backfill unique depuis "Top 10: xx.xx%" / "Top 10 holders: xx.xx% of total supply"
+            if 'top10_concentration' not in columns and 'holder_distribution' in columns:
+                cursor.execute('''
+                    SELECT address, holder_distribution FROM tokens
+                    WHERE holder_distribution LIKE '%Top 10%'
+                ''')
+                backfill = []
+                for address, distribution in cursor.fetchall():
+                    match = LEGACY_DISTRIBUTION_PATTERN.search(distribution or "")
+                    if match:
+                        backfill.append((float(match.group(1)), address))
+                cursor.executemany("UPDATE tokens SET top10_concentration = ? WHERE address = ?", backfill)
+                if backfill:
+                    logger.info(f"✅ Backfilled top10_concentration for {len(backfill)} tokens")
+
+            conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Holders schema error: {e}")
+        finally:
+            conn.close()
+
+    def activity_ttl(self, volume_24h: Optional[float], age_hours: Optional[float]) -> int:
+        """TTL du cache selon volume et âge du token"""
+        config = self.ttl_config
+        volume = volume_24h or 0
+        if volume >= config['hot_volume_usd'] or (age_hours is not None and age_hours < config['young_age_hours']):
+            return config['hot_ttl']
+        if volume >= config['active_volume_usd']:
+            return config['active_ttl']
+        return config['quiet_ttl']
+
+    # === Accès réseau ===
+
+    async def _post_json(self, payload) -> Optional[object]:
+        own_session = self.session is None
+        session = self.session or aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        try:
+            async with session.post(self.rpc_url, json=payload) as resp:
+                if resp.status != 200:
+                    logger.debug(f"Holders RPC HTTP {resp.status}")
+                    return None
+                return await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"Holders RPC error: {e}")
+            return None
+        finally:
+            if own_session:
+                await session.close()
+
+    async def _largest_accounts_chunk(self, addresses: List[str]) -> Dict[str, List[Dict]]:
+        """Une requête JSON-RPC batch de getTokenLargestAccounts"""
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": "getTokenLargestAccounts", "params": [address]}
+            for i, address in enumerate(addresses)
+        ]
+        async with self.call_semaphore:
+            data = await self.request_json(payload)
+        self.stats['rpc_calls'] += 1
+
+        if not isinstance(data, list):
+            self.stats['errors'] += len(addresses)
+            return {}
+
+        largest = {}
+        for response in data:
+            value = (response.get("result") or {}).get("value") if isinstance(response, dict) else None
+            index = response.get("id") if isinstance(response, dict) else None
+            if isinstance(value, list) and isinstance(index, int) and 0 <= index < len(addresses):
+                largest[addresses[index]] = value
+        self.stats['errors'] += len(addresses) - len(largest)
+        return largest
+
+    async def _fetch_batch(self, addresses: List[str]) -> Dict[str, Dict]:
+        """Plus gros comptes + supply pour un lot, concentration calculée localement"""
+        chunks = [addresses[i:i + self.rpc_batch_size] for i in range(0, len(addresses), self.rpc_batch_size)]
+        largest_results, mint_accounts = await asyncio.gather(
+            asyncio.gather(*(self._largest_accounts_chunk(chunk) for chunk in chunks)),
+            self.supply_reader.get_multiple_accounts(addresses)
+        )
+        largest = {}
+        for result in largest_results:
+            largest.update(result)
+
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        results = {}
+        for address, accounts in largest.items():
+            amounts = sorted((int(acc.get("amount") or 0) for acc in accounts), reverse=True)
+            mint_account = mint_accounts.get(address)
+            supply = decode_mint_supply(mint_account["data"]) if mint_account else None
+
+            results[address] = {
+                "holders": sum(1 for amount in amounts if amount > 0),
+                "top1_concentration": round(amounts[0] / supply * 100, 4) if supply and amounts else None,
+                "top10_concentration": round(sum(amounts[:10]) / supply * 100, 4) if supply else None,
+                "holders_checked_at": now
+            }
+
+        self.stats['fetched'] += len(results)
+        return results
+
+    # === Cache / base ===
+
+    def _load_rows(self, addresses: List[str]) -> Dict[str, tuple]:
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+        rows = {}
+        try:
+            for i in range(0, len(addresses), 500):
+                chunk = addresses[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f'''
+                    SELECT address, volume_24h, age_hours, holders,
+                           top1_concentration, top10_concentration, holders_checked_at
+                    FROM tokens WHERE address IN ({placeholders})
+                ''', chunk)
+                for row in cursor.fetchall():
+                    rows[row[0]] = row[1:]
+        except sqlite3.Error as e:
+            logger.debug(f"Holders cache read error: {e}")
+        finally:
+            conn.close()
+        return rows
+
+    def _persist(self, results: Dict[str, Dict]):
+        if not results:
+            return
+        conn = sqlite3.connect(self.database_path)
+        try:
+            conn.executemany('''
+                UPDATE tokens SET holders = ?, top1_concentration = ?, top10_concentration = ?,
+                                  holders_checked_at = ?
+                WHERE address = ?
+            ''', [
+                (r["holders"], r["top1_concentration"], r["top10_concentration"], r["holders_checked_at"], address)
+                for address, r in results.items()
+            ])
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Holders write error: {e}")
+            conn.rollback()
+        finally:
+            conn.close()
+
+    async def get_holders_batch(self, addresses: List[str]) -> Dict[str, Dict]:
+        """{address: {holders, top1_concentration, top10_concentration, holders_checked_at}}
+
+        Les tokens dont la lecture a échoué sont absents du résultat.
+        """
+        addresses = list(dict.fromkeys(addresses))
+        self.stats['requests'] += len(addresses)
+        now = time.time()
+        results = {}
+
+        misses = []
+        for address in addresses:
+            entry = self.cache.get(address)
+            if entry and now - entry[0] < entry[1]:
+                results[address] = entry[2]
+                self.stats['cache_hits'] += 1
+            else:
+                misses.append(address)
+
+        if not misses:
+            return results
+
+        rows = await asyncio.to_thread(self._load_rows, misses)
+        ttls = {}
+        to_fetch = []
+        for address in misses:
+            row = rows.get(address)
+            volume_24h, age_hours = (row[0], row[1]) if row else (None, None)
+            ttls[address] = self.activity_ttl(volume_24h, age_hours)
+
+            # Valeur en base encore fraîche (autre process, redémarrage)
+            if row and row[5] is not None and row[5] != "":
+                checked_at = self._parse_timestamp(row[5])
+                if checked_at and now - checked_at < ttls[address]:
+                    result = {"holders": row[2], "top1_concentration": row[3],
+                              "top10_concentration": row[4], "holders_checked_at": row[5]}
+                    self.cache[address] = (checked_at, ttls[address], result)
+                    results[address] = result
+                    self.stats['db_hits'] += 1
+                    continue
+            to_fetch.append(address)
+
+        if to_fetch:
+            fetched = await self._fetch_batch(to_fetch)
+            await asyncio.to_thread(self._persist, fetched)
+            for address, result in fetched.items():
+                self.cache[address] = (now, ttls[address], result)
+            results.update(fetched)
+
+        if len(self.cache) > self.cache_size:
+            self._purge_expired(now)
+
+        return results
+
+    def _purge_expired(self, now: float):
+        """Retirer les entrées expirées (puis les plus anciennes si encore trop)"""
+        self.cache = {a: e for a, e in self.cache.items() if now - e[0] < e[1]}
+        if len(self.cache) > self.cache_size:
+            newest = sorted(self.cache.items(), key=lambda item: item[1][0], reverse=True)
+            self.cache = dict(newest[:self.cache_size])
+
+    async def get_holders(self, address: str) -> Optional[Dict]:
+        """Holders d'un token (passe par le cache du batch)"""
+        return (await self.get_holders_batch([address])).get(address)
+
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[float]:
+        try:
+            return datetime.strptime(str(value)[:19], '%Y-%m-%d %H:%M:%S').timestamp()
+        except ValueError:
+            return None
+
+    def get_stats(self) -> Dict:
+        served = self.stats['cache_hits'] + self.stats['db_hits']
+        return {
+            **self.stats,
+            'supply_rpc_calls': self.supply_reader.stats['rpc_calls'],
+            'cached_tokens': len(self.cache),
+            'hit_rate': (served / self.stats['requests'] * 100) if self.stats['requests'] else 0
+        }
@@ -25,6 +25,7 @@ from aiohttp import ClientSession, TCPConnector
 from async_lru import alru_cache
 from math import log
 from solana_monitor_c4 import start_monitoring
+from holders_service import HoldersService
 import pytz
 
 
@@ -156,6 +157,7 @@ class InvestScanner:
         }
         self.setup_database()
         self.migrate_database()
+        self.holders_service = HoldersService(self.database_path)
         start_performance_monitoring()
         logger.info("📊 Performance monitoring started")
 
@@ -243,21 +245,12 @@ class InvestScanner:
         conn.commit()
         conn.close()
 
-    async def analyze_holder_distribution(self, address: str) -> str:
-        url = f"https://public-api.solscan.io/token/holders?tokenAddress={address}&limit=100"
-        async with aiohttp.ClientSession(connector=TCPConnector(limit=50)) as session:
-            data = await self.fetch_json(url, session, api_type="solscan")
-            if data and "total" in data:
-                holders = data["total"]
-                if holders > 0:
-                    top_holders = data.get("holders", [])[:10]
-                    if top_holders:
-                        top_holders_sum = sum(float(holder.get("amount", 0)) for holder in top_holders)
-                        total_supply = data.get("totalSupply", 1)
-                        if total_supply > 0:
-                            concentration = (top_holders_sum / total_supply) * 100
-                            return f"Top 10 holders: {concentration:.2f}% of total supply"
-            return "Unknown"
+    async def analyze_holder_distribution(self, address: str) -> Dict:
+        """Holders + concentration top 1 / top 10 (valeurs numériques) via HoldersService"""
+        holders = await self.holders_service.get_holders(address)
+        if holders:
+            return holders
+        return {"holders": 0, "top1_concentration": None, "top10_concentration": None, "holders_checked_at": None}
 
     async def update_metrics(self):
         conn = sqlite3.connect(self.database_path)
@@ -387,10 +380,8 @@ class InvestScanner:
             return {"rug_score": 50}
 
     async def get_holders(self, address: str) -> int:
-        url = f"https://public-api.solscan.io/token/holders?tokenAddress={address}&limit=1"
-        async with aiohttp.ClientSession(connector=TCPConnector(limit=50)) as session:
-            data = await self.fetch_json(url, session, api_type="solscan")
-            return data.get("total", 0) if data else 0
+        holders = await self.holders_service.get_holders(address)
+        return holders["holders"] if holders else 0
 
     @alru_cache(maxsize=1000)
     async def get_launch_data(self, address: str) -> Dict:
@@ -513,11 +504,12 @@ class InvestScanner:
             INSERT OR REPLACE INTO tokens (
                 address, symbol, name, decimals, logo_uri, price_usdc, market_cap,
                 liquidity_usd, volume_24h, price_change_24h, age_hours,
-                rug_score, holders, is_tradeable, invest_score,
+                rug_score, holders, top1_concentration, top10_concentration, holders_checked_at,
+                is_tradeable, invest_score,
                 early_bonus, social_bonus, holders_bonus, 
                 first_discovered_at, updated_at,
                 launch_timestamp, bonding_curve_status, raydium_pool_address
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 
                     COALESCE((SELECT first_discovered_at FROM tokens WHERE address = ?), ?),
                     ?,
                     ?, ?, ?)
@@ -526,6 +518,7 @@ class InvestScanner:
                 token.get("logo_uri"), token.get("price_usdc"), token.get("market_cap"),
                 token.get("liquidity_usd"), token.get("volume_24h"), token.get("price_change_24h"),
                 token.get("age_hours"), token.get("rug_score"), token.get("holders"),
+                token.get("top1_concentration"), token.get("top10_concentration"), token.get("holders_checked_at"),
                 token.get("is_tradeable"), token.get("invest_score"),
                 token.get("early_bonus"), token.get("social_bonus"), token.get("holders_bonus"),
                 token["address"], local_timestamp,  # first_discovered_at avec timestamp local
@@ -564,7 +557,7 @@ class InvestScanner:
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT address, symbol, invest_score, price_usdc, volume_24h, liquidity_usd, holders, holder_distribution, first_discovered_at
+            SELECT address, symbol, invest_score, price_usdc, volume_24h, liquidity_usd, holders, top10_concentration, first_discovered_at
             FROM tokens
             WHERE is_tradeable = 1
             ORDER BY invest_score DESC
@@ -574,7 +567,8 @@ class InvestScanner:
         conn.close()
         if rows:
             logging.info("🏆 Top-10 tokens dans la base :")
-            for i, (addr, sym, score, price, vol, liq, hold, dist, dt) in enumerate(rows, 1):
+            for i, (addr, sym, score, price, vol, liq, hold, top10, dt) in enumerate(rows, 1):
+                dist = f"Top 10: {top10:.2f}%" if top10 is not None else None
                 logging.info(
                     f"{i:2}. {sym:<10} ({addr[:6]}…{addr[-4:]}) | Score: {score or 0:<6.2f} | "
                     f"Price: ${price or 0:<12.8f} | Vol: ${vol or 0:<12.0f} | "
@@ -595,13 +589,12 @@ class InvestScanner:
             dex_task = self.get_dexscreener_data(address)
             jup_task = self.check_jupiter_price(address)
             rug_task = self.get_rugcheck_score(address)
-            hold_task = self.get_holders(address)
             holder_dist_task = self.analyze_holder_distribution(address)
             launch_data_task = self.get_launch_data(address)
 
             # Attendre toutes les tâches
-            dex, jup, rug, hold, holder_distribution, launch_data = await asyncio.gather(
-                dex_task, jup_task, rug_task, hold_task, holder_dist_task, launch_data_task,
+            dex, jup, rug, holder_distribution, launch_data = await asyncio.gather(
+                dex_task, jup_task, rug_task, holder_dist_task, launch_data_task,
                 return_exceptions=True
             )
 
@@ -615,17 +608,14 @@ class InvestScanner:
             if isinstance(rug, Exception):
                 logging.error(f"Error getting rugcheck score for {address}: {rug}")
                 rug = {"rug_score": 0}
-            if isinstance(hold, Exception):
-                logging.error(f"Error getting holders for {address}: {hold}")
-                hold = 0
             if isinstance(holder_distribution, Exception):
                 logging.error(f"Error getting holder distribution for {address}: {holder_distribution}")
-                holder_distribution = "Unknown"
+                holder_distribution = {"holders": 0}
             if isinstance(launch_data, Exception):
                 logging.error(f"Error getting launch data for {address}: {launch_data}")
                 launch_data = {}
 
-            enriched = {**token, **dex, **jup, **rug, "holders": hold, "holder_distribution": holder_distribution}
+            enriched = {**token, **dex, **jup, **rug, **holder_distribution}
             enriched["is_tradeable"] = jup.get("has_price", False) or dex.get("has_dexscreener_data", False)
             enriched["early_bonus"] = await self.early_bonus(address)
             enriched["social_bonus"] = self.social_bonus()
@@ -649,8 +639,7 @@ class InvestScanner:
                 "early_bonus": 0,
                 "social_bonus": 0,
                 "holders_bonus": 0,
-                "holders": 0,
-                "holder_distribution": "Error"
+                "holders": 0
             }
         finally:
             # Enregistrer les métriques de performance
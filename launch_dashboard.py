@@ -13,7 +13,7 @@ from pathlib import Path
 
 # Import de vos modules existants
 from jup_db_scan_k2_g3_c1 import InvestScanner, main_loop, configure_logging
-from flask_api_backend import app
+from flask_api_backend import app, init_schema
 
 # Configuration par défaut
 DEFAULT_DATABASE_PATH = "tokens.db"
@@ -34,6 +34,7 @@ class DashboardLauncher:
     def start_flask_server(self):
         """Démarrer le serveur Flask dans un thread séparé"""
         def run_flask():
+            init_schema()  # Colonnes et index des routes, avant la première requête
             app.run(
                 host=self.flask_host,
                 port=self.flask_port,
@@ -5,6 +5,138 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, roc_auc_score
 from sklearn.preprocessing import StandardScaler
 import sqlite3
+import heapq
+
+from token_feature_store import TokenFeatureStore
+
+# Scoring en masse: tokens lus, prédits et écrits par lots de cette taille
+SCORING_CHUNK_SIZE = 5000
+
+TOKEN_SCORING_COLUMNS = ['price_usdc', 'market_cap', 'price_change_24h', 'volume_24h', 'age_hours', 'holders']
+DEX_SCORING_COLUMNS = [
+    'dexscreener_price_usd', 'dexscreener_market_cap', 'dexscreener_volume_24h',
+    'dexscreener_txns_24h', 'dexscreener_buys_24h', 'dexscreener_sells_24h'
+]
+
+# Pagination par adresse, dernier snapshot lu dans token_features (pas de scan de tokens_hist)
+SCORING_CHUNK_QUERY = """
+WITH batch AS (
+    SELECT address, symbol, price_usdc, market_cap, price_change_24h, volume_24h, age_hours, holders
+    FROM tokens
+    WHERE address > ? {where}
+    ORDER BY address
+    LIMIT ?
+)
+SELECT
+    b.*,
+    f.last_dexscreener_price_usd AS dexscreener_price_usd,
+    f.last_dexscreener_market_cap AS dexscreener_market_cap,
+    f.last_dexscreener_volume_24h AS dexscreener_volume_24h,
+    f.last_dexscreener_txns_24h AS dexscreener_txns_24h,
+    f.last_dexscreener_buys_24h AS dexscreener_buys_24h,
+    f.last_dexscreener_sells_24h AS dexscreener_sells_24h,
+    f.last_dexscreener_price_change_h24 AS dexscreener_price_change_h24,
+    f.address IS NOT NULL AS has_dex_data
+FROM batch b
+LEFT JOIN token_features f ON f.address = b.address
+ORDER BY b.address
+"""
+
+# Dernier snapshot de chaque token (labels SQL et prédiction unitaire)
+LATEST_TOKEN_DATA_QUERY = """
+            SELECT 
+                address, last_symbol AS symbol, last_name AS name, last_price_usdc AS price_usdc,
+                last_market_cap AS market_cap, last_dexscreener_price_usd AS dexscreener_price_usd,
+                last_dexscreener_market_cap AS dexscreener_market_cap, last_price_change_24h AS price_change_24h,
+                last_dexscreener_price_change_h24 AS dexscreener_price_change_h24, last_volume_24h AS volume_24h,
+                last_dexscreener_volume_24h AS dexscreener_volume_24h, last_dexscreener_txns_24h AS dexscreener_txns_24h,
+                last_dexscreener_buys_24h AS dexscreener_buys_24h, last_dexscreener_sells_24h AS dexscreener_sells_24h,
+                last_age_hours AS age_hours, last_holders AS holders
+            FROM token_features"""
+
+
+def iter_scoring_chunks(conn: sqlite3.Connection, where: str = "", chunk_size: int = SCORING_CHUNK_SIZE):
+    """
+    Tokens + dernier snapshot (token_features), par lots de chunk_size (mémoire bornée).
+    Chaque lot est entièrement lu avant d'être rendu: l'appelant peut écrire entre deux lots.
+    """
+    query = SCORING_CHUNK_QUERY.format(where=f"AND ({where})" if where else "")
+    last_address = ""
+    while True:
+        chunk = pd.read_sql_query(query, conn, params=(last_address, chunk_size))
+        if chunk.empty:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last_address = chunk['address'].iloc[-1]
+
+
+def load_scoring_rows(conn: sqlite3.Connection, addresses: list) -> pd.DataFrame:
+    """Mêmes colonnes que iter_scoring_chunks pour une liste d'adresses (scoring en ligne)"""
+    placeholders = ",".join("?" * len(addresses))
+    query = SCORING_CHUNK_QUERY.format(where=f"AND address IN ({placeholders})")
+    return pd.read_sql_query(query, conn, params=("", *addresses, len(addresses)))
+
+
+def build_scoring_features(chunk: pd.DataFrame, feature_names: list = None,
+                           prefer_dex_price_change: bool = True) -> pd.DataFrame:
+    """
+    Matrice de features (même ordre que l'entraînement) pour un lot de iter_scoring_chunks.
+    NULL -> 0, puis indicateurs de rug et ratios calculés en colonnes.
+    """
+    f = chunk[TOKEN_SCORING_COLUMNS + DEX_SCORING_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(0)
+
+    # price_change de DexScreener prioritaire quand il est renseigné
+    if prefer_dex_price_change:
+        dex_change = pd.to_numeric(chunk['dexscreener_price_change_h24'], errors='coerce').fillna(0)
+        f['price_change_24h'] = f['price_change_24h'].where(dex_change == 0, dex_change)
+
+    rug_indicators_count = (
+        (f['price_change_24h'] <= -80).astype(int) +
+        ((f['volume_24h'] == 0) & (f['dexscreener_volume_24h'] == 0)).astype(int) +
+        (f['dexscreener_txns_24h'] == 0).astype(int) +
+        ((f['holders'] != 0) & (f['holders'] <= 10)).astype(int) +
+        ((f['age_hours'] > 24) & (f['market_cap'] < 1000)).astype(int) +
+        ((f['dexscreener_sells_24h'] > 0) & (f['dexscreener_buys_24h'] == 0)).astype(int)
+    )
+
+    X = pd.DataFrame({
+        'price_usdc': f['price_usdc'],
+        'market_cap': f['market_cap'],
+        'dexscreener_price_usd': f['dexscreener_price_usd'],
+        'dexscreener_market_cap': f['dexscreener_market_cap'],
+        'price_change_24h': f['price_change_24h'],
+        'volume_24h': f['volume_24h'],
+        'dexscreener_volume_24h': f['dexscreener_volume_24h'],
+        'dexscreener_txns_24h': f['dexscreener_txns_24h'],
+        'dexscreener_buys_24h': f['dexscreener_buys_24h'],
+        'dexscreener_sells_24h': f['dexscreener_sells_24h'],
+        'age_hours': f['age_hours'],
+        'holders': f['holders'],
+        'rug_indicators_count': rug_indicators_count,
+        'volume_ratio': np.where(f['dexscreener_volume_24h'] > 0,
+                                 f['volume_24h'] / f['dexscreener_volume_24h'], 0),
+        'buy_sell_ratio': np.where(f['dexscreener_sells_24h'] > 0,
+                                   f['dexscreener_buys_24h'] / f['dexscreener_sells_24h'],
+                                   np.where(f['dexscreener_buys_24h'] > 0, 10, 0)),
+        'market_cap_age_ratio': np.where(f['age_hours'] > 0, f['market_cap'] / f['age_hours'], 0),
+        'holders_per_mcap': np.where(f['market_cap'] > 0, f['holders'] / f['market_cap'] * 1000, 0)
+    })
+
+    # Colonnes positionnelles comme pour une prédiction unitaire
+    if feature_names:
+        X = X.set_axis(feature_names, axis=1)
+    return X.fillna(0)
+
+
+def score_feature_matrix(model: dict, scaler, X: pd.DataFrame) -> np.ndarray:
+    """Score ensemble RF + GB pour toutes les lignes, un predict_proba par modèle"""
+    X_scaled = scaler.transform(X)
+    rf_prob = model['rf'].predict_proba(X_scaled)[:, 1]
+    gb_prob = model['gb'].predict_proba(X_scaled)[:, 1]
+    return np.round((rf_prob + gb_prob) / 2, 4)
+
 
 class RugPullPredictor:
     def __init__(self, db_path: str):
@@ -13,24 +145,183 @@ class RugPullPredictor:
         self.scaler = StandardScaler()
         self.feature_names = []
         
+    def load_history(self, address: str = None) -> pd.DataFrame:
+        """Charge tokens_hist (un token ou tout l'historique)"""
+        conn = sqlite3.connect(self.db_path)
+        if address:
+            query = "SELECT * FROM tokens_hist WHERE address = ? ORDER BY snapshot_timestamp"
+            df = pd.read_sql_query(query, conn, params=(address,))
+        else:
+            query = "SELECT * FROM tokens_hist ORDER BY address, snapshot_timestamp"
+            df = pd.read_sql_query(query, conn)
+        conn.close()
+        return df
+    
+    @staticmethod
+    def _truthy(values: pd.Series) -> pd.Series:
+        """Vérité Python élément par élément (NaN est vrai, None / 0 / '' sont faux)"""
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            return values.ne(0) | values.isna()
+        return values.map(lambda v: v is not None and bool(v)).astype(bool)
+    
+    @classmethod
+    def _hist_values(cls, frame: pd.DataFrame, column: str, default=0) -> pd.Series:
+        """Équivalent vectorisé de `row.get(column, default) or default`"""
+        if column not in frame.columns:
+            return pd.Series(default, index=frame.index)
+        values = frame[column]
+        return values.where(cls._truthy(values), default).infer_objects()
+    
+    @classmethod
+    def _first_truthy(cls, frame: pd.DataFrame, columns: list) -> pd.Series:
+        """Équivalent vectorisé de `row.get(a, 0) or row.get(b, 0) or 0`"""
+        result = pd.Series(0, index=frame.index)
+        for column in reversed(columns):
+            if column in frame.columns:
+                values = frame[column]
+                result = values.where(cls._truthy(values), result)
+        return result.infer_objects()
+    
+    @staticmethod
+    def _evolution(first: pd.Series, latest: pd.Series, eligible: np.ndarray) -> np.ndarray:
+        """(latest - first) / first là où eligible, 0 sinon (entiers si jamais eligible, comme la boucle)"""
+        if not eligible.any():
+            return np.zeros(len(eligible), dtype=np.int64)
+        first_values = first.to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            evolution = (latest.to_numpy(dtype=float) - first_values) / first_values
+        return np.where(eligible, evolution, 0)
+    
     def extract_features(self, address: str = None, df: pd.DataFrame = None) -> pd.DataFrame:
         """
         Extrait les features pour la prédiction de rug pull
+        
+        Version vectorisée: tri stable par snapshot_timestamp, premier / dernier
+        snapshot et nombre de snapshots par groupby, drapeaux calculés sur des
+        tableaux. Mêmes colonnes, même ordre et mêmes valeurs que
+        extract_features_reference (boucle par token, quadratique).
         """
         if df is None:
-            conn = sqlite3.connect(self.db_path)
-            if address:
-                query = "SELECT * FROM tokens_hist WHERE address = ? ORDER BY snapshot_timestamp"
-                df = pd.read_sql_query(query, conn, params=(address,))
-            else:
-                query = "SELECT * FROM tokens_hist ORDER BY address, snapshot_timestamp"
-                df = pd.read_sql_query(query, conn)
-            conn.close()
+            df = self.load_history(address)
+        
+        if df.empty:
+            return pd.DataFrame()
+        
+        addresses = [addr for addr in df['address'].unique() if pd.notna(addr)]
+        ordered = df.sort_values('snapshot_timestamp', kind='mergesort')
+        grouped = ordered.groupby('address', sort=False)
+        
+        latest = grouped.tail(1).set_index('address').reindex(addresses)
+        first = grouped.head(1).set_index('address').reindex(addresses)
+        snapshots = grouped.size().reindex(addresses).to_numpy()
+        
+        holders = self._hist_values(latest, 'holders')
+        market_cap = self._hist_values(latest, 'market_cap')
+        liquidity = self._hist_values(latest, 'liquidity_usd')
+        age_hours = self._hist_values(latest, 'age_hours')
+        volume = self._hist_values(latest, 'volume_24h')
+        txns = self._hist_values(latest, 'dexscreener_txns_24h')
+        buys = self._hist_values(latest, 'dexscreener_buys_24h')
+        sells = self._hist_values(latest, 'dexscreener_sells_24h')
+        price_change = self._hist_values(latest, 'price_change_24h')
+        
+        def flag(mask: pd.Series) -> np.ndarray:
+            return mask.to_numpy(dtype=bool).astype(np.int64)
+        
+        days = (self._hist_values(latest, 'age_hours', default=1) / 24).to_numpy(dtype=float)
+        
+        features = pd.DataFrame({
+            'address': addresses,
+            
+            # === FEATURES DE RISQUE ÉLEVÉ ===
+            'holders_count': holders.to_numpy(),
+            'holders_very_low': flag(holders <= 5),
+            'holders_low': flag(holders <= 20),
+            
+            'market_cap': market_cap.to_numpy(),
+            'market_cap_very_low': flag(market_cap < 1000),
+            'liquidity_usd': liquidity.to_numpy(),
+            'has_liquidity_data': flag(liquidity > 0),
+            
+            'age_hours': age_hours.to_numpy(),
+            'age_very_new': flag(age_hours < 24),
+            'age_new': flag(age_hours < 168),
+            
+            # === FEATURES D'ACTIVITÉ ===
+            'volume_24h': volume.to_numpy(),
+            'volume_zero': flag(volume == 0),
+            'dexscreener_txns_24h': txns.to_numpy(),
+            'txns_zero': flag(txns == 0),
+            
+            'buys_24h': buys.to_numpy(),
+            'sells_24h': sells.to_numpy(),
+            'only_sells': flag((sells > 0) & (buys == 0)),
+            
+            # === FEATURES DE PRIX ===
+            'price_usd': self._first_truthy(latest, ['price_usdc', 'dexscreener_price_usd']).to_numpy(),
+            'price_change_24h': price_change.to_numpy(),
+            'price_massive_drop': flag(price_change <= -80),
+            'price_big_drop': flag(price_change <= -50),
+            
+            # === FEATURES ÉVOLUTIVES ===
+            'snapshots_count': snapshots,
+            'data_continuity': snapshots / np.where(days > 1, days, 1),
+        })
+        
+        # Évolutions premier -> dernier snapshot (0 si un seul snapshot ou base nulle)
+        multi = snapshots >= 2
+        first_holders = self._hist_values(first, 'holders')
+        first_price = self._first_truthy(first, ['price_usdc', 'dexscreener_price_usd'])
+        latest_price = self._first_truthy(latest, ['price_usdc', 'dexscreener_price_usd'])
+        first_volume = self._hist_values(first, 'volume_24h')
+        
+        for name, flag_name, threshold, first_values, latest_values in [
+            ('holders_evolution', 'holders_declining', -0.2, first_holders, holders),
+            ('total_price_evolution', 'price_severe_decline', -0.9, first_price, latest_price),
+            ('volume_evolution', 'volume_died', -0.8, first_volume, volume),
+        ]:
+            eligible = multi & (first_values > 0).to_numpy(dtype=bool)
+            evolution = self._evolution(first_values, latest_values, eligible)
+            features[name] = evolution
+            strict = name == 'holders_evolution'  # < pour les holders, <= pour prix et volume
+            declining = (evolution < threshold) if strict else (evolution <= threshold)
+            features[flag_name] = (eligible & declining).astype(np.int64)
+        
+        # === SCORE DE RISQUE COMPOSITE ===
+        risk_factors = [
+            'holders_very_low', 'market_cap_very_low', 'volume_zero', 'txns_zero', 'only_sells',
+            'price_massive_drop', 'holders_declining', 'price_severe_decline', 'volume_died'
+        ]
+        features['risk_score'] = features[risk_factors].sum(axis=1)
+        features['high_risk'] = (features['risk_score'] >= 4).astype(np.int64)
+        
+        return features
+    
+    def load_features(self, address: str = None) -> pd.DataFrame:
+        """
+        Features prêtes depuis token_features (O(tokens)), mêmes colonnes que extract_features.
+        Recalcul depuis tokens_hist si le feature store n'est pas disponible.
+        """
+        store = TokenFeatureStore(self.db_path)
+        if not store.available:
+            return self.extract_features(address=address)
+        return store.load_features([address] if address else None)
+    
+    def extract_features_reference(self, address: str = None, df: pd.DataFrame = None,
+                                   limit_tokens: int = None) -> pd.DataFrame:
+        """
+        Implémentation de référence (boucle par token) gardée pour les tests
+        d'équivalence de extract_features. Quadratique: ne pas utiliser en production.
+        limit_tokens: s'arrêter après N tokens (benchmark sur un historique complet)
+        """
+        if df is None:
+            df = self.load_history(address)
         
         features_list = []
         
-        for addr in df['address'].unique():
-            token_data = df[df['address'] == addr].sort_values('snapshot_timestamp')
+        for addr in df['address'].unique()[:limit_tokens]:
+            # Tri stable, comme extract_features: mêmes premier/dernier snapshots en cas d'ex-aequo
+            token_data = df[df['address'] == addr].sort_values('snapshot_timestamp', kind='mergesort')
             
             if len(token_data) < 1:
                 continue
@@ -151,23 +442,13 @@ class RugPullPredictor:
         SUSPECT + TRÈS SUSPECT = rug pulls (1)
         ATTENTION + OK = pas rug pulls (0)
         """
+        # Dernier snapshot de chaque token lu dans token_features (O(tokens))
+        TokenFeatureStore(self.db_path)
         conn = sqlite3.connect(self.db_path)
         
         # Requête qui reprend votre logique SQL de classification
         query = """
-        WITH latest_token_data AS (
-            SELECT 
-                address, symbol, name, price_usdc, market_cap, dexscreener_price_usd, 
-                dexscreener_market_cap, price_change_24h, dexscreener_price_change_h24, 
-                dexscreener_price_change_6h, dexscreener_price_change_1h, volume_24h, 
-                dexscreener_volume_24h, dexscreener_txns_24h, dexscreener_buys_24h, 
-                dexscreener_sells_24h, age_hours, holders, rug_score, quality_score
-            FROM tokens_hist
-            WHERE snapshot_timestamp = (
-                SELECT MAX(snapshot_timestamp) 
-                FROM tokens_hist t2 
-                WHERE t2.address = tokens_hist.address
-            )
+        WITH latest_token_data AS (""" + LATEST_TOKEN_DATA_QUERY + """
         ),
         rug_indicators AS (
             SELECT *,
@@ -263,22 +544,13 @@ class RugPullPredictor:
         if self.model is None:
             raise ValueError("Le modèle n'est pas encore entraîné!")
         
+        TokenFeatureStore(self.db_path)
         conn = sqlite3.connect(self.db_path)
         
         # Récupération des données du token avec la même logique SQL
         query = """
-        WITH latest_token_data AS (
-            SELECT 
-                address, symbol, name, price_usdc, market_cap, dexscreener_price_usd, 
-                dexscreener_market_cap, price_change_24h, volume_24h, dexscreener_volume_24h, 
-                dexscreener_txns_24h, dexscreener_buys_24h, dexscreener_sells_24h, 
-                age_hours, holders
-            FROM tokens_hist
-            WHERE address = ? AND snapshot_timestamp = (
-                SELECT MAX(snapshot_timestamp) 
-                FROM tokens_hist t2 
-                WHERE t2.address = tokens_hist.address
-            )
+        WITH latest_token_data AS (""" + LATEST_TOKEN_DATA_QUERY + """
+            WHERE address = ?
         ),
         rug_indicators AS (
             SELECT *,
@@ -401,10 +673,12 @@ class RugPullPredictor:
         conn.close()
 
 
-    def predict_and_update_tokens_table(self):
+    def predict_and_update_tokens_table(self, chunk_size: int = SCORING_CHUNK_SIZE) -> dict:
         """
         Prédit les scores ML pour tous les tokens de la table 'tokens' 
-        et met à jour la colonne ml_rug_score
+        et met à jour la colonne ml_rug_score.
+        Par lots: dernier snapshot tokens_hist en une requête fenêtrée, un predict_proba
+        et un executemany par lot, seuls les compteurs et le top 10 restent en mémoire.
         """
         if self.model is None:
             raise ValueError("Le modèle doit être entraîné avant de faire des prédictions!")
@@ -412,179 +686,72 @@ class RugPullPredictor:
         # Ajouter la colonne si nécessaire
         self.add_ml_score_column_if_not_exists()
         
+        TokenFeatureStore(self.db_path)
         conn = sqlite3.connect(self.db_path)
         
-        # Récupérer tous les tokens de la table 'tokens'
-        print("Récupération des tokens depuis la table 'tokens'...")
-        
-        query_tokens = """
-        SELECT 
-            address, symbol, name, price_usdc, market_cap, 
-            price_change_24h, volume_24h, age_hours, holders
-        FROM tokens
-        """
-        
-        tokens_df = pd.read_sql_query(query_tokens, conn)
-        print(f"📊 {len(tokens_df)} tokens trouvés dans la table 'tokens'")
+        total = conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+        print(f"📊 {total} tokens trouvés dans la table 'tokens'")
         
-        # Pour chaque token, récupérer les données DexScreener depuis tokens_hist (si disponibles)
-        predictions = []
+        updated = 0
+        with_dex_data = 0
+        score_sum = 0.0
+        suspects = 0
+        very_suspects = 0
+        top_suspects = []
         
-        for i, token in tokens_df.iterrows():
-            if i % 500 == 0:
-                print(f"Progression: {i}/{len(tokens_df)}")
-            
-            address = token['address']
-            
-            # Récupérer les données DexScreener les plus récentes depuis tokens_hist
-            dex_query = """
-            SELECT 
-                dexscreener_price_usd, dexscreener_market_cap, dexscreener_volume_24h,
-                dexscreener_txns_24h, dexscreener_buys_24h, dexscreener_sells_24h,
-                dexscreener_price_change_h24
-            FROM tokens_hist 
-            WHERE address = ? 
-            ORDER BY snapshot_timestamp DESC 
-            LIMIT 1
-            """
-            
-            dex_data = pd.read_sql_query(dex_query, conn, params=(address,))
-            
-            # Combiner les données tokens + tokens_hist
-            combined_features = {
-                'price_usdc': token.get('price_usdc', 0) or 0,
-                'market_cap': token.get('market_cap', 0) or 0,
-                'price_change_24h': token.get('price_change_24h', 0) or 0,
-                'volume_24h': token.get('volume_24h', 0) or 0,
-                'age_hours': token.get('age_hours', 0) or 0,
-                'holders': token.get('holders', 0) or 0,
-            }
-            
-            # Ajouter les données DexScreener si disponibles
-            if not dex_data.empty:
-                dex_row = dex_data.iloc[0]
-                combined_features.update({
-                    'dexscreener_price_usd': dex_row.get('dexscreener_price_usd', 0) or 0,
-                    'dexscreener_market_cap': dex_row.get('dexscreener_market_cap', 0) or 0,
-                    'dexscreener_volume_24h': dex_row.get('dexscreener_volume_24h', 0) or 0,
-                    'dexscreener_txns_24h': dex_row.get('dexscreener_txns_24h', 0) or 0,
-                    'dexscreener_buys_24h': dex_row.get('dexscreener_buys_24h', 0) or 0,
-                    'dexscreener_sells_24h': dex_row.get('dexscreener_sells_24h', 0) or 0,
-                })
-                # Utiliser le price_change de DexScreener si disponible
-                if dex_row.get('dexscreener_price_change_h24'):
-                    combined_features['price_change_24h'] = dex_row.get('dexscreener_price_change_h24', 0) or 0
-            else:
-                # Valeurs par défaut si pas de données DexScreener
-                combined_features.update({
-                    'dexscreener_price_usd': 0,
-                    'dexscreener_market_cap': 0,
-                    'dexscreener_volume_24h': 0,
-                    'dexscreener_txns_24h': 0,
-                    'dexscreener_buys_24h': 0,
-                    'dexscreener_sells_24h': 0,
-                })
-            
-            # Calculer les indicateurs de rug (même logique que l'entraînement)
-            rug_indicators_count = (
-                (1 if combined_features['price_change_24h'] <= -80 else 0) +
-                (1 if (combined_features['volume_24h'] == 0 and combined_features['dexscreener_volume_24h'] == 0) else 0) +
-                (1 if combined_features['dexscreener_txns_24h'] == 0 else 0) +
-                (1 if combined_features['holders'] != 0 and combined_features['holders'] <= 10 else 0) +
-                (1 if combined_features['age_hours'] > 24 and combined_features['market_cap'] < 1000 else 0) +
-                (1 if combined_features['dexscreener_sells_24h'] > 0 and combined_features['dexscreener_buys_24h'] == 0 else 0)
-            )
+        for chunk in iter_scoring_chunks(conn, chunk_size=chunk_size):
+            X = build_scoring_features(chunk, self.feature_names)
             
-            combined_features['rug_indicators_count'] = rug_indicators_count
-            
-            # Features calculées
-            volume_ratio = (combined_features['volume_24h'] / combined_features['dexscreener_volume_24h'] 
-                          if combined_features['dexscreener_volume_24h'] > 0 else 0)
-            buy_sell_ratio = (combined_features['dexscreener_buys_24h'] / combined_features['dexscreener_sells_24h'] 
-                             if combined_features['dexscreener_sells_24h'] > 0 
-                             else (10 if combined_features['dexscreener_buys_24h'] > 0 else 0))
-            market_cap_age_ratio = (combined_features['market_cap'] / combined_features['age_hours'] 
-                                  if combined_features['age_hours'] > 0 else 0)
-            holders_per_mcap = (combined_features['holders'] / combined_features['market_cap'] * 1000 
-                              if combined_features['market_cap'] > 0 else 0)
-            
-            # Préparer les features pour le modèle
-            feature_values = [
-                combined_features['price_usdc'],
-                combined_features['market_cap'],
-                combined_features['dexscreener_price_usd'],
-                combined_features['dexscreener_market_cap'],
-                combined_features['price_change_24h'],
-                combined_features['volume_24h'],
-                combined_features['dexscreener_volume_24h'],
-                combined_features['dexscreener_txns_24h'],
-                combined_features['dexscreener_buys_24h'],
-                combined_features['dexscreener_sells_24h'],
-                combined_features['age_hours'],
-                combined_features['holders'],
-                combined_features['rug_indicators_count'],
-                volume_ratio,
-                buy_sell_ratio,
-                market_cap_age_ratio,
-                holders_per_mcap
-            ]
-            
-            # Prédiction ML
             try:
-                X = pd.DataFrame([feature_values], columns=self.feature_names)
-    
-                # AJOUT : Remplacer les NaN par 0
-                X = X.fillna(0)
-                X_scaled = self.model['scaler'].transform(X)
-                
-                rf_prob = self.model['rf'].predict_proba(X_scaled)[0][1]
-                gb_prob = self.model['gb'].predict_proba(X_scaled)[0][1]
-                ml_score = (rf_prob + gb_prob) / 2
-                
+                scores = score_feature_matrix(self.model, self.model['scaler'], X)
             except Exception as e:
-                print(f"Erreur prédiction pour {address}: {e}")
-                ml_score = 0.0
+                print(f"Erreur prédiction pour un lot de {len(chunk)} tokens: {e}")
+                scores = np.zeros(len(chunk))
             
-            predictions.append({
-                'address': address,
-                'symbol': token.get('symbol', 'N/A'),
-                'ml_rug_score': round(ml_score, 4),
-                'has_dex_data': not dex_data.empty
-            })
-        
-        # Mise à jour de la base de données
-        print(f"\n📝 Mise à jour de la table tokens avec les scores ML...")
-        
-        cursor = conn.cursor()
-        
-        for pred in predictions:
-            cursor.execute("""
+            conn.executemany("""
                 UPDATE tokens 
                 SET ml_rug_score = ? 
                 WHERE address = ?
-            """, (pred['ml_rug_score'], pred['address']))
+            """, zip(scores.tolist(), chunk['address']))
+            conn.commit()
+            
+            updated += len(chunk)
+            with_dex_data += int(chunk['has_dex_data'].sum())
+            score_sum += float(scores.sum())
+            suspects += int((scores > 0.5).sum())
+            very_suspects += int((scores > 0.8).sum())
+            top_suspects = heapq.nlargest(
+                10, top_suspects + list(zip(scores.tolist(), chunk['symbol'].fillna('N/A'), chunk['address']))
+            )
+            print(f"Progression: {updated}/{total}")
         
-        conn.commit()
         conn.close()
         
         # Statistiques finales
-        scores = [p['ml_rug_score'] for p in predictions]
-        with_dex_data = sum(1 for p in predictions if p['has_dex_data'])
-        
         print(f"\n=== RÉSULTATS ===")
-        print(f"✅ {len(predictions)} tokens mis à jour")
-        print(f"📊 {with_dex_data} tokens avec données DexScreener ({with_dex_data/len(predictions)*100:.1f}%)")
-        print(f"📈 Score ML moyen: {np.mean(scores):.3f}")
-        print(f"📈 Scores > 0.5 (suspects): {sum(1 for s in scores if s > 0.5)} tokens")
-        print(f"📈 Scores > 0.8 (très suspects): {sum(1 for s in scores if s > 0.8)} tokens")
+        print(f"✅ {updated} tokens mis à jour")
+        if updated:
+            print(f"📊 {with_dex_data} tokens avec données DexScreener ({with_dex_data/updated*100:.1f}%)")
+            print(f"📈 Score ML moyen: {score_sum / updated:.3f}")
+        print(f"📈 Scores > 0.5 (suspects): {suspects} tokens")
+        print(f"📈 Scores > 0.8 (très suspects): {very_suspects} tokens")
         
         # Top 10 des tokens les plus suspects
-        top_suspects = sorted(predictions, key=lambda x: x['ml_rug_score'], reverse=True)[:10]
         print(f"\n🚨 TOP 10 TOKENS LES PLUS SUSPECTS:")
-        for i, token in enumerate(top_suspects, 1):
-            print(f"  {i}. {token['symbol']} ({token['address'][:8]}...): {token['ml_rug_score']:.3f}")
+        for i, (score, symbol, address) in enumerate(top_suspects, 1):
+            print(f"  {i}. {symbol} ({address[:8]}...): {score:.3f}")
         
-        return predictions
+        return {
+            'updated': updated,
+            'with_dex_data': with_dex_data,
+            'mean_score': score_sum / updated if updated else 0.0,
+            'suspects': suspects,
+            'very_suspects': very_suspects,
+            'top_suspects': [
+                {'address': address, 'symbol': symbol, 'ml_rug_score': score}
+                for score, symbol, address in top_suspects
+            ]
+        }
 
     def train_model_with_sql_labels(self):
         """
@@ -754,8 +921,8 @@ class RugPullPredictor:
         if self.model is None:
             raise ValueError("Le modèle n'est pas encore entraîné!")
         
-        # Extraction des features
-        features_df = self.extract_features(address=address)
+        # Features maintenues à chaque snapshot
+        features_df = self.load_features(address=address)
         
         if features_df.empty:
             return {"error": "Aucune donnée trouvée pour cette adresse"}
@@ -807,7 +974,7 @@ def example_usage_with_sql():
     
     # Prédiction et mise à jour de la table tokens
     print("\n=== PRÉDICTION ET MISE À JOUR DE LA TABLE TOKENS ===")
-    predictions = predictor.predict_and_update_tokens_table()
+    predictor.predict_and_update_tokens_table()
     
     # Vérification des résultats
     print("\n=== VÉRIFICATION DES RÉSULTATS ===")
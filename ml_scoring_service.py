@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+🤖 ML Scoring Service - Score de rug pull en ligne
+Modèle rug_pull_model.pkl chargé une seule fois (rechargé si le fichier change),
+requêtes unitaires de l'enrichisseur et de l'API regroupées en micro-batches de
+quelques millisecondes: une lecture, un predict_proba et un executemany par lot.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from ml_rugg_pull import build_scoring_features, load_scoring_rows, score_feature_matrix
+from token_feature_store import TokenFeatureStore
+
+logger = logging.getLogger('ml_scoring_service')
+
+
+def risk_level(score: float) -> str:
+    """Niveau de risque (mêmes seuils que RugPullPredictor)"""
+    if score >= 0.8:
+        return "TRÈS ÉLEVÉ"
+    if score >= 0.6:
+        return "ÉLEVÉ"
+    if score >= 0.4:
+        return "MODÉRÉ"
+    return "FAIBLE"
+
+
+class MLScoringService:
+    """Scoring ML à la demande avec micro-batching
+
+    submit() rend un Future (score_async pour asyncio, score pour du code
+    synchrone); un thread unique lit les features, prédit et écrit ml_rug_score.
+    Le résultat vaut None pour une adresse absente de la table tokens.
+    """
+
+    def __init__(self, database_path: str = "tokens.db", model_path: str = "rug_pull_model.pkl",
+                 max_batch_size: int = 256, max_wait_ms: float = 5.0, write_scores: bool = True):
+        self.database_path = database_path
+        self.model_path = model_path
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.write_scores = write_scores
+        # Mêmes features que RugPullMonitor.update_new_tokens_only (price_change de tokens)
+        self.prefer_dex_price_change = False
+
+        self.model = None
+        self.scaler = None
+        self.feature_names = []
+        self.model_mtime = None
+
+        self.requests: queue.Queue = queue.Queue()
+        self._worker_thread = None
+        self._start_lock = threading.Lock()
+
+        self.stats = {
+            'requests': 0,
+            'batches': 0,
+            'scored': 0,
+            'unknown_tokens': 0,
+            'errors': 0,
+            'model_reloads': 0,
+            'max_batch_size_seen': 0
+        }
+
+        self.available = self.load_model()
+        if self.available:
+            TokenFeatureStore(database_path)
+            self._ensure_score_column()
+
+    def load_model(self) -> bool:
+        """Charger (ou recharger) le modèle sauvegardé par RugPullMonitor"""
+        try:
+            mtime = os.path.getmtime(self.model_path)
+            with open(self.model_path, 'rb') as f:
+                model_data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning(f"⚠️ Modèle ML indisponible ({self.model_path}): {e}")
+            return False
+
+        self.model = model_data['model']
+        self.scaler = model_data['scaler']
+        self.feature_names = model_data['feature_names']
+        if self.model_mtime is not None:
+            self.stats['model_reloads'] += 1
+        self.model_mtime = mtime
+        self.available = True
+        logger.info(f"🤖 Modèle ML chargé ({model_data.get('trained_date', 'date inconnue')})")
+        return True
+
+    def _ensure_score_column(self):
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tokens)")}
+            if columns and 'ml_rug_score' not in columns:
+                conn.execute("ALTER TABLE tokens ADD COLUMN ml_rug_score REAL DEFAULT NULL")
+                conn.commit()
+                logger.info("✅ Added column: ml_rug_score")
+        except sqlite3.Error as e:
+            logger.error(f"❌ ml_rug_score column error: {e}")
+        finally:
+            conn.close()
+
+    def _reload_if_changed(self):
+        try:
+            if os.path.getmtime(self.model_path) != self.model_mtime:
+                self.load_model()
+        except OSError:
+            pass  # Fichier en cours de remplacement: garder le modèle en mémoire
+
+    # === API ===
+
+    def start(self):
+        with self._start_lock:
+            if self._worker_thread is None or not self._worker_thread.is_alive():
+                self._worker_thread = threading.Thread(target=self._worker, name="ml-scoring", daemon=True)
+                self._worker_thread.start()
+
+    def submit(self, address: str) -> Future:
+        """Demande de score pour un token, traitée dans le prochain micro-batch"""
+        if not self.available:
+            raise RuntimeError("ML model not available")
+        self.start()
+        future = Future()
+        self.stats['requests'] += 1
+        self.requests.put((address, future))
+        return future
+
+    def submit_many(self, addresses: List[str]) -> List[Future]:
+        return [self.submit(address) for address in addresses]
+
+    def score(self, address: str, timeout: float = 5.0) -> Optional[Dict]:
+        return self.submit(address).result(timeout=timeout)
+
+    def score_many(self, addresses: List[str], timeout: float = 5.0) -> Dict[str, Optional[Dict]]:
+        futures = dict(zip(addresses, self.submit_many(addresses)))
+        deadline = time.monotonic() + timeout
+        return {
+            address: future.result(timeout=max(0.0, deadline - time.monotonic()))
+            for address, future in futures.items()
+        }
+
+    async def score_async(self, address: str) -> Optional[Dict]:
+        return await asyncio.wrap_future(self.submit(address))
+
+    def stop(self, timeout: float = 2.0):
+        """Traiter les demandes en attente puis arrêter le thread"""
+        if self._worker_thread and self._worker_thread.is_alive():
+            self.requests.put(None)
+            self._worker_thread.join(timeout)
+
+    # === Worker ===
+
+    def _worker(self):
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            stopping = False
+            while not stopping:
+                item = self.requests.get()
+                if item is None:
+                    break
+
+                # Regrouper ce qui arrive dans la fenêtre max_wait
+                batch = [item]
+                deadline = time.monotonic() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self.requests.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                self._process_batch(conn, batch)
+        finally:
+            conn.close()
+
+    def _process_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        self._reload_if_changed()
+        addresses = list(dict.fromkeys(address for address, _ in batch))
+        self.stats['batches'] += 1
+        self.stats['max_batch_size_seen'] = max(self.stats['max_batch_size_seen'], len(addresses))
+
+        try:
+            rows = load_scoring_rows(conn, addresses)
+            results = {}
+            if not rows.empty:
+                X = build_scoring_features(rows, self.feature_names, self.prefer_dex_price_change)
+                scores = score_feature_matrix(self.model, self.scaler, X).tolist()
+
+                if self.write_scores:
+                    conn.executemany("UPDATE tokens SET ml_rug_score = ? WHERE address = ?",
+                                     zip(scores, rows['address']))
+                    conn.commit()
+
+                for address, symbol, score, has_dex_data in zip(rows['address'], rows['symbol'],
+                                                                 scores, rows['has_dex_data']):
+                    results[address] = {
+                        'address': address,
+                        'symbol': symbol,
+                        'ml_rug_score': score,
+                        'risk_level': risk_level(score),
+                        'has_dex_data': bool(has_dex_data)
+                    }
+            self.stats['scored'] += len(results)
+            self.stats['unknown_tokens'] += len(addresses) - len(results)
+
+        except Exception as e:
+            logger.error(f"❌ ML scoring batch error ({len(addresses)} tokens): {e}")
+            self.stats['errors'] += 1
+            conn.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for address, future in batch:
+            if not future.done():  # Annulé côté appelant (timeout asyncio)
+                future.set_result(results.get(address))
+
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'pending': self.requests.qsize(),
+            'avg_batch_size': self.stats['requests'] / self.stats['batches'] if self.stats['batches'] else 0,
+            'model_loaded': self.available
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score ML de tokens via le service en ligne")
+    parser.add_argument("addresses", nargs="+", help="Adresses à scorer")
+    parser.add_argument("--database", default="tokens.db")
+    parser.add_argument("--model", default="rug_pull_model.pkl")
+    parser.add_argument("--dry-run", action="store_true", help="Ne pas écrire ml_rug_score")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    service = MLScoringService(args.database, args.model, write_scores=not args.dry_run)
+    if not service.available:
+        return
+
+    for address, result in service.score_many(args.addresses).items():
+        if result is None:
+            print(f"❓ {address}: token inconnu")
+        else:
+            print(f"{result['symbol']:<10} {address[:8]}... {result['ml_rug_score']:.3f} ({result['risk_level']})")
+    service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+🏋️ ML Training Pipeline - Sélection de modèle en parallèle
+Validation croisée temporelle (tokens triés par premier snapshot) sur une grille
+d'hyperparamètres RF / GB exécutée dans un pool de processus. La matrice de
+features est mise en cache sur disque (.npy ouverts en memmap par les workers),
+avec un leaderboard qui donne qualité, temps d'entraînement et d'inférence.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import average_precision_score, roc_auc_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from ml_rugg_pull import RugPullPredictor
+from token_feature_store import TokenFeatureStore
+
+logger = logging.getLogger('ml_training_pipeline')
+
+CACHE_FORMAT_VERSION = 1
+
+MODEL_CLASSES = {
+    'rf': RandomForestClassifier,
+    'gb': GradientBoostingClassifier
+}
+
+# Grille par défaut (paramètres fixes de train_model_with_sql_labels inclus)
+PARAM_GRID = {
+    'rf': {
+        'n_estimators': [100, 200],
+        'max_depth': [8, 12, None],
+        'min_samples_split': [5],
+        'min_samples_leaf': [1, 2],
+        'class_weight': ['balanced'],
+        'random_state': [42]
+    },
+    'gb': {
+        'n_estimators': [100, 200],
+        'max_depth': [3, 5, 8],
+        'learning_rate': [0.05, 0.1],
+        'random_state': [42]
+    }
+}
+
+
+def expand_grid(param_grid: Dict) -> List[Dict]:
+    """[{'model': 'rf', 'params': {...}}, ...] pour toutes les combinaisons"""
+    configs = []
+    for model_name, grid in param_grid.items():
+        keys = list(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            configs.append({'model': model_name, 'params': dict(zip(keys, values))})
+    return configs
+
+
+def _run_fold(task: Dict) -> Dict:
+    """Un (configuration, fold) dans un worker: la matrice est lue en memmap, rien n'est picklé"""
+    X = np.load(os.path.join(task['cache_dir'], 'X.npy'), mmap_mode='r')
+    y = np.load(os.path.join(task['cache_dir'], 'y.npy'), mmap_mode='r')
+    train = slice(0, task['train_end'])
+    test = slice(task['train_end'], task['test_end'])
+    y_train, y_test = np.asarray(y[train]), np.asarray(y[test])
+
+    result = {'config_id': task['config_id'], 'fold': task['fold'], 'test_rows': len(y_test)}
+    if len(np.unique(y_train)) < 2:
+        result['skipped'] = "une seule classe dans le train"
+        return result
+
+    params = dict(task['params'])
+    if task['model'] == 'rf':
+        params['n_jobs'] = 1  # Le parallélisme est déjà au niveau du pool
+
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[train])
+    model = MODEL_CLASSES[task['model']](**params).fit(X_train, y_train)
+    result['fit_seconds'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = model.predict_proba(scaler.transform(X[test]))[:, 1]
+    result['predict_us_per_row'] = (time.perf_counter() - start) / max(1, len(y_test)) * 1e6
+
+    if len(np.unique(y_test)) == 2:
+        result['roc_auc'] = roc_auc_score(y_test, proba)
+        result['average_precision'] = average_precision_score(y_test, proba)
+    result['accuracy'] = float(((proba > 0.5).astype(int) == y_test).mean())
+    return result
+
+
+class TrainingPipeline:
+    """Grille d'hyperparamètres x folds temporels sur un pool de processus"""
+
+    def __init__(self, db_path: str = "tokens.db", cache_dir: str = "ml_cache",
+                 n_folds: int = 5, max_workers: Optional[int] = None):
+        self.db_path = db_path
+        self.cache_dir = cache_dir
+        self.n_folds = n_folds
+        self.max_workers = max_workers or os.cpu_count()
+        self.meta = None
+
+    # === Cache de la matrice de features ===
+
+    def _data_signature(self) -> str:
+        """Change dès qu'un snapshot modifie token_features"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            state = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(snapshots_count), 0), MAX(updated_at) FROM token_features
+            ''').fetchone()
+        finally:
+            conn.close()
+        return hashlib.sha1(json.dumps([CACHE_FORMAT_VERSION, list(state)]).encode()).hexdigest()
+
+    def load_matrix(self, refresh: bool = False) -> Dict:
+        """Matrice X / labels y triés par date de premier snapshot, depuis le cache si à jour"""
+        meta_path = os.path.join(self.cache_dir, 'meta.json')
+        TokenFeatureStore(self.db_path)  # Crée token_features au besoin avant la signature
+        signature = self._data_signature()
+
+        if not refresh and os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta.get('signature') == signature:
+                logger.info(f"📦 Matrice de features en cache ({meta['rows']} tokens)")
+                self.meta = meta
+                return meta
+
+        start = time.perf_counter()
+        X, y, df = RugPullPredictor(self.db_path).prepare_training_data_from_sql_classification()
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            first_seen = pd.read_sql_query("SELECT address, first_snapshot_at FROM token_features", conn)
+        finally:
+            conn.close()
+        order = (df[['address']].reset_index(drop=True)
+                 .merge(first_seen, on='address', how='left')
+                 .sort_values('first_snapshot_at', kind='mergesort', na_position='first').index)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for name, values in (('X', X.to_numpy(dtype=np.float64)[order]), ('y', y.to_numpy(dtype=np.int8)[order])):
+            tmp_path = os.path.join(self.cache_dir, f'{name}.tmp.npy')
+            np.save(tmp_path, values)
+            os.replace(tmp_path, os.path.join(self.cache_dir, f'{name}.npy'))
+
+        meta = {
+            'signature': signature,
+            'rows': int(len(order)),
+            'positives': int(y.sum()),
+            'feature_names': list(X.columns),
+            'built_at': datetime.now().isoformat(),
+            'build_seconds': round(time.perf_counter() - start, 2)
+        }
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        logger.info(f"💾 Matrice de features mise en cache: {meta['rows']} tokens en {meta['build_seconds']}s")
+        self.meta = meta
+        return meta
+
+    # === Grille x folds ===
+
+    def run(self, param_grid: Dict = None, refresh_cache: bool = False) -> pd.DataFrame:
+        """Évaluer toutes les configurations, leaderboard trié par ROC AUC moyen"""
+        meta = self.load_matrix(refresh=refresh_cache)
+        configs = expand_grid(param_grid or PARAM_GRID)
+        splits = list(TimeSeriesSplit(n_splits=self.n_folds).split(np.zeros(meta['rows'])))
+
+        tasks = [
+            {
+                'cache_dir': self.cache_dir, 'config_id': config_id, 'fold': fold,
+                'model': config['model'], 'params': config['params'],
+                'train_end': int(train_idx[-1]) + 1, 'test_end': int(test_idx[-1]) + 1
+            }
+            for config_id, config in enumerate(configs)
+            for fold, (train_idx, test_idx) in enumerate(splits)
+        ]
+        logger.info(f"🏋️ {len(configs)} configurations x {len(splits)} folds = {len(tasks)} entraînements "
+                    f"sur {self.max_workers} processus")
+
+        start = time.perf_counter()
+        results = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(_run_fold, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), 1):
+                results.append(future.result())
+                if done % max(1, len(tasks) // 10) == 0:
+                    logger.info(f"   {done}/{len(tasks)} folds terminés")
+        logger.info(f"✅ Grille évaluée en {time.perf_counter() - start:.1f}s")
+
+        return self._leaderboard(configs, results)
+
+    @staticmethod
+    def _leaderboard(configs: List[Dict], results: List[Dict]) -> pd.DataFrame:
+        folds = pd.DataFrame(results)
+        for column in ('roc_auc', 'average_precision', 'fit_seconds', 'predict_us_per_row', 'accuracy'):
+            if column not in folds:
+                folds[column] = np.nan
+
+        grouped = folds.groupby('config_id')
+        board = pd.DataFrame({
+            'model': [configs[i]['model'] for i in grouped.groups],
+            'params': [json.dumps(configs[i]['params'], sort_keys=True) for i in grouped.groups],
+            'folds_scored': grouped['roc_auc'].count().values,
+            'roc_auc_mean': grouped['roc_auc'].mean().values,
+            'roc_auc_std': grouped['roc_auc'].std().values,
+            'average_precision_mean': grouped['average_precision'].mean().values,
+            'accuracy_mean': grouped['accuracy'].mean().values,
+            'fit_seconds_mean': grouped['fit_seconds'].mean().values,
+            'predict_us_per_row': grouped['predict_us_per_row'].mean().values
+        }, index=pd.Index(list(grouped.groups), name='config_id'))
+
+        board = board.sort_values(['roc_auc_mean', 'fit_seconds_mean'], ascending=[False, True], na_position='last')
+        board.insert(0, 'rank', range(1, len(board) + 1))
+        return board
+
+    # === Modèle final ===
+
+    def save_best(self, leaderboard: pd.DataFrame, model_path: str = "rug_pull_model.pkl") -> Dict:
+        """Réentraîner le meilleur RF et le meilleur GB sur tout l'historique, format RugPullMonitor"""
+        # Noms de colonnes comme à l'entraînement classique (le scoring passe des DataFrames)
+        X = pd.DataFrame(np.load(os.path.join(self.cache_dir, 'X.npy'), mmap_mode='r'),
+                         columns=self.meta['feature_names'])
+        y = np.load(os.path.join(self.cache_dir, 'y.npy'), mmap_mode='r')
+
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        model = {'scaler': scaler}
+        selected = {}
+        for model_name in ('rf', 'gb'):
+            best = leaderboard[leaderboard['model'] == model_name].iloc[0]
+            selected[model_name] = json.loads(best['params'])
+            model[model_name] = MODEL_CLASSES[model_name](**selected[model_name]).fit(X_scaled, y)
+
+        model_data = {
+            'model': model,
+            'scaler': scaler,
+            'feature_names': self.meta['feature_names'],
+            'trained_date': datetime.now().isoformat(),
+            'selected_params': selected
+        }
+        tmp_path = f"{model_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(model_data, f)
+        os.replace(tmp_path, model_path)  # Le service de scoring recharge sur changement de mtime
+        logger.info(f"💾 Modèle sauvegardé dans {model_path}: {selected}")
+        return selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sélection de modèle rug pull (CV temporelle, grille en parallèle)")
+    parser.add_argument("--database", default="tokens.db")
+    parser.add_argument("--cache-dir", default="ml_cache", help="Cache de la matrice de features et leaderboard")
+    parser.add_argument("--folds", type=int, default=5, help="Folds de validation temporelle")
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut: nombre de CPU)")
+    parser.add_argument("--refresh-cache", action="store_true", help="Reconstruire la matrice de features")
+    parser.add_argument("--save", action="store_true", help="Sauvegarder le meilleur ensemble dans rug_pull_model.pkl")
+    parser.add_argument("--model-path", default="rug_pull_model.pkl")
+    parser.add_argument("--top", type=int, default=10, help="Lignes du leaderboard affichées")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    pipeline = TrainingPipeline(args.database, args.cache_dir, args.folds, args.workers)
+    leaderboard = pipeline.run(refresh_cache=args.refresh_cache)
+
+    leaderboard_path = os.path.join(args.cache_dir, 'leaderboard.csv')
+    leaderboard.to_csv(leaderboard_path)
+
+    print(f"\n=== LEADERBOARD ({len(leaderboard)} configurations, CV temporelle {args.folds} folds) ===")
+    for config_id, row in leaderboard.head(args.top).iterrows():
+        print(f"{row['rank']:>3}. {row['model']} AUC {row['roc_auc_mean']:.3f} ±{row['roc_auc_std']:.3f} "
+              f"| AP {row['average_precision_mean']:.3f} | fit {row['fit_seconds_mean']:.2f}s "
+              f"| predict {row['predict_us_per_row']:.1f}µs/token | {row['params']}")
+    print(f"\n📄 Leaderboard complet: {leaderboard_path}")
+
+    if args.save:
+        pipeline.save_best(leaderboard, args.model_path)
+
+
+if __name__ == "__main__":
+    main()
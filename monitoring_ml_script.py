@@ -7,6 +7,10 @@ import os
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.preprocessing import StandardScaler
 
+from ml_rugg_pull import (SCORING_CHUNK_SIZE, build_scoring_features, iter_scoring_chunks,
+                          score_feature_matrix)
+from token_feature_store import TokenFeatureStore
+
 class RugPullMonitor:
     def __init__(self, db_path: str):
         self.db_path = db_path
@@ -69,10 +73,104 @@ class RugPullMonitor:
             )
         """)
         
+        # High-water marks des jobs incrémentaux (détection, performances)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monitoring_job_state (
+                job TEXT PRIMARY KEY,
+                high_water_mark TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        # Compteurs de la matrice de confusion par jour d'événement
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS performance_counters (
+                date DATE PRIMARY KEY,
+                confirmed_events INTEGER DEFAULT 0,
+                confirmed_rugs INTEGER DEFAULT 0,
+                true_positives INTEGER DEFAULT 0,
+                false_negatives INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_confirmed_events_date ON confirmed_events(event_date)")
+        
+        self.create_score_index(cursor)
+        
         conn.commit()
         conn.close()
         print("✅ Tables de monitoring créées/vérifiées")
     
+    def create_score_index(self, cursor):
+        """
+        Index sur ml_rug_score: totaux des scores (tokens scorés, haut risque,
+        somme) recalculés à chaque passage par un parcours de l'index seul.
+        Remplace les anciens totaux tenus par triggers, faussés par les
+        INSERT OR REPLACE INTO tokens (DELETE implicite sans trigger).
+        """
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(tokens)")}
+        if not columns:
+            return
+        if 'ml_rug_score' not in columns:
+            cursor.execute("ALTER TABLE tokens ADD COLUMN ml_rug_score REAL DEFAULT NULL")
+        
+        for trigger in ('trg_tokens_score_insert', 'trg_tokens_score_update', 'trg_tokens_score_delete'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS ml_score_totals")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tokens_ml_rug_score ON tokens(ml_rug_score)")
+    
+    def create_rug_detection_queue(self, cursor):
+        """
+        File des tokens à réexaminer par detect_confirmed_rugs_auto, alimentée
+        par triggers: nouveau snapshot (token_features) ou score ML modifié.
+        Pas d'horloge: un écrivain qui commit après la lecture reste dans la file.
+        """
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rug_detection_pending'"
+        ).fetchone()
+        
+        cursor.execute("CREATE TABLE IF NOT EXISTS rug_detection_pending (address TEXT PRIMARY KEY)")
+        for event in ('INSERT', 'UPDATE'):
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_token_features_rug_pending_{event.lower()}
+                AFTER {event} ON token_features
+                BEGIN
+                    INSERT OR IGNORE INTO rug_detection_pending (address) VALUES (NEW.address);
+                END
+            """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tokens_rug_pending_insert AFTER INSERT ON tokens
+            WHEN NEW.ml_rug_score IS NOT NULL
+            BEGIN
+                INSERT OR IGNORE INTO rug_detection_pending (address) VALUES (NEW.address);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_tokens_rug_pending_score AFTER UPDATE OF ml_rug_score ON tokens
+            WHEN NEW.ml_rug_score IS NOT NULL AND OLD.ml_rug_score IS NOT NEW.ml_rug_score
+            BEGIN
+                INSERT OR IGNORE INTO rug_detection_pending (address) VALUES (NEW.address);
+            END
+        """)
+        
+        # Création (ou migration depuis l'ancien high-water mark): un passage complet
+        if not exists:
+            cursor.execute("INSERT OR IGNORE INTO rug_detection_pending (address) SELECT address FROM token_features")
+            cursor.execute("DELETE FROM monitoring_job_state WHERE job = 'rug_detection'")
+    
+    def get_high_water_mark(self, conn, job):
+        row = conn.execute("SELECT high_water_mark FROM monitoring_job_state WHERE job = ?", (job,)).fetchone()
+        return row[0] if row else None
+    
+    def set_high_water_mark(self, conn, job, value):
+        conn.execute("""
+            INSERT INTO monitoring_job_state (job, high_water_mark, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(job) DO UPDATE SET
+                high_water_mark = excluded.high_water_mark,
+                updated_at = excluded.updated_at
+        """, (job, str(value)))
+    
     def load_trained_model(self):
         """
         Charge le modèle pré-entraîné ou entraîne un nouveau
@@ -118,9 +216,10 @@ class RugPullMonitor:
         
         print("💾 Modèle sauvegardé dans rug_pull_model.pkl")
     
-    def update_new_tokens_only(self):
+    def update_new_tokens_only(self, chunk_size: int = SCORING_CHUNK_SIZE):
         """
         Met à jour seulement les tokens qui n'ont pas encore de score ML
+        (par lots: une requête, un predict_proba et un executemany par lot)
         """
         if self.model is None:
             self.load_trained_model()
@@ -135,54 +234,49 @@ class RugPullMonitor:
         except:
             pass  # Colonne existe déjà
         
-        # Récupérer seulement les tokens sans score ML
-        query = """
-        SELECT 
-            address, symbol, name, price_usdc, market_cap, 
-            price_change_24h, volume_24h, age_hours, holders
-        FROM tokens 
-        WHERE ml_rug_score IS NULL
-        """
+        TokenFeatureStore(self.db_path)
         
-        new_tokens = pd.read_sql_query(query, conn)
+        # Compter seulement les tokens sans score ML
+        pending = conn.execute("SELECT COUNT(*) FROM tokens WHERE ml_rug_score IS NULL").fetchone()[0]
         
-        if len(new_tokens) == 0:
+        if pending == 0:
             print("✅ Aucun nouveau token à traiter")
             conn.close()
             return 0
         
-        print(f"🆕 Traitement de {len(new_tokens)} nouveaux tokens...")
+        print(f"🆕 Traitement de {pending} nouveaux tokens...")
         
         updated_count = 0
         
-        for i, token in new_tokens.iterrows():
-            if i % 100 == 0:
-                print(f"Progression: {i}/{len(new_tokens)}")
-            
-            address = token['address']
-            
+        for chunk in iter_scoring_chunks(conn, where="ml_rug_score IS NULL", chunk_size=chunk_size):
             try:
-                ml_score = self.predict_single_token(address, token, conn)
-                
-                # Mettre à jour la base
-                conn.execute("""
-                    UPDATE tokens 
-                    SET ml_rug_score = ? 
-                    WHERE address = ?
-                """, (ml_score, address))
-                
-                updated_count += 1
-                
-                # Créer des alertes pour les tokens très suspects
-                if ml_score >= 0.8:
-                    self.create_alert('HIGH_RISK_TOKEN', address, token['symbol'], 
-                                    ml_score, f"Nouveau token à très haut risque détecté", 'HIGH')
-                
+                X = build_scoring_features(chunk, self.feature_names, prefer_dex_price_change=False)
+                scores = score_feature_matrix(self.model, self.scaler, X)
             except Exception as e:
-                print(f"Erreur pour {address}: {e}")
+                print(f"Erreur pour un lot de {len(chunk)} tokens: {e}")
                 continue
+            
+            # Mettre à jour la base
+            conn.executemany("""
+                UPDATE tokens 
+                SET ml_rug_score = ? 
+                WHERE address = ?
+            """, zip(scores.tolist(), chunk['address']))
+            
+            # Créer des alertes pour les tokens très suspects (même transaction)
+            high_risk = scores >= 0.8
+            try:
+                conn.executemany("""
+                    INSERT INTO alerts (alert_type, address, symbol, ml_score, message, severity)
+                    VALUES ('HIGH_RISK_TOKEN', ?, ?, ?, 'Nouveau token à très haut risque détecté', 'HIGH')
+                """, zip(chunk['address'][high_risk], chunk['symbol'][high_risk], scores[high_risk].tolist()))
+            except sqlite3.Error as e:
+                print(f"Erreur création alertes: {e}")
+            
+            conn.commit()
+            updated_count += len(chunk)
+            print(f"Progression: {updated_count}/{pending}")
         
-        conn.commit()
         conn.close()
         
         print(f"✅ {updated_count} nouveaux tokens mis à jour")
@@ -304,76 +398,56 @@ class RugPullMonitor:
     def detect_confirmed_rugs_auto(self):
         """
         Détecte automatiquement les nouveaux rug pulls basés sur des critères
+        Incrémental: seuls les tokens de rug_detection_pending (nouveau snapshot
+        ou score ML modifié) sont examinés; ceux encore sans score restent en file
         """
-        conn = sqlite3.connect(self.db_path)
+        if not TokenFeatureStore(self.db_path).available:
+            print("⚠️ tokens_hist absente, détection automatique impossible")
+            return 0
+        
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        # File lue et vidée dans la même transaction d'écriture: rien ne s'y glisse entre les deux
+        conn.execute("BEGIN IMMEDIATE")
+        self.create_score_index(conn)
+        self.create_rug_detection_queue(conn)
         
-        # Critères automatiques pour détecter un rug pull
+        # Critères automatiques sur le dernier snapshot de chaque token en file
         auto_rug_query = """
-        WITH latest_data AS (
-            SELECT 
-                t.address, t.symbol, t.ml_rug_score,
-                th.price_change_24h, th.dexscreener_price_change_h24,
-                th.volume_24h, th.dexscreener_volume_24h,
-                th.dexscreener_txns_24h, th.market_cap,
-                th.snapshot_timestamp
-            FROM tokens t
-            LEFT JOIN tokens_hist th ON t.address = th.address
-            WHERE th.snapshot_timestamp = (
-                SELECT MAX(snapshot_timestamp) 
-                FROM tokens_hist th2 
-                WHERE th2.address = t.address
-            )
-            AND t.ml_rug_score IS NOT NULL
-        )
+        INSERT OR IGNORE INTO confirmed_events 
+        (address, symbol, event_type, event_date, ml_score_at_prediction, detection_method, notes)
         SELECT 
-            address, symbol, ml_rug_score, price_change_24h,
-            dexscreener_price_change_h24, volume_24h, market_cap
-        FROM latest_data
-        WHERE 
+            f.address, t.symbol, 'RUG_PULL', ?, t.ml_rug_score, 'AUTO_PRICE_DROP',
+            printf('Prix: %.1f%%, Volume: %.0f', f.last_price_change_24h, f.last_volume_24h)
+        FROM rug_detection_pending p
+        JOIN token_features f ON f.address = p.address
+        JOIN tokens t ON t.address = p.address
+        WHERE t.ml_rug_score IS NOT NULL
+        AND (
             -- Critère 1: Chute massive de prix (>90%)
-            (price_change_24h <= -90 OR dexscreener_price_change_h24 <= -90)
+            (f.last_price_change_24h <= -90 OR f.last_dexscreener_price_change_h24 <= -90)
             OR
             -- Critère 2: Prix -80% + Volume quasi nul
-            ((price_change_24h <= -80 OR dexscreener_price_change_h24 <= -80) 
-             AND (volume_24h < 100 OR dexscreener_volume_24h < 100))
+            ((f.last_price_change_24h <= -80 OR f.last_dexscreener_price_change_h24 <= -80) 
+             AND (f.last_volume_24h < 100 OR f.last_dexscreener_volume_24h < 100))
             OR  
             -- Critère 3: Market cap effondré + aucune transaction
-            (market_cap < 100 AND dexscreener_txns_24h = 0)
+            (f.last_market_cap < 100 AND f.last_dexscreener_txns_24h = 0)
+        )
+        -- Un rug pull n'est confirmé qu'une fois
+        AND NOT EXISTS (
+            SELECT 1 FROM confirmed_events e
+            WHERE e.address = f.address AND e.event_type = 'RUG_PULL'
+        )
         """
         
-        potential_rugs = pd.read_sql_query(auto_rug_query, conn)
-        
         today = datetime.now().date()
-        new_detections = 0
-        
-        for _, rug in potential_rugs.iterrows():
-            # Vérifier si pas déjà dans confirmed_events
-            existing = conn.execute("""
-                SELECT COUNT(*) FROM confirmed_events 
-                WHERE address = ? AND event_date = ?
-            """, (rug['address'], today)).fetchone()[0]
-            
-            if existing == 0:
-                # Ajouter comme rug pull confirmé
-                conn.execute("""
-                    INSERT OR IGNORE INTO confirmed_events 
-                    (address, symbol, event_type, event_date, ml_score_at_prediction, detection_method, notes)
-                    VALUES (?, ?, 'RUG_PULL', ?, ?, 'AUTO_PRICE_DROP', ?)
-                """, (
-                    rug['address'], 
-                    rug['symbol'], 
-                    today,
-                    rug['ml_rug_score'],
-                    f"Prix: {rug['price_change_24h']:.1f}%, Volume: {rug['volume_24h']:.0f}"
-                ))
-                
-                new_detections += 1
-                
-                # Créer alerte
-                #self.create_alert_with_conn('RUG_DETECTED', rug['address'], rug['symbol'],
-                 #               rug['ml_rug_score'], 
-                 #               f"Rug pull détecté automatiquement (prix: {rug['price_change_24h']:.1f}%)", 
-                 #               'CRITICAL')
+        new_detections = conn.execute(auto_rug_query, (today,)).rowcount
+        
+        # Retirer les tokens examinés; sans score, ils attendent leur scoring
+        conn.execute("""
+            DELETE FROM rug_detection_pending
+            WHERE address NOT IN (SELECT address FROM tokens WHERE ml_rug_score IS NULL)
+        """)
         
         conn.commit()
         conn.close()
@@ -383,62 +457,82 @@ class RugPullMonitor:
         
         return new_detections
     
+    def update_performance_counters(self, conn):
+        """
+        Recalcule les compteurs des seuls jours ayant reçu des événements depuis le
+        dernier passage (high-water mark sur confirmed_events.id). Un INSERT OR REPLACE
+        manuel crée un nouvel id: le jour concerné est simplement recompté.
+        """
+        since = int(self.get_high_water_mark(conn, 'performance_events') or 0)
+        until = conn.execute("SELECT MAX(id) FROM confirmed_events").fetchone()[0]
+        if until is None or until <= since:
+            return 0
+        
+        days = [row[0] for row in conn.execute("""
+            SELECT DISTINCT event_date FROM confirmed_events WHERE id > ? AND id <= ?
+        """, (since, until))]
+        
+        placeholders = ",".join("?" * len(days))
+        conn.execute(f"""
+            INSERT OR REPLACE INTO performance_counters
+            (date, confirmed_events, confirmed_rugs, true_positives, false_negatives, updated_at)
+            SELECT 
+                event_date,
+                COUNT(*),
+                SUM(event_type = 'RUG_PULL'),
+                SUM(event_type = 'RUG_PULL' AND ml_score_at_prediction >= 0.5),
+                SUM(event_type = 'RUG_PULL' AND ml_score_at_prediction < 0.5),
+                CURRENT_TIMESTAMP
+            FROM confirmed_events
+            WHERE event_date IN ({placeholders})
+            GROUP BY event_date
+        """, days)
+        self.set_high_water_mark(conn, 'performance_events', until)
+        return len(days)
+    
     def calculate_daily_performance(self):
         """
-        Calcule les performances du modèle pour aujourd'hui
+        Calcule les performances du modèle pour aujourd'hui à partir des
+        compteurs par jour et des totaux de scores (index, pas de scan des tables)
         """
         conn = sqlite3.connect(self.db_path)
         today = datetime.now().date()
         
-        # Récupérer tous les événements confirmés d'aujourd'hui
-        confirmed_events = pd.read_sql_query("""
-            SELECT address, event_type, ml_score_at_prediction
-            FROM confirmed_events
-            WHERE event_date = ?
-        """, conn, params=(today,))
+        self.update_performance_counters(conn)
+        conn.commit()
+        
+        counters = conn.execute("""
+            SELECT confirmed_events, confirmed_rugs, true_positives, false_negatives
+            FROM performance_counters
+            WHERE date = ?
+        """, (today,)).fetchone()
         
-        if len(confirmed_events) == 0:
+        if not counters or counters[0] == 0:
             print("ℹ️ Aucun événement confirmé aujourd'hui pour calculer les performances")
             conn.close()
             return
         
-        # Récupérer toutes les prédictions à haut risque d'aujourd'hui
-        high_risk_predictions = pd.read_sql_query("""
-            SELECT COUNT(*) as count
-            FROM tokens
-            WHERE ml_rug_score >= 0.5
-        """, conn).iloc[0]['count']
+        total_confirmed, confirmed_rugs, true_positives, false_negatives = counters
         
-        # Calculer métriques
-        total_confirmed = len(confirmed_events)
-        confirmed_rugs = len(confirmed_events[confirmed_events['event_type'] == 'RUG_PULL'])
-        
-        # True Positives: Tokens prédits à haut risque ET qui ont ruggé
-        true_positives = len(confirmed_events[
-            (confirmed_events['event_type'] == 'RUG_PULL') & 
-            (confirmed_events['ml_score_at_prediction'] >= 0.5)
-        ])
+        # Prédictions à haut risque et score moyen (idx_tokens_ml_rug_score, pas de scan de table)
+        scored_tokens, score_sum = conn.execute("""
+            SELECT COUNT(ml_rug_score), COALESCE(SUM(ml_rug_score), 0)
+            FROM tokens WHERE ml_rug_score IS NOT NULL
+        """).fetchone()
+        high_risk_predictions = conn.execute(
+            "SELECT COUNT(*) FROM tokens WHERE ml_rug_score >= 0.5"
+        ).fetchone()[0]
         
         # False Positives: Tokens prédits à haut risque mais PAS ruggés
         false_positives = high_risk_predictions - true_positives
         
-        # False Negatives: Tokens qui ont ruggé mais PAS prédits à haut risque
-        false_negatives = len(confirmed_events[
-            (confirmed_events['event_type'] == 'RUG_PULL') & 
-            (confirmed_events['ml_score_at_prediction'] < 0.5)
-        ])
-        
         # Métriques
         precision = true_positives / max(1, true_positives + false_positives)
         recall = true_positives / max(1, true_positives + false_negatives)
         f1_score = 2 * (precision * recall) / max(0.001, precision + recall)
         
         # Score moyen
-        avg_score = pd.read_sql_query("""
-            SELECT AVG(ml_rug_score) as avg_score
-            FROM tokens
-            WHERE ml_rug_score IS NOT NULL
-        """, conn).iloc[0]['avg_score']
+        avg_score = score_sum / scored_tokens if scored_tokens else float('nan')
         
         # Sauvegarder les performances
         conn.execute("""
@@ -15,6 +15,8 @@ from dataclasses import dataclass
 import json
 import time
 
+from epoch_columns import EpochColumns
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger('non_tradeable_analyzer')
@@ -54,6 +56,7 @@ class NonTradeableAnalyzer:
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
         self.session: aiohttp.ClientSession = None
+        self.epoch_columns = EpochColumns(database_path)
         
         # Rate limiting
         self.last_jupiter_call = 0
@@ -94,7 +97,8 @@ class NonTradeableAnalyzer:
             params = []
             
             if age_hours:
-                query += ' AND first_discovered_at > datetime("now", "-{} hours", "localtime")'.format(age_hours)
+                discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at')
+                query += f" AND {discovered} > CAST(strftime('%s', 'now', '-{int(age_hours)} hours') AS INTEGER)"
             
             query += ' ORDER BY first_discovered_at DESC'
             
@@ -205,6 +205,7 @@ class OptimizedSolanaScanner:
         self.args = args
         self.shutdown_event = asyncio.Event()
         self.tasks = []
+        self.enrichment_scheduler = None
         self.stats = {
             'start_time': time.time(),
             'tokens_processed': 0,
@@ -237,6 +238,8 @@ class OptimizedSolanaScanner:
         
         # 3. Démarrer l'enrichisseur optimisé
         from solana_monitor_c4 import token_enricher
+        token_enricher.durable_queue = not self.args.memory_queue
+        token_enricher.queue_path = self.args.queue_db
         await token_enricher.start()
         
         # === NOUVEAU: Configurer le seuil whale ===
@@ -248,7 +251,9 @@ class OptimizedSolanaScanner:
         
         # 5. Créer toutes les tâches optimisées
         tasks_config = [
-            ("solana_monitoring", start_monitoring(self.args.log_level)),
+            # --unified-scheduler: boucle enrich_existing_tokens coupée, sinon double enrichissement
+            ("solana_monitoring", start_monitoring(self.args.log_level,
+                                                   legacy_enrichment=not self.args.unified_scheduler)),
             ("performance_monitoring", self._performance_monitoring_loop()),
             ("stats_reporter", self._stats_reporting_loop()),
             ("enrichment_monitor", self._enrichment_monitoring_loop()),
@@ -262,6 +267,15 @@ class OptimizedSolanaScanner:
         if self.args.enable_auto_scaling:
             tasks_config.append(("auto_scaler", self._auto_scaling_loop()))
         
+        if self.args.unified_scheduler:
+            # Ordonnanceur unique: remplace les boucles "oldest" des enrichisseurs séparés
+            from enrichment_scheduler import build_default_scheduler
+            self.enrichment_scheduler = await build_default_scheduler(
+                self.args.database, full_enricher=token_enricher,
+                max_concurrent=self.config['max_concurrent'] // 3 or 1
+            )
+            tasks_config.append(("enrichment_scheduler", self.enrichment_scheduler.run()))
+        
         # Démarrer toutes les tâches
         for name, coro in tasks_config:
             task = asyncio.create_task(coro, name=name)
@@ -287,8 +301,9 @@ class OptimizedSolanaScanner:
         """Démarrer le serveur Flask dans un thread séparé"""
         def run_flask():
             try:
-                # Importer l'app Flask
-                from flask_api_backend import app
+                # Importer l'app Flask et créer le schéma des routes avant de servir
+                from flask_api_backend import app, init_schema
+                init_schema()
                 
                 # Configuration pour production
                 app.config['ENV'] = 'production'
@@ -402,6 +417,9 @@ class OptimizedSolanaScanner:
         if self.tasks:
             await asyncio.gather(*self.tasks, return_exceptions=True)
         
+        if self.enrichment_scheduler:
+            self.enrichment_scheduler.stop()
+        
         # Arrêter l'enrichisseur
         try:
             from solana_monitor_c4 import token_enricher
@@ -484,7 +502,7 @@ class OptimizedSolanaScanner:
                 # Statistiques de la queue d'enrichissement
                 try:
                     from solana_monitor_c4 import token_enricher
-                    queue_size = token_enricher.enrichment_queue.qsize()
+                    queue_size = token_enricher.queue_size()
                     
                     if queue_size > 50:
                         logging.warning(f"⚠️  High enrichment queue: {queue_size} tokens")
@@ -492,11 +510,26 @@ class OptimizedSolanaScanner:
                         logging.info(f"📊 Enrichment queue: {queue_size} tokens")
                     else:
                         logging.debug(f"📊 Enrichment queue: {queue_size} tokens")
-                        
+
+                    if token_enricher.job_queue:
+                        job_stats = token_enricher.job_queue.get_stats()
+                        if job_stats['dead']:
+                            logging.warning(f"💀 Dead-lettered enrichment jobs: {job_stats['dead']} "
+                                            f"(retried: {job_stats['retried']}, reclaimed: {job_stats['reclaimed']})")
+
                 except ImportError as e:
                     logging.debug(f"Token enricher not available for monitoring: {e}")
                 except AttributeError as e:
                     logging.debug(f"Token enricher queue not accessible: {e}")
+                
+                # Ordonnanceur unifié: profondeur de file et latence par source
+                if self.enrichment_scheduler:
+                    scheduler_stats = self.enrichment_scheduler.get_stats()
+                    logging.info(f"🗓️ Scheduler queue: {scheduler_stats['queue_depth']} jobs "
+                                 f"({scheduler_stats['in_flight']} in flight) "
+                                 f"{scheduler_stats['queue_depth_by_source']}")
+                    for source, latency in scheduler_stats['job_latency'].items():
+                        logging.debug(f"   {source}: p95 {latency['p95']:.1f}s over {latency['count']} jobs")
             except Exception as e:
                 logging.error(f"Error in enrichment monitoring: {e}")
     
@@ -535,10 +568,16 @@ class OptimizedSolanaScanner:
                 
                 try:
                     from solana_monitor_c4 import token_enricher
-                    queue_size = token_enricher.enrichment_queue.qsize()
+                    queue_size = token_enricher.queue_size()
+                    
+                    if token_enricher.adaptive_concurrency:
+                        # Batch piloté par les limites AIMD: rapport seulement
+                        limits = {name: limiter.current_limit for name, limiter in token_enricher.limiters.items()}
+                        logging.info(f"🎚️ AIMD limits: {limits} | batch_size: {token_enricher.batch_size} | "
+                                     f"queue: {queue_size}")
                     
                     # Auto-scaling simple basé sur la taille de la queue
-                    if queue_size > 75:
+                    elif queue_size > 75:
                         # Queue très pleine - augmenter le batch size temporairement
                         token_enricher.batch_size = min(20, token_enricher.batch_size + 2)
                         logging.info(f"📈 Auto-scaling UP: batch_size -> {token_enricher.batch_size}")
@@ -637,6 +676,12 @@ def main():
                        help="Enable automatic batch size scaling")
     parser.add_argument("--enable-cache-preload", action="store_true",
                        help="Preload Jupiter tokens cache on startup")
+    parser.add_argument("--unified-scheduler", action="store_true",
+                       help="Run all enrichers through the priority-based enrichment scheduler")
+    parser.add_argument("--queue-db", default="enrichment_queue.db",
+                       help="SQLite file of the persistent enrichment job queue")
+    parser.add_argument("--memory-queue", action="store_true",
+                       help="Use the in-memory enrichment queue (pending work lost on restart)")
     
     # Options de test
     parser.add_argument("--dry-run", action="store_true",
@@ -14,6 +14,8 @@ from dataclasses import dataclass, asdict
 from typing import Dict, List, Optional
 import logging
 
+from epoch_columns import EpochColumns
+
 logger = logging.getLogger('performance_monitor')
 
 @dataclass
@@ -37,6 +39,9 @@ class PerformanceMonitor:
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
         self.start_time = time.time()
+        # updated_at_epoch / first_discovered_at_epoch: créées au premier relevé,
+        # pas ici (performance_monitor est instancié à l'import du module)
+        self.epoch_columns = None
         
         # Métriques en mémoire (pour les tendances et temps)
         self.update_times = deque(maxlen=100)
@@ -48,6 +53,10 @@ class PerformanceMonitor:
         self.enrichment_queue_size = 0
         self.active_enrichment_tasks = 0
         
+        # Limites de concurrence adaptatives (AIMD) par upstream
+        self.concurrency_limits = {}
+        self.concurrency_history = defaultdict(lambda: deque(maxlen=200))
+        
         # Snapshots pour historique
         self.metric_history = deque(maxlen=50)
         
@@ -99,16 +108,44 @@ class PerformanceMonitor:
         with self.lock:
             self.active_enrichment_tasks = count
     
+    def record_concurrency_limit(self, upstream: str, snapshot: Dict, reason: str):
+        """Enregistrer un changement de limite de concurrence AIMD"""
+        with self.lock:
+            self.concurrency_limits[upstream] = {**snapshot, 'last_reason': reason, 'updated_at': time.time()}
+            self.concurrency_history[upstream].append((time.time(), snapshot['limit'], reason))
+    
+    def get_concurrency_stats(self) -> Dict:
+        """Limites actuelles et historique récent par upstream"""
+        with self.lock:
+            cutoff = time.time() - 300
+            stats = {}
+            for upstream, current in self.concurrency_limits.items():
+                history = list(self.concurrency_history[upstream])
+                recent = [entry for entry in history if entry[0] > cutoff]
+                stats[upstream] = {
+                    **current,
+                    'decreases_5min': len([entry for entry in recent if entry[2] != 'increase']),
+                    'min_limit_5min': min((entry[1] for entry in recent), default=current['limit']),
+                    'max_limit_5min': max((entry[1] for entry in recent), default=current['limit']),
+                    'history': history[-20:]
+                }
+            return stats
+    
     def get_database_metrics(self) -> Dict:
         """Récupérer les métriques RÉELLES depuis la base de données"""
         try:
+            if self.epoch_columns is None:
+                self.epoch_columns = EpochColumns(self.database_path)
+            updated = self.epoch_columns.epoch('tokens', 'updated_at')
+            discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at')
+
             conn = sqlite3.connect(self.database_path)
             cursor = conn.cursor()
             
             # ✅ TOKENS MIS À JOUR dans les 5 dernières minutes (RÉEL)
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
-                WHERE updated_at > datetime('now', '-5 minutes', 'localtime')
+                WHERE {updated} > CAST(strftime('%s', 'now', '-5 minutes') AS INTEGER)
                 AND updated_at IS NOT NULL
                 AND symbol IS NOT NULL 
                 AND symbol != 'UNKNOWN' 
@@ -117,9 +154,9 @@ class PerformanceMonitor:
             tokens_updated_5min = cursor.fetchone()[0]
             
             # ✅ TOKENS MIS À JOUR dans la dernière heure
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
-                WHERE updated_at > datetime('now', '-1 hour', 'localtime')
+                WHERE {updated} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)
                 AND updated_at IS NOT NULL
                 AND symbol IS NOT NULL 
                 AND symbol != 'UNKNOWN' 
@@ -145,9 +182,9 @@ class PerformanceMonitor:
             high_score_tokens = cursor.fetchone()[0]
             
             # Nouveaux tokens (24h)
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
-                WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                WHERE {discovered} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
             """)
             new_tokens_24h = cursor.fetchone()[0]
             
@@ -297,6 +334,16 @@ class PerformanceMonitor:
                 print(f"   {api_name:<12}: {stats['total_calls']:>4} calls, "
                       f"moy: {stats['avg_time']:.2f}s, min: {stats['min_time']:.2f}s, max: {stats['max_time']:.2f}s")
         
+        # Concurrence adaptative
+        concurrency_stats = self.get_concurrency_stats()
+        if concurrency_stats:
+            print(f"\n🎚️  CONCURRENCE ADAPTATIVE (AIMD)")
+            for upstream, stats in concurrency_stats.items():
+                print(f"   {upstream:<12}: limite {stats['limit']:>3} "
+                      f"(5min: {stats['min_limit_5min']}-{stats['max_limit_5min']}, "
+                      f"{stats['decreases_5min']} baisses), en vol: {stats['in_flight']:>3}, "
+                      f"timeout: {stats['timeout']:.1f}s, dernier: {stats['last_reason']}")
+        
         # Tendances
         if len(self.metric_history) >= 2:
             prev_snapshot = self.metric_history[-2]
@@ -328,7 +375,10 @@ class PerformanceMonitor:
             'queue_size': current.queue_size,
             'active_tasks': current.active_threads,
             'total_updates': self.total_updates,
-            'total_errors': self.total_errors
+            'total_errors': self.total_errors,
+            'concurrency_limits': {
+                upstream: stats['limit'] for upstream, stats in self.get_concurrency_stats().items()
+            }
         }
     
     def export_metrics_json(self, filename: str = None) -> str:
@@ -342,6 +392,7 @@ class PerformanceMonitor:
             'current_metrics': asdict(self.calculate_current_metrics()),
             'database_metrics': self.get_database_metrics(),
             'api_stats': self.get_api_stats(),
+            'concurrency_stats': self.get_concurrency_stats(),
             'total_updates': self.total_updates,
             'total_errors': self.total_errors,
             'metric_history': [asdict(snapshot) for snapshot in list(self.metric_history)]
@@ -380,6 +431,10 @@ def set_active_enrichment_tasks(count: int):
     """Mettre à jour le nombre de tâches actives"""
     performance_monitor.set_active_enrichment_tasks(count)
 
+def record_concurrency_limit(upstream: str, snapshot: Dict, reason: str):
+    """Enregistrer un changement de limite de concurrence AIMD"""
+    performance_monitor.record_concurrency_limit(upstream, snapshot, reason)
+
 def export_performance_report():
     """Exporter un rapport de performance"""
     return performance_monitor.export_metrics_json()
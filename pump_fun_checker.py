@@ -16,6 +16,8 @@ from dataclasses import dataclass
 from aiohttp import ClientSession, TCPConnector
 import random
 
+from epoch_columns import EpochColumns
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -90,6 +92,7 @@ class PumpFunChecker:
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
         self.session: Optional[ClientSession] = None
+        self.epoch_columns = EpochColumns(database_path)
         self.rate_limiter = RateLimiter(requests_per_minute=100)  # Conservative
         self.is_running = False
         
@@ -141,18 +144,20 @@ class PumpFunChecker:
         cursor = conn.cursor()
         
         try:
+            updated = self.epoch_columns.epoch('tokens', 'updated_at')
+            discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at')
             if recheck_failures:
                 # Mode re-check : retester les échecs après X heures
-                query = '''
+                query = f'''
                     SELECT address, symbol, name, status, first_discovered_at, exists_on_pump, updated_at
                     FROM tokens 
                     WHERE (status = ? OR status IS NULL)
                     AND (
                         exists_on_pump IS NULL 
-                        OR (exists_on_pump = 0 AND updated_at < datetime('now', '-{} hours', 'localtime'))
+                        OR (exists_on_pump = 0 AND {updated} < CAST(strftime('%s', 'now', '-{int(recheck_after_hours)} hours') AS INTEGER))
                     )
                     AND address IS NOT NULL
-                '''.format(recheck_after_hours)
+                '''
             else:
                 # Mode normal : ne tester que les tokens jamais testés
                 query = '''
@@ -166,9 +171,9 @@ class PumpFunChecker:
             params = [status_filter]
             
             # Prioriser les tokens récents
-            query += '''
+            query += f'''
                 ORDER BY 
-                    CASE WHEN first_discovered_at > datetime('now', '-24 hours', 'localtime') THEN 1 ELSE 2 END,
+                    CASE WHEN {discovered} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER) THEN 1 ELSE 2 END,
                     first_discovered_at DESC
                 LIMIT ?
             '''
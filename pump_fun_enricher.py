@@ -18,6 +18,10 @@ from dataclasses import dataclass
 from aiohttp import ClientSession, TCPConnector
 import random
 
+from epoch_columns import EpochColumns
+from token_feature_store import TokenFeatureStore
+from token_write_layer import TokenWriteLayer
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,6 +29,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Colonnes écrites par l'enrichisseur (hors updated_at)
+PUMP_FUN_COLUMNS = [
+    'exists_on_pump', 'pump_fun_name', 'pump_fun_symbol', 'pump_fun_description',
+    'pump_fun_image_uri', 'pump_fun_metadata_uri', 'pump_fun_twitter', 'pump_fun_telegram',
+    'pump_fun_website', 'pump_fun_show_name', 'pump_fun_created_timestamp',
+    'pump_fun_usd_market_cap', 'pump_fun_reply_count', 'pump_fun_raydium_pool',
+    'pump_fun_complete', 'pump_fun_total_supply', 'pump_fun_creator', 'pump_fun_nsfw',
+    'pump_fun_market_cap', 'pump_fun_virtual_sol_reserves', 'pump_fun_virtual_token_reserves',
+    'pump_fun_bonding_curve', 'pump_fun_associated_bonding_curve',
+    'pump_fun_king_of_hill_timestamp', 'pump_fun_market_id', 'pump_fun_inverted',
+    'pump_fun_is_currently_live', 'pump_fun_username', 'pump_fun_profile_image',
+    'pump_fun_last_pump_update'
+]
+
 @dataclass
 class RateLimiter:
     """Rate limiter pour Pump.fun API - IDENTIQUE AU SCRIPT ORIGINAL"""
@@ -93,6 +111,11 @@ class ContinuousPumpFunEnricher:
         self.verbose = verbose
         self.rate_limiter = RateLimiter(requests_per_minute=100)  # Conservative
         self.is_running = False
+        self.write_layer = TokenWriteLayer(database_path)
+        # Trigger tokens_hist -> token_features: chaque snapshot met à jour les features ML
+        self.feature_store = TokenFeatureStore(database_path)
+        # Colonnes *_epoch: tokens découverts depuis moins de 24h via index
+        self.epoch_columns = EpochColumns(database_path)
         
         # URLs Pump.fun (mises à jour 2025)
         self.pump_fun_urls = [
@@ -111,7 +134,8 @@ class ContinuousPumpFunEnricher:
             'cycles_completed': 0,
             'last_successful_tokens': [],
             'snapshots_created': 0,
-            'snapshot_errors': 0
+            'snapshot_errors': 0,
+            'unchanged_updates': 0
         }
     
     def migrate_database_pump_fun(self):
@@ -239,7 +263,7 @@ class ContinuousPumpFunEnricher:
                 query = f'''
                     SELECT address, symbol, updated_at, pump_fun_last_pump_update, exists_on_pump
                     FROM tokens 
-                    WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                    WHERE {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                     AND symbol IS NOT NULL 
                     AND symbol != 'UNKNOWN' 
                     AND symbol != ''
@@ -517,100 +541,40 @@ class ContinuousPumpFunEnricher:
     
     def update_token_in_database(self, address: str, pump_fun_data: Dict) -> bool:
         """
-        Mettre à jour le token avec les données Pump.fun dans la base de données
+        Mettre à jour le token avec les données Pump.fun (dirty-checking):
+        seules les colonnes modifiées sont écrites, snapshot et updated_at
+        uniquement si une valeur a réellement changé
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
+        fields = {column: pump_fun_data.get(column) for column in PUMP_FUN_COLUMNS if column in pump_fun_data}
         
         try:
-            update_query = '''
-                UPDATE tokens SET 
-                    exists_on_pump = ?,
-                    pump_fun_name = ?,
-                    pump_fun_symbol = ?,
-                    pump_fun_description = ?,
-                    pump_fun_image_uri = ?,
-                    pump_fun_metadata_uri = ?,
-                    pump_fun_twitter = ?,
-                    pump_fun_telegram = ?,
-                    pump_fun_website = ?,
-                    pump_fun_show_name = ?,
-                    pump_fun_created_timestamp = ?,
-                    pump_fun_usd_market_cap = ?,
-                    pump_fun_reply_count = ?,
-                    pump_fun_raydium_pool = ?,
-                    pump_fun_complete = ?,
-                    pump_fun_total_supply = ?,
-                    pump_fun_creator = ?,
-                    pump_fun_nsfw = ?,
-                    pump_fun_market_cap = ?,
-                    pump_fun_virtual_sol_reserves = ?,
-                    pump_fun_virtual_token_reserves = ?,
-                    pump_fun_bonding_curve = ?,
-                    pump_fun_associated_bonding_curve = ?,
-                    pump_fun_king_of_hill_timestamp = ?,
-                    pump_fun_market_id = ?,
-                    pump_fun_inverted = ?,
-                    pump_fun_is_currently_live = ?,
-                    pump_fun_username = ?,
-                    pump_fun_profile_image = ?,
-                    pump_fun_last_pump_update = ?,
-                    updated_at = ?
-                WHERE address = ?
-            '''
-            
-            values = (
-                pump_fun_data.get('exists_on_pump'),
-                pump_fun_data.get('pump_fun_name'),
-                pump_fun_data.get('pump_fun_symbol'),
-                pump_fun_data.get('pump_fun_description'),
-                pump_fun_data.get('pump_fun_image_uri'),
-                pump_fun_data.get('pump_fun_metadata_uri'),
-                pump_fun_data.get('pump_fun_twitter'),
-                pump_fun_data.get('pump_fun_telegram'),
-                pump_fun_data.get('pump_fun_website'),
-                pump_fun_data.get('pump_fun_show_name'),
-                pump_fun_data.get('pump_fun_created_timestamp'),
-                pump_fun_data.get('pump_fun_usd_market_cap'),
-                pump_fun_data.get('pump_fun_reply_count'),
-                pump_fun_data.get('pump_fun_raydium_pool'),
-                pump_fun_data.get('pump_fun_complete'),
-                pump_fun_data.get('pump_fun_total_supply'),
-                pump_fun_data.get('pump_fun_creator'),
-                pump_fun_data.get('pump_fun_nsfw'),
-                pump_fun_data.get('pump_fun_market_cap'),
-                pump_fun_data.get('pump_fun_virtual_sol_reserves'),
-                pump_fun_data.get('pump_fun_virtual_token_reserves'),
-                pump_fun_data.get('pump_fun_bonding_curve'),
-                pump_fun_data.get('pump_fun_associated_bonding_curve'),
-                pump_fun_data.get('pump_fun_king_of_hill_timestamp'),
-                pump_fun_data.get('pump_fun_market_id'),
-                pump_fun_data.get('pump_fun_inverted'),
-                pump_fun_data.get('pump_fun_is_currently_live'),
-                pump_fun_data.get('pump_fun_username'),
-                pump_fun_data.get('pump_fun_profile_image'),
-                pump_fun_data.get('pump_fun_last_pump_update'),
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                address
+            changed = self.write_layer.write_fields(
+                address, 'pump_fun', fields,
+                checked_columns=('pump_fun_last_pump_update',),
+                before_write=self._snapshot_before_write
             )
-            
-            cursor.execute(update_query, values)
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                logger.debug(f"✅ Token {address} mis à jour avec succès")
-                return True
-            else:
-                logger.warning(f"⚠️ Token {address} non trouvé dans la base")
-                return False
-                
         except sqlite3.Error as e:
             logger.error(f"Erreur base de données pour {address}: {e}")
             self.stats['database_errors'] += 1
-            conn.rollback()
             return False
-        finally:
-            conn.close()
+        
+        if changed is None:
+            logger.warning(f"⚠️ Token {address} non trouvé dans la base")
+            return False
+        
+        if changed:
+            logger.debug(f"✅ Token {address} mis à jour ({len(changed)} colonnes modifiées)")
+        else:
+            self.stats['unchanged_updates'] += 1
+            logger.debug(f"⏸️ Token {address} inchangé, fraîcheur seule mise à jour")
+        return True
+    
+    def _snapshot_before_write(self, address: str, changed_fields: Dict):
+        """Snapshot tokens_hist juste avant une écriture qui modifie le token"""
+        if self.create_token_snapshot(address, 'before_pump_fun_update'):
+            self.stats['snapshots_created'] += 1
+        else:
+            self.stats['snapshot_errors'] += 1
     
     def enrich_token(self, token: Dict) -> bool:
         """
@@ -622,16 +586,7 @@ class ContinuousPumpFunEnricher:
         if self.verbose:
             logger.info(f"🔍 Enrichissement Pump.fun: {symbol} ({address[:8]}...)")
         
-        # 1. CRÉER UN SNAPSHOT AVANT L'ENRICHISSEMENT
-        snapshot_created = self.create_token_snapshot(address, 'before_pump_fun_update')
-        if snapshot_created:
-            self.stats['snapshots_created'] += 1
-        else:
-            self.stats['snapshot_errors'] += 1
-            logger.debug(f"⚠️ Impossible de créer le snapshot pour {symbol}, on continue quand même")
-        
-        # 2. ENRICHISSEMENT NORMAL (logique originale inchangée)
-        # Récupérer les données Pump.fun
+        # Récupérer les données Pump.fun (snapshot fait par update_token_in_database si changement)
         try:
             pump_data = asyncio.run(self.fetch_pump_fun_data(address))
             
@@ -639,27 +594,12 @@ class ContinuousPumpFunEnricher:
                 # Le token n'existe pas ou plus sur Pump.fun
                 logger.debug(f"❌ Pas de données Pump.fun pour {symbol}")
                 
-                # Mettre à jour exists_on_pump = False
-                conn = sqlite3.connect(self.database_path)
-                cursor = conn.cursor()
-                try:
-                    cursor.execute('''
-                        UPDATE tokens SET 
-                            exists_on_pump = 0,
-                            pump_fun_last_pump_update = ?,
-                            updated_at = ?
-                        WHERE address = ?
-                    ''', (
-                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                        address
-                    ))
-                    conn.commit()
-                    logger.debug(f"💾 Marqué {symbol} comme absent de Pump.fun")
-                except sqlite3.Error as e:
-                    logger.error(f"Erreur DB pour {address}: {e}")
-                finally:
-                    conn.close()
+                # Mettre à jour exists_on_pump = False (écrit seulement si différent)
+                self.update_token_in_database(address, {
+                    'exists_on_pump': False,
+                    'pump_fun_last_pump_update': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                })
+                logger.debug(f"💾 Marqué {symbol} comme absent de Pump.fun")
                 
                 return False
 
@@ -817,6 +757,7 @@ class ContinuousPumpFunEnricher:
         logger.info(f"✅ Total processed:     {self.stats['total_processed']}")
         logger.info(f"💾 Successful updates:  {self.stats['successful_updates']}")
         logger.info(f"📸 Snapshots created:   {self.stats['snapshots_created']}")
+        logger.info(f"⏸️ Unchanged updates:   {self.stats['unchanged_updates']}")
         logger.info(f"❌ API errors:          {self.stats['api_errors']}")
         logger.info(f"⚪ No data found:       {self.stats['no_data_found']}")
         logger.info(f"🔄 Cycles completed:    {self.stats['cycles_completed']}")
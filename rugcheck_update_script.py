@@ -27,11 +27,15 @@ logger = logging.getLogger('rugcheck_updater')
 class RugCheckUpdater:
     """Classe pour mettre à jour les scores RugCheck"""
     
-    def __init__(self, database_path: str = "tokens.db", batch_size: int = 5, delay: float = 2.0):
+    def __init__(self, database_path: str = "tokens.db", batch_size: int = 5, delay: float = 2.0,
+                 max_concurrent_fetches: int = 3):
         self.database_path = database_path
-        self.batch_size = batch_size
+        self.batch_size = batch_size  # Taille des flush de l'étage DB
         self.delay = delay  # Délai entre requêtes pour éviter rate limiting
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self.flush_interval = 2.0  # Flush DB au plus tard toutes les 2s
         self.session: Optional[ClientSession] = None
+        self.rate_lock = asyncio.Lock()  # Espacement des requêtes partagé par les fetchers
         
         # Rate limiting avancé
         self.rate_limiter = {
@@ -53,8 +57,54 @@ class RugCheckUpdater:
             'rate_limit_hits': 0,
             'total_wait_time': 0,
             'not_found_in_db': 0,  # Nouveaux tokens pas encore en DB
-            'created_tokens': 0     # Tokens créés automatiquement
+            'created_tokens': 0,    # Tokens créés automatiquement
+            'history_rows_added': 0,
+            'db_flushes': 0
         }
+        
+        self.init_rugcheck_history()
+    
+    def init_rugcheck_history(self):
+        """
+        Table d'historique des scores par token, clé (address, valid_from)
+        
+        Une ligne par changement de score: le score valide à un instant T est la
+        dernière ligne avec valid_from <= T. Remplace la réécriture de tous les
+        enregistrements tokens_hist à chaque mise à jour.
+        """
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rugcheck_scores (
+                    address TEXT NOT NULL,
+                    valid_from DATETIME NOT NULL,
+                    rug_score INTEGER,
+                    raw_score REAL,
+                    normalized_score REAL,
+                    PRIMARY KEY (address, valid_from)
+                ) WITHOUT ROWID
+            ''')
+            
+            # Vue de compatibilité: snapshots avec le score valide à leur date et le dernier score connu
+            cursor.execute('''
+                CREATE VIEW IF NOT EXISTS tokens_hist_rugcheck AS
+                SELECT h.*,
+                       (SELECT r.rug_score FROM rugcheck_scores r
+                        WHERE r.address = h.address AND r.valid_from <= h.snapshot_timestamp
+                        ORDER BY r.valid_from DESC LIMIT 1) AS rugcheck_score_at_snapshot,
+                       (SELECT r.rug_score FROM rugcheck_scores r
+                        WHERE r.address = h.address
+                        ORDER BY r.valid_from DESC LIMIT 1) AS rugcheck_score_latest
+                FROM tokens_hist h
+            ''')
+            
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erreur création table rugcheck_scores: {e}")
+        finally:
+            conn.close()
     
     def load_addresses_from_file(self, file_path: str) -> List[str]:
         """
@@ -313,8 +363,9 @@ class RugCheckUpdater:
         """Récupérer le score RugCheck pour un token avec rate limiting robuste"""
         url = f"https://api.rugcheck.xyz/v1/tokens/{address}/report"
         
-        # Attendre selon le rate limiting
-        await self.wait_for_rate_limit()
+        # Attendre selon le rate limiting (espacement partagé entre fetchers concurrents)
+        async with self.rate_lock:
+            await self.wait_for_rate_limit()
         
         max_retries = 3
         for attempt in range(max_retries):
@@ -432,114 +483,190 @@ class RugCheckUpdater:
         finally:
             conn.close()
     
-    def update_token_rugcheck(self, address: str, new_rug_score: int, old_rug_score: Optional[int] = None) -> bool:
-        """Mettre à jour le rug_score d'un token dans la table tokens"""
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                UPDATE tokens 
-                SET rug_score = ?, updated_at = ?
-                WHERE address = ?
-            ''', (new_rug_score, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), address))
-            
-            if cursor.rowcount > 0:
-                conn.commit()
-                
-                # Stats
-                if old_rug_score != new_rug_score:
-                    self.stats['scores_changed'] += 1
-                    logger.info(f"📊 {address}: {old_rug_score} → {new_rug_score}")
-                else:
-                    self.stats['scores_unchanged'] += 1
-                
-                return True
-            else:
-                logger.warning(f"Token {address} non trouvé en base")
-                return False
-                
-        except sqlite3.Error as e:
-            logger.error(f"Erreur mise à jour {address}: {e}")
-            return False
-        finally:
-            conn.close()
-    
-    def update_tokens_hist_rugcheck(self, address: str, new_rug_score: int) -> int:
+    def apply_scores(self, results: List[Dict], record_history: bool = True) -> Dict:
         """
-        Mettre à jour le rug_score d'un token dans tous ses enregistrements tokens_hist
+        Étage DB: appliquer un lot de scores en une transaction
         
+        Args:
+            results: dicts {address, symbol, old_score, rug_score, raw_score, normalized_score}
+            record_history: Si True, ajoute une ligne rugcheck_scores quand le score change
+            
         Returns:
-            Nombre d'enregistrements mis à jour
+            Compteurs du lot (tokens_found, tokens_updated, history_rows)
+        
+        L'ancien score est relu en base dans la transaction: old_score (lu avant
+        le fetch, ou absent) n'est qu'indicatif.
         """
+        if not results:
+            return {'tokens_found': 0, 'tokens_updated': 0, 'history_rows': 0}
+        
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                UPDATE tokens_hist 
-                SET rug_score = ?
-                WHERE address = ?
-            ''', (new_rug_score, address))
+            cursor.execute("BEGIN IMMEDIATE")
+            current = {}
+            addresses = list({r['address'] for r in results})
+            for start in range(0, len(addresses), 500):
+                chunk = addresses[start:start + 500]
+                cursor.execute(f"SELECT address, rug_score FROM tokens WHERE address IN ({','.join('?' * len(chunk))})",
+                               chunk)
+                current.update(cursor.fetchall())
+            
+            for r in results:
+                if r['address'] in current:
+                    r['old_score'] = current[r['address']]
+            changed = [r for r in results if r['address'] in current and r['old_score'] != r['rug_score']]
+            
+            # Seuls les scores modifiés touchent la ligne tokens
+            cursor.executemany('''
+                UPDATE tokens 
+                SET rug_score = ?, updated_at = ?
+                WHERE address = ? AND rug_score IS NOT ?
+            ''', [(r['rug_score'], now, r['address'], r['rug_score']) for r in changed])
+            tokens_updated = cursor.rowcount
+            
+            history_rows = 0
+            if record_history:
+                changes_before = conn.total_changes
+                # Nouvelle version seulement si différente de la dernière connue
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO rugcheck_scores (address, valid_from, rug_score, raw_score, normalized_score)
+                    SELECT ?, ?, ?, ?, ?
+                    WHERE ? IS NOT (
+                        SELECT rug_score FROM rugcheck_scores 
+                        WHERE address = ? ORDER BY valid_from DESC LIMIT 1
+                    )
+                ''', [
+                    (r['address'], now, r['rug_score'], r.get('raw_score'), r.get('normalized_score'),
+                     r['rug_score'], r['address'])
+                    for r in results
+                ])
+                history_rows = conn.total_changes - changes_before
             
-            updated_count = cursor.rowcount
             conn.commit()
             
-            if updated_count > 0:
-                logger.debug(f"📚 Mis à jour {updated_count} enregistrements historiques pour {address}")
-            
-            return updated_count
-            
         except sqlite3.Error as e:
-            logger.error(f"Erreur mise à jour historique {address}: {e}")
-            return 0
+            logger.error(f"Erreur écriture batch RugCheck ({len(results)} tokens): {e}")
+            conn.rollback()
+            return {'tokens_found': 0, 'tokens_updated': 0, 'history_rows': 0, 'error': str(e)}
         finally:
             conn.close()
+        
+        # Stats (tokens absents de la table: ni modifiés ni inchangés)
+        for r in results:
+            if r['address'] not in current:
+                continue
+            if r['old_score'] != r['rug_score']:
+                self.stats['scores_changed'] += 1
+                logger.info(f"📊 {r['address']}: {r['old_score']} → {r['rug_score']}")
+            else:
+                self.stats['scores_unchanged'] += 1
+        self.stats['history_rows_added'] += history_rows
+        self.stats['db_flushes'] += 1
+        
+        return {'tokens_found': len(current), 'tokens_updated': tokens_updated, 'history_rows': history_rows}
     
-    async def update_batch(self, tokens_batch: List[Tuple[str, str, Optional[int]]]) -> Dict:
-        """Mettre à jour un batch de tokens"""
-        batch_stats = {
-            'processed': 0,
-            'updated': 0,
-            'errors': 0,
-            'hist_updated': 0
-        }
+    def update_token_rugcheck(self, address: str, new_rug_score: int, old_rug_score: Optional[int] = None) -> bool:
+        """Mettre à jour le rug_score d'un seul token (tokens + rugcheck_scores)
         
-        for address, symbol, current_score in tokens_batch:
+        Succès dès que le token existe, score inchangé compris.
+        """
+        result = self.apply_scores([{
+            'address': address, 'symbol': None, 'old_score': old_rug_score, 'rug_score': new_rug_score
+        }])
+        return 'error' not in result and result['tokens_found'] > 0
+    
+    async def _fetch_worker(self, fetch_queue: asyncio.Queue, result_queue: asyncio.Queue, batch_stats: Dict):
+        """Étage fetch: récupère les scores tant qu'il reste des tokens"""
+        while True:
+            try:
+                address, symbol, current_score = fetch_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            
             try:
-                logger.info(f"🔍 Traitement: {symbol} ({address[:8]}...)")
-                
-                # Récupérer le nouveau score
                 rugcheck_data = await self.get_rugcheck_score(address)
                 
                 if rugcheck_data and rugcheck_data['has_data']:
-                    new_score = rugcheck_data['rug_score']
-                    
-                    # Mettre à jour tokens
-                    if self.update_token_rugcheck(address, new_score, current_score):
-                        batch_stats['updated'] += 1
-                        
-                        # Mettre à jour tokens_hist
-                        hist_count = self.update_tokens_hist_rugcheck(address, new_score)
-                        batch_stats['hist_updated'] += hist_count
-                        
-                        logger.info(f"✅ {symbol}: score={new_score}, hist_records={hist_count}")
-                    else:
-                        batch_stats['errors'] += 1
+                    await result_queue.put({
+                        'address': address,
+                        'symbol': symbol,
+                        'old_score': current_score,
+                        'rug_score': rugcheck_data['rug_score'],
+                        'raw_score': rugcheck_data.get('raw_score'),
+                        'normalized_score': rugcheck_data.get('normalized_score')
+                    })
                 else:
                     logger.debug(f"❌ Pas de données RugCheck pour {symbol}")
                     batch_stats['errors'] += 1
-                
-                batch_stats['processed'] += 1
-                self.stats['total_processed'] += 1
-                
-                # Délai entre requêtes (maintenant géré par wait_for_rate_limit)
-                # Le délai est automatiquement ajusté selon les rate limits
-                
             except Exception as e:
                 logger.error(f"Erreur traitement {symbol}: {e}")
                 batch_stats['errors'] += 1
-                continue
+            
+            batch_stats['processed'] += 1
+            self.stats['total_processed'] += 1
+    
+    async def _db_writer(self, result_queue: asyncio.Queue, batch_stats: Dict, record_history: bool):
+        """Étage DB: regroupe les résultats et les écrit par lots (hors boucle asyncio)"""
+        pending = []
+        deadline = None
+        finished = False
+        loop = asyncio.get_running_loop()
+        
+        while not finished:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                item = await asyncio.wait_for(result_queue.get(), timeout=timeout)
+                if item is None:
+                    finished = True
+                else:
+                    if not pending:
+                        deadline = loop.time() + self.flush_interval
+                    pending.append(item)
+            except asyncio.TimeoutError:
+                pass
+            
+            # Flush par taille, à l'échéance ou en fin de pipeline
+            if pending and (finished or len(pending) >= self.batch_size or loop.time() >= deadline):
+                flush, pending, deadline = pending, [], None
+                result = await asyncio.to_thread(self.apply_scores, flush, record_history)
+                if 'error' in result:
+                    batch_stats['errors'] += len(flush)
+                else:
+                    batch_stats['updated'] += len(flush)
+                    batch_stats['hist_updated'] += result['history_rows']
+                    logger.info(f"💾 {len(flush)} scores écrits ({result['tokens_updated']} modifiés, "
+                                f"{result['history_rows']} versions historiques)")
+    
+    async def update_batch(self, tokens_batch: List[Tuple[str, str, Optional[int]]], 
+                           record_history: bool = True) -> Dict:
+        """Mettre à jour des tokens en pipeline: fetchs concurrents bornés + étage DB séparé"""
+        batch_stats = {
+            'processed': 0,
+            'updated': 0,
+            'errors': 0,
+            'hist_updated': 0
+        }
+        
+        fetch_queue = asyncio.Queue()
+        for token in tokens_batch:
+            fetch_queue.put_nowait(token)
+        result_queue = asyncio.Queue(maxsize=max(1, self.batch_size) * 4)
+        
+        writer = asyncio.create_task(self._db_writer(result_queue, batch_stats, record_history))
+        workers = [
+            asyncio.create_task(self._fetch_worker(fetch_queue, result_queue, batch_stats))
+            for _ in range(min(self.max_concurrent_fetches, len(tokens_batch)) or 1)
+        ]
+        
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            await result_queue.put(None)
+            await writer
         
         return batch_stats
     
@@ -550,7 +677,7 @@ class RugCheckUpdater:
         Args:
             limit: Nombre maximum de tokens à traiter
             only_missing: Si True, ne traite que les tokens sans rug_score
-            update_history: Si True, met aussi à jour tokens_hist
+            update_history: Si True, versionne les scores dans rugcheck_scores
             addresses_file: Chemin vers un fichier contenant les adresses à traiter
         """
         await self.start()
@@ -575,26 +702,14 @@ class RugCheckUpdater:
                 logger.info("✅ Aucun token à mettre à jour")
                 return
             
-            logger.info(f"📊 {len(tokens_to_update)} tokens à traiter")
+            logger.info(f"📊 {len(tokens_to_update)} tokens à traiter "
+                        f"({self.max_concurrent_fetches} fetchs concurrents, flush DB par {self.batch_size})")
             
-            # Traiter par batches
-            total_hist_updated = 0
+            # Pipeline: fetchs concurrents bornés -> étage DB par lots
+            batch_stats = await self.update_batch(tokens_to_update, record_history=update_history)
+            total_hist_updated = batch_stats['hist_updated']
             
-            for i in range(0, len(tokens_to_update), self.batch_size):
-                batch = tokens_to_update[i:i + self.batch_size]
-                batch_num = (i // self.batch_size) + 1
-                total_batches = (len(tokens_to_update) + self.batch_size - 1) // self.batch_size
-                
-                logger.info(f"📦 Batch {batch_num}/{total_batches} ({len(batch)} tokens)")
-                
-                batch_stats = await self.update_batch(batch)
-                total_hist_updated += batch_stats['hist_updated']
-                
-                logger.info(f"📊 Batch {batch_num} terminé: {batch_stats['updated']}/{batch_stats['processed']} succès")
-                
-                # Petit délai entre batches
-                if i + self.batch_size < len(tokens_to_update):
-                    await asyncio.sleep(2)
+            logger.info(f"📊 Pipeline terminé: {batch_stats['updated']}/{batch_stats['processed']} succès")
             
             # Stats finales
             self.stats['successful_updates'] = self.stats['scores_changed'] + self.stats['scores_unchanged']
@@ -606,7 +721,8 @@ class RugCheckUpdater:
             logger.info(f"💾 Mises à jour réussies: {self.stats['successful_updates']}")
             logger.info(f"🔄 Scores modifiés: {self.stats['scores_changed']}")
             logger.info(f"⚪ Scores inchangés: {self.stats['scores_unchanged']}")
-            logger.info(f"📚 Enregistrements historiques mis à jour: {total_hist_updated}")
+            logger.info(f"📚 Versions ajoutées à rugcheck_scores: {total_hist_updated}")
+            logger.info(f"💾 Flushs DB: {self.stats['db_flushes']}")
             
             if addresses_file:
                 logger.info(f"✨ Nouveaux tokens créés: {self.stats['created_tokens']}")
@@ -635,11 +751,12 @@ def main():
     
     parser.add_argument("--database", default="tokens.db", help="Chemin de la base de données")
     parser.add_argument("--limit", type=int, help="Nombre maximum de tokens à traiter")
-    parser.add_argument("--batch-size", type=int, default=5, help="Taille des batches (défaut: 5)")
+    parser.add_argument("--batch-size", type=int, default=5, help="Taille des lots écrits en base (défaut: 5)")
+    parser.add_argument("--concurrency", type=int, default=3, help="Requêtes RugCheck simultanées max (défaut: 3)")
     parser.add_argument("--delay", type=float, default=2.0, help="Délai entre requêtes (secondes, défaut: 2.0)")
     parser.add_argument("--requests-per-minute", type=int, default=30, help="Limite de requêtes par minute (défaut: 30)")
     parser.add_argument("--only-missing", action="store_true", help="Ne traiter que les tokens sans rug_score")
-    parser.add_argument("--no-history", action="store_true", help="Ne pas mettre à jour tokens_hist")
+    parser.add_argument("--no-history", action="store_true", help="Ne pas versionner les scores dans rugcheck_scores")
     parser.add_argument("--addresses-file", type=str, help="Fichier texte contenant la liste des adresses à traiter")
     parser.add_argument("--dry-run", action="store_true", help="Simulation sans mise à jour")
     
@@ -664,7 +781,8 @@ def main():
     updater = RugCheckUpdater(
         database_path=args.database,
         batch_size=args.batch_size,
-        delay=args.delay
+        delay=args.delay,
+        max_concurrent_fetches=args.concurrency
     )
     
     # Ajuster la limite de requêtes par minute
@@ -36,6 +36,14 @@ from aiohttp import ClientSession, TCPConnector
 from math import log
 from typing import Dict, List, Optional
 
+from epoch_columns import EpochColumns
+from token_write_layer import TokenWriteLayer
+from token_metadata_decoder import OnChainMetadataReader
+from holders_service import HoldersService
+from durable_job_queue import DurableJobQueue
+from ml_scoring_service import MLScoringService
+from system_optimization import AdaptiveConcurrencyLimiter, SYSTEM_CONFIG
+
 # Import du système de détection whale
 from whale_detector_integration import (
     whale_detector, 
@@ -49,6 +57,11 @@ def set_enrichment_queue_size(size: int): pass
 def set_active_enrichment_tasks(count: int): pass  
 def record_token_update(address: str, update_time: float, success: bool = True): pass
 
+try:
+    from performance_monitor import record_concurrency_limit
+except ImportError:
+    def record_concurrency_limit(upstream: str, snapshot: dict, reason: str): pass
+
 # Configuration du logger
 logger = logging.getLogger('solana_monitoring')
 
@@ -82,6 +95,24 @@ class OptimizedTokenEnricher:
         self.batch_size = 10
         self.processing_batch = []
         self.batch_timeout = 5.0  # Traiter le batch même s'il n'est pas plein après 5s
+        self.write_layer = None  # TokenWriteLayer créé à la première écriture
+        self.metadata_reader = None  # Métadonnées on-chain du batch en un aller-retour
+        self.holders_service = None  # Holders / concentration partagés, cache à TTL
+        self.ml_scorer = None  # Score ML en ligne juste après l'enrichissement
+        
+        # File persistante (SQLite dédié): reprise après crash, plusieurs workers possibles
+        self.durable_queue = True
+        self.queue_path = "enrichment_queue.db"
+        self.job_queue = None
+        self.queue_poll_interval = 0.5
+        
+        # Concurrence adaptative (AIMD) par upstream: le batch suit le goulot
+        self.adaptive_concurrency = True
+        self.max_batch_size = 40
+        self.limiters = {
+            upstream: AdaptiveConcurrencyLimiter(upstream, on_change=self._on_limit_change, **settings)
+            for upstream, settings in SYSTEM_CONFIG["adaptive_concurrency"].items()
+        }
         
     async def start(self):
         """Démarrer l'enrichissement optimisé"""
@@ -97,15 +128,87 @@ class OptimizedTokenEnricher:
             ),
             timeout=aiohttp.ClientTimeout(total=12)
         )
+        helius_json = lambda payload: self._limited_json(
+            "helius", "POST", "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8", json=payload
+        )
+        self.metadata_reader = OnChainMetadataReader(request_json=helius_json)
+        self.holders_service = HoldersService(DATABASE_PATH, request_json=helius_json)
+        
+        # Modèle chargé une fois; sans rug_pull_model.pkl le score attend le batch quotidien
+        ml_scorer = await asyncio.to_thread(MLScoringService, DATABASE_PATH)
+        self.ml_scorer = ml_scorer if ml_scorer.available else None
+        
+        if self.durable_queue:
+            # Lease > durée max d'un batch: enrichissement + écriture
+            self.job_queue = DurableJobQueue(
+                self.queue_path, visibility_timeout=max(120.0, 3 * self._enrichment_timeout())
+            )
+            resumed = self.job_queue.pending_count()
+            if resumed:
+                logger.info(f"📬 Resuming {resumed} pending enrichment jobs from {self.queue_path}")
         self.is_running = True
         
         # Démarrer le processeur de batch
         asyncio.create_task(self._batch_processor_worker())
         logger.info("🚀 Optimized token enricher started")
     
+    def _on_limit_change(self, upstream: str, snapshot: Dict, reason: str):
+        """Publier les changements de limite dans performance_monitor"""
+        if reason != "increase":
+            logger.info(f"🎚️ {upstream} concurrency -> {snapshot['limit']} ({reason}, timeout {snapshot['timeout']}s)")
+        record_concurrency_limit(upstream, snapshot, reason)
+    
+    def _adaptive_batch_size(self) -> int:
+        """Taille de batch = limite du goulot (helius: 2 appels par token)"""
+        bottleneck = min(
+            self.limiters["helius"].current_limit // 2,
+            self.limiters["dexscreener"].current_limit,
+            self.limiters["jupiter"].current_limit,
+            self.limiters["rugcheck"].current_limit
+        )
+        return max(5, min(self.max_batch_size, bottleneck * 2))
+    
+    def _enrichment_timeout(self) -> float:
+        """Timeout global d'un token: deux vagues d'appels au timeout adaptatif le plus long"""
+        return 2 * max(limiter.timeout for limiter in self.limiters.values()) + 2.0
+    
+    async def _limited_json(self, upstream: str, method: str, url: str, **kwargs) -> Optional[Dict]:
+        """Requête HTTP sous limite AIMD de l'upstream, None si échec"""
+        limiter = self.limiters[upstream]
+        async with limiter:
+            start = time.time()
+            try:
+                async with self.session.request(
+                    method, url, timeout=aiohttp.ClientTimeout(total=limiter.timeout), **kwargs
+                ) as resp:
+                    if resp.status in (429, 503):
+                        limiter.on_congestion(str(resp.status))
+                        return None
+                    if resp.status != 200:
+                        limiter.on_error()
+                        return None
+                    data = await resp.json(content_type=None)
+                limiter.on_success(time.time() - start)
+                return data
+            except asyncio.TimeoutError:
+                limiter.on_congestion("timeout")
+            except (aiohttp.ClientError, ValueError):
+                limiter.on_error()
+        return None
+    
+    def queue_size(self) -> int:
+        """Tokens en attente d'enrichissement (file persistante ou mémoire)"""
+        if self.job_queue:
+            return self.job_queue.pending_count()
+        return self.enrichment_queue.qsize()
+    
     async def queue_for_enrichment(self, address: str):
         """Ajouter un token à la queue d'enrichissement"""
-        if self.is_running:
+        if self.is_running and self.job_queue:
+            # Doublons ignorés par la file (token déjà en attente ou en cours)
+            if await asyncio.to_thread(self.job_queue.enqueue, [address]):
+                logger.debug(f"🔄 Queued: {address}")
+        elif self.is_running:
             try:
                 await asyncio.wait_for(
                     self.enrichment_queue.put(address), 
@@ -121,9 +224,14 @@ class OptimizedTokenEnricher:
             try:
                 batch = []
                 batch_start_time = time.time()
+                if self.adaptive_concurrency:
+                    self.batch_size = self._adaptive_batch_size()
                 
                 # Collecter un batch ou attendre le timeout
-                while len(batch) < self.batch_size and (time.time() - batch_start_time) < self.batch_timeout:
+                if self.job_queue:
+                    batch, jobs = await self._lease_batch(batch_start_time)
+                
+                while not self.job_queue and len(batch) < self.batch_size and (time.time() - batch_start_time) < self.batch_timeout:
                     try:
                         address = await asyncio.wait_for(
                             self.enrichment_queue.get(), 
@@ -134,7 +242,7 @@ class OptimizedTokenEnricher:
                         break
                 
                 if batch:
-                    set_enrichment_queue_size(self.enrichment_queue.qsize())
+                    set_enrichment_queue_size(self.queue_size())
                     set_active_enrichment_tasks(len(batch))
                     
                     logger.info(f"⚡ Processing batch of {len(batch)} tokens")
@@ -143,7 +251,20 @@ class OptimizedTokenEnricher:
                     start_time = time.time()
                     enriched_count = 0
                     
-                    tasks = [self._enrich_token_fast(addr) for addr in batch]
+                    # Métadonnées de tout le batch via getMultipleAccounts, getAsset seulement pour les manquants
+                    try:
+                        onchain_metadata = await self.metadata_reader.get_metadata_batch(batch)
+                    except Exception as e:
+                        logger.debug(f"On-chain metadata batch error: {e}")
+                        onchain_metadata = {}
+                    
+                    # Holders du batch en un aller-retour: _get_holders_fast lit ensuite le cache
+                    try:
+                        await self.holders_service.get_holders_batch(batch)
+                    except Exception as e:
+                        logger.debug(f"Holders batch error: {e}")
+                    
+                    tasks = [self._enrich_token_fast(addr, onchain_metadata.get(addr)) for addr in batch]
                     results = await asyncio.gather(*tasks, return_exceptions=True)
                     
                     # Mettre à jour en base par batch
@@ -155,8 +276,18 @@ class OptimizedTokenEnricher:
                         elif isinstance(result, Exception):
                             logger.debug(f"Enrichment error: {result}")
                     
-                    if valid_results:
-                        await self._update_batch_in_db(valid_results)
+                    # Ack seulement après commit: un échec d'écriture rend les jobs à la file
+                    try:
+                        if valid_results:
+                            await self._update_batch_in_db(valid_results)
+                            self._submit_ml_scoring(valid_results)
+                    except sqlite3.Error as e:
+                        logger.error(f"Batch DB update error: {e}")
+                        if self.job_queue:
+                            await self._release_jobs(jobs, f"db write failed: {e}")
+                    else:
+                        if self.job_queue:
+                            await self._settle_jobs(jobs, valid_results)
                     
                     # Métriques de performance
                     batch_time = time.time() - start_time
@@ -173,12 +304,51 @@ class OptimizedTokenEnricher:
                 logger.error(f"Error in batch processor: {e}")
                 await asyncio.sleep(5)
     
-    async def _enrich_token_fast(self, address: str) -> Dict:
+    def _submit_ml_scoring(self, valid_results: List[Dict]):
+        """Scorer les tokens enrichis (micro-batch du service, écrit ml_rug_score)"""
+        if not self.ml_scorer:
+            return
+        for result in valid_results:
+            if result.get("symbol") != "ERROR":
+                self.ml_scorer.submit(result["address"])
+    
+    async def _lease_batch(self, batch_start_time: float):
+        """Leaser jusqu'à batch_size jobs, en attendant au plus batch_timeout"""
+        jobs = {}
+        while len(jobs) < self.batch_size:
+            leased = await asyncio.to_thread(self.job_queue.lease, self.batch_size - len(jobs))
+            for job in leased:
+                jobs[job['payload']] = job['id']
+            if len(jobs) >= self.batch_size or (time.time() - batch_start_time) >= self.batch_timeout:
+                break
+            if jobs and not leased:
+                break  # File vidée: traiter ce qu'on a
+            await asyncio.sleep(self.queue_poll_interval)
+        return list(jobs), jobs
+    
+    async def _settle_jobs(self, jobs: Dict[str, int], valid_results: List[Dict]):
+        """Ack des tokens enrichis, retry (puis dead-letter) pour les échecs"""
+        enriched = {r["address"] for r in valid_results if r.get("symbol") != "ERROR"}
+        succeeded = [job_id for address, job_id in jobs.items() if address in enriched]
+        failed = [job_id for address, job_id in jobs.items() if address not in enriched]
+        
+        await asyncio.to_thread(self.job_queue.ack, succeeded)
+        if failed:
+            outcome = await asyncio.to_thread(self.job_queue.nack, failed, "enrichment failed")
+            logger.info(f"🔁 {outcome['retried']} jobs scheduled for retry, {outcome['dead']} dead-lettered")
+    
+    async def _release_jobs(self, jobs: Dict[str, int], error: str):
+        """Nack de tout le batch (écriture en base échouée): retry avec backoff"""
+        outcome = await asyncio.to_thread(self.job_queue.nack, list(jobs.values()), error)
+        logger.info(f"🔁 {outcome['retried']} jobs scheduled for retry, {outcome['dead']} dead-lettered")
+    
+    async def _enrich_token_fast(self, address: str, onchain_metadata: Optional[Dict] = None) -> Dict:
         """Version rapide de l'enrichissement"""
         try:
             # Lancer toutes les requêtes en parallèle
             tasks = [
-                self._get_metadata_fast(address),
+                self._metadata_from_onchain(onchain_metadata) if onchain_metadata and onchain_metadata.get("symbol")
+                else self._get_metadata_fast(address),
                 self._get_market_data_fast(address),
                 self._get_holders_fast(address),
                 get_bonding_curve_progress(address)
@@ -186,7 +356,7 @@ class OptimizedTokenEnricher:
             
             results = await asyncio.wait_for(
                 asyncio.gather(*tasks, return_exceptions=True),
-                timeout=10.0
+                timeout=self._enrichment_timeout()
             )
             
             # Combiner les résultats
@@ -216,28 +386,30 @@ class OptimizedTokenEnricher:
                 "progress_percentage": 0.0
             }
     
+    async def _metadata_from_onchain(self, metadata: Dict) -> Dict:
+        """Métadonnées déjà décodées on-chain (même format que _get_metadata_fast)"""
+        return {
+            "symbol": metadata["symbol"],
+            "name": metadata.get("name") or "Unknown Token",
+            "decimals": metadata["decimals"] if metadata.get("decimals") is not None else 9
+        }
+    
     async def _get_metadata_fast(self, address: str) -> Dict:
-        """Métadonnées rapides - essayer Helius puis Jupiter"""
-        # Helius d'abord (plus rapide pour les métadonnées)
-        try:
-            helius_url = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8"
-            payload = {"jsonrpc": "2.0", "id": 1, "method": "getAsset", "params": {"id": address}}
+        """Métadonnées rapides via Helius getAsset"""
+        helius_url = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8"
+        payload = {"jsonrpc": "2.0", "id": 1, "method": "getAsset", "params": {"id": address}}
+        
+        data = await self._limited_json("helius", "POST", helius_url, json=payload)
+        if data:
+            result = data.get("result") or {}
+            metadata = result.get("content", {}).get("metadata", {})
             
-            async with self.session.post(helius_url, json=payload, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    result = data.get("result", {})
-                    content = result.get("content", {})
-                    metadata = content.get("metadata", {})
-                    
-                    if metadata and metadata.get("symbol"):
-                        return {
-                            "symbol": metadata.get("symbol", "UNKNOWN"),
-                            "name": metadata.get("name", "Unknown Token"),
-                            "decimals": result.get("token_info", {}).get("decimals", 9)
-                        }
-        except:
-            pass
+            if metadata and metadata.get("symbol"):
+                return {
+                    "symbol": metadata.get("symbol", "UNKNOWN"),
+                    "name": metadata.get("name", "Unknown Token"),
+                    "decimals": result.get("token_info", {}).get("decimals", 9)
+                }
         
         return {"symbol": "UNKNOWN", "name": "Unknown Token", "decimals": 9}
     
@@ -270,67 +442,45 @@ class OptimizedTokenEnricher:
     async def _fetch_dexscreener(self, address: str) -> Dict:
         """DexScreener rapide"""
         url = f"https://api.dexscreener.com/latest/dex/tokens/{address}"
+        data = await self._limited_json("dexscreener", "GET", url)
         try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if data and data.get("pairs"):
-                        pair = data["pairs"][0]
-                        return {
-                            "price_usdc": float(pair.get("priceUsd", 0)),
-                            "liquidity_usd": float(pair.get("liquidity", {}).get("usd", 0)),
-                            "volume_24h": float(pair.get("volume", {}).get("h24", 0))
-                        }
-        except:
+            if data and data.get("pairs"):
+                pair = data["pairs"][0]
+                return {
+                    "price_usdc": float(pair.get("priceUsd", 0)),
+                    "liquidity_usd": float(pair.get("liquidity", {}).get("usd", 0)),
+                    "volume_24h": float(pair.get("volume", {}).get("h24", 0))
+                }
+        except (TypeError, ValueError):
             pass
         return {}
     
     async def _fetch_jupiter_price(self, address: str) -> Dict:
         """Prix Jupiter rapide"""
         url = f"https://quote-api.jup.ag/v6/quote?inputMint={address}&outputMint=EPjFWdd5AufqSSqeM2qN1xzybapC8G4wEGGkZwyTDt1v&amount=1000000&slippageBps=500"
-        try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=4)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if data and "outAmount" in data:
-                        price = int(data["outAmount"]) / 1e6
-                        return {"price_usdc": price}
-        except:
-            pass
+        data = await self._limited_json("jupiter", "GET", url)
+        if data and "outAmount" in data:
+            price = int(data["outAmount"]) / 1e6
+            return {"price_usdc": price}
         return {}
     
     async def _fetch_rugcheck(self, address: str) -> Dict:
         """RugCheck optimisé"""
         url = f"https://api.rugcheck.xyz/v1/tokens/{address}/report"
-        try:
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=6)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if data:
-                        normalized_score = data.get("score_normalised", None)
-                        raw_score = data.get("score", 50)
-                        final_score = normalized_score if normalized_score is not None else raw_score
-                        final_score = max(0, min(100, final_score))
-                        return {"rug_score": final_score}
-        except:
-            pass
+        data = await self._limited_json("rugcheck", "GET", url)
+        if data:
+            normalized_score = data.get("score_normalised", None)
+            raw_score = data.get("score", 50)
+            final_score = normalized_score if normalized_score is not None else raw_score
+            final_score = max(0, min(100, final_score))
+            return {"rug_score": final_score}
         return {"rug_score": 50}
     
     async def _get_holders_fast(self, address: str) -> Dict:
-        """Holders rapide via Helius"""
-        try:
-            url = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8"
-            payload = {"jsonrpc": "2.0", "id": 1, "method": "getTokenLargestAccounts", "params": [address]}
-            
-            async with self.session.post(url, json=payload, timeout=aiohttp.ClientTimeout(total=4)) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    if "result" in data and "value" in data["result"]:
-                        accounts = data["result"]["value"]
-                        holders = len([acc for acc in accounts if acc.get("uiAmount", 0) > 0])
-                        return {"holders": holders}
-        except:
-            pass
+        """Holders et concentration via HoldersService (cache alimenté par le batch)"""
+        holders = await self.holders_service.get_holders(address)
+        if holders:
+            return {"holders": holders["holders"]}  # Concentration déjà écrite par le service
         return {"holders": 0}
     
     def _calculate_score_fast(self, data: Dict) -> float:
@@ -350,65 +500,46 @@ class OptimizedTokenEnricher:
         return round(min(max(score, 0), 200), 2)
     
     async def _update_batch_in_db(self, enriched_tokens: List[Dict]):
-        """Mise à jour batch optimisée en base"""
+        """Mise à jour batch en base (dirty-checking: colonnes modifiées uniquement)
+        
+        Les sqlite3.Error remontent à l'appelant, qui ne doit pas acker le batch.
+        """
         if not enriched_tokens:
             return
         
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
+        if self.write_layer is None:
+            self.write_layer = TokenWriteLayer(DATABASE_PATH)
         
-        try:
-            local_timestamp = get_local_timestamp()
-            
-            # Requête batch optimisée
-            update_sql = '''
-                UPDATE tokens SET 
-                    symbol = ?, name = ?, decimals = ?, price_usdc = ?, 
-                    liquidity_usd = ?, volume_24h = ?, rug_score = ?,
-                    holders = ?, is_tradeable = ?, invest_score = ?,
-                    bonding_curve_progress = ?,
-                    updated_at = ?
-                WHERE address = ?
-            '''
-            
-            batch_data = []
-            for token in enriched_tokens:
-                progress = token.get("progress_percentage", 0.0)
-                
-                batch_data.append((
-                    token.get("symbol", "UNKNOWN"),
-                    token.get("name", "Unknown"),
-                    token.get("decimals", 9),
-                    token.get("price_usdc"),
-                    token.get("liquidity_usd"),
-                    token.get("volume_24h"),
-                    token.get("rug_score"),
-                    token.get("holders"),
-                    token.get("is_tradeable"),
-                    token.get("invest_score"),
-                    progress,
-                    local_timestamp,
-                    token["address"]
-                ))
-            
-            cursor.executemany(update_sql, batch_data)
-            conn.commit()
+        updates = []
+        for token in enriched_tokens:
+            updates.append({
+                "address": token["address"],
+                "symbol": token.get("symbol", "UNKNOWN"),
+                "name": token.get("name", "Unknown"),
+                "decimals": token.get("decimals", 9),
+                "price_usdc": token.get("price_usdc"),
+                "liquidity_usd": token.get("liquidity_usd"),
+                "volume_24h": token.get("volume_24h"),
+                "rug_score": token.get("rug_score"),
+                "holders": token.get("holders"),
+                "is_tradeable": token.get("is_tradeable"),
+                "invest_score": token.get("invest_score"),
+                "bonding_curve_progress": token.get("progress_percentage", 0.0)
+            })
+        
+        changes = self.write_layer.write_batch("full", updates)
+        changed_count = len([address for address, columns in changes.items() if columns])
 
-            # Log pour debug
-            progress_tokens = [t for t in enriched_tokens if t.get("progress_percentage", 0) > 0]
-            if progress_tokens:
-                logger.info(f"💾 Batch updated {len(enriched_tokens)} tokens ({len(progress_tokens)} with progress)")
-            else:
-                logger.info(f"💾 Batch updated {len(enriched_tokens)} tokens in DB")
-            
-        except sqlite3.Error as e:
-            logger.error(f"Batch DB update error: {e}")
-        finally:
-            conn.close()
+        # Log pour debug
+        progress_tokens = [t for t in enriched_tokens if t.get("progress_percentage", 0) > 0]
+        logger.info(f"💾 Batch checked {len(enriched_tokens)} tokens: {changed_count} changed, "
+                    f"{len(changes) - changed_count} unchanged ({len(progress_tokens)} with progress)")
 
     async def stop(self):
         """Arrêter l'enrichisseur"""
         self.is_running = False
+        if self.ml_scorer:
+            await asyncio.to_thread(self.ml_scorer.stop)
         if self.session:
             await self.session.close()
 
@@ -1084,7 +1215,7 @@ def should_update_token_status(old_status: str, new_status: str) -> bool:
 # Instance globale de l'enricher
 token_enricher = OptimizedTokenEnricher()
 
-async def enrich_existing_tokens():
+async def enrich_existing_tokens(epoch_columns: EpochColumns):
     """Version optimisée pour enrichir les tokens existants"""
     while True:
         try:
@@ -1093,10 +1224,10 @@ async def enrich_existing_tokens():
             conn = sqlite3.connect(DATABASE_PATH)
             cursor = conn.cursor()
             
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT address FROM tokens 
                 WHERE (symbol IS NULL OR symbol = 'UNKNOWN' OR symbol = '') 
-                AND first_discovered_at > datetime('now', '-48 hours', 'localtime')
+                AND {epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-48 hours') AS INTEGER)
                 ORDER BY first_discovered_at DESC
                 LIMIT 25
             ''')
@@ -1114,7 +1245,7 @@ async def enrich_existing_tokens():
             logger.error(f"Error in optimized existing tokens enrichment: {e}")
             await asyncio.sleep(60)
 
-async def display_token_stats():
+async def display_token_stats(epoch_columns: EpochColumns):
     """Afficher périodiquement les statistiques des tokens"""
     while True:
         try:
@@ -1132,11 +1263,14 @@ async def display_token_stats():
             cursor.execute("SELECT COUNT(*) FROM tokens WHERE invest_score >= 80")
             high_score = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM tokens WHERE first_discovered_at > datetime('now', '-1 hour', 'localtime')")
+            cursor.execute(f"SELECT COUNT(*) FROM tokens WHERE {epoch_columns.epoch('tokens', 'first_discovered_at')} "
+                           "> CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
             recent = cursor.fetchone()[0]
             
             # 🐋 NOUVEAU: Stats des whales
-            cursor.execute("SELECT COUNT(*) FROM whale_transactions_live WHERE timestamp > datetime('now', '-1 hour', 'localtime')")
+            cursor.execute(f"SELECT COUNT(*) FROM whale_transactions_live "
+                           f"WHERE {epoch_columns.epoch('whale_transactions_live', 'timestamp')} "
+                           "> CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
             whale_activity = cursor.fetchone()[0]
             
             cursor.execute('''
@@ -1190,8 +1324,12 @@ def migrate_database_progress():
     finally:
         conn.close()
 
-async def start_monitoring(log_level='INFO'):
-    """Start enhanced monitoring with whale detection."""
+async def start_monitoring(log_level='INFO', legacy_enrichment=True):
+    """Start enhanced monitoring with whale detection.
+
+    legacy_enrichment=False: pas de boucle enrich_existing_tokens, les tokens
+    non enrichis sont repris par l'ordonnanceur unifié (source "full").
+    """
     logger.info(f"🚀 Starting Enhanced Solana monitoring with whale detection (log level: {log_level})")
     
     # Migration de la base de données
@@ -1232,6 +1370,10 @@ async def start_monitoring(log_level='INFO'):
     ''')
     conn.commit()
     conn.close()
+    # Colonnes *_epoch tenues par triggers dès la première écriture du monitor,
+    # lignes antérieures migrées en tâche de fond (requêtes en repli texte d'ici là)
+    epoch_columns = EpochColumns(DATABASE_PATH)
+    epoch_columns.start_backfill()
     logger.info("✅ Database initialized successfully")
     
     # Démarrer l'enricher et le système whale
@@ -1244,13 +1386,10 @@ async def start_monitoring(log_level='INFO'):
     
     try:
         # Lancer toutes les tâches en parallèle
-        await asyncio.gather(
-            monitor_pump_fun(),
-            monitor_raydium_pools(),
-            enrich_existing_tokens(),
-            display_token_stats(),
-            return_exceptions=False
-        )
+        tasks = [monitor_pump_fun(), monitor_raydium_pools(), display_token_stats(epoch_columns)]
+        if legacy_enrichment:
+            tasks.append(enrich_existing_tokens(epoch_columns))
+        await asyncio.gather(*tasks, return_exceptions=False)
     except Exception as e:
         logger.error(f"Error in monitoring tasks: {str(e)}")
         raise
@@ -11,6 +11,9 @@ let currentTab = 'base';
 let activeFiltersCount = 0;
 let isDataLoaded = false; // ✅ AJOUT: Flag pour savoir si les données sont chargées
 
+// Onglet de base: pages filtrées/triées par le serveur (curseurs de /api/tokens-detail)
+let pageCursors = [null], hasMorePages = false, totalFiltered = null, isPageLoaded = false;
+
 // Variables whale
 let whaleData = [];
 let isWhaleAutoRefreshEnabled = true;
@@ -306,7 +309,8 @@ function switchTab(tabName, button) {
     initializeCurrentTabFilterPanel();
     }, 100);
   // ✅ CORRECTION: Vérifier si les données sont chargées avant d'appliquer les filtres
-  if (!isDataLoaded) {
+  // (l'onglet de base charge ses pages à la demande)
+  if (!isDataLoaded && tabName !== 'base') {
     console.log('⚠️ Data not loaded yet, fetching...');
     fetchData().then(() => {
       applyTabFilters();
@@ -352,6 +356,7 @@ function applyTabFilters() {
       }
       break;
     case 'analysis':
+      filteredData = [...data];
       updateAnalysis();
       break;
     case 'whale':
@@ -458,8 +463,93 @@ function showRefreshIndicator(active) {
 // FONCTIONS DE DONNÉES
 // =============================================================================
 
-// ✅ FONCTION CORRIGÉE: Meilleure gestion des erreurs et du loading
+// Onglet de base: page courante seulement; autres onglets: table complète
 async function fetchData() {
+  if (currentTab === 'base') {
+    return fetchTokensPage();
+  }
+  return fetchAllTokens();
+}
+
+// Paramètres /api/tokens-detail depuis les filtres de l'onglet de base
+function buildTokensQueryParams() {
+  const params = new URLSearchParams();
+  const value = id => document.getElementById(id)?.value.trim() || '';
+  
+  const ranges = {
+    score: ['filterScoreMin', 'filterScoreMax'],
+    price: ['filterPriceMin', 'filterPriceMax'],
+    liquidity: ['filterLiquidityMin', 'filterLiquidityMax'],
+    volume: ['filterVolumeMin', 'filterVolumeMax'],
+    holders: ['filterHoldersMin', 'filterHoldersMax'],
+    age: ['filterAgeMin', 'filterAgeMax'],
+    progress: ['filterProgressMin', 'filterProgressMax'],
+    risk: ['filterRiskMin', 'filterRiskMax']
+  };
+  Object.entries(ranges).forEach(([name, [minId, maxId]]) => {
+    if (value(minId)) params.set(`min_${name}`, value(minId));
+    if (value(maxId)) params.set(`max_${name}`, value(maxId));
+  });
+  
+  if (value('filterSymbol')) params.set('symbol', value('filterSymbol'));
+  if (value('filterBondingStatus')) params.set('bonding_status', value('filterBondingStatus').toLowerCase());
+  if (value('filterTradeable')) params.set('tradeable', value('filterTradeable'));
+  if (value('filterOnPump')) params.set('on_pump', value('filterOnPump'));
+  if (value('filterDiscoveredAt')) params.set('discovered_on', value('filterDiscoveredAt'));
+  
+  const timeValue = parseInt(value('filterTimeValue'));
+  const minutesPerUnit = { minutes: 1, hours: 60, days: 1440 }[value('filterTimeUnit')];
+  if (timeValue && minutesPerUnit) params.set('updated_within_minutes', timeValue * minutesPerUnit);
+  
+  const [sort, order] = (value('sortBy') || 'last_update:desc').split(':');
+  params.set('sort', sort);
+  params.set('order', order);
+  return params;
+}
+
+async function fetchTokensPage() {
+  console.log(`🔄 Fetching page ${currentPage}...`);
+  showRefreshIndicator(true);
+  
+  try {
+    const params = buildTokensQueryParams();
+    params.set('limit', perPage);
+    const cursor = pageCursors[currentPage - 1];
+    if (cursor) params.set('cursor', cursor);
+    if (currentPage === 1) params.set('include_total', '1');
+    
+    const response = await fetch(`/api/tokens-detail?${params}`);
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+    
+    const page = await response.json();
+    filteredData = page.tokens;
+    pageCursors[currentPage] = page.next_cursor;
+    hasMorePages = page.has_more;
+    if (page.total !== undefined) totalFiltered = page.total;
+    isPageLoaded = true;
+    
+    if (currentTab === 'base') {
+      renderPage();
+    }
+    
+  } catch (error) {
+    console.error('❌ Error loading page:', error);
+    
+    const tbody = document.getElementById('baseTbody');
+    if (tbody) {
+      tbody.innerHTML = `<tr><td colspan="20" class="error-message">❌ Erreur: ${error.message}<br><button onclick="fetchData()" style="margin-top: 10px;">🔄 Réessayer</button></td></tr>`;
+    }
+    showErrorNotification(`Erreur de chargement: ${error.message}`);
+    
+  } finally {
+    showRefreshIndicator(false);
+  }
+}
+
+// Table complète (onglets DexScreener, Pump.fun et analyse, filtrés côté navigateur)
+async function fetchAllTokens() {
   console.log('🔄 Fetching data...');
   showRefreshIndicator(true);
   
@@ -579,71 +669,14 @@ function clearTimeFilter(btn) {
   applyFilters();
 }
 
+// Filtres de l'onglet de base appliqués par le serveur: retour à la première page
 function applyFilters() {
-  if (!isDataLoaded) {
-    console.log('⚠️ Data not loaded, skipping filter application');
-    return;
-  }
-  
-  const filters = {
-    symbol: document.getElementById('filterSymbol').value.toLowerCase().trim(),
-    bondingStatus: document.getElementById('filterBondingStatus').value.toLowerCase().trim(),
-    progressMin: document.getElementById('filterProgressMin').value ? parseFloat(document.getElementById('filterProgressMin').value) : null,
-    progressMax: document.getElementById('filterProgressMax').value ? parseFloat(document.getElementById('filterProgressMax').value) : null,
-    priceMin: document.getElementById('filterPriceMin').value ? parseFloat(document.getElementById('filterPriceMin').value) : null,
-    priceMax: document.getElementById('filterPriceMax').value ? parseFloat(document.getElementById('filterPriceMax').value) : null,
-    scoreMin: document.getElementById('filterScoreMin').value ? parseFloat(document.getElementById('filterScoreMin').value) : null,
-    scoreMax: document.getElementById('filterScoreMax').value ? parseFloat(document.getElementById('filterScoreMax').value) : null,
-    liquidityMin: document.getElementById('filterLiquidityMin').value ? parseFloat(document.getElementById('filterLiquidityMin').value) : null,
-    liquidityMax: document.getElementById('filterLiquidityMax').value ? parseFloat(document.getElementById('filterLiquidityMax').value) : null,
-    volumeMin: document.getElementById('filterVolumeMin').value ? parseFloat(document.getElementById('filterVolumeMin').value) : null,
-    volumeMax: document.getElementById('filterVolumeMax').value ? parseFloat(document.getElementById('filterVolumeMax').value) : null,
-    holdersMin: document.getElementById('filterHoldersMin').value ? parseInt(document.getElementById('filterHoldersMin').value) : null,
-    holdersMax: document.getElementById('filterHoldersMax').value ? parseInt(document.getElementById('filterHoldersMax').value) : null,
-    ageMin: document.getElementById('filterAgeMin').value ? parseFloat(document.getElementById('filterAgeMin').value) : null,
-    ageMax: document.getElementById('filterAgeMax').value ? parseFloat(document.getElementById('filterAgeMax').value) : null,
-    riskMin: document.getElementById('filterRiskMin').value ? parseInt(document.getElementById('filterRiskMin').value) : null,
-    riskMax: document.getElementById('filterRiskMax').value ? parseInt(document.getElementById('filterRiskMax').value) : null,
-    discoveredAt: document.getElementById('filterDiscoveredAt').value,
-    timeValue: document.getElementById('filterTimeValue').value ? parseInt(document.getElementById('filterTimeValue').value) : null,
-    timeUnit: document.getElementById('filterTimeUnit').value
-  };
-
-  filteredData = data.filter(row => {
-    const riskValue = 100 - (row.rug_score || 50);
-    const updatedAt = row.updated_at || row.first_discovered_at;
-    const rowBondingStatus = (row.bonding_curve_status || '').toLowerCase();
-    const progressValue = parseFloat(row.bonding_curve_progress) || 0;
-    const tokenAgeHours = parseFloat(row.age_hours) || 0;
-    
-    return (
-      (!filters.symbol || row.symbol.toLowerCase().includes(filters.symbol)) &&
-      (!filters.bondingStatus || rowBondingStatus === filters.bondingStatus) &&
-      (filters.progressMin === null || progressValue >= filters.progressMin) &&
-      (filters.progressMax === null || progressValue <= filters.progressMax) &&
-      (filters.priceMin === null || row.price_usdc >= filters.priceMin) &&
-      (filters.priceMax === null || row.price_usdc <= filters.priceMax) &&
-      (filters.scoreMin === null || row.invest_score >= filters.scoreMin) &&
-      (filters.scoreMax === null || row.invest_score <= filters.scoreMax) &&
-      (filters.liquidityMin === null || row.liquidity_usd >= filters.liquidityMin) &&
-      (filters.liquidityMax === null || row.liquidity_usd <= filters.liquidityMax) &&
-      (filters.volumeMin === null || row.volume_24h >= filters.volumeMin) &&
-      (filters.volumeMax === null || row.volume_24h <= filters.volumeMax) &&
-      (filters.holdersMin === null || row.holders >= filters.holdersMin) &&
-      (filters.holdersMax === null || row.holders <= filters.holdersMax) &&
-      (filters.ageMin === null || tokenAgeHours >= filters.ageMin) &&
-      (filters.ageMax === null || tokenAgeHours <= filters.ageMax) &&
-      (filters.riskMin === null || riskValue >= filters.riskMin) &&
-      (filters.riskMax === null || riskValue <= filters.riskMax) &&
-      (!filters.discoveredAt || new Date(row.first_discovered_at).toISOString().startsWith(filters.discoveredAt)) &&
-      isWithinTimeFilter(updatedAt, filters.timeValue, filters.timeUnit)
-    );
-  });
-
   highlightActiveFilters();
   updateFiltersIndicator();
   currentPage = 1;
-  renderPage();
+  pageCursors = [null];
+  totalFiltered = null;
+  fetchTokensPage();
 }
 
 // =============================================================================
@@ -651,14 +684,15 @@ function applyFilters() {
 // =============================================================================
 
 function renderPage() {
-  if (!isDataLoaded) {
+  if (currentTab === 'base' ? !isPageLoaded : !isDataLoaded) {
     console.log('⚠️ Data not loaded, showing loading message');
     showLoadingMessage();
     return;
   }
   
+  // Onglet de base: filteredData contient déjà la page renvoyée par le serveur
   const start = (currentPage - 1) * perPage;
-  const rows = filteredData.slice(start, start + perPage);
+  const rows = currentTab === 'base' ? filteredData : filteredData.slice(start, start + perPage);
   
   switch (currentTab) {
     case 'base':
@@ -854,6 +888,15 @@ function updateAnalysis() {
 }
 
 function updatePagination() {
+  if (currentTab === 'base') {
+    const totalPages = totalFiltered !== null ? Math.max(1, Math.ceil(totalFiltered / perPage)) : '?';
+    document.getElementById("pageInfo").textContent = 
+      `Page ${currentPage} / ${totalPages} (${totalFiltered ?? '?'} tokens)`;
+    document.getElementById("prevBtn").disabled = currentPage === 1;
+    document.getElementById("nextBtn").disabled = !hasMorePages;
+    return;
+  }
+  
   const totalPages = Math.ceil(filteredData.length / perPage);
   document.getElementById("pageInfo").textContent = 
     `Page ${currentPage} / ${totalPages} (${filteredData.length} tokens)`;
@@ -867,6 +910,10 @@ function updatePagination() {
 
 function changePerPage() {
   perPage = +document.getElementById("perPage").value;
+  if (currentTab === 'base') {
+    applyFilters();
+    return;
+  }
   currentPage = 1;
   renderPage();
 }
@@ -874,11 +921,18 @@ function changePerPage() {
 function prevPage() {
   if (currentPage > 1) {
     currentPage--;
-    renderPage();
+    currentTab === 'base' ? fetchTokensPage() : renderPage();
   }
 }
 
 function nextPage() {
+  if (currentTab === 'base') {
+    if (hasMorePages) {
+      currentPage++;
+      fetchTokensPage();
+    }
+    return;
+  }
   if (currentPage < Math.ceil(filteredData.length / perPage)) {
     currentPage++;
     renderPage();
@@ -945,7 +999,9 @@ function resetAllFilters() {
 function resetFilters() {
   resetAllFilters();
   
-  if (isDataLoaded) {
+  if (currentTab === 'base') {
+    applyFilters();
+  } else if (isDataLoaded) {
     filteredData = [...data];
     renderPage();
   }
@@ -955,13 +1011,40 @@ function resetFilters() {
 // FONCTIONS D'EXPORT
 // =============================================================================
 
-function exportData(format) {
-  if (!isDataLoaded) {
+// Onglet de base: toutes les pages correspondant aux filtres
+async function fetchAllFilteredTokens() {
+  const params = buildTokensQueryParams();
+  params.set('limit', 500);
+  const tokens = [];
+  
+  while (true) {
+    const response = await fetch(`/api/tokens-detail?${params}`);
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+    const page = await response.json();
+    tokens.push(...page.tokens);
+    if (!page.has_more) return tokens;
+    params.set('cursor', page.next_cursor);
+  }
+}
+
+async function exportData(format) {
+  let exportRows = filteredData;
+  
+  if (currentTab === 'base') {
+    try {
+      exportRows = await fetchAllFilteredTokens();
+    } catch (error) {
+      alert(`Erreur lors de l'export: ${error.message}`);
+      return;
+    }
+  } else if (!isDataLoaded) {
     alert('⚠️ Données non chargées. Veuillez attendre le chargement complet.');
     return;
   }
   
-  if (filteredData.length === 0) {
+  if (exportRows.length === 0) {
     alert('Aucune donnée à exporter avec les filtres actuels');
     return;
   }
@@ -971,9 +1054,9 @@ function exportData(format) {
   
   try {
     if (format === 'csv') {
-      exportToCSV(filteredData, filename);
+      exportToCSV(exportRows, filename);
     } else if (format === 'json') {
-      exportToJSON(filteredData, filename);
+      exportToJSON(exportRows, filename);
     }
   } catch (error) {
     console.error('❌ Export error:', error);
@@ -1436,7 +1519,8 @@ function updateFiltersIndicator() {
     'filterPriceMin', 'filterPriceMax', 'filterScoreMin', 'filterScoreMax',
     'filterLiquidityMin', 'filterLiquidityMax', 'filterVolumeMin', 'filterVolumeMax',
     'filterHoldersMin', 'filterHoldersMax', 'filterAgeMin', 'filterAgeMax',
-    'filterRiskMin', 'filterRiskMax', 'filterDiscoveredAt', 'filterTimeValue'
+    'filterRiskMin', 'filterRiskMax', 'filterDiscoveredAt', 'filterTimeValue',
+    'filterTradeable', 'filterOnPump'
   ];
   
   baseInputs.forEach(id => {
@@ -1524,10 +1608,10 @@ function highlightActiveFilters() {
   });
 }
 
-// ✅ FONCTION AMÉLIORÉE: Vérification de l'historique avec timeout
-// ✅ FONCTION AMÉLIORÉE: Vérification de l'historique avec timeout
-function checkTokenHistory(address) {
- if (!address) return;
+// ✅ Vérification de l'historique de tous les tokens affichés en une seule requête
+function checkTokensHistory(addresses) {
+ addresses = [...new Set((addresses || []).filter(Boolean))];
+ if (addresses.length === 0) return;
  
  const timeoutDuration = 10000; // 10 secondes
  const controller = new AbortController();
@@ -1537,7 +1621,15 @@ function checkTokenHistory(address) {
    controller.abort();
  }, timeoutDuration);
  
- fetch(`/api/token-has-history/${address}`, {
+ const setIndicator = (address, html) => {
+   const element = document.getElementById(`history-${address}`);
+   if (element) element.innerHTML = html;
+ };
+ 
+ fetch('/api/tokens-has-history', {
+   method: 'POST',
+   headers: { 'Content-Type': 'application/json' },
+   body: JSON.stringify({ addresses }),
    signal: controller.signal
  })
    .then(response => {
@@ -1545,31 +1637,29 @@ function checkTokenHistory(address) {
      if (!response.ok) throw new Error(`HTTP ${response.status}`);
      return response.json();
    })
-   .then(data => {
-     const element = document.getElementById(`history-${address}`);
-     if (element) {
-       if (data.has_history && data.data_points > 0) {
-         element.innerHTML = `
+   .then(history => {
+     addresses.forEach(address => {
+       const data = history[address];
+       if (data && data.has_history && data.data_points > 0) {
+         setIndicator(address, `
            <a href="/dashboard/history?address=${address}" target="_blank" style="color: #00d4ff;">
              📊 Historique (${data.data_points} pts)
            </a>
-         `;
+         `);
        } else {
-         element.innerHTML = '<span style="color: #666;">📊 Pas d\'historique</span>';
+         setIndicator(address, '<span style="color: #666;">📊 Pas d\'historique</span>');
        }
-     }
+     });
    })
    .catch(error => {
      clearTimeout(timeoutId);
-     const element = document.getElementById(`history-${address}`);
-     if (element) {
-       if (error.name === 'AbortError') {
-         element.innerHTML = '<span style="color: #888;">📊 Timeout</span>';
-       } else {
-         console.warn(`⚠️ History check failed for ${address}:`, error);
-         element.innerHTML = '<span style="color: #666;">📊 Pas d\'historique</span>';
-       }
+     if (error.name !== 'AbortError') {
+       console.warn(`⚠️ History check failed for ${addresses.length} tokens:`, error);
      }
+     const html = error.name === 'AbortError'
+       ? '<span style="color: #888;">📊 Timeout</span>'
+       : '<span style="color: #666;">📊 Pas d\'historique</span>';
+     addresses.forEach(address => setIndicator(address, html));
    });
 }
 
@@ -576,9 +576,7 @@ function renderDexScreenerTable(rows) {
     }).join('');
     
     // Vérifier l'historique des tokens et mettre à jour les indicateurs whale
-    rows.forEach(r => {
-      setTimeout(() => window.checkTokenHistory(r.address), Math.random() * 1000);
-    });
+    window.checkTokensHistory(rows.map(r => r.address));
     
     setTimeout(() => {
       console.log('Triggering whale indicators update after table render');
@@ -17,6 +17,9 @@ from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from aiohttp import ClientSession, TCPConnector
 import random
+
+from epoch_columns import EpochColumns
+from token_metadata_decoder import OnChainMetadataReader
 import struct
 
 # Configuration du logging
@@ -26,6 +29,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger('symbol_fixer')
 
+# Ordre par défaut des sources (on-chain préchargé par batch, puis DexScreener qui a souvent les vrais symboles)
+DEFAULT_SOURCE_ORDER = ['onchain', 'dexscreener', 'jupiter', 'solscan', 'helius']
+
 @dataclass
 class FixedTokenData:
     """Données corrigées d'un token"""
@@ -105,6 +111,7 @@ class SymbolFixer:
         self.database_path = database_path
         self.session: Optional[ClientSession] = None
         self.is_running = False
+        self.epoch_columns = EpochColumns(database_path)
         
         # Rate limiters pour chaque API
         self.rate_limiters = {
@@ -115,10 +122,26 @@ class SymbolFixer:
             #'helius': RateLimiter('Helius', 50),        # 100 req/min
         }
         
+        # Résolution concurrente avec hedging
+        self.resolver_config = {
+            'hedge_fanout': 2,            # Sources lancées immédiatement
+            'hedge_delay': 0.75,          # Secondes avant de lancer les autres sources
+            'confidence_threshold': 70,   # Score qui arrête la résolution
+            'resolve_timeout': 20.0       # Temps max par token
+        }
+        self.source_stats = {
+            name: {'started': 0, 'returned': 0, 'wins': 0, 'cancelled': 0, 'total_latency': 0.0}
+            for name in DEFAULT_SOURCE_ORDER
+        }
+        
         # Configuration Helius
         self.helius_api_key = ""
         self.helius_rpc_url = f"https://rpc.helius.xyz/?api-key={self.helius_api_key}"
         
+        # Métadonnées on-chain (Metaplex / Token-2022) lues pour tout le batch en un aller-retour
+        self.metadata_reader: Optional[OnChainMetadataReader] = None
+        self.onchain_prefetch: Dict[str, Dict] = {}
+        
         # Statistiques
         self.stats = {
             'total_processed': 0,
@@ -184,6 +207,8 @@ class SymbolFixer:
             }
         )
         
+        self.metadata_reader = OnChainMetadataReader(session=self.session)
+        
         logger.info("🚀 HTTP session started")
     
     async def close_session(self):
@@ -215,7 +240,8 @@ class SymbolFixer:
             params = [max_attempts]
             
             if age_hours:
-                query += ' AND first_discovered_at > datetime("now", "-{} hours", "localtime")'.format(age_hours)
+                discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at')
+                query += f" AND {discovered} > CAST(strftime('%s', 'now', '-{int(age_hours)} hours') AS INTEGER)"
             
             # Prioriser les tokens récents et ceux avec un score, et ceux avec moins de tentatives
             query += '''
@@ -304,6 +330,37 @@ class SymbolFixer:
         finally:
             conn.close()
     
+    async def prefetch_onchain_metadata(self, addresses: List[str]):
+        """Lire les métadonnées on-chain de tout un batch (getMultipleAccounts par 100)"""
+        try:
+            decoded, read = await self.metadata_reader.read_metadata_batch(addresses)
+            # None = lu sans métadonnées, inutile de relire token par token. Les mints
+            # d'un appel en échec sont absents: fetch_onchain_metadata les relit seuls
+            self.onchain_prefetch = {address: decoded.get(address) for address in addresses
+                                     if address in read or address in decoded}
+            logger.info(f"🏷️ On-chain metadata prefetched: {len(decoded)}/{len(addresses)} tokens")
+        except Exception as e:
+            logger.warning(f"On-chain metadata prefetch failed: {e}")
+            self.onchain_prefetch = {}
+    
+    async def fetch_onchain_metadata(self, address: str) -> Optional[Dict]:
+        """Métadonnées décodées depuis le compte Metaplex / l'extension Token-2022"""
+        metadata = self.onchain_prefetch.get(address)
+        if metadata is None and address not in self.onchain_prefetch:
+            metadata = (await self.metadata_reader.get_metadata_batch([address])).get(address)
+        
+        if not metadata or not metadata.get('symbol'):
+            return None
+        
+        return {
+            'symbol': metadata['symbol'],
+            'name': metadata.get('name', ''),
+            'decimals': metadata['decimals'] if metadata.get('decimals') is not None else 9,
+            'logo_uri': None,  # uri pointe vers le JSON off-chain, pas vers l'image
+            'source': f"onchain_{metadata['standard']}",
+            'confidence': 'high'
+        }
+    
     async def fetch_helius_metadata(self, address: str) -> Optional[Dict]:
         """Récupérer les métadonnées via Helius (méthode principale)"""
         await self.rate_limiters['helius'].acquire()
@@ -628,108 +685,181 @@ class SymbolFixer:
         
         return None
     
+    def score_metadata(self, source_name: str, metadata: Dict) -> int:
+        """Score de qualité d'un résultat (0 si symbole invalide)"""
+        symbol = metadata.get('symbol', '').strip()
+        confidence = metadata.get('confidence', 'medium')
+        
+        if not symbol or symbol in ['ERROR', 'UNKNOWN', ''] or len(symbol) > 20:
+            return 0
+        
+        quality_score = 10  # Symbole valide
+        
+        # Bonus pour symboles qui ne sont pas génériques
+        if not symbol.startswith('TOKEN_'):
+            quality_score += 20
+        
+        # Bonus par source (DexScreener prioritaire)
+        if source_name.startswith('dexscreener'):
+            quality_score += 30  # DexScreener très prioritaire
+        elif source_name in ('jupiter', 'onchain'):
+            quality_score += 25  # Jupiter et métadonnées on-chain aussi fiables
+        elif source_name == 'solscan':
+            quality_score += 15  # Solscan moyen
+        elif source_name.startswith('helius'):
+            quality_score += 5   # Helius en dernier (souvent générique)
+        
+        # Bonus par confidence
+        if confidence == 'high':
+            quality_score += 15
+        elif confidence == 'medium':
+            quality_score += 10
+        # low = +0
+        
+        # Bonus si on a aussi un nom différent du symbole
+        name = metadata.get('name', '').strip()
+        if name and name != symbol and not name.startswith('Token '):
+            quality_score += 10
+        
+        return quality_score
+    
+    def get_source_order(self) -> List[str]:
+        """Sources triées par taux de victoire (lissé), ordre par défaut en cas d'égalité"""
+        def win_rate(name: str) -> float:
+            stats = self.source_stats[name]
+            return (stats['wins'] + 1) / (stats['started'] + 2)
+        
+        return sorted(DEFAULT_SOURCE_ORDER,
+                      key=lambda name: (-win_rate(name), DEFAULT_SOURCE_ORDER.index(name)))
+    
     async def get_token_metadata(self, address: str) -> Optional[FixedTokenData]:
-        """Récupérer les métadonnées d'un token depuis plusieurs sources avec priorisation intelligente"""
+        """Résolution concurrente avec hedging
         
+        Les meilleures sources (par taux de victoire) partent tout de suite, les
+        autres après hedge_delay. Chaque résultat est scoré à l'arrivée; dès qu'un
+        score atteint confidence_threshold, les requêtes restantes sont annulées.
+        """
         logger.debug(f"🔍 Starting metadata search for {address}")
         
-        # NOUVEAU: Prioriser DexScreener car il a souvent les vrais symboles
-        # Essayer les sources dans un ordre optimisé
-        sources = [
-            ('dexscreener', self.fetch_dexscreener_metadata),  # Maintenant en premier !
-            ('jupiter', self.fetch_jupiter_metadata),
-            ('solscan', self.fetch_solscan_metadata),
-            ('helius', self.fetch_helius_metadata),           # Helius en dernier (symboles génériques)
-        ]
+        fetchers = {
+            'onchain': self.fetch_onchain_metadata,  # Instantané si préchargé par process_batch
+            'dexscreener': self.fetch_dexscreener_metadata,
+            'jupiter': self.fetch_jupiter_metadata,
+            'solscan': self.fetch_solscan_metadata,
+            'helius': self.fetch_helius_metadata,  # Souvent générique
+        }
+        config = self.resolver_config
+        order = self.get_source_order()
+        
+        tasks = {}  # task -> (source_name, started_at)
+        
+        def launch(names: List[str]) -> set:
+            launched = set()
+            for name in names:
+                task = asyncio.create_task(fetchers[name](address))
+                tasks[task] = (name, time.time())
+                self.source_stats[name]['started'] += 1
+                launched.add(task)
+            return launched
+        
+        pending = launch(order[:config['hedge_fanout']])
+        remaining = order[config['hedge_fanout']:]
+        hedge_at = time.time() + config['hedge_delay']
+        deadline = time.time() + config['resolve_timeout']
         
         found_data = []  # Collecter toutes les données trouvées pour debug
         best_result = None
         best_score = 0
         
-        for source_name, fetch_func in sources:
-            try:
-                logger.debug(f"🔍 Trying {source_name} for {address}")
-                metadata = await fetch_func(address)
+        try:
+            while pending or remaining:
+                # Hedge: lancer les autres sources après le délai (ou si plus rien en cours)
+                if remaining and (not pending or time.time() >= hedge_at):
+                    logger.debug(f"⏩ Hedging {address} with {remaining}")
+                    pending |= launch(remaining)
+                    remaining = []
                 
-                if metadata:
-                    found_data.append((source_name, metadata))
-                    logger.debug(f"✅ {source_name} returned: {metadata}")
+                wait_until = min(hedge_at, deadline) if remaining else deadline
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0, wait_until - time.time()),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if not done:
+                    if time.time() >= deadline:
+                        logger.debug(f"⏰ Resolve timeout for {address}")
+                        break
+                    continue
+                
+                for task in done:
+                    source_name, started_at = tasks[task]
+                    try:
+                        metadata = task.result()
+                    except Exception as e:
+                        logger.debug(f"❌ Error with {source_name} for {address}: {e}")
+                        continue
                     
-                    symbol = metadata.get('symbol', '').strip()
-                    confidence = metadata.get('confidence', 'medium')
+                    self.source_stats[source_name]['returned'] += 1
+                    self.source_stats[source_name]['total_latency'] += time.time() - started_at
                     
-                    # Calculer un score de qualité pour chaque résultat
-                    quality_score = 0
+                    if not metadata:
+                        logger.debug(f"❌ {source_name} returned no data for {address}")
+                        continue
                     
-                    # Critères de qualité du symbole
-                    if symbol and symbol not in ['ERROR', 'UNKNOWN', ''] and len(symbol) >= 1 and len(symbol) <= 20:
-                        quality_score += 10  # Symbole valide
-                        
-                        # Bonus pour symboles qui ne sont pas génériques
-                        if not symbol.startswith('TOKEN_'):
-                            quality_score += 20
-                        
-                        # Bonus par source (DexScreener prioritaire)
-                        if source_name.startswith('dexscreener'):
-                            quality_score += 30  # DexScreener très prioritaire
-                        elif source_name == 'jupiter':
-                            quality_score += 25  # Jupiter aussi fiable
-                        elif source_name == 'solscan':
-                            quality_score += 15  # Solscan moyen
-                        elif source_name.startswith('helius'):
-                            quality_score += 5   # Helius en dernier (souvent générique)
-                        
-                        # Bonus par confidence
-                        if confidence == 'high':
-                            quality_score += 15
-                        elif confidence == 'medium':
-                            quality_score += 10
-                        # low = +0
-                        
-                        # Bonus si on a aussi un nom différent du symbole
-                        name = metadata.get('name', '').strip()
-                        if name and name != symbol and not name.startswith('Token '):
-                            quality_score += 10
-                        
-                        logger.debug(f"📊 {source_name} quality score: {quality_score} (symbol: {symbol})")
-                        
-                        # Garder le meilleur résultat
-                        if quality_score > best_score:
-                            best_score = quality_score
-                            best_result = FixedTokenData(
-                                address=address,
-                                old_symbol='ERROR',  # Sera mis à jour par l'appelant
-                                new_symbol=symbol,
-                                name=name or symbol,
-                                decimals=metadata.get('decimals', 9),
-                                logo_uri=metadata.get('logo_uri'),
-                                source=source_name,
-                                confidence=confidence
-                            )
-                            logger.debug(f"🏆 New best result: {symbol} from {source_name} (score: {quality_score})")
-                
-                else:
-                    logger.debug(f"❌ {source_name} returned no data for {address}")
+                    found_data.append((source_name, metadata))
+                    quality_score = self.score_metadata(source_name, metadata)
+                    logger.debug(f"📊 {source_name} quality score: {quality_score} (symbol: {metadata.get('symbol')})")
+                    
+                    # Garder le meilleur résultat
+                    if quality_score > best_score:
+                        symbol = metadata.get('symbol', '').strip()
+                        best_score = quality_score
+                        best_result = FixedTokenData(
+                            address=address,
+                            old_symbol='ERROR',  # Sera mis à jour par l'appelant
+                            new_symbol=symbol,
+                            name=metadata.get('name', '').strip() or symbol,
+                            decimals=metadata.get('decimals', 9),
+                            logo_uri=metadata.get('logo_uri'),
+                            source=source_name,
+                            confidence=metadata.get('confidence', 'medium')
+                        )
                 
-            except Exception as e:
-                logger.debug(f"❌ Error with {source_name} for {address}: {e}")
-                continue
+                if best_score >= config['confidence_threshold']:
+                    break
+        finally:
+            # Annuler les requêtes devenues inutiles
+            for task in pending:
+                task.cancel()
+                self.source_stats[tasks[task][0]]['cancelled'] += 1
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
         # Debug final
         if found_data:
             logger.info(f"🎯 Found {len(found_data)} sources with data:")
             for source, data in found_data:
-                symbol = data.get('symbol', 'N/A')
-                confidence = data.get('confidence', 'N/A')
-                logger.info(f"   {source}: {symbol} ({confidence})")
+                logger.info(f"   {source}: {data.get('symbol', 'N/A')} ({data.get('confidence', 'N/A')})")
         
         if best_result:
-            logger.info(f"✅ Selected BEST result: {best_result.new_symbol} from {best_result.source} (score: {best_score})")
+            self.source_stats[best_result.source]['wins'] += 1
+            logger.info(f"✅ Selected BEST result: {best_result.new_symbol} from {best_result.source} "
+                        f"(score: {best_score}, {len(pending)} requests cancelled)")
             return best_result
         else:
             logger.debug(f"❌ No valid symbol found from any source for {address}")
             return None
     
+    def log_source_win_rates(self):
+        """Taux de victoire et latence par source"""
+        logger.info(f"🏁 Source win rates (order: {' > '.join(self.get_source_order())}):")
+        for name in self.get_source_order():
+            stats = self.source_stats[name]
+            win_rate = (stats['wins'] / stats['started'] * 100) if stats['started'] else 0
+            avg_latency = (stats['total_latency'] / stats['returned']) if stats['returned'] else 0
+            logger.info(f"   {name:<12}: {stats['wins']}/{stats['started']} wins ({win_rate:.1f}%), "
+                        f"avg {avg_latency:.2f}s, {stats['cancelled']} cancelled")
+    
     def update_token_in_db(self, fixed_data: FixedTokenData) -> bool:
         """Mettre à jour le token dans la DB"""
         conn = sqlite3.connect(self.database_path)
@@ -784,6 +914,7 @@ class SymbolFixer:
         }
         
         logger.info(f"🔧 Processing batch of {len(tokens)} tokens")
+        await self.prefetch_onchain_metadata([token['address'] for token in tokens])
         
         for i, token in enumerate(tokens, 1):
             logger.info(f"📊 Rate limiter status:")
@@ -994,6 +1125,8 @@ class SymbolFixer:
             for source, count in sorted(self.stats['fixes_by_source'].items(), key=lambda x: x[1], reverse=True):
                 logger.info(f"   {source}: {count}")
         
+        self.log_source_win_rates()
+        
         # Derniers tokens corrigés
         if self.stats['last_successful_tokens']:
             logger.info(f"🎯 Last successful fixes:")
@@ -1107,6 +1240,8 @@ class SymbolFixer:
                 percentage = (count / total_fixes) * 100
                 logger.info(f"   {source}: {count} ({percentage:.1f}%)")
         
+        self.log_source_win_rates()
+        
         logger.info("=" * 100)
     
     async def test_specific_token(self, address: str):
@@ -1137,6 +1272,7 @@ class SymbolFixer:
             
             # Test chaque source individuellement
             sources = [
+                ('On-chain', self.fetch_onchain_metadata),
                 ('Helius', self.fetch_helius_metadata),
                 ('Jupiter', self.fetch_jupiter_metadata),
                 ('DexScreener', self.fetch_dexscreener_metadata),
@@ -1198,6 +1334,10 @@ def main():
     parser.add_argument("--test-token", type=str, help="Test a specific token address for debugging")
     parser.add_argument("--log-level", choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], 
                        default='INFO', help="Logging level")
+    parser.add_argument("--hedge-delay", type=float, default=0.75,
+                       help="Seconds before querying the remaining sources (default: 0.75, 0 = all at once)")
+    parser.add_argument("--confidence-threshold", type=int, default=70,
+                       help="Quality score that stops the resolution early (default: 70)")
     
     args = parser.parse_args()
     
@@ -1206,6 +1346,8 @@ def main():
     
     # Créer le fixer
     fixer = SymbolFixer(args.database)
+    fixer.resolver_config['hedge_delay'] = args.hedge_delay
+    fixer.resolver_config['confidence_threshold'] = args.confidence_threshold
     
     try:
         if args.show_stats:
@@ -18,6 +18,8 @@ import asyncio
 import aiohttp
 import sys
 
+from epoch_columns import EpochColumns
+
 # Configuration du logging minimal pour ce script
 logging.basicConfig(level=logging.WARNING)
 
@@ -68,9 +70,16 @@ class SystemHealthMonitor:
         self.database_path = database_path
         self.api_url = api_url
         self.previous_metrics: Optional[HealthMetrics] = None
+        # Colonnes *_epoch pour les compteurs 1h / 24h
+        self.epoch_columns = EpochColumns(database_path)
         
     def get_database_metrics(self) -> Dict:
         """Récupérer les métriques de la base de données"""
+        discovered = self.epoch_columns.epoch('tokens', 'first_discovered_at')
+        updated = self.epoch_columns.epoch('tokens', 'updated_at')
+        snapshot = self.epoch_columns.epoch('tokens_hist', 'snapshot_timestamp')
+        whale_timestamp = self.epoch_columns.epoch('whale_transactions_live', 'timestamp')
+
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         
@@ -84,13 +93,13 @@ class SystemHealthMonitor:
             cursor.execute("SELECT COUNT(*) FROM tokens WHERE symbol IS NOT NULL AND symbol != 'UNKNOWN' AND symbol != ''")
             metrics['tokens_with_symbol'] = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM tokens WHERE first_discovered_at > datetime('now', '-1 hour', 'localtime')")
+            cursor.execute(f"SELECT COUNT(*) FROM tokens WHERE {discovered} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
             metrics['tokens_last_hour'] = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM tokens WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')")
+            cursor.execute(f"SELECT COUNT(*) FROM tokens WHERE {discovered} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)")
             metrics['tokens_last_24h'] = cursor.fetchone()[0]
             
-            cursor.execute("SELECT COUNT(*) FROM tokens WHERE updated_at > datetime('now', '-1 hour', 'localtime')")
+            cursor.execute(f"SELECT COUNT(*) FROM tokens WHERE {updated} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
             metrics['recent_updates'] = cursor.fetchone()[0]
             
             # === TOKENS ENRICHIS ===
@@ -116,10 +125,10 @@ class SystemHealthMonitor:
                 cursor.execute("SELECT COUNT(*) FROM tokens_hist")
                 metrics['hist_records_total'] = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM tokens_hist WHERE snapshot_timestamp > datetime('now', '-1 hour', 'localtime')")
+                cursor.execute(f"SELECT COUNT(*) FROM tokens_hist WHERE {snapshot} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
                 metrics['hist_records_last_hour'] = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM tokens_hist WHERE snapshot_timestamp > datetime('now', '-24 hours', 'localtime')")
+                cursor.execute(f"SELECT COUNT(*) FROM tokens_hist WHERE {snapshot} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)")
                 metrics['hist_records_last_24h'] = cursor.fetchone()[0]
             except sqlite3.OperationalError:
                 # Table tokens_hist n'existe peut-être pas
@@ -132,10 +141,10 @@ class SystemHealthMonitor:
                 cursor.execute("SELECT COUNT(*) FROM whale_transactions_live")
                 metrics['whale_transactions_total'] = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM whale_transactions_live WHERE timestamp > datetime('now', '-1 hour', 'localtime')")
+                cursor.execute(f"SELECT COUNT(*) FROM whale_transactions_live WHERE {whale_timestamp} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)")
                 metrics['whale_transactions_last_hour'] = cursor.fetchone()[0]
                 
-                cursor.execute("SELECT COUNT(*) FROM whale_transactions_live WHERE timestamp > datetime('now', '-24 hours', 'localtime')")
+                cursor.execute(f"SELECT COUNT(*) FROM whale_transactions_live WHERE {whale_timestamp} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)")
                 metrics['whale_transactions_last_24h'] = cursor.fetchone()[0]
             except sqlite3.OperationalError:
                 # Table whale pas encore créée
@@ -151,7 +160,7 @@ class SystemHealthMonitor:
             metrics['active_tokens'] = cursor.fetchone()[0]
             
             # === PERFORMANCE ===
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT AVG(
                     CASE 
                         WHEN updated_at IS NOT NULL AND first_discovered_at IS NOT NULL 
@@ -159,7 +168,7 @@ class SystemHealthMonitor:
                         ELSE NULL 
                     END
                 ) FROM tokens 
-                WHERE updated_at > datetime('now', '-24 hours', 'localtime')
+                WHERE {updated} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                 AND first_discovered_at IS NOT NULL
             """)
             result = cursor.fetchone()[0]
@@ -167,9 +176,9 @@ class SystemHealthMonitor:
             
             # Taux de succès approximatif
             total_recent = metrics['tokens_last_24h']
-            enriched_recent = cursor.execute("""
+            enriched_recent = cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
-                WHERE first_discovered_at > datetime('now', '-24 hours', 'localtime')
+                WHERE {discovered} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER)
                 AND symbol IS NOT NULL AND symbol != 'UNKNOWN' AND symbol != ''
             """).fetchone()[0]
             
@@ -231,10 +240,10 @@ class SystemHealthMonitor:
             cursor = conn.cursor()
             
             # Tokens récents non enrichis = proxy pour queue size
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT COUNT(*) FROM tokens 
                 WHERE (symbol IS NULL OR symbol = 'UNKNOWN' OR symbol = '')
-                AND first_discovered_at > datetime('now', '-2 hours', 'localtime')
+                AND {self.epoch_columns.epoch('tokens', 'first_discovered_at')} > CAST(strftime('%s', 'now', '-2 hours') AS INTEGER)
             """)
             
             queue_estimate = cursor.fetchone()[0]
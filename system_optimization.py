@@ -7,6 +7,10 @@ Base de données, cache, et configuration réseau optimisés
 import sqlite3
 import asyncio
 import logging
+import os
+import queue
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Dict, List
 import threading
 import time
@@ -217,6 +221,141 @@ class ConnectionPoolManager:
         finally:
             await self.return_connection(conn)
 
+class ReadConnectionPool:
+    """Pool de connexions SQLite en lecture seule pour l'API
+    
+    Connexions longue durée (mode=ro + query_only, mmap, cache de pages et de
+    requêtes préparées) rendues au pool après chaque requête: plus d'ouverture
+    ni de cache froid par requête. Une connexion dont le schema_version a changé
+    depuis son ouverture est fermée et remplacée à la sortie du pool.
+    """
+    
+    def __init__(self, database_path: str, max_idle: int = 16, cache_size_mb: int = 64,
+                 mmap_size_mb: int = 256, cached_statements: int = 256, timeout: float = 30.0):
+        self.database_path = database_path
+        self.max_idle = max_idle
+        self.cache_size_mb = cache_size_mb
+        self.mmap_size_mb = mmap_size_mb
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        
+        # LIFO: la connexion la plus récemment utilisée a le cache le plus chaud
+        self.pool = queue.LifoQueue()
+        self.schema_versions: Dict[sqlite3.Connection, int] = {}
+        self.lock = threading.Lock()
+        self.wal_checked = False
+        self.stats = {
+            'opened': 0,
+            'reused': 0,
+            'schema_changes': 0,
+            'broken': 0,
+            'closed': 0
+        }
+    
+    def _ensure_wal(self):
+        """journal_mode est persistant mais ne peut pas être changé en lecture seule"""
+        if not os.path.exists(self.database_path):
+            return
+        conn = sqlite3.connect(self.database_path, timeout=self.timeout)
+        try:
+            if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != 'wal':
+                conn.execute("PRAGMA journal_mode = WAL")
+                logger.info(f"✅ WAL activé sur {self.database_path}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Impossible d'activer WAL: {e}")
+        finally:
+            conn.close()
+        self.wal_checked = True
+    
+    def _open(self) -> sqlite3.Connection:
+        if not self.wal_checked:
+            self._ensure_wal()
+        
+        uri = f"{Path(self.database_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA query_only = ON")
+        cursor.execute(f"PRAGMA cache_size = -{self.cache_size_mb * 1024}")
+        cursor.execute(f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        
+        with self.lock:
+            self.schema_versions[conn] = cursor.execute("PRAGMA schema_version").fetchone()[0]
+            self.stats['opened'] += 1
+        return conn
+    
+    def _close(self, conn: sqlite3.Connection):
+        with self.lock:
+            self.schema_versions.pop(conn, None)
+            self.stats['closed'] += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        """Connexion utilisable et schéma inchangé depuis l'ouverture"""
+        try:
+            version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.debug(f"Connexion de lecture invalide: {e}")
+            self.stats['broken'] += 1
+            return False
+        if version != self.schema_versions.get(conn):
+            self.stats['schema_changes'] += 1
+            return False
+        return True
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Sortir une connexion du pool (ou en ouvrir une)"""
+        while True:
+            try:
+                conn = self.pool.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if self._is_healthy(conn):
+                self.stats['reused'] += 1
+                return conn
+            self._close(conn)
+    
+    def release(self, conn: sqlite3.Connection):
+        """Rendre une connexion; au-delà de max_idle elle est fermée"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._close(conn)
+            return
+        if self.pool.qsize() >= self.max_idle:
+            self._close(conn)
+        else:
+            self.pool.put(conn)
+    
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+    
+    def close_all(self):
+        while True:
+            try:
+                self._close(self.pool.get_nowait())
+            except queue.Empty:
+                break
+    
+    def get_stats(self) -> Dict:
+        return {
+            **self.stats,
+            'idle': self.pool.qsize(),
+            'in_use': len(self.schema_versions) - self.pool.qsize()
+        }
+
 class PerformanceProfiler:
     """Profiler pour identifier les goulots d'étranglement"""
     
@@ -269,6 +408,111 @@ class PerformanceProfiler:
                     f"count: {metrics['count']})"
                 )
 
+class AdaptiveConcurrencyLimiter:
+    """Limite de concurrence AIMD par upstream
+
+    +additive_increase par fenêtre de `limit` succès sous la latence cible,
+    x decrease_factor sur 429 / timeout (une seule baisse par cooldown).
+    Le timeout HTTP suit la latence observée (srtt + 4 x rttvar, façon TCP).
+    """
+
+    def __init__(self, name: str, initial_limit: int = 8, min_limit: int = 1, max_limit: int = 50,
+                 latency_target: float = 1.5, additive_increase: float = 1.0,
+                 decrease_factor: float = 0.5, min_timeout: float = 1.0, max_timeout: float = 6.0,
+                 decrease_cooldown: float = 2.0, on_change=None):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.decrease_cooldown = decrease_cooldown
+        self.on_change = on_change
+
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        self.srtt = None
+        self.rttvar = 0.0
+        self.last_decrease_at = 0.0
+
+        self.counters = defaultdict(int)
+        self.history = deque(maxlen=200)  # (timestamp, limit, reason)
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    @property
+    def timeout(self) -> float:
+        """Timeout adaptatif dérivé de la latence observée"""
+        if self.srtt is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+    async def __aenter__(self):
+        async with self.condition:
+            while self.in_flight >= self.current_limit:
+                await self.condition.wait()
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def _set_limit(self, new_limit: float, reason: str):
+        previous = self.current_limit
+        self.limit = min(float(self.max_limit), max(float(self.min_limit), new_limit))
+        if self.current_limit != previous:
+            self.history.append((time.time(), self.current_limit, reason))
+            if self.on_change:
+                self.on_change(self.name, self.snapshot(), reason)
+
+    def on_success(self, latency: float):
+        """Réponse OK: estimation RTT puis augmentation additive (ou baisse douce si lent)"""
+        self.counters['success'] += 1
+        if self.srtt is None:
+            self.srtt, self.rttvar = latency, latency / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - latency)
+            self.srtt = 0.875 * self.srtt + 0.125 * latency
+
+        if self.srtt > self.latency_target:
+            # Au-delà de la latence cible: l'upstream sature, on recule doucement
+            self.counters['slow'] += 1
+            self._decrease(0.9, "latency")
+        else:
+            self._set_limit(self.limit + self.additive_increase / self.current_limit, "increase")
+
+    def on_congestion(self, reason: str):
+        """429 / timeout / 503: baisse multiplicative"""
+        self.counters[reason] += 1
+        self._decrease(self.decrease_factor, reason)
+
+    def on_error(self):
+        """Erreur sans signal de congestion (404, JSON invalide...): limite inchangée"""
+        self.counters['error'] += 1
+
+    def _decrease(self, factor: float, reason: str):
+        now = time.time()
+        if now - self.last_decrease_at < self.decrease_cooldown:
+            return  # Même rafale de congestion: une seule baisse
+        self.last_decrease_at = now
+        self._set_limit(self.limit * factor, reason)
+
+    def snapshot(self) -> Dict:
+        return {
+            'limit': self.current_limit,
+            'in_flight': self.in_flight,
+            'timeout': round(self.timeout, 2),
+            'srtt': round(self.srtt, 3) if self.srtt is not None else None,
+            'counters': dict(self.counters)
+        }
+
 # Configuration globale optimisée
 SYSTEM_CONFIG = {
     # Réseau
@@ -300,6 +544,15 @@ SYSTEM_CONFIG = {
         "rugcheck": {"calls_per_second": 1.5, "burst": 6},
         "helius": {"calls_per_second": 3, "burst": 10},
         "solscan": {"calls_per_second": 2.5, "burst": 8},
+        "pumpfun": {"calls_per_second": 1.5, "burst": 5},
+    },
+    
+    # Concurrence adaptative (AIMD) par upstream de l'enrichisseur
+    "adaptive_concurrency": {
+        "helius": {"initial_limit": 10, "max_limit": 40, "latency_target": 1.5, "max_timeout": 5.0},
+        "dexscreener": {"initial_limit": 5, "max_limit": 20, "latency_target": 1.5, "max_timeout": 5.0},
+        "jupiter": {"initial_limit": 8, "max_limit": 30, "latency_target": 1.0, "max_timeout": 4.0},
+        "rugcheck": {"initial_limit": 3, "max_limit": 10, "latency_target": 2.5, "max_timeout": 6.0},
     }
 }
 
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+🧮 Token Feature Store - Features ML maintenues à chaque snapshot
+Table token_features (une ligne par token) tenue à jour par un trigger sur
+tokens_hist: premier / dernier snapshot et compteur mis à jour en O(1) à
+l'insertion, features dérivées (évolutions, flags, risk_score) en colonnes
+générées. Mêmes définitions que RugPullPredictor.extract_features.
+"""
+
+import argparse
+import logging
+import sqlite3
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger('token_feature_store')
+
+# Valeurs brutes du premier snapshot (évolutions)
+FIRST_COLUMNS = ['holders', 'price_usdc', 'dexscreener_price_usd', 'volume_24h']
+
+# Valeurs brutes du dernier snapshot, NULL conservés (features, labels SQL, scoring)
+LATEST_COLUMNS = [
+    'symbol', 'name', 'holders', 'market_cap', 'liquidity_usd', 'age_hours', 'volume_24h',
+    'price_usdc', 'price_change_24h', 'dexscreener_price_usd', 'dexscreener_market_cap',
+    'dexscreener_volume_24h', 'dexscreener_txns_24h', 'dexscreener_buys_24h',
+    'dexscreener_sells_24h', 'dexscreener_price_change_h24'
+]
+
+# Features dérivées, dans l'ordre de extract_features ("x or 0" -> COALESCE(x, 0))
+GENERATED_FEATURES = [
+    ('holders_count', 'REAL', "COALESCE(last_holders, 0)"),
+    ('holders_very_low', 'INTEGER', "COALESCE(last_holders, 0) <= 5"),
+    ('holders_low', 'INTEGER', "COALESCE(last_holders, 0) <= 20"),
+    ('market_cap', 'REAL', "COALESCE(last_market_cap, 0)"),
+    ('market_cap_very_low', 'INTEGER', "COALESCE(last_market_cap, 0) < 1000"),
+    ('liquidity_usd', 'REAL', "COALESCE(last_liquidity_usd, 0)"),
+    ('has_liquidity_data', 'INTEGER', "COALESCE(last_liquidity_usd, 0) > 0"),
+    ('age_hours', 'REAL', "COALESCE(last_age_hours, 0)"),
+    ('age_very_new', 'INTEGER', "COALESCE(last_age_hours, 0) < 24"),
+    ('age_new', 'INTEGER', "COALESCE(last_age_hours, 0) < 168"),
+    ('volume_24h', 'REAL', "COALESCE(last_volume_24h, 0)"),
+    ('volume_zero', 'INTEGER', "COALESCE(last_volume_24h, 0) = 0"),
+    ('dexscreener_txns_24h', 'REAL', "COALESCE(last_dexscreener_txns_24h, 0)"),
+    ('txns_zero', 'INTEGER', "COALESCE(last_dexscreener_txns_24h, 0) = 0"),
+    ('buys_24h', 'REAL', "COALESCE(last_dexscreener_buys_24h, 0)"),
+    ('sells_24h', 'REAL', "COALESCE(last_dexscreener_sells_24h, 0)"),
+    ('only_sells', 'INTEGER',
+     "COALESCE(last_dexscreener_sells_24h, 0) > 0 AND COALESCE(last_dexscreener_buys_24h, 0) = 0"),
+    ('price_usd', 'REAL', "COALESCE(NULLIF(last_price_usdc, 0), NULLIF(last_dexscreener_price_usd, 0), 0)"),
+    ('price_change_24h', 'REAL', "COALESCE(last_price_change_24h, 0)"),
+    ('price_massive_drop', 'INTEGER', "COALESCE(last_price_change_24h, 0) <= -80"),
+    ('price_big_drop', 'INTEGER', "COALESCE(last_price_change_24h, 0) <= -50"),
+    ('data_continuity', 'REAL',
+     "snapshots_count / MAX(1.0, COALESCE(NULLIF(last_age_hours, 0), 1) / 24.0)"),
+    ('holders_evolution', 'REAL',
+     "CASE WHEN snapshots_count >= 2 AND first_holders > 0 "
+     "THEN (COALESCE(last_holders, 0) - first_holders) * 1.0 / first_holders ELSE 0 END"),
+    ('holders_declining', 'INTEGER', "holders_evolution < -0.2"),
+    ('first_price_usd', 'REAL',
+     "COALESCE(NULLIF(first_price_usdc, 0), NULLIF(first_dexscreener_price_usd, 0), 0)"),
+    ('total_price_evolution', 'REAL',
+     "CASE WHEN snapshots_count >= 2 AND first_price_usd > 0 "
+     "THEN (price_usd - first_price_usd) / first_price_usd ELSE 0 END"),
+    ('price_severe_decline', 'INTEGER', "total_price_evolution <= -0.9"),
+    ('volume_evolution', 'REAL',
+     "CASE WHEN snapshots_count >= 2 AND first_volume_24h > 0 "
+     "THEN (COALESCE(last_volume_24h, 0) - first_volume_24h) / first_volume_24h ELSE 0 END"),
+    ('volume_died', 'INTEGER', "volume_evolution <= -0.8"),
+    ('risk_score', 'INTEGER',
+     "holders_very_low + market_cap_very_low + volume_zero + txns_zero + only_sells"
+     " + price_massive_drop + holders_declining + price_severe_decline + volume_died"),
+    ('high_risk', 'INTEGER', "risk_score >= 4"),
+]
+
+# Colonnes rendues par load_features (= colonnes de extract_features)
+FEATURE_COLUMNS = [
+    'holders_count', 'holders_very_low', 'holders_low', 'market_cap', 'market_cap_very_low',
+    'liquidity_usd', 'has_liquidity_data', 'age_hours', 'age_very_new', 'age_new',
+    'volume_24h', 'volume_zero', 'dexscreener_txns_24h', 'txns_zero',
+    'buys_24h', 'sells_24h', 'only_sells',
+    'price_usd', 'price_change_24h', 'price_massive_drop', 'price_big_drop',
+    'snapshots_count', 'data_continuity',
+    'holders_evolution', 'holders_declining', 'total_price_evolution', 'price_severe_decline',
+    'volume_evolution', 'volume_died', 'risk_score', 'high_risk'
+]
+
+# Objets créés par init_schema: présents = rien à écrire
+SCHEMA_OBJECTS = {'token_features', 'idx_token_features_updated_at', 'trg_tokens_hist_features'}
+
+# Bases dont le schéma est vérifié dans ce processus (les lecteurs ne rouvrent pas de connexion)
+_ready_databases = set()
+
+
+def _upsert_sql(source: str) -> str:
+    """
+    UPSERT d'un snapshot dans token_features; source = 'NEW.' (trigger) ou 'h.' (reconstruction).
+    Premier snapshot remplacé seulement par plus ancien, dernier par plus récent ou égal.
+    """
+    columns = (['address', 'snapshots_count', 'first_snapshot_at', 'latest_snapshot_at']
+               + [f"first_{c}" for c in FIRST_COLUMNS]
+               + [f"last_{c}" for c in LATEST_COLUMNS] + ['updated_at'])
+    values = ([f"{source}address", "1", f"{source}snapshot_timestamp", f"{source}snapshot_timestamp"]
+              + [f"{source}{c}" for c in FIRST_COLUMNS]
+              + [f"{source}{c}" for c in LATEST_COLUMNS] + ["datetime('now', 'localtime')"])
+
+    is_first = "(excluded.first_snapshot_at < first_snapshot_at OR first_snapshot_at IS NULL)"
+    is_latest = "(excluded.latest_snapshot_at >= latest_snapshot_at OR latest_snapshot_at IS NULL)"
+    updates = ["snapshots_count = snapshots_count + 1", "updated_at = excluded.updated_at"]
+    for column in ['first_snapshot_at'] + [f"first_{c}" for c in FIRST_COLUMNS]:
+        updates.append(f"{column} = CASE WHEN {is_first} THEN excluded.{column} ELSE {column} END")
+    for column in ['latest_snapshot_at'] + [f"last_{c}" for c in LATEST_COLUMNS]:
+        updates.append(f"{column} = CASE WHEN {is_latest} THEN excluded.{column} ELSE {column} END")
+
+    return (f"INSERT INTO token_features ({', '.join(columns)})\n"
+            f"{{select}} {', '.join(values)} {{tail}}\n"
+            f"ON CONFLICT(address) DO UPDATE SET\n    " + ",\n    ".join(updates))
+
+
+class TokenFeatureStore:
+    """Features ML prêtes à l'emploi, une ligne par token
+
+    Le trigger trg_tokens_hist_features met la table à jour pour tout écrivain
+    de tokens_hist (enrichers, scripts); rebuild() la recalcule entièrement.
+    Construire un store sur les chemins de lecture est gratuit: le schéma est
+    vérifié une fois par processus, sans transaction d'écriture s'il existe.
+    """
+
+    def __init__(self, database_path: str = "tokens.db"):
+        self.database_path = database_path
+        self.available = database_path in _ready_databases or self.init_schema()
+
+    def init_schema(self) -> bool:
+        """Table + trigger; remplissage initial depuis tokens_hist à la création"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            objects = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            if 'tokens_hist' not in objects:
+                logger.debug("tokens_hist absente, feature store inactif")
+                return False
+            if SCHEMA_OBJECTS <= objects:
+                _ready_databases.add(self.database_path)
+                return True
+
+            conn.execute("BEGIN IMMEDIATE")
+            generated = ",\n".join(
+                f"    {name} {column_type} GENERATED ALWAYS AS ({expression}) STORED"
+                for name, column_type, expression in GENERATED_FEATURES
+            )
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS token_features (
+                    address TEXT PRIMARY KEY,
+                    snapshots_count INTEGER NOT NULL DEFAULT 0,
+                    first_snapshot_at TIMESTAMP,
+                    latest_snapshot_at TIMESTAMP,
+                    {", ".join(f"first_{c} REAL" for c in FIRST_COLUMNS)},
+                    last_symbol TEXT,
+                    last_name TEXT,
+                    {", ".join(f"last_{c} REAL" for c in LATEST_COLUMNS[2:])},
+                    updated_at TIMESTAMP,
+{generated}
+                )
+            ''')
+            # Jobs incrémentaux: tokens modifiés depuis un high-water mark
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_token_features_updated_at ON token_features(updated_at)")
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_tokens_hist_features
+                AFTER INSERT ON tokens_hist
+                WHEN NEW.address IS NOT NULL
+                BEGIN
+                    {_upsert_sql("NEW.").format(select="VALUES (", tail=")")};
+                END
+            ''')
+
+            created = 'token_features' not in objects
+            if created:
+                count = self._rebuild(conn)
+                logger.info(f"✅ token_features créée ({count} tokens depuis tokens_hist)")
+            conn.commit()
+            _ready_databases.add(self.database_path)
+            return True
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Feature store schema error: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rebuild(conn: sqlite3.Connection) -> int:
+        conn.execute("DELETE FROM token_features")
+        conn.execute(_upsert_sql("h.").format(
+            select="SELECT", tail="FROM tokens_hist h WHERE h.address IS NOT NULL ORDER BY h.rowid"
+        ))
+        return conn.execute("SELECT COUNT(*) FROM token_features").fetchone()[0]
+
+    def rebuild(self) -> int:
+        """Recalcul complet depuis tokens_hist (après purge ou import hors trigger)"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            count = self._rebuild(conn)
+            conn.commit()
+            logger.info(f"🔄 token_features reconstruite: {count} tokens")
+            return count
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def load_features(self, addresses: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame address + FEATURE_COLUMNS (tous les tokens ou une liste d'adresses)"""
+        select = f"SELECT address, {', '.join(FEATURE_COLUMNS)} FROM token_features"
+        conn = sqlite3.connect(self.database_path)
+        try:
+            if addresses is None:
+                return pd.read_sql_query(select, conn)
+
+            frames = []
+            for i in range(0, len(addresses), 500):
+                chunk = list(addresses[i:i + 500])
+                frames.append(pd.read_sql_query(
+                    f"{select} WHERE address IN ({','.join('?' * len(chunk))})", conn, params=chunk
+                ))
+            if not frames:
+                return pd.DataFrame(columns=['address'] + FEATURE_COLUMNS)
+            return pd.concat(frames, ignore_index=True)
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        conn = sqlite3.connect(self.database_path)
+        try:
+            tokens, snapshots, high_risk, last_update = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(snapshots_count), 0), COALESCE(SUM(high_risk), 0), MAX(updated_at)
+                FROM token_features
+            ''').fetchone()
+        finally:
+            conn.close()
+        return {
+            'tokens': tokens,
+            'snapshots': snapshots,
+            'high_risk': high_risk,
+            'last_update': last_update
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token feature store (token_features)")
+    parser.add_argument("--database", default="tokens.db", help="Base SQLite")
+    parser.add_argument("--rebuild", action="store_true", help="Recalculer toute la table depuis tokens_hist")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = TokenFeatureStore(args.database)
+    if not store.available:
+        print("❌ Feature store indisponible (tokens_hist absente ?)")
+        return
+
+    if args.rebuild:
+        store.rebuild()
+
+    stats = store.get_stats()
+    print(f"🧮 token_features: {stats['tokens']} tokens, {stats['snapshots']} snapshots, "
+          f"{stats['high_risk']} high risk (dernière mise à jour: {stats['last_update']})")
+
+
+if __name__ == "__main__":
+    main()
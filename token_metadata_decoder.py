@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+🏷️ Token Metadata Decoder - Métadonnées on-chain sans API tierce
+Dérive les PDA Metaplex Token Metadata, lit les comptes par getMultipleAccounts
+(100 comptes par appel) et décode localement name / symbol / uri / update
+authority. Gère aussi l'extension TokenMetadata des mints Token-2022.
+"""
+
+import asyncio
+import base64
+import logging
+import struct
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import aiohttp
+from solders.pubkey import Pubkey
+
+logger = logging.getLogger('token_metadata_decoder')
+
+METADATA_PROGRAM_ID = "metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s"
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAXJNbaSmtoDpbmTqZjVbQYDUzRMkW"
+TOKEN_2022_PROGRAM_ID = "TokenzQdBNbLqP5VEhdkAS6EPFLC1PHnBqCXEpPxuEb"
+
+MAX_ACCOUNTS_PER_CALL = 100  # Limite RPC de getMultipleAccounts
+
+# Layout Metaplex: key(1) + update_authority(32) + mint(32) puis chaînes borsh
+METAPLEX_KEY_METADATA_V1 = 4
+METAPLEX_STRINGS_OFFSET = 1 + 32 + 32
+
+# Layout SPL mint: supply u64 à 36, decimals u8 à 44; extensions Token-2022 après 165 + account type
+MINT_SUPPLY_OFFSET = 36
+MINT_DECIMALS_OFFSET = 44
+TOKEN_2022_ACCOUNT_TYPE_OFFSET = 165
+TOKEN_2022_ACCOUNT_TYPE_MINT = 1
+TOKEN_2022_EXTENSION_TOKEN_METADATA = 19
+
+_metadata_program = Pubkey.from_string(METADATA_PROGRAM_ID)
+
+
+def derive_metadata_pda(mint: str) -> str:
+    """Adresse du compte Metaplex Token Metadata d'un mint"""
+    seeds = [b"metadata", bytes(_metadata_program), bytes(Pubkey.from_string(mint))]
+    pda, _ = Pubkey.find_program_address(seeds, _metadata_program)
+    return str(pda)
+
+
+def _read_borsh_string(data: bytes, offset: int) -> tuple:
+    """Chaîne borsh (u32 longueur + utf8), retourne (valeur, offset suivant)"""
+    (length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    if offset + length > len(data):
+        raise ValueError("borsh string out of bounds")
+    value = data[offset:offset + length].decode("utf-8", errors="replace")
+    # Metaplex remplit les champs à taille fixe avec des \x00
+    return value.rstrip("\x00").strip(), offset + length
+
+
+def _pubkey_or_none(raw: bytes) -> Optional[str]:
+    """Pubkey base58, None pour la clé nulle (OptionalNonZeroPubkey)"""
+    if not any(raw):
+        return None
+    return str(Pubkey.from_bytes(raw))
+
+
+def decode_metaplex_metadata(data: bytes) -> Optional[Dict]:
+    """Décoder un compte Metaplex MetadataV1 (None si invalide)"""
+    if len(data) < METAPLEX_STRINGS_OFFSET + 12 or data[0] != METAPLEX_KEY_METADATA_V1:
+        return None
+
+    try:
+        offset = METAPLEX_STRINGS_OFFSET
+        name, offset = _read_borsh_string(data, offset)
+        symbol, offset = _read_borsh_string(data, offset)
+        uri, offset = _read_borsh_string(data, offset)
+    except (struct.error, ValueError):
+        return None
+
+    return {
+        "name": name,
+        "symbol": symbol,
+        "uri": uri,
+        "update_authority": _pubkey_or_none(data[1:33]),
+        "standard": "metaplex"
+    }
+
+
+def decode_mint_decimals(data: bytes) -> Optional[int]:
+    """Décimales d'un compte mint SPL / Token-2022"""
+    if len(data) <= MINT_DECIMALS_OFFSET:
+        return None
+    return data[MINT_DECIMALS_OFFSET]
+
+
+def decode_mint_supply(data: bytes) -> Optional[int]:
+    """Supply brute (u64, avant décimales) d'un compte mint SPL / Token-2022"""
+    if len(data) < MINT_SUPPLY_OFFSET + 8:
+        return None
+    (supply,) = struct.unpack_from("<Q", data, MINT_SUPPLY_OFFSET)
+    return supply
+
+
+def decode_token2022_metadata(data: bytes) -> Optional[Dict]:
+    """Décoder l'extension TokenMetadata d'un mint Token-2022 (None si absente)"""
+    if len(data) <= TOKEN_2022_ACCOUNT_TYPE_OFFSET or data[TOKEN_2022_ACCOUNT_TYPE_OFFSET] != TOKEN_2022_ACCOUNT_TYPE_MINT:
+        return None
+
+    # Parcours des entrées TLV: type u16, longueur u16, valeur
+    offset = TOKEN_2022_ACCOUNT_TYPE_OFFSET + 1
+    while offset + 4 <= len(data):
+        ext_type, length = struct.unpack_from("<HH", data, offset)
+        offset += 4
+        if ext_type == 0:  # Uninitialized: fin des extensions
+            break
+
+        if ext_type == TOKEN_2022_EXTENSION_TOKEN_METADATA:
+            value = data[offset:offset + length]
+            try:
+                name, cursor = _read_borsh_string(value, 64)  # update_authority(32) + mint(32)
+                symbol, cursor = _read_borsh_string(value, cursor)
+                uri, cursor = _read_borsh_string(value, cursor)
+            except (struct.error, ValueError):
+                return None
+            return {
+                "name": name,
+                "symbol": symbol,
+                "uri": uri,
+                "update_authority": _pubkey_or_none(value[0:32]),
+                "standard": "token2022"
+            }
+
+        offset += length
+
+    return None
+
+
+class OnChainMetadataReader:
+    """Lecture des métadonnées d'un lot de mints en quelques appels RPC
+
+    Chaque mint coûte deux comptes (mint + PDA Metaplex): le mint donne les
+    décimales et, pour Token-2022, l'extension TokenMetadata qui a priorité.
+    """
+
+    def __init__(self, rpc_url: str = "https://rpc.helius.xyz/?api-key=872ddf73-4cfd-4263-a418-521bbde27eb8",
+                 session: Optional[aiohttp.ClientSession] = None,
+                 request_json: Optional[Callable[[Dict], Awaitable[Optional[Dict]]]] = None,
+                 max_parallel_calls: int = 4):
+        self.rpc_url = rpc_url
+        self.session = session
+        # Permet à l'appelant de passer par son propre rate limiting / limiteur AIMD
+        self.request_json = request_json or self._post_json
+        self.call_semaphore = asyncio.Semaphore(max_parallel_calls)
+
+        self.stats = {
+            'rpc_calls': 0,
+            'accounts_read': 0,
+            'decoded_metaplex': 0,
+            'decoded_token2022': 0,
+            'missing_metadata': 0
+        }
+
+    async def _post_json(self, payload: Dict) -> Optional[Dict]:
+        own_session = self.session is None
+        session = self.session or aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        try:
+            async with session.post(self.rpc_url, json=payload) as resp:
+                if resp.status != 200:
+                    logger.debug(f"getMultipleAccounts HTTP {resp.status}")
+                    return None
+                return await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.debug(f"getMultipleAccounts error: {e}")
+            return None
+        finally:
+            if own_session:
+                await session.close()
+
+    async def _get_accounts_chunk(self, addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "getMultipleAccounts",
+            "params": [addresses, {"encoding": "base64"}]
+        }
+        async with self.call_semaphore:
+            data = await self.request_json(payload)
+        self.stats['rpc_calls'] += 1
+
+        values = ((data or {}).get("result") or {}).get("value")
+        if not isinstance(values, list) or len(values) != len(addresses):
+            return {}
+
+        accounts = {}
+        for address, value in zip(addresses, values):
+            if value and value.get("data"):
+                accounts[address] = {
+                    "owner": value.get("owner"),
+                    "data": base64.b64decode(value["data"][0])
+                }
+            else:
+                accounts[address] = None
+        self.stats['accounts_read'] += len(addresses)
+        return accounts
+
+    async def get_multiple_accounts(self, addresses: List[str]) -> Dict[str, Optional[Dict]]:
+        """{adresse: {'owner', 'data'} | None}, par appels de 100 comptes en parallèle
+
+        Les adresses absentes du résultat correspondent à un appel en échec.
+        """
+        chunks = [addresses[i:i + MAX_ACCOUNTS_PER_CALL]
+                  for i in range(0, len(addresses), MAX_ACCOUNTS_PER_CALL)]
+        results = await asyncio.gather(*(self._get_accounts_chunk(chunk) for chunk in chunks))
+
+        accounts = {}
+        for result in results:
+            accounts.update(result)
+        return accounts
+
+    async def get_metadata_batch(self, mints: List[str]) -> Dict[str, Dict]:
+        """Métadonnées décodées par mint (les mints sans métadonnées sont absents)"""
+        metadata, _ = await self.read_metadata_batch(mints)
+        return metadata
+
+    async def read_metadata_batch(self, mints: List[str]) -> Tuple[Dict[str, Dict], Set[str]]:
+        """(métadonnées par mint, mints effectivement lus)
+
+        Un mint lu (compte du mint et PDA Metaplex renvoyés par le RPC) sans
+        métadonnées n'en a pas; un mint non lu (appel en échec) reste à relire.
+        """
+        mints = list(dict.fromkeys(mints))
+        pdas = {}
+        for mint in mints:
+            try:
+                pdas[mint] = derive_metadata_pda(mint)
+            except ValueError:
+                logger.debug(f"Invalid mint address: {mint}")
+
+        accounts = await self.get_multiple_accounts(list(pdas) + list(pdas.values()))
+
+        metadata = {}
+        read = {mint for mint, pda in pdas.items() if mint in accounts and pda in accounts}
+        for mint, pda in pdas.items():
+            mint_account = accounts.get(mint)
+            decoded = None
+
+            if mint_account and mint_account["owner"] == TOKEN_2022_PROGRAM_ID:
+                decoded = decode_token2022_metadata(mint_account["data"])
+                if decoded:
+                    self.stats['decoded_token2022'] += 1
+
+            if decoded is None and accounts.get(pda):
+                decoded = decode_metaplex_metadata(accounts[pda]["data"])
+                if decoded:
+                    self.stats['decoded_metaplex'] += 1
+
+            if decoded is None:
+                if mint in read:
+                    self.stats['missing_metadata'] += 1
+                continue
+
+            decoded["decimals"] = decode_mint_decimals(mint_account["data"]) if mint_account else None
+            metadata[mint] = decoded
+
+        logger.debug(f"🏷️ On-chain metadata: {len(metadata)}/{len(mints)} mints decoded, {len(read)} read")
+        return metadata, read
+
+    def get_stats(self) -> Dict:
+        return dict(self.stats)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+🔎 Token Search Index - Recherche plein texte des tokens (SQLite FTS5)
+Tables virtuelles sur symbol, name et les champs pump.fun, tenues à jour par
+des triggers sur tokens; recherche par préfixe classée par paliers de
+pertinence pour l'autocomplétion du dashboard (/api/search).
+"""
+
+import argparse
+import logging
+import re
+import sqlite3
+import time
+from typing import Dict, List
+
+logger = logging.getLogger('token_search_index')
+
+# Tables FTS5 -> colonnes de tokens indexées. Les descriptions ont leur propre
+# table: leurs mots courants ("the", "solana"...) ne gonflent pas les doclists
+# parcourues par les recherches sur symbole / nom.
+SEARCH_TABLES = {
+    'tokens_fts': ['symbol', 'name', 'pump_fun_name', 'pump_fun_symbol'],
+    'tokens_fts_description': ['pump_fun_description'],
+}
+
+# Index de préfixes: "p*" à "solana*" lisent une seule doclist au lieu de fusionner
+# celles de tous les termes commençant par le préfixe
+PREFIX_LENGTHS = '1 2 3 4 5 6'
+
+# Paliers de pertinence: (table, filtre de colonnes FTS5, dernier terme en préfixe)
+SEARCH_TIERS = [
+    ('tokens_fts', '{symbol pump_fun_symbol}', False),  # Symbole exact
+    ('tokens_fts', '', True),                           # Préfixe de symbole ou de nom
+    ('tokens_fts_description', '', True),               # Description pump.fun
+]
+# Candidats lus par palier (tokens les plus récents d'abord), classés par invest_score
+SEARCH_CANDIDATES = 200
+
+# Colonnes pump.fun ajoutées par pump_fun_enricher (créées ici si absentes)
+PUMP_FUN_COLUMNS = ['pump_fun_name', 'pump_fun_symbol', 'pump_fun_description']
+
+# Champs renvoyés par search()
+RESULT_COLUMNS = ['address', 'symbol', 'name', 'pump_fun_name', 'pump_fun_symbol',
+                  'invest_score', 'bonding_curve_status', 'is_tradeable']
+
+SEARCH_MAX_LIMIT = 100
+SEARCH_MAX_TERMS = 8
+
+# Adresse Solana (base58, 32 à 44 caractères): recherche exacte sur tokens.address
+ADDRESS_PATTERN = re.compile(r'^[1-9A-HJ-NP-Za-km-z]{32,44}$')
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _insert_sql(table: str, prefix: str) -> str:
+    """Indexer une ligne de tokens (ignorée si toutes les colonnes indexées sont NULL)"""
+    columns = SEARCH_TABLES[table]
+    values = ", ".join(f"{prefix}{column}" for column in ['rowid', 'address'] + columns)
+    source = "" if prefix else " FROM tokens"
+    not_null = " OR ".join(f"{prefix}{column} IS NOT NULL" for column in columns)
+    return (f"INSERT OR REPLACE INTO {table}(rowid, address, {', '.join(columns)}) "
+            f"SELECT {values}{source} WHERE {not_null}")
+
+
+def build_match_query(text: str, columns: str = '', prefix: bool = True) -> str:
+    """Requête MATCH FTS5 depuis la saisie: termes entre guillemets, dernier terme en préfixe
+
+    Les opérateurs FTS5 (AND, NEAR, *, :, ...) de la saisie ne sont jamais interprétés.
+    """
+    terms = TERM_PATTERN.findall(text.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += '*'
+    phrase = " ".join(quoted)
+    return f"{columns}: ({phrase})" if columns else phrase
+
+
+def search(conn: sqlite3.Connection, text: str, limit: int = 20) -> List[Dict]:
+    """Tokens correspondant à la saisie, du plus pertinent au moins pertinent
+
+    Palier par palier (symbole exact, préfixe de symbole / nom, description),
+    au plus SEARCH_CANDIDATES tokens par palier, classés par invest_score.
+    Pas de bm25: son IDF parcourt toute la doclist du terme, ce qui coûte des
+    centaines de ms pour un préfixe courant sur des millions de tokens.
+    """
+    text = (text or "").strip()
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    select = ", ".join(f"t.{column}" for column in RESULT_COLUMNS)
+
+    if ADDRESS_PATTERN.match(text):
+        rows = conn.execute(f"SELECT {select} FROM tokens t WHERE t.address = ?", (text,)).fetchall()
+        if rows:
+            return [dict(zip(RESULT_COLUMNS, row)) for row in rows]
+
+    results = {}
+    for table, columns, prefix in SEARCH_TIERS:
+        match = build_match_query(text, columns, prefix)
+        if not match:
+            return []
+        # t.address = f.address écarte les entrées orphelines (INSERT OR REPLACE, voir TokenSearchIndex)
+        rows = conn.execute(f'''
+            SELECT {select}
+            FROM (
+                SELECT rowid, address FROM {table}
+                WHERE {table} MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            ) f
+            JOIN tokens t ON t.rowid = f.rowid AND t.address = f.address
+            ORDER BY COALESCE(t.invest_score, 0) DESC
+        ''', (match, SEARCH_CANDIDATES)).fetchall()
+        for row in rows:
+            results.setdefault(row[0], row)
+        if len(results) >= limit:
+            break
+    return [dict(zip(RESULT_COLUMNS, row)) for row in list(results.values())[:limit]]
+
+
+class TokenSearchIndex:
+    """Index FTS5 des tokens maintenu par triggers
+
+    Les tables FTS gardent leur propre copie des textes, rowid = tokens.rowid.
+    Une table à contenu externe (content='tokens') se désynchroniserait: les
+    INSERT OR REPLACE des scanners suppriment l'ancienne ligne sans
+    déclencher le trigger DELETE. L'entrée orpheline qui en résulte est
+    ignorée par search() et disparaît au prochain rebuild().
+    """
+
+    def __init__(self, database_path: str = "tokens.db"):
+        self.database_path = database_path
+        self.available = self.init_schema()
+
+    def init_schema(self) -> bool:
+        """Tables FTS5 + triggers; remplissage initial depuis tokens à la création"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            if 'tokens' not in tables:
+                logger.debug("tokens absente, index de recherche inactif")
+                return False
+
+            conn.execute("BEGIN IMMEDIATE")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(tokens)")}
+            for column in PUMP_FUN_COLUMNS:
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE tokens ADD COLUMN {column} TEXT")
+                    logger.info(f"✅ Added column: {column}")
+
+            for table, indexed in SEARCH_TABLES.items():
+                conn.execute(f'''
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                        address UNINDEXED,
+                        {", ".join(indexed)},
+                        tokenize = "unicode61 remove_diacritics 2",
+                        prefix = '{PREFIX_LENGTHS}'
+                    )
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_insert
+                    AFTER INSERT ON tokens
+                    BEGIN
+                        {_insert_sql(table, "NEW.")};
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_update
+                    AFTER UPDATE OF address, {", ".join(indexed)} ON tokens
+                    BEGIN
+                        DELETE FROM {table} WHERE rowid = OLD.rowid;
+                        {_insert_sql(table, "NEW.")};
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_delete
+                    AFTER DELETE ON tokens
+                    BEGIN
+                        DELETE FROM {table} WHERE rowid = OLD.rowid;
+                    END
+                ''')
+
+                if table not in tables:
+                    count = self._rebuild(conn, table)
+                    logger.info(f"✅ {table} créée ({count} tokens indexés)")
+            conn.commit()
+            return True
+
+        except sqlite3.Error as e:
+            logger.error(f"❌ Search index schema error: {e}")
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _rebuild(conn: sqlite3.Connection, table: str) -> int:
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(_insert_sql(table, ""))
+        conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def rebuild(self) -> int:
+        """Réindexation complète (purge les entrées orphelines, fusionne les segments)"""
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            counts = {table: self._rebuild(conn, table) for table in SEARCH_TABLES}
+            conn.commit()
+            logger.info(f"🔄 Index de recherche reconstruit: {counts}")
+            return counts['tokens_fts']
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        conn = sqlite3.connect(self.database_path)
+        try:
+            tokens = conn.execute("SELECT COUNT(*) FROM tokens").fetchone()[0]
+            indexed = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                       for table in SEARCH_TABLES}
+        finally:
+            conn.close()
+        return {
+            'tokens': tokens,
+            'indexed': indexed['tokens_fts'],
+            'descriptions': indexed['tokens_fts_description'],
+            'orphans': max(indexed['tokens_fts'] - tokens, 0)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index de recherche des tokens (tokens_fts)")
+    parser.add_argument("query", nargs="?", help="Recherche à effectuer")
+    parser.add_argument("--database", default="tokens.db", help="Base SQLite")
+    parser.add_argument("--rebuild", action="store_true", help="Réindexer toute la table tokens")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    index = TokenSearchIndex(args.database)
+    if not index.available:
+        print("❌ Index de recherche indisponible (tokens absente ?)")
+        return
+
+    if args.rebuild:
+        index.rebuild()
+
+    stats = index.get_stats()
+    print(f"🔎 tokens_fts: {stats['indexed']} entrées pour {stats['tokens']} tokens "
+          f"({stats['descriptions']} descriptions, {stats['orphans']} orphelines)")
+
+    if args.query:
+        conn = sqlite3.connect(args.database)
+        try:
+            start = time.perf_counter()
+            results = search(conn, args.query, args.limit)
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            conn.close()
+        print(f"   {len(results)} résultats en {elapsed:.1f} ms")
+        for result in results:
+            print(f"   {result['symbol'] or '?':<12} {result['name'] or '':<30} {result['address']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+✍️ Token Write Layer - Écritures "dirty-checking" sur la table tokens
+Compare les champs reçus avec la ligne actuelle, relue en base juste avant
+l'écriture, n'écrit que les colonnes modifiées et ne touche à updated_at que
+s'il y a un vrai changement. Garde la fraîcheur par champ (dernier changement / dernière
+vérification) dans token_field_freshness.
+"""
+
+import json
+import logging
+import sqlite3
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger('token_write_layer')
+
+
+def _normalize(value):
+    """Représentation comparable d'une valeur telle que SQLite la stocke"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _values_equal(current, incoming, tolerance: float) -> bool:
+    current, incoming = _normalize(current), _normalize(incoming)
+    if isinstance(current, (int, float)) and isinstance(incoming, (int, float)):
+        return abs(current - incoming) <= tolerance * max(abs(current), abs(incoming), 1.0)
+    return current == incoming
+
+
+class TokenWriteLayer:
+    """Couche d'écriture avec détection des colonnes modifiées
+
+    Fraîcheur: une ligne par (token, source). Les champs d'une source sont
+    toujours récupérés ensemble, donc last_checked_at vaut pour tous ses champs;
+    field_changed_at garde la date du dernier changement de chaque champ.
+
+    Pas de cache mémoire de la ligne: d'autres process et des enrichisseurs
+    écrivent dans tokens sans passer par la couche, une valeur "égale au cache"
+    ne prouve rien. La ligne est relue par clé primaire à chaque lot, juste
+    avant l'UPDATE. Pas de BEGIN IMMEDIATE: before_write (snapshot tokens_hist)
+    écrit sur sa propre connexion et resterait bloqué par notre verrou.
+    """
+
+    def __init__(self, database_path: str = "tokens.db", float_tolerance: float = 1e-9):
+        self.database_path = database_path
+        self.float_tolerance = float_tolerance
+
+        self.stats = {
+            'writes': 0,
+            'unchanged': 0,
+            'columns_written': 0,
+            'columns_skipped': 0,
+            'missing_tokens': 0
+        }
+
+        self.init_freshness_table()
+
+    def init_freshness_table(self):
+        """Table de fraîcheur par (token, source)"""
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS token_field_freshness (
+                    address TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    last_checked_at DATETIME,
+                    last_changed_at DATETIME,
+                    field_changed_at TEXT,
+                    PRIMARY KEY (address, source)
+                ) WITHOUT ROWID
+            ''')
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error creating token_field_freshness table: {e}")
+        finally:
+            conn.close()
+
+    def _load_rows(self, cursor, addresses: List[str], columns: List[str]) -> Dict[str, Dict]:
+        """Lire les colonnes courantes des tokens à écrire"""
+        rows = {}
+        column_list = ", ".join(columns)
+
+        # Par paquets pour rester sous la limite de variables SQLite
+        for i in range(0, len(addresses), 500):
+            chunk = addresses[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT address, {column_list} FROM tokens WHERE address IN ({placeholders})", chunk
+            )
+            for result in cursor.fetchall():
+                rows[result[0]] = dict(zip(columns, result[1:]))
+
+        return rows
+
+    # === Écritures ===
+
+    def diff_fields(self, current: Dict, fields: Dict) -> Dict:
+        """Colonnes dont la valeur reçue diffère de la valeur actuelle"""
+        return {
+            column: value for column, value in fields.items()
+            if not _values_equal(current.get(column), value, self.float_tolerance)
+        }
+
+    def write_batch(self, source: str, updates: List[Dict], checked_columns: Iterable[str] = (),
+                    before_write: Optional[Callable[[str, Dict], None]] = None) -> Dict[str, List[str]]:
+        """Écrire un lot de mises à jour {'address': ..., colonne: valeur}
+
+        checked_columns: colonnes de vérification (ex: dexscreener_last_dexscreener_update)
+        toujours écrites mais qui ne comptent pas comme un changement.
+        before_write(address, changed): appelé avant d'écrire un token modifié (snapshot).
+
+        Retourne {address: [colonnes modifiées]} pour les tokens trouvés en base.
+        """
+        if not updates:
+            return {}
+
+        checked_columns = set(checked_columns)
+        columns = sorted({c for update in updates for c in update if c != 'address'})
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        conn = sqlite3.connect(self.database_path, timeout=30)
+        cursor = conn.cursor()
+        changes: Dict[str, List[str]] = {}
+
+        try:
+            current_rows = self._load_rows(cursor, [u['address'] for u in updates], columns)
+
+            # Regrouper les UPDATE par ensemble de colonnes pour executemany
+            grouped_updates: Dict[tuple, List[tuple]] = {}
+            freshness_rows = []
+
+            for update in updates:
+                address = update['address']
+                current = current_rows.get(address)
+                if current is None:
+                    self.stats['missing_tokens'] += 1
+                    continue
+
+                fields = {c: v for c, v in update.items() if c != 'address'}
+                dirty = self.diff_fields(current, fields)
+                changed = sorted(c for c in dirty if c not in checked_columns)
+                changes[address] = changed
+
+                to_write = dict(dirty) if changed else {c: v for c, v in dirty.items() if c in checked_columns}
+                self.stats['columns_skipped'] += len(fields) - len(to_write)
+
+                if changed:
+                    if before_write:
+                        before_write(address, dirty)
+                    to_write['updated_at'] = now
+                    self.stats['writes'] += 1
+                else:
+                    self.stats['unchanged'] += 1
+
+                if to_write:
+                    key = tuple(sorted(to_write))
+                    grouped_updates.setdefault(key, []).append(
+                        tuple(to_write[c] for c in key) + (address,)
+                    )
+                    self.stats['columns_written'] += len(to_write)
+
+                freshness_rows.append((address, source, now, now if changed else None,
+                                       json.dumps({c: now for c in changed})))
+
+            for key, rows in grouped_updates.items():
+                set_clause = ", ".join(f"{column} = ?" for column in key)
+                cursor.executemany(f"UPDATE tokens SET {set_clause} WHERE address = ?", rows)
+
+            # Fusion des dates de changement par champ avec celles déjà connues
+            cursor.executemany('''
+                INSERT INTO token_field_freshness (address, source, last_checked_at, last_changed_at, field_changed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(address, source) DO UPDATE SET
+                    last_checked_at = excluded.last_checked_at,
+                    last_changed_at = COALESCE(excluded.last_changed_at, last_changed_at),
+                    field_changed_at = json_patch(COALESCE(field_changed_at, '{}'), excluded.field_changed_at)
+            ''', freshness_rows)
+
+            conn.commit()
+
+        except sqlite3.Error as e:
+            logger.error(f"Dirty-checking write error ({source}): {e}")
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        return changes
+
+    def write_fields(self, address: str, source: str, fields: Dict, checked_columns: Iterable[str] = (),
+                     before_write: Optional[Callable[[str, Dict], None]] = None) -> Optional[List[str]]:
+        """Écrire les champs d'un token. None si le token n'existe pas, sinon colonnes modifiées"""
+        changes = self.write_batch(source, [{**fields, 'address': address}], checked_columns, before_write)
+        return changes.get(address)
+
+    # === Lecture de la fraîcheur ===
+
+    def get_field_freshness(self, address: str) -> Dict[str, Dict]:
+        """Fraîcheur par champ: {champ: {'source', 'last_changed_at', 'last_checked_at'}}"""
+        conn = sqlite3.connect(self.database_path)
+        cursor = conn.cursor()
+
+        try:
+            cursor.execute('''
+                SELECT source, last_checked_at, field_changed_at
+                FROM token_field_freshness WHERE address = ?
+            ''', (address,))
+
+            freshness = {}
+            for source, last_checked_at, field_changed_at in cursor.fetchall():
+                for field, changed_at in json.loads(field_changed_at or '{}').items():
+                    freshness[field] = {
+                        'source': source,
+                        'last_changed_at': changed_at,
+                        'last_checked_at': last_checked_at
+                    }
+            return freshness
+
+        except sqlite3.Error as e:
+            logger.error(f"Error reading field freshness for {address}: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def get_stats(self) -> Dict:
+        total = self.stats['writes'] + self.stats['unchanged']
+        return {
+            **self.stats,
+            'unchanged_rate': (self.stats['unchanged'] / total * 100) if total else 0
+        }
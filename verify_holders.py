@@ -15,6 +15,8 @@ import argparse
 import sys
 from dataclasses import dataclass
 
+from epoch_columns import EpochColumns
+
 @dataclass
 class HoldersComparison:
     """Structure pour stocker les résultats de comparaison"""
@@ -39,6 +41,7 @@ class HoldersVerifier:
     def __init__(self, database_path: str = "tokens.db"):
         self.database_path = database_path
         self.helius_api_key = ""
+        self.epoch_columns = EpochColumns(database_path)
         self.session: Optional[aiohttp.ClientSession] = None
         
         # Rate limiting
@@ -68,6 +71,7 @@ class HoldersVerifier:
         cursor = conn.cursor()
         
         try:
+            updated = self.epoch_columns.epoch('tokens', 'updated_at')
             base_query = """
                 SELECT address, symbol, holders, dexscreener_price_usd, updated_at, 
                        dexscreener_volume_24h, volume_24h
@@ -81,9 +85,9 @@ class HoldersVerifier:
             
             if filter_recent_dex:
                 # Prioriser les tokens avec données DexScreener récentes et activité
-                query = base_query + """
+                query = base_query + f"""
                     AND dexscreener_price_usd > 0 
-                    AND updated_at > datetime('now', '-6 hours', 'localtime')
+                    AND {updated} > CAST(strftime('%s', 'now', '-6 hours') AS INTEGER)
                     AND (dexscreener_volume_24h > 10000 OR volume_24h > 10000)
                     ORDER BY 
                         CASE WHEN dexscreener_volume_24h > 100000 THEN 1 ELSE 2 END,
@@ -93,10 +97,10 @@ class HoldersVerifier:
                 """
             else:
                 # Prendre un échantillon plus large
-                query = base_query + """
+                query = base_query + f"""
                     ORDER BY 
                         CASE WHEN dexscreener_price_usd > 0 THEN 1 ELSE 2 END,
-                        CASE WHEN updated_at > datetime('now', '-24 hours', 'localtime') THEN 1 ELSE 2 END,
+                        CASE WHEN {updated} > CAST(strftime('%s', 'now', '-24 hours') AS INTEGER) THEN 1 ELSE 2 END,
                         holders DESC
                     LIMIT ?
                 """
@@ -22,6 +22,8 @@ from cachetools import TTLCache
 from collections import deque
 import httpx
 
+from epoch_columns import EpochColumns
+
 logger = logging.getLogger('whale_detector')
 
 # Configuration
@@ -209,6 +211,9 @@ class WhaleTransactionDetector:
 
     async def start(self):
         try:
+            # timestamp_epoch: colonne, index et triggers avant les premières écritures
+            # (ici et non dans setup_database: whale_detector est instancié à l'import)
+            EpochColumns(self.database_path)
             self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
             self.client = AsyncClient(SOLANA_RPC_URL)
             self.is_running = True
@@ -1140,6 +1145,7 @@ class WhaleActivityAPI:
     def __init__(self, database_path: str = "tokens.db", whale_threshold: int = 10000):
         self.database_path = database_path
         self.whale_threshold = whale_threshold
+        self.epoch_columns = None  # Créé au premier appel: instance globale, pas de DDL à l'import
         self._debug_mode = True  # Active le mode debug
         self._transactions_seen = 0
         self._transactions_with_dex_programs = 0
@@ -1174,18 +1180,24 @@ class WhaleActivityAPI:
         finally:
             conn.close()
 
+    def timestamp_epoch(self, alias: str = None) -> str:
+        """Expression epoch de whale_transactions_live.timestamp (repli texte pendant le backfill)"""
+        if self.epoch_columns is None:
+            self.epoch_columns = EpochColumns(self.database_path)
+        return self.epoch_columns.epoch('whale_transactions_live', 'timestamp', alias)
+
     def get_recent_whale_activity(self, hours: int = 1, limit: int = 50) -> List[Dict]:
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         try:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT w.*, t.symbol, t.name, t.bonding_curve_status
                 FROM whale_transactions_live w
                 LEFT JOIN tokens t ON w.token_address = t.address
-                WHERE w.timestamp > datetime('now', '-{} hours', 'localtime')
+                WHERE {self.timestamp_epoch('w')} > CAST(strftime('%s', 'now', '-{int(hours)} hours') AS INTEGER)
                 ORDER BY w.timestamp DESC, w.amount_usd DESC
                 LIMIT ?
-            '''.format(hours), (limit,))
+            ''', (limit,))
             columns = [desc[0] for desc in cursor.description]
             results = []
             for row in cursor.fetchall():
@@ -1235,12 +1247,12 @@ class WhaleActivityAPI:
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         try:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT * FROM whale_transactions_live 
                 WHERE token_address = ? 
-                AND timestamp > datetime('now', '-{} hours', 'localtime')
+                AND {self.timestamp_epoch()} > CAST(strftime('%s', 'now', '-{int(hours)} hours') AS INTEGER)
                 ORDER BY timestamp DESC
-            '''.format(hours), (token_address,))
+            ''', (token_address,))
             columns = [desc[0] for desc in cursor.description]
             results = []
             for row in cursor.fetchall():
@@ -1256,7 +1268,7 @@ class WhaleActivityAPI:
         conn = sqlite3.connect(self.database_path)
         cursor = conn.cursor()
         try:
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT 
                     COUNT(*) as total_transactions,
                     SUM(amount_usd) as total_volume,
@@ -1264,7 +1276,7 @@ class WhaleActivityAPI:
                     COUNT(DISTINCT token_address) as unique_tokens,
                     COUNT(DISTINCT wallet_address) as unique_wallets
                 FROM whale_transactions_live 
-                WHERE timestamp > datetime('now', '-1 hour', 'localtime')
+                WHERE {self.timestamp_epoch()} > CAST(strftime('%s', 'now', '-1 hour') AS INTEGER)
             ''')
             row = cursor.fetchone()
             return {